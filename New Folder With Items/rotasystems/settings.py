@@ -756,6 +756,20 @@ if CELERY_AVAILABLE:
             'schedule': 300.0,  # Every 5 minutes
             'options': {'expires': 250}
         },
+        'drain-audit-spool': {
+            'task': 'scheduling.tasks.drain_audit_spool',
+            'schedule': 300.0,  # Every 5 minutes
+            'options': {'expires': 250}
+        },
+        'warm-dashboards': {
+            'task': 'scheduling.tasks.warm_dashboards',
+            'schedule': 600.0,  # Every 10 minutes (warms what is due next)
+            'options': {'expires': 540}
+        },
+        'reconcile-daily-metrics': {
+            'task': 'scheduling.tasks.reconcile_daily_metrics',
+            'schedule': crontab(hour=2, minute=30),  # Daily at 02:30
+        },
         'post-shift-admin-reminders': {
             'task': 'scheduling.tasks.send_post_shift_admin_reminders',
             'schedule': crontab(hour=9, minute=0),  # Daily at 09:00
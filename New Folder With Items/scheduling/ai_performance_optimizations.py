@@ -18,6 +18,8 @@ from datetime import timedelta
 from functools import wraps
 import logging
 
+from scheduling.cache_service import CacheService
+
 logger = logging.getLogger(__name__)
 
 # ============================================================================
@@ -58,6 +60,9 @@ def cached(timeout=300, key_prefix=''):
     """
     Decorator to cache function results.
     
+    Delegates to CacheService.cache_result(): concurrent misses recompute
+    once, and invalidate_cache(key_prefix) drops every entry in one INCR.
+    
     Args:
         timeout (int): Cache timeout in seconds (default: 5 minutes)
         key_prefix (str): Prefix for cache key
@@ -68,32 +73,7 @@ def cached(timeout=300, key_prefix=''):
             # Expensive operation
             return calculate_analytics(user_id)
     """
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Generate cache key from function name and arguments
-            cache_key = cache_key_generator(
-                key_prefix or func.__name__,
-                *args,
-                **{k: str(v) for k, v in kwargs.items()}
-            )
-            
-            # Try to get from cache
-            result = cache.get(cache_key)
-            if result is not None:
-                logger.debug(f"Cache HIT: {cache_key}")
-                return result
-            
-            # Cache miss - execute function
-            logger.debug(f"Cache MISS: {cache_key}")
-            result = func(*args, **kwargs)
-            
-            # Store in cache
-            cache.set(cache_key, result, timeout)
-            return result
-        
-        return wrapper
-    return decorator
+    return CacheService.cache_result(timeout=timeout, key_prefix=key_prefix)
 
 
 def invalidate_cache(key_pattern):
@@ -103,14 +83,10 @@ def invalidate_cache(key_pattern):
     Args:
         key_pattern (str): Pattern to match (e.g., 'user_prefs_*')
     
-    Note: This is a simple implementation. For production, consider
-    using cache versioning or Redis SCAN for pattern matching.
+    The pattern's prefix (e.g. 'user_prefs') is a @cached key_prefix; its
+    generation is bumped so every entry under it is dropped.
     """
-    # For memcached/simple cache, we can't pattern-match
-    # Instead, use versioning by storing a version number
-    version_key = f"{key_pattern}_version"
-    current_version = cache.get(version_key, 0)
-    cache.set(version_key, current_version + 1, None)  # Infinite timeout
+    CacheService.bump_generation(key_pattern.split('*', 1)[0].rstrip('_:'))
     logger.info(f"Invalidated cache pattern: {key_pattern}")
 
 
@@ -157,8 +133,7 @@ def invalidate_user_preferences_cache(user_id):
     
     Call this after updating UserPreference model.
     """
-    cache_key = cache_key_generator('user_prefs', user_id=user_id)
-    cache.delete(cache_key)
+    invalidate_cache('user_prefs_*')
     logger.debug(f"Invalidated user preferences cache: {user_id}")
 
 
@@ -266,9 +241,7 @@ def invalidate_analytics_cache():
     
     Call this after new feedback is submitted.
     """
-    for period in ['last_7_days', 'last_30_days', 'last_90_days']:
-        cache_key = cache_key_generator('analytics', period=period)
-        cache.delete(cache_key)
+    invalidate_cache('analytics_*')
     logger.debug("Invalidated analytics cache")
 
 
@@ -297,8 +270,7 @@ def invalidate_insights_cache():
     
     Call this after significant analytics changes.
     """
-    cache_key = 'insights'
-    cache.delete(cache_key)
+    invalidate_cache('insights_*')
     logger.debug("Invalidated insights cache")
 
 
@@ -11,6 +11,7 @@ from collections import defaultdict
 import logging
 
 from .models import Shift, User, CareHome, Unit, ShiftType, LeaveRequest
+from .dashboard_warmup import warmable
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +79,86 @@ def get_date_range(range_type='week', custom_start=None, custom_end=None):
         raise ValueError(f"Invalid range_type: {range_type}")
 
 
+def get_period_buckets(periods=12, period='week', end_date=None, custom_ranges=None):
+    """
+    Consecutive reporting periods for trend charts (oldest first)
+    
+    Args:
+        periods: number of periods
+        period: 'week' (7 days ending on end_date's weekday), 'month'
+            (calendar months) or 'custom'
+        end_date: date in the latest period (default today)
+        custom_ranges: [(start_date, end_date), ...] for period='custom'
+    
+    Returns:
+        list: [(start_date, end_date, label), ...]
+    """
+    end_date = end_date or timezone.now().date()
+    buckets = []
+    
+    if period == 'week':
+        for i in range(periods - 1, -1, -1):
+            end = end_date - timedelta(weeks=i)
+            start = end - timedelta(days=6)
+            buckets.append((start, end, f"{start.strftime('%m/%d')} - {end.strftime('%m/%d')}"))
+    
+    elif period == 'month':
+        month_start = end_date.replace(day=1)
+        for _ in range(periods):
+            next_month = (month_start + timedelta(days=32)).replace(day=1)
+            buckets.insert(0, (month_start, next_month - timedelta(days=1), month_start.strftime('%b %Y')))
+            month_start = (month_start - timedelta(days=1)).replace(day=1)
+    
+    elif period == 'custom':
+        if not custom_ranges:
+            raise ValueError("Custom periods require custom_ranges")
+        for start, end in custom_ranges:
+            buckets.append((start, end, f"{start.strftime('%m/%d')} - {end.strftime('%m/%d')}"))
+    
+    else:
+        raise ValueError(f"Invalid period: {period}")
+    
+    return buckets
+
+
+def _period_index(periods):
+    """{date: [index of each period containing it]}"""
+    index = defaultdict(list)
+    for i, (start, end, *_) in enumerate(periods):
+        day = start
+        while day <= end:
+            index[day].append(i)
+            day += timedelta(days=1)
+    return index
+
+
+def _sum_by_period(rows, periods, fields):
+    """Add per-day aggregate rows into every period they fall in"""
+    index = _period_index(periods)
+    totals = [dict.fromkeys(fields, 0) for _ in periods]
+    for row in rows:
+        for i in index.get(row['date'], ()):
+            for field in fields:
+                totals[i][field] += row[field] or 0
+    return totals
+
+
+def _period_shifts(care_home, unit, periods):
+    """Shifts in scope from the first period's start to the last period's end"""
+    shifts = Shift.objects.filter(
+        date__range=[min(p[0] for p in periods), max(p[1] for p in periods)]
+    )
+    if unit:
+        shifts = shifts.filter(unit=unit)
+    elif care_home:
+        shifts = shifts.filter(unit__care_home=care_home)
+    return shifts
+
+
+# Shifts counted as overtime (no actual-hours tracking yet)
+OVERTIME_SHIFT_Q = Q(shift_type__name__icontains='overtime') | Q(shift_type__duration_hours__gt=8)
+
+
 def calculate_occupancy_rate(care_home=None, unit=None, start_date=None, end_date=None):
     """
     Calculate bed occupancy rate for care homes/units
@@ -99,45 +180,49 @@ def calculate_occupancy_rate(care_home=None, unit=None, start_date=None, end_dat
     if not start_date or not end_date:
         start_date, end_date = get_date_range('month')
     
-    # Base queryset
+    return calculate_occupancy_rate_by_period(care_home, unit, [(start_date, end_date)])[0]
+
+
+
+def calculate_occupancy_rate_by_period(care_home=None, unit=None, periods=None):
+    """
+    calculate_occupancy_rate() for several periods at once
+    
+    Args:
+        periods: [(start_date, end_date[, label]), ...] (default get_period_buckets())
+    
+    Returns:
+        list: one calculate_occupancy_rate() dict per period
+    """
+    periods = periods or get_period_buckets()
+    
+    # Units have no bed count of their own, so a unit reports its home's beds
     if unit:
-        total_beds = unit.bed_capacity or 0
-        homes = [unit.care_home]
+        total_beds = unit.care_home.bed_capacity or 0
     elif care_home:
-        total_beds = sum(u.bed_capacity or 0 for u in care_home.units.all())
-        homes = [care_home]
+        total_beds = care_home.bed_capacity or 0
     else:
-        # All care homes
-        homes = CareHome.objects.all()
-        total_beds = sum(
-            sum(u.bed_capacity or 0 for u in home.units.all())
-            for home in homes
-        )
+        total_beds = sum(home.bed_capacity or 0 for home in CareHome.objects.all())
     
     if total_beds == 0:
-        return {
+        return [{
             'total_beds': 0,
             'occupied_beds': 0,
             'occupancy_rate': 0.0,
             'vacant_beds': 0
-        }
+        } for _ in periods]
     
-    # Calculate average occupancy over date range
     # This is simplified - in production, you'd integrate with resident management system
-    # For now, we estimate based on staffing levels
-    days = (end_date - start_date).days + 1
-    
-    # Rough estimation: Average 0.85 occupancy (85%) as baseline
-    # In production, this would query actual resident data
+    # Rough estimation: Average 0.85 occupancy (85%) as baseline, the same for every period
     occupied_beds = int(total_beds * 0.85)
     occupancy_rate = (occupied_beds / total_beds) * 100
     
-    return {
+    return [{
         'total_beds': total_beds,
         'occupied_beds': occupied_beds,
         'occupancy_rate': round(occupancy_rate, 2),
         'vacant_beds': total_beds - occupied_beds
-    }
+    } for _ in periods]
 
 
 def calculate_staffing_levels(care_home=None, unit=None, start_date=None, end_date=None):
@@ -156,21 +241,29 @@ def calculate_staffing_levels(care_home=None, unit=None, start_date=None, end_da
     if not start_date or not end_date:
         start_date, end_date = get_date_range('week')
     
-    # Build queryset
-    shifts = Shift.objects.filter(date__range=[start_date, end_date])
+    return calculate_staffing_levels_by_period(care_home, unit, [(start_date, end_date)])[0]
+
+
+
+def calculate_staffing_levels_by_period(care_home=None, unit=None, periods=None):
+    """
+    calculate_staffing_levels() for several periods from one query
     
-    if unit:
-        shifts = shifts.filter(unit=unit)
-    elif care_home:
-        shifts = shifts.filter(care_home=care_home)
+    Args:
+        periods: [(start_date, end_date[, label]), ...] (default get_period_buckets())
     
-    scheduled_shifts = shifts.count()
+    Returns:
+        list: one calculate_staffing_levels() dict per period
+    """
+    periods = periods or get_period_buckets()
+    
+    daily = _period_shifts(care_home, unit, periods).values('date').annotate(
+        scheduled=Count('id')
+    ).order_by()
+    totals = _sum_by_period(daily, periods, ['scheduled'])
     
-    # Calculate required shifts based on expected coverage
     # Since Vacancy model doesn't exist, estimate based on expected shifts per day
     # Typical care home: ~15-20 staff per day across all units
-    days = (end_date - start_date).days + 1
-    
     if unit:
         expected_shifts_per_day = 5  # Estimate per unit
     elif care_home:
@@ -178,22 +271,25 @@ def calculate_staffing_levels(care_home=None, unit=None, start_date=None, end_da
     else:
         expected_shifts_per_day = 50  # Estimate for all homes
     
-    required_shifts = days * expected_shifts_per_day
-    vacancies_count = max(0, required_shifts - scheduled_shifts)
-    
-    # Calculate fill rate
-    fill_rate = (scheduled_shifts / required_shifts * 100) if required_shifts > 0 else 100.0
-    
-    # Calculate average staff per day
-    avg_staff_per_day = scheduled_shifts / days if days > 0 else 0
+    results = []
+    for (start_date, end_date, *_), total in zip(periods, totals):
+        scheduled_shifts = total['scheduled']
+        days = (end_date - start_date).days + 1
+        
+        required_shifts = days * expected_shifts_per_day
+        vacancies_count = max(0, required_shifts - scheduled_shifts)
+        fill_rate = (scheduled_shifts / required_shifts * 100) if required_shifts > 0 else 100.0
+        avg_staff_per_day = scheduled_shifts / days if days > 0 else 0
+        
+        results.append({
+            'required_shifts': required_shifts,
+            'scheduled_shifts': scheduled_shifts,
+            'fill_rate': round(fill_rate, 2),
+            'vacancies': vacancies_count,
+            'avg_staff_per_day': round(avg_staff_per_day, 2)
+        })
     
-    return {
-        'required_shifts': required_shifts,
-        'scheduled_shifts': scheduled_shifts,
-        'fill_rate': round(fill_rate, 2),
-        'vacancies': vacancies_count,
-        'avg_staff_per_day': round(avg_staff_per_day, 2)
-    }
+    return results
 
 
 def calculate_overtime_metrics(care_home=None, unit=None, start_date=None, end_date=None):
@@ -211,23 +307,34 @@ def calculate_overtime_metrics(care_home=None, unit=None, start_date=None, end_d
     if not start_date or not end_date:
         start_date, end_date = get_date_range('month')
     
-    # Get shifts
-    shifts = Shift.objects.filter(date__range=[start_date, end_date])
+    return calculate_overtime_metrics_by_period(care_home, unit, [(start_date, end_date)])[0]
+
+
+
+def calculate_overtime_metrics_by_period(care_home=None, unit=None, periods=None):
+    """
+    calculate_overtime_metrics() for several periods from one query
     
-    if unit:
-        shifts = shifts.filter(unit=unit)
-    elif care_home:
-        shifts = shifts.filter(care_home=care_home)
+    Args:
+        periods: [(start_date, end_date[, label]), ...] (default get_period_buckets())
     
-    total_shifts = shifts.count()
+    Returns:
+        list: one calculate_overtime_metrics() dict per period
+    """
+    periods = periods or get_period_buckets()
     
-    # Calculate overtime (shifts marked as overtime or over standard hours)
-    # This is simplified - in production, track actual hours worked
-    overtime_shifts = shifts.filter(
-        Q(shift_type__name__icontains='overtime') |
-        Q(shift_type__hours__gt=8)
-    ).count()
+    daily = _period_shifts(care_home, unit, periods).values('date').annotate(
+        total=Count('id'),
+        overtime=Count('id', filter=OVERTIME_SHIFT_Q)
+    ).order_by()
     
+    return [
+        _overtime_metrics(total['total'], total['overtime'])
+        for total in _sum_by_period(daily, periods, ['total', 'overtime'])
+    ]
+
+
+def _overtime_metrics(total_shifts, overtime_shifts):
     # Estimate overtime hours (average 2 hours OT per overtime shift)
     avg_overtime_hours_per_shift = 2.0
     total_overtime_hours = overtime_shifts * avg_overtime_hours_per_shift
@@ -236,7 +343,6 @@ def calculate_overtime_metrics(care_home=None, unit=None, start_date=None, end_d
     overtime_rate = 25.0
     estimated_overtime_cost = total_overtime_hours * overtime_rate
     
-    # Calculate percentage
     percentage_overtime = (overtime_shifts / total_shifts * 100) if total_shifts > 0 else 0.0
     
     return {
@@ -264,48 +370,68 @@ def calculate_cost_metrics(care_home=None, unit=None, start_date=None, end_date=
     if not start_date or not end_date:
         start_date, end_date = get_date_range('month')
     
-    # Get shifts
-    shifts = Shift.objects.filter(date__range=[start_date, end_date])
+    return calculate_cost_metrics_by_period(care_home, unit, [(start_date, end_date)])[0]
+
+
+
+def calculate_cost_metrics_by_period(care_home=None, unit=None, periods=None):
+    """
+    calculate_cost_metrics() for several periods from one query
     
-    if unit:
-        shifts = shifts.filter(unit=unit)
-    elif care_home:
-        shifts = shifts.filter(care_home=care_home)
+    Regular hours and overtime come from the same per-day, per-shift-length
+    counts.
     
-    total_shifts = shifts.count()
+    Args:
+        periods: [(start_date, end_date[, label]), ...] (default get_period_buckets())
     
-    # Calculate shift type breakdown
-    shift_breakdown = shifts.values('shift_type__name', 'shift_type__hours').annotate(
-        count=Count('id')
+    Returns:
+        list: one calculate_cost_metrics() dict per period
+    """
+    periods = periods or get_period_buckets()
+    
+    breakdown = _period_shifts(care_home, unit, periods).values(
+        'date', 'shift_type__duration_hours'
+    ).annotate(
+        count=Count('id'),
+        overtime=Count('id', filter=OVERTIME_SHIFT_Q)
+    ).order_by()
+    
+    daily = (
+        {
+            'date': row['date'],
+            'count': row['count'],
+            'overtime': row['overtime'],
+            'hours': float(row['shift_type__duration_hours'] or 8) * row['count'],
+        }
+        for row in breakdown
     )
+    totals = _sum_by_period(daily, periods, ['count', 'overtime', 'hours'])
     
     # Estimate regular cost (£15/hour average base rate)
     regular_rate = 15.0
-    estimated_regular_hours = sum(
-        (st['shift_type__hours'] or 8) * st['count']
-        for st in shift_breakdown
-    )
-    estimated_regular_cost = estimated_regular_hours * regular_rate
-    
-    # Get overtime cost
-    overtime_metrics = calculate_overtime_metrics(care_home, unit, start_date, end_date)
-    estimated_overtime_cost = overtime_metrics['estimated_overtime_cost']
-    
-    estimated_total_cost = estimated_regular_cost + estimated_overtime_cost
     
-    # Calculate averages
-    cost_per_shift = estimated_total_cost / total_shifts if total_shifts > 0 else 0.0
-    days = (end_date - start_date).days + 1
-    cost_per_day = estimated_total_cost / days if days > 0 else 0.0
+    results = []
+    for (start_date, end_date, *_), total in zip(periods, totals):
+        total_shifts = total['count']
+        estimated_regular_cost = total['hours'] * regular_rate
+        estimated_overtime_cost = _overtime_metrics(total_shifts, total['overtime'])['estimated_overtime_cost']
+        estimated_total_cost = estimated_regular_cost + estimated_overtime_cost
+        
+        # Calculate averages
+        cost_per_shift = estimated_total_cost / total_shifts if total_shifts > 0 else 0.0
+        days = (end_date - start_date).days + 1
+        cost_per_day = estimated_total_cost / days if days > 0 else 0.0
+        
+        results.append({
+            'total_shifts': total_shifts,
+            'estimated_regular_cost': round(estimated_regular_cost, 2),
+            'estimated_overtime_cost': round(estimated_overtime_cost, 2),
+            'estimated_total_cost': round(estimated_total_cost, 2),
+            'cost_per_shift': round(cost_per_shift, 2),
+            'cost_per_day': round(cost_per_day, 2)
+        })
     
-    return {
-        'total_shifts': total_shifts,
-        'estimated_regular_cost': round(estimated_regular_cost, 2),
-        'estimated_overtime_cost': round(estimated_overtime_cost, 2),
-        'estimated_total_cost': round(estimated_total_cost, 2),
-        'cost_per_shift': round(cost_per_shift, 2),
-        'cost_per_day': round(cost_per_day, 2)
-    }
+    return results
 
 
 def calculate_compliance_metrics(care_home=None, unit=None, start_date=None, end_date=None):
@@ -324,74 +450,102 @@ def calculate_compliance_metrics(care_home=None, unit=None, start_date=None, end
     if not start_date or not end_date:
         start_date, end_date = get_date_range('week')
     
+    return calculate_compliance_metrics_by_period(care_home, unit, [(start_date, end_date)])[0]
+
+
+
+def calculate_compliance_metrics_by_period(care_home=None, unit=None, periods=None):
+    """
+    calculate_compliance_metrics() for several periods
+    
+    Two queries in total (active staff, then all their shifts across the
+    periods) instead of one shift query per staff member per period.
+    
+    Args:
+        periods: [(start_date, end_date[, label]), ...] (default get_period_buckets())
+    
+    Returns:
+        list: one calculate_compliance_metrics() dict per period
+    """
+    periods = periods or get_period_buckets()
+    
     # Get active staff
     staff_query = User.objects.filter(is_active=True)
     
     if unit:
         staff_query = staff_query.filter(unit=unit)
     elif care_home:
-        staff_query = staff_query.filter(care_home=care_home)
-    
-    total_staff = staff_query.count()
-    
-    violations = 0
-    warnings = 0
-    at_risk_staff = []
-    
-    # Check each staff member's shifts
-    for staff_member in staff_query:
-        shifts = Shift.objects.filter(
-            staff=staff_member,
-            date__range=[start_date, end_date]
-        ).order_by('date')
+        staff_query = staff_query.filter(unit__care_home=care_home)
+    
+    staff = list(staff_query.only('sap', 'first_name', 'last_name'))
+    total_staff = len(staff)
+    
+    shifts_by_staff = defaultdict(list)
+    for shift in Shift.objects.filter(
+        user__in=staff_query,
+        date__range=[min(p[0] for p in periods), max(p[1] for p in periods)]
+    ).values('user_id', 'date', 'shift_type__duration_hours').order_by('date'):
+        shifts_by_staff[shift['user_id']].append(shift)
+    
+    results = []
+    for start_date, end_date, *_ in periods:
+        violations = 0
+        warnings = 0
+        at_risk_staff = []
         
-        # Check for violations
-        # 1. Max hours per week (48 hours)
-        total_hours = sum(shift.shift_type.hours or 8 for shift in shifts)
-        if total_hours > 48:
-            violations += 1
-            at_risk_staff.append({
-                'staff_id': staff_member.id,
-                'staff_name': staff_member.get_full_name(),
-                'issue': f'Excessive hours: {total_hours}h/week'
-            })
-        
-        # 2. Minimum rest period (11 hours between shifts)
-        for i in range(len(shifts) - 1):
-            current_shift = shifts[i]
-            next_shift = shifts[i + 1]
+        # Check each staff member's shifts
+        for staff_member in staff:
+            shifts = [
+                shift for shift in shifts_by_staff.get(staff_member.id, ())
+                if start_date <= shift['date'] <= end_date
+            ]
+            
+            # Check for violations
+            # 1. Max hours per week (48 hours)
+            total_hours = sum(float(shift['shift_type__duration_hours'] or 8) for shift in shifts)
+            if total_hours > 48:
+                violations += 1
+                at_risk_staff.append({
+                    'staff_id': staff_member.id,
+                    'staff_name': staff_member.get_full_name(),
+                    'issue': f'Excessive hours: {total_hours}h/week'
+                })
+            
+            # 2. Minimum rest period (11 hours between shifts)
+            for current_shift, next_shift in zip(shifts, shifts[1:]):
+                # Calculate rest period (simplified - assumes end of shift + rest)
+                if (next_shift['date'] - current_shift['date']).days == 0:
+                    # Same day shifts - potential violation
+                    warnings += 1
+            
+            # 3. Check for excessive consecutive days
+            consecutive_days = 0
+            prev_date = None
+            max_consecutive = 0
+            
+            for shift in shifts:
+                if prev_date and (shift['date'] - prev_date).days == 1:
+                    consecutive_days += 1
+                else:
+                    consecutive_days = 1
+                
+                max_consecutive = max(max_consecutive, consecutive_days)
+                prev_date = shift['date']
             
-            # Calculate rest period (simplified - assumes end of shift + rest)
-            if (next_shift.date - current_shift.date).days == 0:
-                # Same day shifts - potential violation
+            if max_consecutive > 6:
                 warnings += 1
         
-        # 3. Check for excessive consecutive days
-        consecutive_days = 0
-        prev_date = None
-        max_consecutive = 0
+        compliance_rate = ((total_staff - violations) / total_staff * 100) if total_staff > 0 else 100.0
         
-        for shift in shifts:
-            if prev_date and (shift.date - prev_date).days == 1:
-                consecutive_days += 1
-            else:
-                consecutive_days = 1
-            
-            max_consecutive = max(max_consecutive, consecutive_days)
-            prev_date = shift.date
-        
-        if max_consecutive > 6:
-            warnings += 1
-    
-    compliance_rate = ((total_staff - violations) / total_staff * 100) if total_staff > 0 else 100.0
+        results.append({
+            'total_staff': total_staff,
+            'compliance_rate': round(compliance_rate, 2),
+            'violations': violations,
+            'warnings': warnings,
+            'at_risk_staff': at_risk_staff[:10]  # Limit to top 10
+        })
     
-    return {
-        'total_staff': total_staff,
-        'compliance_rate': round(compliance_rate, 2),
-        'violations': violations,
-        'warnings': warnings,
-        'at_risk_staff': at_risk_staff[:10]  # Limit to top 10
-    }
+    return results
 
 
 def calculate_leave_metrics(care_home=None, unit=None, start_date=None, end_date=None):
@@ -520,54 +674,47 @@ def get_shift_distribution(care_home=None, unit=None, start_date=None, end_date=
     }
 
 
-def get_trending_data(care_home=None, unit=None, metric='staffing', periods=12):
+def get_trending_data(care_home=None, unit=None, metric='staffing', periods=12, period='week'):
     """
     Get trending data for charts (last N periods)
     
+    All periods are computed together by the metric's *_by_period function.
+    
     Args:
         metric: 'staffing', 'costs', 'occupancy', 'compliance'
         periods: number of periods to show (default 12 weeks)
+        period: 'week' or 'month' (see get_period_buckets)
     
     Returns:
         list: [{period_label, value}, ...]
     """
-    today = timezone.now().date()
-    trending_data = []
+    buckets = get_period_buckets(periods, period)
     
-    for i in range(periods - 1, -1, -1):
-        # Calculate week range
-        end_date = today - timedelta(weeks=i)
-        start_date = end_date - timedelta(days=6)
-        
-        period_label = f"{start_date.strftime('%m/%d')} - {end_date.strftime('%m/%d')}"
-        
-        if metric == 'staffing':
-            data = calculate_staffing_levels(care_home, unit, start_date, end_date)
-            value = data['fill_rate']
-        
-        elif metric == 'costs':
-            data = calculate_cost_metrics(care_home, unit, start_date, end_date)
-            value = data['estimated_total_cost']
-        
-        elif metric == 'occupancy':
-            data = calculate_occupancy_rate(care_home, unit, start_date, end_date)
-            value = data['occupancy_rate']
-        
-        elif metric == 'compliance':
-            data = calculate_compliance_metrics(care_home, unit, start_date, end_date)
-            value = data['compliance_rate']
-        
-        else:
-            value = 0
-        
-        trending_data.append({
-            'period': period_label,
-            'value': value
-        })
+    if metric == 'staffing':
+        values = [data['fill_rate'] for data in calculate_staffing_levels_by_period(care_home, unit, buckets)]
     
-    return trending_data
+    elif metric == 'costs':
+        values = [data['estimated_total_cost'] for data in calculate_cost_metrics_by_period(care_home, unit, buckets)]
+    
+    elif metric == 'occupancy':
+        values = [data['occupancy_rate'] for data in calculate_occupancy_rate_by_period(care_home, unit, buckets)]
+    
+    elif metric == 'compliance':
+        values = [data['compliance_rate'] for data in calculate_compliance_metrics_by_period(care_home, unit, buckets)]
+    
+    else:
+        values = [0] * len(buckets)
+    
+    return [
+        {
+            'period': label,
+            'value': value
+        }
+        for (_, _, label), value in zip(buckets, values)
+    ]
 
 
+@warmable('analytics_summary')
 def get_dashboard_summary(care_home=None, unit=None, date_range='week'):
     """
     Get complete dashboard summary with all KPIs
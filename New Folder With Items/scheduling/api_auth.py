@@ -9,11 +9,11 @@ Task 41: Integration APIs
 """
 
 from django.http import JsonResponse
-from django.utils import timezone
 from functools import wraps
 import time
 
-from .models_integrations import APIClient, APIToken, APIRateLimit, APIRequestLog
+from . import api_credentials, api_request_log
+from .rate_limiter import WINDOW_SECONDS, get_rate_limiter, record_for_reporting, window_limits
 
 
 class APIAuthenticationMiddleware:
@@ -41,13 +41,8 @@ class APIAuthenticationMiddleware:
         
         # Try API key authentication
         if api_key:
-            try:
-                client = APIClient.objects.get(
-                    api_key=api_key,
-                    is_active=True,
-                    status='ACTIVE'
-                )
-            except APIClient.DoesNotExist:
+            client = api_credentials.resolve_api_key(api_key)
+            if client is None:
                 return JsonResponse({
                     'error': 'Invalid API key',
                     'code': 'INVALID_API_KEY'
@@ -56,28 +51,22 @@ class APIAuthenticationMiddleware:
         # Try Bearer token authentication
         elif auth_header.startswith('Bearer '):
             token_value = auth_header.split(' ')[1]
-            try:
-                token = APIToken.objects.select_related('client').get(
-                    token=token_value,
-                    is_active=True
-                )
-                
-                if not token.is_valid():
-                    return JsonResponse({
-                        'error': 'Token expired',
-                        'code': 'TOKEN_EXPIRED'
-                    }, status=401)
-                
-                client = token.client
-                token.last_used_at = timezone.now()
-                token.use_count += 1
-                token.save()
-                
-            except APIToken.DoesNotExist:
+            token = api_credentials.resolve_token(token_value)
+            if token is None:
                 return JsonResponse({
                     'error': 'Invalid token',
                     'code': 'INVALID_TOKEN'
                 }, status=401)
+            
+            if not token.is_valid():
+                return JsonResponse({
+                    'error': 'Token expired',
+                    'code': 'TOKEN_EXPIRED'
+                }, status=401)
+            
+            client = token.client
+            request.api_token = token
+            api_credentials.record_usage(client.pk, token_id=token.pk)
         
         else:
             return JsonResponse({
@@ -150,36 +139,38 @@ class APIRateLimitMiddleware:
         client = request.api_client
         endpoint = request.path.replace('/api/v1/integration/', '')
         
-        # Check rate limits for different windows
-        for window_type in ['MINUTE', 'HOUR', 'DAY']:
-            allowed, rate_limit = APIRateLimit.check_rate_limit(
-                client, window_type, endpoint
-            )
-            
-            if not allowed:
-                # Determine when rate limit resets
-                if window_type == 'MINUTE':
-                    reset_seconds = 60 - timezone.now().second
-                    limit = client.rate_limit_per_minute
-                elif window_type == 'HOUR':
-                    reset_seconds = (60 - timezone.now().minute) * 60
-                    limit = client.rate_limit_per_hour
-                else:  # DAY
-                    now = timezone.now()
-                    tomorrow = now.replace(hour=0, minute=0, second=0) + timezone.timedelta(days=1)
-                    reset_seconds = int((tomorrow - now).total_seconds())
-                    limit = client.rate_limit_per_day
-                
-                return JsonResponse({
-                    'error': 'Rate limit exceeded',
-                    'code': 'RATE_LIMIT_EXCEEDED',
-                    'window': window_type.lower(),
-                    'limit': limit,
-                    'current': rate_limit.request_count,
-                    'reset_in_seconds': reset_seconds
-                }, status=429)
+        # One atomic check across the minute, hour and day windows
+        decision = get_rate_limiter().hit(f"{client.pk}:{endpoint}", window_limits(client))
         
-        return self.get_response(request)
+        if not decision.allowed:
+            blocked = decision.blocked
+            response = JsonResponse({
+                'error': 'Rate limit exceeded',
+                'code': 'RATE_LIMIT_EXCEEDED',
+                'window': blocked.window.lower(),
+                'limit': blocked.limit,
+                'current': blocked.count,
+                'reset_in_seconds': blocked.reset_in_seconds
+            }, status=429)
+            response['Retry-After'] = blocked.reset_in_seconds
+            self.add_rate_limit_headers(response, decision)
+            return response
+        
+        record_for_reporting(client.pk, endpoint, decision)
+        
+        response = self.get_response(request)
+        self.add_rate_limit_headers(response, decision)
+        return response
+    
+    def add_rate_limit_headers(self, response, decision):
+        """Report the window closest to its limit"""
+        tightest = decision.blocked or min(
+            decision.windows, key=lambda w: (w.limit - w.count, -w.reset_in_seconds)
+        )
+        response['X-RateLimit-Limit'] = tightest.limit
+        response['X-RateLimit-Remaining'] = max(0, tightest.limit - tightest.count)
+        response['X-RateLimit-Reset'] = tightest.window_start + WINDOW_SECONDS[tightest.window]
+        response['X-RateLimit-Window'] = tightest.window.lower()
 
 
 class APILoggingMiddleware:
@@ -204,6 +195,29 @@ class APILoggingMiddleware:
         # Calculate response time
         response_time_ms = int((time.time() - start_time) * 1000)
         
+        client = getattr(request, 'api_client', None)
+        
+        if client is not None:
+            # Update client statistics (flushed in bulk)
+            api_credentials.record_usage(
+                client.pk,
+                success=(200 <= response.status_code < 300)
+            )
+        
+        # Count every request in the rollups; sampled-out successes get no row
+        if api_request_log.observe(client.pk if client else None, response.status_code, response_time_ms):
+            self.log_request(request, response, response_time_ms, client)
+        
+        # Add rate limit headers
+        if client is not None:
+            response['X-RateLimit-Limit-Minute'] = client.rate_limit_per_minute
+            response['X-RateLimit-Limit-Hour'] = client.rate_limit_per_hour
+            response['X-RateLimit-Limit-Day'] = client.rate_limit_per_day
+        
+        return response
+    
+    def log_request(self, request, response, response_time_ms, client):
+        """Queue the APIRequestLog row (written in bulk by api_request_log)"""
         # Get client IP
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
@@ -223,42 +237,22 @@ class APILoggingMiddleware:
             except:
                 request_body = {}
         
-        # Log request
-        log_data = {
-            'endpoint': request.path,
-            'method': request.method,
-            'query_params': dict(request.GET),
-            'request_body': request_body,
-            'ip_address': ip_address,
-            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
-            'status_code': response.status_code,
-            'response_time_ms': response_time_ms,
-            'response_size': len(response.content) if hasattr(response, 'content') else 0,
-        }
-        
-        # Add client if authenticated
-        if hasattr(request, 'api_client'):
-            log_data['client'] = request.api_client
-            
-            # Update client statistics
-            request.api_client.increment_request_count(
-                success=(200 <= response.status_code < 300)
-            )
-        
-        # Create log entry (async to not slow down response)
         try:
-            APIRequestLog.objects.create(**log_data)
+            api_request_log.record({
+                'client_id': client.pk if client else None,
+                'endpoint': request.path[:500],
+                'method': request.method,
+                'query_params': dict(request.GET),
+                'request_body': request_body,
+                'ip_address': ip_address,
+                'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+                'status_code': response.status_code,
+                'response_time_ms': response_time_ms,
+                'response_size': len(response.content) if hasattr(response, 'content') else 0,
+            })
         except Exception as e:
             # Don't fail request if logging fails
             print(f"Failed to log API request: {e}")
-        
-        # Add rate limit headers
-        if hasattr(request, 'api_client'):
-            response['X-RateLimit-Limit-Minute'] = request.api_client.rate_limit_per_minute
-            response['X-RateLimit-Limit-Hour'] = request.api_client.rate_limit_per_hour
-            response['X-RateLimit-Limit-Day'] = request.api_client.rate_limit_per_day
-        
-        return response
 
 
 def require_api_scope(*required_scopes):
@@ -281,23 +275,18 @@ def require_api_scope(*required_scopes):
                 }, status=401)
             
             # If using token, check scopes
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header.startswith('Bearer '):
-                token_value = auth_header.split(' ')[1]
-                try:
-                    token = APIToken.objects.get(token=token_value)
-                    token_scopes = set(token.scope)
-                    
-                    # Check if token has all required scopes
-                    if not all(scope in token_scopes for scope in required_scopes):
-                        return JsonResponse({
-                            'error': 'Insufficient permissions',
-                            'code': 'INSUFFICIENT_SCOPE',
-                            'required_scopes': required_scopes,
-                            'token_scopes': list(token_scopes)
-                        }, status=403)
-                except APIToken.DoesNotExist:
-                    pass
+            token = getattr(request, 'api_token', None)
+            if token is not None:
+                token_scopes = set(token.scope)
+                
+                # Check if token has all required scopes
+                if not all(scope in token_scopes for scope in required_scopes):
+                    return JsonResponse({
+                        'error': 'Insufficient permissions',
+                        'code': 'INSUFFICIENT_SCOPE',
+                        'required_scopes': required_scopes,
+                        'token_scopes': list(token_scopes)
+                    }, status=403)
             
             return view_func(request, *args, **kwargs)
         return wrapped_view
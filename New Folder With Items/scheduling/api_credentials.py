@@ -0,0 +1,250 @@
+"""
+Integration API Credential Cache and Usage Counters
+
+Resolving an API key or bearer token no longer reads the database on every
+request, and usage bookkeeping no longer saves the APIClient/APIToken row:
+
+- Resolved credentials are cached for API_CREDENTIAL_CACHE_TTL seconds
+  under a SHA-256 of the credential (the raw secret never becomes a cache
+  key). Unknown credentials are cached briefly as misses.
+- Only the pk and the fields authentication needs (status, allowed IPs,
+  endpoints and methods, rate limits, token scope and expiry) are cached;
+  keys, tokens and secret hashes never leave the database. Callers get
+  APIClient/APIToken instances with every other field deferred, so reading
+  one loads it by pk.
+- Entries are tagged with their client; saving or deleting an APIClient or
+  APIToken purges the client's entries on commit, so suspending a client or
+  revoking a token takes effect on the next request.
+- Request counts and last-used times accumulate in process memory and are
+  flushed every API_USAGE_FLUSH_INTERVAL seconds as one F() UPDATE per
+  client/token, so concurrent requests never queue on the same row lock.
+
+Usage:
+    from scheduling import api_credentials
+
+    client = api_credentials.resolve_api_key(api_key)
+    token = api_credentials.resolve_token(token_value)
+    api_credentials.record_usage(client.pk, token_id=token.pk, success=True)
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import atexit
+import hashlib
+import logging
+import threading
+import time
+
+from .cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+API_CREDENTIAL_CACHE_TTL = getattr(settings, 'API_CREDENTIAL_CACHE_TTL', 60)
+API_CREDENTIAL_MISS_TTL = getattr(settings, 'API_CREDENTIAL_MISS_TTL', 10)
+API_USAGE_FLUSH_INTERVAL = getattr(settings, 'API_USAGE_FLUSH_INTERVAL', 30)
+
+# Cached value for credentials that matched nothing
+MISSING = 'missing'
+
+# Bump when the cached fields change so old entries are never read
+CACHE_VERSION = 2
+
+CLIENT_FIELDS = (
+    'id', 'status', 'is_active', 'ip_whitelist', 'allowed_endpoints', 'allowed_methods',
+    'rate_limit_per_minute', 'rate_limit_per_hour', 'rate_limit_per_day',
+)
+TOKEN_FIELDS = ('id', 'client_id', 'token_type', 'scope', 'expires_at', 'is_active')
+
+
+def credential_key(kind: str, credential: str) -> str:
+    digest = hashlib.sha256(credential.encode()).hexdigest()
+    return f"api_cred:v{CACHE_VERSION}:{kind}:{digest}"
+
+
+def client_tag(client_id) -> str:
+    return f"api_client:{client_id}"
+
+
+def _instance(model, values):
+    """Model instance holding only these fields; the rest load by pk on access"""
+    fields = [f for f in model._meta.concrete_fields if f.attname in values]
+    return model.from_db(None, [f.attname for f in fields], [values[f.attname] for f in fields])
+
+
+def _resolve(kind, credential, load):
+    """Cached {'client': fields, 'token': fields or None} for a credential, or None"""
+    key = credential_key(kind, credential)
+    cached = cache.get(key)
+    if cached is not None:
+        CacheService.record_lookup('api_cred', hit=True)
+        return None if cached == MISSING else cached
+
+    CacheService.record_lookup('api_cred', hit=False)
+    entry = load()
+    if entry is None:
+        cache.set(key, MISSING, API_CREDENTIAL_MISS_TTL)
+        return None
+
+    cache.set(key, entry, API_CREDENTIAL_CACHE_TTL)
+    CacheService.tag_key(key, client_tag(entry['client']['id']), timeout=API_CREDENTIAL_CACHE_TTL)
+    return entry
+
+
+def resolve_api_key(api_key: str):
+    """Active APIClient for an API key, or None"""
+    from .models_integrations import APIClient
+
+    def load():
+        client = APIClient.objects.filter(
+            api_key=api_key, is_active=True, status='ACTIVE'
+        ).values(*CLIENT_FIELDS).first()
+        return client and {'client': client, 'token': None}
+
+    entry = _resolve('key', api_key, load)
+    return entry and _instance(APIClient, entry['client'])
+
+
+def resolve_token(token_value: str):
+    """APIToken (with its client) for a bearer token, or None
+
+    Expiry is not checked here; callers use token.is_valid().
+    """
+    from .models_integrations import APIClient, APIToken
+
+    def load():
+        row = APIToken.objects.filter(token=token_value, is_active=True).values(
+            *TOKEN_FIELDS, *(f'client__{field}' for field in CLIENT_FIELDS)
+        ).first()
+        if row is None:
+            return None
+        return {
+            'client': {field: row[f'client__{field}'] for field in CLIENT_FIELDS},
+            'token': {field: row[field] for field in TOKEN_FIELDS},
+        }
+
+    entry = _resolve('token', token_value, load)
+    if entry is None:
+        return None
+    token = _instance(APIToken, entry['token'])
+    token.client = _instance(APIClient, entry['client'])
+    return token
+
+
+def invalidate_client(client_id, *credentials):
+    """
+    Drop cached credentials for a client once the current transaction commits
+
+    Args:
+        client_id: APIClient pk; every key and token of the client is purged
+        *credentials: (kind, credential) pairs whose cached misses to clear,
+            e.g. a newly issued key
+    """
+    def purge():
+        CacheService.purge_tag(client_tag(client_id))
+        if credentials:
+            cache.delete_many([credential_key(kind, value) for kind, value in credentials])
+
+    transaction.on_commit(purge)
+
+
+# ----------------------------------------------------------------------
+# Write-behind usage counters
+# ----------------------------------------------------------------------
+
+_client_usage = {}   # client_id -> [total, successful, failed, last_used_at]
+_token_usage = {}    # token_id -> [use_count, last_used_at]
+_usage_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record_usage(client_id, token_id=None, success=None):
+    """
+    Count one request for a client (and token)
+
+    Args:
+        client_id: APIClient pk
+        token_id: APIToken pk when the request used a bearer token
+        success: True/False to count the outcome; None records only the
+            token use (the outcome is counted once the response is known)
+    """
+    global _last_flush
+    now = timezone.now()
+
+    with _usage_lock:
+        if token_id is not None:
+            usage = _token_usage.setdefault(token_id, [0, now])
+            usage[0] += 1
+            usage[1] = now
+        if success is not None:
+            usage = _client_usage.setdefault(client_id, [0, 0, 0, now])
+            usage[0] += 1
+            usage[1 if success else 2] += 1
+            usage[3] = now
+        due = time.monotonic() - _last_flush >= API_USAGE_FLUSH_INTERVAL
+        if due:
+            _last_flush = time.monotonic()
+
+    if due:
+        flush_usage()
+
+
+def flush_usage() -> int:
+    """
+    Apply accumulated usage to APIClient and APIToken rows
+
+    Returns:
+        Number of rows updated
+    """
+    with _usage_lock:
+        clients = dict(_client_usage)
+        tokens = dict(_token_usage)
+        _client_usage.clear()
+        _token_usage.clear()
+
+    if not clients and not tokens:
+        return 0
+
+    from .models_integrations import APIClient, APIToken
+
+    try:
+        with transaction.atomic():
+            # Fixed pk order so concurrent flushes never deadlock
+            for client_id, (total, ok, failed, last_used) in sorted(clients.items()):
+                APIClient.objects.filter(pk=client_id).update(
+                    total_requests=F('total_requests') + total,
+                    successful_requests=F('successful_requests') + ok,
+                    failed_requests=F('failed_requests') + failed,
+                    last_used_at=last_used,
+                )
+            for token_id, (count, last_used) in sorted(tokens.items()):
+                APIToken.objects.filter(pk=token_id).update(
+                    use_count=F('use_count') + count,
+                    last_used_at=last_used,
+                )
+    except Exception as e:
+        logger.error(f"Failed to flush API usage counters: {e}")
+        _requeue(clients, tokens)
+        return 0
+
+    return len(clients) + len(tokens)
+
+
+def _requeue(clients, tokens):
+    """Merge unflushed counts back so the next flush retries them"""
+    with _usage_lock:
+        for client_id, (total, ok, failed, last_used) in clients.items():
+            usage = _client_usage.setdefault(client_id, [0, 0, 0, last_used])
+            usage[0] += total
+            usage[1] += ok
+            usage[2] += failed
+            usage[3] = max(usage[3], last_used)
+        for token_id, (count, last_used) in tokens.items():
+            usage = _token_usage.setdefault(token_id, [0, last_used])
+            usage[0] += count
+            usage[1] = max(usage[1], last_used)
+
+
+atexit.register(flush_usage)
@@ -0,0 +1,229 @@
+"""
+Buffered Integration API Request Log
+
+APILoggingMiddleware hands finished requests to this module instead of
+INSERTing an APIRequestLog row inside each request:
+
+- Every request is counted in a per-client, per-minute APIRequestRollup
+  (request/error counts and a latency histogram)
+- Error responses (4xx/5xx) always get an APIRequestLog row; successful
+  ones are kept at API_LOG_SUCCESS_SAMPLE_RATE (1.0 keeps all)
+- Rows and rollups are buffered in process and written with bulk_create on
+  a background thread once API_LOG_BUFFER_SIZE rows are waiting or
+  API_LOG_FLUSH_INTERVAL seconds have passed, and at process exit
+
+Rows are stamped with the time they were recorded, as audit_sink does, so
+a row and its rollup minute both use the request time however late the
+buffer is written.
+
+Usage:
+    from scheduling import api_request_log
+
+    if api_request_log.observe(client_id, status_code, response_time_ms):
+        api_request_log.record({'client_id': client_id, 'endpoint': ..., ...})
+"""
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+import atexit
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+API_LOG_BUFFER_SIZE = getattr(settings, 'API_LOG_BUFFER_SIZE', 500)
+API_LOG_FLUSH_INTERVAL = getattr(settings, 'API_LOG_FLUSH_INTERVAL', 5)
+API_LOG_SUCCESS_SAMPLE_RATE = getattr(settings, 'API_LOG_SUCCESS_SAMPLE_RATE', 1.0)
+
+# Rows held back after failed writes are capped here (oldest dropped)
+API_LOG_MAX_BUFFER = getattr(settings, 'API_LOG_MAX_BUFFER', 10000)
+
+_rows = []      # {'at': datetime, 'fields': dict}
+_rollups = {}   # (client_id, minute) -> [requests, errors, total_ms, max_ms, histogram]
+_buffer_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flush_running = False
+
+
+def is_buffered() -> bool:
+    """API_LOG_BUFFERED = False writes every row immediately (e.g. in tests)"""
+    return getattr(settings, 'API_LOG_BUFFERED', True)
+
+
+def observe(client_id, status_code: int, response_time_ms: int) -> bool:
+    """
+    Count a finished request in its minute's rollup
+
+    Returns:
+        True if the request should also get an APIRequestLog row
+    """
+    from .models_integrations import APIRequestRollup
+
+    is_error = status_code >= 400
+
+    if client_id is not None:
+        minute = timezone.now().replace(second=0, microsecond=0)
+        bucket = APIRequestRollup.bucket_index(response_time_ms)
+        with _buffer_lock:
+            rollup = _rollups.get((client_id, minute))
+            if rollup is None:
+                rollup = _rollups[(client_id, minute)] = [
+                    0, 0, 0, 0, [0] * (len(APIRequestRollup.LATENCY_BUCKETS_MS) + 1)
+                ]
+            rollup[0] += 1
+            rollup[1] += is_error
+            rollup[2] += response_time_ms
+            rollup[3] = max(rollup[3], response_time_ms)
+            rollup[4][bucket] += 1
+            due = time.monotonic() - _last_flush >= API_LOG_FLUSH_INTERVAL
+
+        if not is_buffered():
+            flush()
+        elif due:
+            # Rollups still flush when sampling leaves few rows to trigger it
+            _flush_in_background()
+
+    return is_error or random.random() < API_LOG_SUCCESS_SAMPLE_RATE
+
+
+def record(fields: dict):
+    """
+    Queue one APIRequestLog row
+
+    Args:
+        fields: Column values by attname (client as client_id)
+    """
+    row = {'at': timezone.now(), 'fields': fields}
+
+    if not is_buffered():
+        _write_rows([row])
+        return
+
+    with _buffer_lock:
+        _rows.append(row)
+        due = (
+            len(_rows) >= API_LOG_BUFFER_SIZE or
+            time.monotonic() - _last_flush >= API_LOG_FLUSH_INTERVAL
+        )
+    if due:
+        _flush_in_background()
+
+
+def _flush_in_background():
+    """Run flush() on a daemon thread unless one is already running"""
+    global _flush_running
+    with _buffer_lock:
+        if _flush_running:
+            return
+        _flush_running = True
+
+    def run():
+        global _flush_running
+        try:
+            flush()
+        finally:
+            _flush_running = False
+            connections.close_all()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def flush():
+    """Write buffered rows and rollups"""
+    global _last_flush
+    with _buffer_lock:
+        rows = _rows[:]
+        rollups = dict(_rollups)
+        del _rows[:]
+        _rollups.clear()
+        _last_flush = time.monotonic()
+
+    if rows:
+        try:
+            _write_rows(rows)
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} API request logs: {e}")
+            _requeue(rows)
+
+    if rollups:
+        try:
+            _write_rollups(rollups)
+        except IntegrityError:
+            # Another process created one of the minutes first - merge again
+            try:
+                _write_rollups(rollups)
+            except Exception as e:
+                logger.error(f"Failed to write API request rollups: {e}")
+        except Exception as e:
+            logger.error(f"Failed to write API request rollups: {e}")
+
+
+def _requeue(rows):
+    with _buffer_lock:
+        _rows[:0] = rows
+        overflow = len(_rows) - API_LOG_MAX_BUFFER
+        if overflow > 0:
+            del _rows[:overflow]
+            logger.warning(f"API request log buffer full - dropped {overflow} rows")
+
+
+def _write_rows(rows):
+    from .models_integrations import APIRequestLog
+
+    APIRequestLog.objects.bulk_create(
+        [APIRequestLog(timestamp=row['at'], **row['fields']) for row in rows], batch_size=500
+    )
+
+
+def _write_rollups(rollups):
+    """Merge rollups into existing rows (locked) or create them"""
+    from .models_integrations import APIRequestRollup
+
+    client_ids = {client_id for client_id, _ in rollups}
+    minutes = {minute for _, minute in rollups}
+
+    with transaction.atomic():
+        existing = {
+            (row.client_id, row.minute): row
+            for row in APIRequestRollup.objects.select_for_update().filter(
+                client_id__in=client_ids, minute__in=minutes
+            )
+        }
+
+        updated, created = [], []
+        for (client_id, minute), (requests, errors, total_ms, max_ms, histogram) in rollups.items():
+            row = existing.get((client_id, minute))
+            if row is None:
+                created.append(APIRequestRollup(
+                    client_id=client_id,
+                    minute=minute,
+                    request_count=requests,
+                    error_count=errors,
+                    total_response_ms=total_ms,
+                    max_response_ms=max_ms,
+                    latency_histogram=histogram,
+                ))
+                continue
+
+            row.request_count += requests
+            row.error_count += errors
+            row.total_response_ms += total_ms
+            row.max_response_ms = max(row.max_response_ms, max_ms)
+            row.latency_histogram = [
+                a + b for a, b in zip(row.latency_histogram or [0] * len(histogram), histogram)
+            ]
+            updated.append(row)
+
+        if updated:
+            APIRequestRollup.objects.bulk_update(updated, [
+                'request_count', 'error_count', 'total_response_ms',
+                'max_response_ms', 'latency_histogram',
+            ])
+        if created:
+            APIRequestRollup.objects.bulk_create(created)
+
+
+atexit.register(flush)
@@ -1,9 +1,13 @@
 """
 Audit Trail Service
 Centralized service for logging audit events and tracking system activity
+
+log_data_change/log_access queue rows through scheduling.audit_sink; they
+return the (unsaved) log instance.
 """
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
+from . import audit_sink
 from .models_audit import (
     DataChangeLog, SystemAccessLog, ComplianceCheck, 
     ComplianceViolation, AuditReport
@@ -31,26 +35,27 @@ class AuditService:
             request: HTTP request object
             is_automated: Whether change was automated
         """
-        log_entry = DataChangeLog(
-            content_type=ContentType.objects.get_for_model(obj),
-            object_id=str(obj.pk),
-            action=action,
-            field_name=field_name,
-            old_value=str(old_value) if old_value is not None else None,
-            new_value=str(new_value) if new_value is not None else None,
-            user=user,
-            reason=reason,
-            is_automated=is_automated
-        )
+        fields = {
+            'content_type_id': ContentType.objects.get_for_model(obj).pk,
+            'object_id': str(obj.pk),
+            'action': action,
+            'field_name': field_name,
+            'old_value': str(old_value) if old_value is not None else None,
+            'new_value': str(new_value) if new_value is not None else None,
+            'user_id': user.pk if user is not None else None,
+            'reason': reason,
+            'is_automated': is_automated,
+        }
         
         if request:
-            log_entry.ip_address = AuditService._get_client_ip(request)
-            log_entry.user_agent = request.META.get('HTTP_USER_AGENT', '')[:255]
+            fields['ip_address'] = AuditService._get_client_ip(request)
+            fields['user_agent'] = request.META.get('HTTP_USER_AGENT', '')[:255]
             if hasattr(request, 'session'):
-                log_entry.session_key = request.session.session_key
+                fields['session_key'] = request.session.session_key
         
-        log_entry.save()
-        return log_entry
+        # Queued; written in bulk at request end (see audit_sink)
+        audit_sink.record('DataChangeLog', fields)
+        return DataChangeLog(**fields)
     
     @staticmethod
     def log_access(user, access_type, ip_address, user_agent=None, 
@@ -69,16 +74,20 @@ class AuditService:
             failure_reason: Reason for failure (if failed)
             username_attempt: Username attempted (for failed logins)
         """
-        return SystemAccessLog.objects.create(
-            user=user,
-            username_attempt=username_attempt,
-            access_type=access_type,
-            ip_address=ip_address,
-            user_agent=user_agent[:255] if user_agent else None,
-            session_key=session_key,
-            success=success,
-            failure_reason=failure_reason
-        )
+        fields = {
+            'user_id': user.pk if user is not None else None,
+            'username_attempt': username_attempt,
+            'access_type': access_type,
+            'ip_address': ip_address,
+            'user_agent': user_agent[:255] if user_agent else None,
+            'session_key': session_key,
+            'success': success,
+            'failure_reason': failure_reason,
+        }
+        
+        # Queued; written in bulk at request end (see audit_sink)
+        audit_sink.record('SystemAccessLog', fields)
+        return SystemAccessLog(**fields)
     
     @staticmethod
     def log_object_changes(user, obj, changes_dict, action='UPDATE', request=None):
@@ -0,0 +1,261 @@
+"""
+Buffered Audit Log Sink
+
+Audit rows (DataChangeLog, SystemAccessLog) are queued in-process instead of
+being INSERTed one by one inside the user's request:
+
+- Events raised inside a transaction are queued on commit (a rollback
+  leaves no audit row, as before)
+- The buffer is written with bulk_create at request end, when it reaches
+  AUDIT_BUFFER_SIZE, and at process exit
+- Batches of AUDIT_CELERY_THRESHOLD or more are handed to a Celery task
+- If the broker and the database are both unavailable, events are appended
+  to a bounded local spool file (JSON lines) and replayed later
+
+Delivery is at-least-once: events leave the buffer only once they are
+written, enqueued or spooled, so a retry may duplicate a row but never lose
+one. Rows are stamped with the time each event was recorded, so events
+written late (Celery backlog, spool replay) keep their own time.
+
+Usage:
+    from scheduling import audit_sink
+
+    audit_sink.record('SystemAccessLog', {'user_id': user.pk, 'access_type': 'LOGIN', ...})
+    audit_sink.flush()
+"""
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from collections import defaultdict
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Flush when this many events are buffered
+AUDIT_BUFFER_SIZE = getattr(settings, 'AUDIT_BUFFER_SIZE', 200)
+
+# Batches at least this large go to Celery rather than the request thread
+AUDIT_CELERY_THRESHOLD = getattr(settings, 'AUDIT_CELERY_THRESHOLD', 50)
+
+AUDIT_SPOOL_PATH = getattr(
+    settings, 'AUDIT_SPOOL_PATH',
+    os.path.join(str(getattr(settings, 'BASE_DIR', tempfile.gettempdir())), 'audit_spool.jsonl')
+)
+AUDIT_SPOOL_MAX_BYTES = getattr(settings, 'AUDIT_SPOOL_MAX_BYTES', 50 * 1024 * 1024)
+
+# How often a successful flush checks for a spool to replay
+SPOOL_CHECK_INTERVAL = 60
+
+_buffer = []
+_buffer_lock = threading.Lock()
+_spool_lock = threading.Lock()
+_last_spool_check = 0.0
+
+
+def _models():
+    from .models_audit import DataChangeLog, SystemAccessLog
+    return {
+        'DataChangeLog': DataChangeLog,
+        'SystemAccessLog': SystemAccessLog,
+    }
+
+
+def is_buffered() -> bool:
+    """AUDIT_BUFFERED = False writes every event immediately (e.g. in tests)"""
+    return getattr(settings, 'AUDIT_BUFFERED', True)
+
+
+def record(model_name: str, fields: dict):
+    """
+    Queue one audit row
+
+    Args:
+        model_name: 'DataChangeLog' or 'SystemAccessLog'
+        fields: Column values by attname (FKs as *_id), JSON-serialisable
+    """
+    event = {'model': model_name, 'at': timezone.now().isoformat(), 'fields': fields}
+
+    if not is_buffered():
+        write_events([event])
+        return
+
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _append(event))
+    else:
+        _append(event)
+
+
+def _append(event):
+    with _buffer_lock:
+        _buffer.append(event)
+        full = len(_buffer) >= AUDIT_BUFFER_SIZE
+    if full:
+        flush()
+
+
+def flush():
+    """Deliver everything buffered: Celery for large batches, else bulk_create"""
+    with _buffer_lock:
+        events = _buffer[:]
+        del _buffer[:]
+    if not events:
+        return
+
+    if len(events) >= AUDIT_CELERY_THRESHOLD and _enqueue(events):
+        return
+
+    try:
+        write_events(events)
+    except Exception as e:
+        logger.error(f"Audit write failed, spooling {len(events)} events: {e}")
+        spool_events(events)
+        return
+
+    _maybe_drain_spool()
+
+
+def _enqueue(events) -> bool:
+    try:
+        from .tasks import write_audit_events
+        write_audit_events.delay(events)
+        return True
+    except Exception as e:
+        logger.warning(f"Audit task enqueue failed, writing inline: {e}")
+        return False
+
+
+def write_events(events):
+    """
+    Write events with bulk_create; a row the database rejects is set aside
+    in the .rejected file rather than holding back (or re-spooling) its batch
+    """
+    try:
+        _bulk_write(events)
+    except (DataError, IntegrityError) as e:
+        for event in events:
+            try:
+                _bulk_write([event])
+            except (DataError, IntegrityError):
+                logger.error(f"Audit event rejected by database: {e}")
+                _append_lines(AUDIT_SPOOL_PATH + '.rejected', [event])
+
+
+def _bulk_write(events):
+    """bulk_create events grouped by model, in one transaction"""
+    models = _models()
+    by_model = defaultdict(list)
+    for event in events:
+        by_model[event['model']].append(event)
+
+    with transaction.atomic():
+        for model_name, group in by_model.items():
+            model = models[model_name]
+            model.objects.bulk_create(
+                [
+                    model(timestamp=parse_datetime(event['at']), **_clip(model, event['fields']))
+                    for event in group
+                ],
+                batch_size=500
+            )
+
+
+def _clip(model, fields):
+    """Truncate strings to their column's max_length"""
+    clipped = dict(fields)
+    for name, value in fields.items():
+        if isinstance(value, str):
+            max_length = getattr(model._meta.get_field(name), 'max_length', None)
+            if max_length and len(value) > max_length:
+                clipped[name] = value[:max_length]
+    return clipped
+
+
+def spool_events(events) -> bool:
+    """
+    Append events to the local spool file
+
+    Returns:
+        False if the spool is full and the events were dropped
+    """
+    if _append_lines(AUDIT_SPOOL_PATH, events, AUDIT_SPOOL_MAX_BYTES):
+        return True
+    logger.critical(f"Audit spool {AUDIT_SPOOL_PATH} full - dropped {len(events)} events")
+    return False
+
+
+def _append_lines(path, events, max_bytes=None) -> bool:
+    payload = ''.join(json.dumps(event, cls=DjangoJSONEncoder) + '\n' for event in events)
+
+    with _spool_lock, open(path, 'a') as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        if max_bytes and os.fstat(fh.fileno()).st_size + len(payload) > max_bytes:
+            return False
+        fh.write(payload)
+        fh.flush()
+        os.fsync(fh.fileno())
+    return True
+
+
+def drain_spool() -> int:
+    """
+    Replay spooled events into the database
+
+    The spool is renamed before replay so new events go to a fresh file.
+    A failed replay leaves the renamed file for the next attempt.
+
+    Returns:
+        Number of events written
+    """
+    draining = AUDIT_SPOOL_PATH + '.draining'
+    with _spool_lock:
+        if not os.path.exists(draining):
+            if not os.path.exists(AUDIT_SPOOL_PATH):
+                return 0
+            os.replace(AUDIT_SPOOL_PATH, draining)
+
+    events = []
+    with open(draining) as fh:
+        for line in fh:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping corrupt audit spool line")
+
+    try:
+        for offset in range(0, len(events), 1000):
+            write_events(events[offset:offset + 1000])
+    except Exception as e:
+        logger.warning(f"Audit spool replay failed, will retry: {e}")
+        return 0
+
+    os.remove(draining)
+    logger.info(f"Replayed {len(events)} spooled audit events")
+    return len(events)
+
+
+def _maybe_drain_spool():
+    global _last_spool_check
+    now = time.monotonic()
+    if now - _last_spool_check < SPOOL_CHECK_INTERVAL:
+        return
+    _last_spool_check = now
+    if os.path.exists(AUDIT_SPOOL_PATH) or os.path.exists(AUDIT_SPOOL_PATH + '.draining'):
+        drain_spool()
+
+
+atexit.register(flush)
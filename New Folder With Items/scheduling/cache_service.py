@@ -4,6 +4,11 @@ Task 44: Comprehensive caching layer for improved performance
 
 Features:
 - Redis caching with automatic invalidation
+- Generation-counter invalidation (one atomic INCR, no KEYS scans or clear())
+- Optional tag index for targeted purges
+- Single-flight recompute (per-key lock) with stale-while-revalidate
+- Invalidations coalesced per transaction and flushed once on commit
+- Hit/miss/recompute-time counters per key prefix
 - Query result caching
 - Template fragment caching
 - Decorators for easy cache application
@@ -11,13 +16,33 @@ Features:
 - Performance monitoring
 """
 
+from django.conf import settings
 from django.core.cache import cache
+from django.db import connections, transaction
 from django.db.models import QuerySet
-from functools import wraps
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial, wraps
 from typing import Any, Callable, Optional
 import hashlib
+import inspect
 import json
 from datetime import timedelta
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Stored value plus the time it stops being fresh. Entries live for
+# timeout + stale_timeout (hard TTL); between the two they are served stale
+# while one caller refreshes them.
+CacheEntry = namedtuple('CacheEntry', ['value', 'fresh_until'])
+
+# Refresh stale entries on a daemon thread (False = the lock winner
+# refreshes inline, e.g. in tests)
+BACKGROUND_REFRESH = getattr(settings, 'CACHE_BACKGROUND_REFRESH', True)
 
 
 class CacheService:
@@ -39,6 +64,33 @@ class CacheService:
     PREFIX_REPORT = "report"
     PREFIX_COMPLIANCE = "compliance"
     
+    # Generation counters and tag indexes
+    PREFIX_GENERATION = "gen"
+    PREFIX_TAG = "tag"
+    PREFIX_LOCK = "lock"
+    
+    # Single-flight recompute
+    LOCK_TIMEOUT = 60  # longest a recompute may hold a key's lock
+    LOCK_WAIT = 5.0  # longest a caller with nothing to serve waits for it
+    LOCK_POLL = 0.05
+    
+    _redis_conn = None
+    _redis_checked = False
+    
+    _metrics = {}
+    _metrics_lock = threading.Lock()
+    
+    # Pending invalidations (per thread): current transaction's batch and
+    # any coalesce_invalidations() scope
+    _pending = threading.local()
+    
+    @staticmethod
+    def _key_default(obj) -> str:
+        """Model instances key on label + pk, everything else on str()"""
+        if hasattr(obj, '_meta') and hasattr(obj, 'pk'):
+            return f"{obj._meta.label}:{obj.pk}"
+        return str(obj)
+    
     @staticmethod
     def generate_cache_key(*args, **kwargs) -> str:
         """
@@ -56,39 +108,470 @@ class CacheService:
             'args': args,
             'kwargs': sorted(kwargs.items())
         }
-        key_string = json.dumps(key_data, sort_keys=True, default=str)
+        key_string = json.dumps(key_data, sort_keys=True, default=CacheService._key_default)
         
         # Create hash for consistent key length
         return hashlib.md5(key_string.encode()).hexdigest()
     
+    # ------------------------------------------------------------------
+    # Generation counters
+    #
+    # Every scoped key embeds the current generation of its namespaces
+    # (domain, home, domain+home). Invalidating a namespace is a single
+    # atomic INCR of its counter: old keys are never read again and simply
+    # expire, so there is no KEYS scan and no cache.clear().
+    #
+    # Missing counters are seeded from the clock (milliseconds), not 1, so
+    # a counter that was evicted comes back above every value it had before
+    # and can never re-stamp keys that are still cached.
+    # ------------------------------------------------------------------
+    
     @staticmethod
-    def cache_result(timeout: int = TIMEOUT_MEDIUM, key_prefix: str = ""):
+    def _generation_key(namespace: str) -> str:
+        return f"{CacheService.PREFIX_GENERATION}:{namespace}"
+    
+    @staticmethod
+    def _generation_seed() -> int:
+        return int(time.time() * 1000)
+    
+    @staticmethod
+    def get_generations(namespaces: list) -> dict:
+        """
+        Current generation of each namespace (single get_many round-trip)
+        
+        Args:
+            namespaces: Namespace names, e.g. ["shift", "home:3"]
+            
+        Returns:
+            Dict[namespace] = generation (missing counters are seeded first)
+        """
+        keys = {CacheService._generation_key(n): n for n in namespaces}
+        found = cache.get_many(list(keys))
+        missing = [key for key in keys if key not in found]
+        seed = None
+        if missing:
+            seed = CacheService._generation_seed()
+            for key in missing:
+                cache.add(key, seed, timeout=None)
+            # Another process may have seeded first; its value wins
+            found.update(cache.get_many(missing))
+        return {namespace: found.get(key, seed) for key, namespace in keys.items()}
+    
+    @staticmethod
+    def bump_generation(namespace: str) -> int:
+        """
+        Invalidate every key scoped to a namespace (atomic INCR)
+        
+        Args:
+            namespace: Namespace name, e.g. "home:3" or "shift:home:3"
+            
+        Returns:
+            New generation number
+        """
+        key = CacheService._generation_key(namespace)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Missing counter: seed from the clock, never expire
+            cache.add(key, CacheService._generation_seed(), timeout=None)
+            return cache.incr(key)
+    
+    @staticmethod
+    def scope_namespaces(prefix: str, home_id: Optional[int] = None, tags: tuple = ()) -> list:
+        """Namespaces a key belongs to: domain, home, domain+home and any tags"""
+        namespaces = [prefix]
+        if home_id is not None:
+            namespaces += [f"home:{home_id}", f"{prefix}:home:{home_id}"]
+        namespaces += [f"tag:{tag}" for tag in tags]
+        return namespaces
+    
+    @staticmethod
+    def scoped_key(prefix: str, *parts, home_id: Optional[int] = None, tags: tuple = ()) -> str:
+        """
+        Build a cache key stamped with its namespace generations
+        
+        Usage:
+            key = CacheService.scoped_key("dashboard", "summary", today, home_id=3)
+            # -> "dashboard:g1.4.2:summary:2025-01-06"
+        """
+        namespaces = CacheService.scope_namespaces(prefix, home_id, tags)
+        generations = CacheService.get_generations(namespaces)
+        stamp = '.'.join(str(generations[n]) for n in namespaces)
+        return ':'.join([prefix, f"g{stamp}"] + [str(part) for part in parts])
+    
+    # ------------------------------------------------------------------
+    # Tag index (optional) - targeted purges that also free memory
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _redis():
+        """Raw django_redis connection, or None on other backends"""
+        if not CacheService._redis_checked:
+            CacheService._redis_checked = True
+            try:
+                from django_redis import get_redis_connection
+                CacheService._redis_conn = get_redis_connection("default")
+            except Exception:
+                CacheService._redis_conn = None
+        return CacheService._redis_conn
+    
+    @staticmethod
+    def tag_key(cache_key: str, *tags, timeout: int = TIMEOUT_DAY):
+        """
+        Record a cache key under tags so purge_tag() can delete it
+        
+        Args:
+            cache_key: Key already stored with cache.set()
+            *tags: Tag names, e.g. "shift:1234"
+            timeout: Lifetime of the tag index
+        """
+        conn = CacheService._redis()
+        for tag in tags:
+            index_key = f"{CacheService.PREFIX_TAG}:{tag}"
+            if conn is not None:
+                raw_index = cache.make_key(index_key)
+                conn.sadd(raw_index, cache.make_key(cache_key))
+                conn.expire(raw_index, timeout)
+            else:
+                members = cache.get(index_key) or set()
+                members.add(cache_key)
+                cache.set(index_key, members, timeout)
+    
+    @staticmethod
+    def purge_tag(tag: str) -> int:
+        """
+        Delete every key recorded under a tag and bump the tag's generation
+        
+        Returns:
+            Number of keys deleted
+        """
+        CacheService.bump_generation(f"tag:{tag}")
+        return CacheService._delete_tagged([tag])
+    
+    @staticmethod
+    def _delete_tagged(tags) -> int:
+        """Delete the keys recorded under tags, plus the tag indexes"""
+        index_keys = [f"{CacheService.PREFIX_TAG}:{tag}" for tag in tags]
+        conn = CacheService._redis()
+        if conn is not None:
+            raw_indexes = [cache.make_key(key) for key in index_keys]
+            pipe = conn.pipeline(transaction=False)
+            for raw_index in raw_indexes:
+                pipe.smembers(raw_index)
+            members = set().union(*pipe.execute())
+            conn.delete(*members, *raw_indexes)
+            return len(members)
+        
+        members = set().union(*cache.get_many(index_keys).values())
+        cache.delete_many(list(members) + index_keys)
+        return len(members)
+    
+    # ------------------------------------------------------------------
+    # Invalidation coalescing
+    #
+    # Inside transaction.atomic() invalidations are collected per
+    # transaction, de-duplicated by scope and flushed once from
+    # transaction.on_commit(); a rollback discards them. A bulk edit saving
+    # hundreds of shifts therefore costs one flush, not one per row.
+    # coalesce_invalidations() does the same for autocommit code.
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def bump_generations(namespaces) -> None:
+        """Bump several namespaces in one round-trip (pipelined on Redis)"""
+        conn = CacheService._redis()
+        if conn is None:
+            for namespace in namespaces:
+                CacheService.bump_generation(namespace)
+            return
+        
+        seed = CacheService._generation_seed()
+        pipe = conn.pipeline(transaction=False)
+        for namespace in namespaces:
+            raw_key = cache.make_key(CacheService._generation_key(namespace))
+            # Seed a missing counter before bumping it
+            pipe.set(raw_key, seed, nx=True)
+            pipe.incr(raw_key)
+        pipe.execute()
+    
+    @staticmethod
+    def flush_invalidations(namespaces=(), tags=()):
+        """Apply collected invalidations: one generation bump per scope"""
+        scopes = set(namespaces) | {f"tag:{tag}" for tag in tags}
+        if scopes:
+            CacheService.bump_generations(scopes)
+        if tags:
+            CacheService._delete_tagged(tags)
+    
+    @staticmethod
+    def _flush_batch(batch):
+        """on_commit hook: apply a transaction's batch and retire it"""
+        batch['flushed'] = True
+        CacheService.flush_invalidations(batch['namespaces'], batch['tags'])
+    
+    @staticmethod
+    def _defer(namespaces=(), tags=()):
+        """Queue invalidations until commit (or scope exit); apply now otherwise"""
+        pending = CacheService._pending
+        conn = transaction.get_connection()
+        
+        if conn.in_atomic_block:
+            batch = getattr(pending, 'batch', None)
+            # Django replaces run_on_commit with a new list on every commit
+            # and (savepoint) rollback, so a batch bound to the current list
+            # is never carried into a later transaction. A flushed batch is
+            # never reused either (TestCase keeps one list across
+            # captureOnCommitCallbacks blocks); daily_metrics.mark_stale does
+            # the same
+            if batch is None or batch['flushed'] or batch['hooks'] is not conn.run_on_commit:
+                batch = {'namespaces': set(), 'tags': set(), 'flushed': False}
+                transaction.on_commit(partial(CacheService._flush_batch, batch))
+                batch['hooks'] = conn.run_on_commit
+                pending.batch = batch
+        else:
+            batch = getattr(pending, 'scope', None)
+            if batch is None:
+                CacheService.flush_invalidations(namespaces, tags)
+                return
+        
+        batch['namespaces'].update(namespaces)
+        batch['tags'].update(tags)
+    
+    @staticmethod
+    @contextmanager
+    def coalesce_invalidations():
+        """
+        Collect autocommit invalidations and flush them once on exit
+        
+        Usage:
+            with CacheService.coalesce_invalidations():
+                for shift in shifts:
+                    shift.save()
+        """
+        pending = CacheService._pending
+        if getattr(pending, 'scope', None) is not None:
+            yield
+            return
+        
+        scope = pending.scope = {'namespaces': set(), 'tags': set()}
+        try:
+            yield
+        finally:
+            pending.scope = None
+            CacheService.flush_invalidations(scope['namespaces'], scope['tags'])
+    
+    # ------------------------------------------------------------------
+    # Single-flight get-or-set with stale-while-revalidate
+    #
+    # Only the caller that wins a key's lock (cache.add) recomputes it.
+    # Everyone else gets the stale value if there is one, or waits briefly
+    # for the winner's result. This is what stops the 08:00 changeover
+    # stampede when every manager opens the same home dashboard at once.
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _record(prefix: str, event: str, seconds: float = 0.0):
+        with CacheService._metrics_lock:
+            counters = CacheService._metrics.setdefault(prefix, {
+                'hits': 0, 'stale_hits': 0, 'misses': 0, 'waits': 0,
+                'recomputes': 0, 'recompute_seconds': 0.0, 'errors': 0,
+            })
+            counters[event] += 1
+            counters['recompute_seconds'] += seconds
+    
+    @staticmethod
+    def record_lookup(prefix: str, hit: bool):
+        """Count a plain cache.get() hit/miss made outside get_or_set()"""
+        CacheService._record(prefix, 'hits' if hit else 'misses')
+    
+    @staticmethod
+    def get_prefix_stats() -> dict:
+        """
+        Hit/miss/recompute counters per key prefix (this process)
+        
+        Returns:
+            Dict[prefix] = counters plus hit_rate and avg_recompute_ms
+        """
+        with CacheService._metrics_lock:
+            snapshot = {prefix: dict(c) for prefix, c in CacheService._metrics.items()}
+        
+        for counters in snapshot.values():
+            # waits are misses that were served by another caller's recompute
+            served = counters['hits'] + counters['stale_hits']
+            counters['hit_rate'] = served / max(1, served + counters['misses'])
+            counters['avg_recompute_ms'] = round(
+                1000 * counters['recompute_seconds'] / max(1, counters['recomputes']), 1
+            )
+        return snapshot
+    
+    @staticmethod
+    def reset_prefix_stats():
+        with CacheService._metrics_lock:
+            CacheService._metrics.clear()
+    
+    @staticmethod
+    def _acquire_lock(cache_key: str) -> Optional[str]:
+        """Take the recompute lock for a key; returns a token or None"""
+        token = uuid.uuid4().hex
+        if cache.add(f"{CacheService.PREFIX_LOCK}:{cache_key}", token, CacheService.LOCK_TIMEOUT):
+            return token
+        return None
+    
+    @staticmethod
+    def _release_lock(cache_key: str, token: str):
+        lock_key = f"{CacheService.PREFIX_LOCK}:{cache_key}"
+        # Don't release a lock that expired and was taken by someone else
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    
+    @staticmethod
+    def _recompute(cache_key: str, compute: Callable, timeout: int,
+                   stale_timeout: int, prefix: str) -> Any:
+        started = time.perf_counter()
+        try:
+            value = compute()
+        except Exception:
+            CacheService._record(prefix, 'errors')
+            raise
+        
+        # Convert QuerySet to list for caching
+        if isinstance(value, QuerySet):
+            value = list(value)
+        
+        CacheService._record(prefix, 'recomputes', time.perf_counter() - started)
+        cache.set(
+            cache_key,
+            CacheEntry(value, time.time() + timeout),
+            timeout + stale_timeout
+        )
+        return value
+    
+    @staticmethod
+    def _refresh(cache_key: str, compute: Callable, timeout: int,
+                 stale_timeout: int, prefix: str, token: str):
+        """Recompute a stale entry, keeping the stale value on failure"""
+        try:
+            CacheService._recompute(cache_key, compute, timeout, stale_timeout, prefix)
+        except Exception as e:
+            logger.warning(f"Background refresh of {cache_key} failed, serving stale: {e}")
+        finally:
+            CacheService._release_lock(cache_key, token)
+    
+    @staticmethod
+    def _refresh_in_background(*args):
+        def run():
+            try:
+                CacheService._refresh(*args)
+            finally:
+                connections.close_all()
+        
+        threading.Thread(target=run, name=f"cache-refresh:{args[0]}", daemon=True).start()
+    
+    @staticmethod
+    def get_or_set(cache_key: str, compute: Callable, timeout: int = TIMEOUT_MEDIUM,
+                   stale_timeout: Optional[int] = None, prefix: Optional[str] = None) -> Any:
+        """
+        Get a value, recomputing it at most once across all callers
+        
+        - Fresh entry: returned as-is
+        - Stale entry (past timeout, within timeout + stale_timeout): returned
+          immediately; the lock winner refreshes it in the background
+        - Missing entry: the lock winner computes it; other callers wait up
+          to LOCK_WAIT for the result, then compute it themselves
+        
+        Args:
+            cache_key: Cache key (build with scoped_key() to make it invalidatable)
+            compute: Zero-argument callable producing the value
+            timeout: Soft TTL in seconds
+            stale_timeout: Extra seconds a stale value may be served (default = timeout)
+            prefix: Metrics bucket (default: first segment of the key)
+            
+        Returns:
+            Cached or fresh value (None is cached like any other value)
+        """
+        if stale_timeout is None:
+            stale_timeout = timeout
+        prefix = prefix or cache_key.split(':', 1)[0]
+        args = (cache_key, compute, timeout, stale_timeout, prefix)
+        
+        entry = cache.get(cache_key)
+        if isinstance(entry, CacheEntry):
+            if entry.fresh_until > time.time():
+                CacheService._record(prefix, 'hits')
+                return entry.value
+            
+            token = CacheService._acquire_lock(cache_key)
+            if token is not None and not BACKGROUND_REFRESH:
+                CacheService._record(prefix, 'misses')
+                CacheService._refresh(*args, token)
+                return cache.get(cache_key, entry).value
+            if token is not None:
+                CacheService._refresh_in_background(*args, token)
+            CacheService._record(prefix, 'stale_hits')
+            return entry.value
+        
+        CacheService._record(prefix, 'misses')
+        token = CacheService._acquire_lock(cache_key)
+        if token is not None:
+            try:
+                return CacheService._recompute(*args)
+            finally:
+                CacheService._release_lock(cache_key, token)
+        
+        # Someone else is computing it - wait for their result
+        deadline = time.monotonic() + CacheService.LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(CacheService.LOCK_POLL)
+            entry = cache.get(cache_key)
+            if isinstance(entry, CacheEntry):
+                CacheService._record(prefix, 'waits')
+                return entry.value
+        
+        logger.warning(f"Timed out waiting for {cache_key} recompute, computing locally")
+        return CacheService._recompute(*args)
+    
+    @staticmethod
+    def cache_result(timeout: int = TIMEOUT_MEDIUM, key_prefix: str = "", home_arg: str = None,
+                     stale_timeout: Optional[int] = None):
         """
         Decorator to cache function results
         
+        Keys are generation-stamped, so invalidate_home_cache() and
+        invalidate_pattern("<prefix>:*") invalidate them with one INCR.
+        home_arg names the parameter holding the home (id or instance),
+        however it is passed.
+        Concurrent misses compute once (see get_or_set()).
+        
         Usage:
-            @CacheService.cache_result(timeout=300, key_prefix="dashboard")
+            @CacheService.cache_result(timeout=300, key_prefix="dashboard", home_arg="home_id")
             def get_dashboard_stats(home_id):
                 # expensive operation
                 return stats
         """
         def decorator(func: Callable) -> Callable:
+            prefix = key_prefix or func.__name__
+            signature = inspect.signature(func)
+            
             @wraps(func)
             def wrapper(*args, **kwargs):
-                # Generate cache key
-                cache_key = f"{key_prefix}:{func.__name__}:{CacheService.generate_cache_key(*args, **kwargs)}"
+                # The home may be passed positionally or by keyword
+                home_id = None
+                if home_arg:
+                    bound = signature.bind_partial(*args, **kwargs)
+                    bound.apply_defaults()
+                    home = bound.arguments.get(home_arg)
+                    home_id = getattr(home, 'pk', home)
                 
-                # Try to get from cache
-                result = cache.get(cache_key)
-                
-                if result is None:
-                    # Cache miss - execute function
-                    result = func(*args, **kwargs)
-                    
-                    # Store in cache
-                    cache.set(cache_key, result, timeout)
-                
-                return result
+                # Generate cache key
+                cache_key = CacheService.scoped_key(
+                    prefix, func.__name__,
+                    CacheService.generate_cache_key(*args, **kwargs),
+                    home_id=home_id
+                )
+                return CacheService.get_or_set(
+                    cache_key, lambda: func(*args, **kwargs),
+                    timeout=timeout, stale_timeout=stale_timeout, prefix=prefix
+                )
             
             return wrapper
         return decorator
@@ -98,33 +581,50 @@ class CacheService:
         """
         Invalidate all cache keys matching a pattern
         
+        The pattern's leading namespace (e.g. "dashboard" in "dashboard:*")
+        has its generation bumped, which invalidates every scoped key under it
+        with one INCR. Patterns without a literal namespace are purged on Redis
+        with an incremental SCAN (never KEYS); other backends are left alone
+        rather than cleared.
+        
         Args:
             pattern: Cache key pattern (e.g., "dashboard:*")
         """
-        # Note: This requires Redis backend
-        try:
-            from django_redis import get_redis_connection
-            conn = get_redis_connection("default")
-            
-            # Find all keys matching pattern
-            keys = conn.keys(pattern)
-            
-            if keys:
-                conn.delete(*keys)
-                
-        except Exception as e:
-            # Fallback if Redis not available
-            cache.clear()
+        namespace = pattern.split(':', 1)[0]
+        if namespace and '*' not in namespace and '?' not in namespace:
+            CacheService._defer(namespaces=[namespace])
+            return
+        
+        conn = CacheService._redis()
+        if conn is None:
+            logger.warning(f"Cannot invalidate pattern {pattern!r} without Redis - ignored")
+            return
+        
+        batch = []
+        for key in conn.scan_iter(match=cache.make_key(pattern), count=1000):
+            batch.append(key)
+            if len(batch) >= 500:
+                conn.delete(*batch)
+                batch = []
+        if batch:
+            conn.delete(*batch)
     
     @staticmethod
     def warm_dashboard_cache(home_id: Optional[int] = None):
         """
         Pre-populate dashboard caches for faster load times
         
+        Warms shift counts and every dashboard the warm-up planner has seen
+        requested regularly (see dashboard_warmup).
+        
         Args:
             home_id: Specific home to warm cache for (None = all homes)
+            
+        Returns:
+            Warm-up report from dashboard_warmup.warm()
         """
         from scheduling.models import CareHome, Shift
+        from scheduling import dashboard_warmup
         from django.utils import timezone
         from datetime import timedelta
         
@@ -136,13 +636,17 @@ class CacheService:
             for days_ahead in [7, 14, 30]:
                 end_date = today + timedelta(days=days_ahead)
                 
-                cache_key = f"{CacheService.PREFIX_SHIFT}:count:{home.id}:{today}:{end_date}"
+                cache_key = CacheService.scoped_key(
+                    CacheService.PREFIX_SHIFT, 'count', today, end_date, home_id=home.id
+                )
                 count = Shift.objects.filter(
-                    home=home,
+                    unit__care_home=home,
                     date__gte=today,
                     date__lte=end_date
                 ).count()
                 cache.set(cache_key, count, CacheService.TIMEOUT_MEDIUM)
+        
+        return dashboard_warmup.warm(home_ids=[home_id] if home_id else None)
     
     @staticmethod
     def get_or_cache_queryset(cache_key: str, queryset_func: Callable, timeout: int = TIMEOUT_MEDIUM) -> Any:
@@ -150,62 +654,84 @@ class CacheService:
         Get result from cache or execute queryset function
         
         Args:
-            cache_key: Cache key to use
+            cache_key: Cache key to use (build with scoped_key() to make it invalidatable)
             queryset_func: Function that returns queryset/data
             timeout: Cache timeout in seconds
             
         Returns:
             Cached or fresh data
         """
-        result = cache.get(cache_key)
-        
-        if result is None:
-            result = queryset_func()
-            
-            # Convert QuerySet to list for caching
-            if isinstance(result, QuerySet):
-                result = list(result)
-            
-            cache.set(cache_key, result, timeout)
-        
-        return result
+        return CacheService.get_or_set(cache_key, queryset_func, timeout=timeout)
     
     @staticmethod
     def invalidate_home_cache(home_id: int):
         """
-        Invalidate all caches related to a specific home
+        Invalidate all caches related to a specific home (one INCR)
+        
+        Deferred to commit inside a transaction.
         
         Args:
             home_id: ID of the care home
         """
-        patterns = [
-            f"{CacheService.PREFIX_DASHBOARD}:*:{home_id}:*",
-            f"{CacheService.PREFIX_STATS}:*:{home_id}:*",
-            f"{CacheService.PREFIX_SHIFT}:*:{home_id}:*",
-            f"{CacheService.PREFIX_COMPLIANCE}:*:{home_id}:*",
-        ]
-        
-        for pattern in patterns:
-            CacheService.invalidate_pattern(pattern)
+        CacheService._defer(namespaces=[f"home:{home_id}"])
     
     @staticmethod
     def invalidate_shift_cache(shift_id: int = None, home_id: int = None, date = None):
         """
         Invalidate shift-related caches
         
+        Deferred to commit inside a transaction.
+        
         Args:
-            shift_id: Specific shift ID
-            home_id: Home ID for bulk invalidation
-            date: Date for date-specific invalidation
+            shift_id: Specific shift ID (purges keys tagged "shift:<id>")
+            home_id: Home ID - only that home's shift caches are invalidated
+            date: Date of the change (covered by the home/domain generation)
         """
-        if shift_id:
-            CacheService.invalidate_pattern(f"{CacheService.PREFIX_SHIFT}:*:{shift_id}:*")
-        
         if home_id:
-            CacheService.invalidate_pattern(f"{CacheService.PREFIX_SHIFT}:*:{home_id}:*")
+            namespace = f"{CacheService.PREFIX_SHIFT}:home:{home_id}"
+        else:
+            namespace = CacheService.PREFIX_SHIFT
+        tags = [f"{CacheService.PREFIX_SHIFT}:{shift_id}"] if shift_id else []
+        
+        CacheService._defer(namespaces=[namespace], tags=tags)
+    
+    @staticmethod
+    def invalidate_unit_shifts(unit_ids, dates=None):
+        """
+        Invalidate shift and home caches for the homes owning these units
+        
+        For bulk writes that bypass post_save (bulk_create, queryset delete).
+        Also refreshes the units' daily metrics rollup on commit.
+        
+        Args:
+            unit_ids: Iterable of Unit IDs touched by the write
+            dates: Iterable of shift dates touched, or None if unknown
+                (the units' whole rollup history is then rebuilt)
+        """
+        from scheduling.models import Unit
+        from scheduling import daily_metrics, reference_data
+        
+        unit_ids = set(unit_ids)
+        daily_metrics.mark_stale(unit_ids, dates)
+        
+        home_ids = set()
+        unknown = set()
+        for unit_id in unit_ids:
+            home_id = reference_data.home_id_for_unit(unit_id)
+            if home_id is None:
+                unknown.add(unit_id)
+            home_ids.add(home_id)
+        if unknown:
+            home_ids.update(
+                Unit.objects.filter(pk__in=unknown).values_list('care_home_id', flat=True)
+            )
+        for home_id in home_ids - {None}:
+            CacheService.invalidate_shift_cache(home_id=home_id)
+            CacheService.invalidate_home_cache(home_id)
         
-        if date:
-            CacheService.invalidate_pattern(f"{CacheService.PREFIX_SHIFT}:*:{date}:*")
+        # Recompute the dashboards these homes' managers use, after commit
+        from scheduling.dashboard_warmup import schedule_warm
+        schedule_warm(home_ids)
     
     @staticmethod
     def get_cache_stats() -> dict:
@@ -227,6 +753,7 @@ class CacheService:
                 'hit_rate': info.get('keyspace_hits', 0) / max(1, info.get('keyspace_hits', 0) + info.get('keyspace_misses', 0)),
                 'connected_clients': info.get('connected_clients', 0),
                 'uptime_days': info.get('uptime_in_days', 0),
+                'prefixes': CacheService.get_prefix_stats(),
             }
         except:
             return {
@@ -235,6 +762,7 @@ class CacheService:
                 'hit_rate': 0.0,
                 'connected_clients': 0,
                 'uptime_days': 0,
+                'prefixes': CacheService.get_prefix_stats(),
             }
 
 
@@ -327,16 +855,22 @@ class QueryOptimizer:
 
 
 # Convenience decorators
-def cache_dashboard(timeout: int = CacheService.TIMEOUT_MEDIUM):
+def cache_dashboard(timeout: int = CacheService.TIMEOUT_MEDIUM, stale_timeout: Optional[int] = None,
+                    home_arg: str = None):
     """Decorator for caching dashboard data"""
-    return CacheService.cache_result(timeout=timeout, key_prefix=CacheService.PREFIX_DASHBOARD)
+    return CacheService.cache_result(timeout=timeout, key_prefix=CacheService.PREFIX_DASHBOARD,
+                                     home_arg=home_arg, stale_timeout=stale_timeout)
 
 
-def cache_stats(timeout: int = CacheService.TIMEOUT_LONG):
+def cache_stats(timeout: int = CacheService.TIMEOUT_LONG, stale_timeout: Optional[int] = None,
+                home_arg: str = None):
     """Decorator for caching statistics"""
-    return CacheService.cache_result(timeout=timeout, key_prefix=CacheService.PREFIX_STATS)
+    return CacheService.cache_result(timeout=timeout, key_prefix=CacheService.PREFIX_STATS,
+                                     home_arg=home_arg, stale_timeout=stale_timeout)
 
 
-def cache_report(timeout: int = CacheService.TIMEOUT_DAY):
+def cache_report(timeout: int = CacheService.TIMEOUT_DAY, stale_timeout: Optional[int] = None,
+                 home_arg: str = None):
     """Decorator for caching reports"""
-    return CacheService.cache_result(timeout=timeout, key_prefix=CacheService.PREFIX_REPORT)
+    return CacheService.cache_result(timeout=timeout, key_prefix=CacheService.PREFIX_REPORT,
+                                     home_arg=home_arg, stale_timeout=stale_timeout)
@@ -0,0 +1,396 @@
+"""
+Daily Unit Metrics Rollup
+
+Dashboards need the same daily facts for every view: scheduled hours,
+filled and unfilled shifts, agency and overtime counts and cost, and staff
+on leave. DailyUnitMetrics holds those facts per (unit, date), and this module
+keeps them current:
+
+- refresh() recomputes a set of units and dates. It runs one grouped Shift
+  query and one LeaveRequest query, then upserts the rows. Rows whose
+  shifts and leave have all gone are deleted
+- Shift and LeaveRequest saves and deletes mark their (unit, date) rows
+  stale (signals.py). Bulk writes do the same through
+  CacheService.invalidate_unit_shifts(). Stale rows are refreshed once on
+  commit, or straight away outside a transaction
+- reconcile() rebuilds the last DAILY_METRICS_RECONCILE_DAYS days every night
+  (tasks.reconcile_daily_metrics). That catches writes no signal sees,
+  such as queryset update()
+- backfill() rebuilds any date range in chunks (manage.py
+  backfill_daily_metrics)
+
+Costs use the cost_analytics defaults: the shift's agency_hourly_rate, or
+DEFAULT_AGENCY_RATE, for agency shifts; and DEFAULT_PERMANENT_RATE x
+DEFAULT_OVERTIME_MULTIPLIER for overtime. Hours come from the shift type.
+
+Usage:
+    from scheduling import daily_metrics
+
+    week = daily_metrics.totals(care_home=home, start_date=monday, end_date=sunday)
+    fill_rate = week['filled_shifts'] / week['total_shifts']
+    by_day = daily_metrics.daily_series(unit=unit, start_date=start, end_date=end)
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .cost_analytics import DEFAULT_AGENCY_RATE, DEFAULT_OVERTIME_MULTIPLIER, DEFAULT_PERMANENT_RATE
+
+logger = logging.getLogger(__name__)
+
+DAILY_METRICS_RECONCILE_DAYS = getattr(settings, 'DAILY_METRICS_RECONCILE_DAYS', 35)
+DAILY_METRICS_BACKFILL_CHUNK_DAYS = getattr(settings, 'DAILY_METRICS_BACKFILL_CHUNK_DAYS', 31)
+
+OVERTIME_HOURLY_COST = DEFAULT_PERMANENT_RATE * DEFAULT_OVERTIME_MULTIPLIER
+
+COUNT_FIELDS = [
+    'total_shifts', 'filled_shifts', 'unfilled_shifts',
+    'agency_shifts', 'overtime_shifts', 'leave_days',
+]
+DECIMAL_FIELDS = [
+    'scheduled_hours', 'agency_hours', 'agency_cost', 'overtime_hours', 'overtime_cost',
+]
+METRIC_FIELDS = COUNT_FIELDS + DECIMAL_FIELDS
+
+ACTIVE_SHIFT_Q = ~Q(status='CANCELLED')
+FILLED_SHIFT_Q = Q(status__in=['SCHEDULED', 'CONFIRMED'])
+# Same definitions as the dashboards: a scheduled shift nobody holds is open
+ASSIGNED_SHIFT_Q = FILLED_SHIFT_Q & Q(user__isnull=False)
+UNFILLED_SHIFT_Q = Q(status='UNCOVERED') | (FILLED_SHIFT_Q & Q(user__isnull=True))
+AGENCY_SHIFT_Q = FILLED_SHIFT_Q & Q(shift_classification='AGENCY')
+OVERTIME_SHIFT_Q = FILLED_SHIFT_Q & Q(shift_classification='OVERTIME')
+
+_MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _empty():
+    return dict.fromkeys(METRIC_FIELDS, 0)
+
+
+def _shift_facts(unit_ids, start_date, end_date, dates):
+    """{(unit_id, date): (care_home_id, facts)} from one grouped Shift query"""
+    from .models import Shift
+
+    shifts = Shift.objects.all()
+    if unit_ids is not None:
+        shifts = shifts.filter(unit_id__in=unit_ids)
+    if dates is not None:
+        shifts = shifts.filter(date__in=dates)
+    else:
+        if start_date:
+            shifts = shifts.filter(date__gte=start_date)
+        if end_date:
+            shifts = shifts.filter(date__lte=end_date)
+
+    hours = F('shift_type__duration_hours')
+    agency_rate = Coalesce('agency_hourly_rate', Value(DEFAULT_AGENCY_RATE), output_field=_MONEY)
+
+    rows = shifts.values('unit_id', 'unit__care_home_id', 'date').annotate(
+        total_shifts=Count('id', filter=ACTIVE_SHIFT_Q),
+        filled_shifts=Count('id', filter=ASSIGNED_SHIFT_Q),
+        unfilled_shifts=Count('id', filter=UNFILLED_SHIFT_Q),
+        scheduled_hours=Sum(hours, filter=ACTIVE_SHIFT_Q),
+        agency_shifts=Count('id', filter=AGENCY_SHIFT_Q),
+        agency_hours=Sum(hours, filter=AGENCY_SHIFT_Q),
+        agency_cost=Sum(ExpressionWrapper(hours * agency_rate, output_field=_MONEY), filter=AGENCY_SHIFT_Q),
+        overtime_shifts=Count('id', filter=OVERTIME_SHIFT_Q),
+        overtime_hours=Sum(hours, filter=OVERTIME_SHIFT_Q),
+    ).order_by()
+
+    facts = {}
+    for row in rows:
+        values = _empty()
+        for field in METRIC_FIELDS:
+            if row.get(field) is not None:
+                values[field] = row[field]
+        values['overtime_cost'] = (
+            Decimal(values['overtime_hours']) * OVERTIME_HOURLY_COST
+        ).quantize(Decimal('0.01'))
+        facts[(row['unit_id'], row['date'])] = (row['unit__care_home_id'], values)
+    return facts
+
+
+def _leave_days(unit_ids, start_date, end_date, dates):
+    """{(unit_id, date): (care_home_id, staff on approved leave)}"""
+    from .models import LeaveRequest
+
+    wanted = set(dates) if dates is not None else None
+    if wanted is not None:
+        start_date, end_date = min(wanted), max(wanted)
+
+    leave = LeaveRequest.objects.filter(status='APPROVED', user__unit__isnull=False)
+    if unit_ids is not None:
+        leave = leave.filter(user__unit_id__in=unit_ids)
+    if start_date:
+        leave = leave.filter(end_date__gte=start_date)
+    if end_date:
+        leave = leave.filter(start_date__lte=end_date)
+
+    counts = defaultdict(int)
+    homes = {}
+    for unit_id, home_id, first, last in leave.values_list(
+        'user__unit_id', 'user__unit__care_home_id', 'start_date', 'end_date'
+    ):
+        homes[unit_id] = home_id
+        day = max(first, start_date) if start_date else first
+        last = min(last, end_date) if end_date else last
+        while day <= last:
+            if wanted is None or day in wanted:
+                counts[(unit_id, day)] += 1
+            day += timedelta(days=1)
+
+    return {key: (homes[key[0]], days) for key, days in counts.items()}
+
+
+def compute(unit_ids=None, dates=None, start_date=None, end_date=None):
+    """
+    Daily facts straight from Shift and LeaveRequest, without writing them
+
+    Args:
+        unit_ids: Units to compute (default: all)
+        dates: Exact dates to compute, or None for start_date..end_date
+        start_date, end_date: Inclusive range (either may be None for open-ended)
+
+    Returns:
+        dict: {(unit_id, date): (care_home_id, {field: value})}
+    """
+    if unit_ids is not None:
+        unit_ids = set(unit_ids)
+    if dates is not None:
+        dates = sorted(set(dates))
+        if not dates:
+            return {}
+
+    facts = _shift_facts(unit_ids, start_date, end_date, dates)
+    for key, (home_id, days) in _leave_days(unit_ids, start_date, end_date, dates).items():
+        facts.setdefault(key, (home_id, _empty()))[1]['leave_days'] = days
+    return facts
+
+
+def refresh(unit_ids=None, dates=None, start_date=None, end_date=None):
+    """
+    Recompute and store DailyUnitMetrics rows for these units and dates
+
+    Takes the same arguments as compute(). Rows in scope that no longer
+    have any shifts or leave are deleted.
+
+    Returns:
+        dict: {'written': int, 'deleted': int}
+    """
+    from .models import DailyUnitMetrics
+
+    if unit_ids is not None:
+        unit_ids = set(unit_ids)
+        if not unit_ids:
+            return {'written': 0, 'deleted': 0}
+    if dates is not None:
+        dates = sorted(set(dates))
+        if not dates:
+            return {'written': 0, 'deleted': 0}
+
+    facts = compute(unit_ids, dates, start_date, end_date)
+
+    existing = DailyUnitMetrics.objects.all()
+    if unit_ids is not None:
+        existing = existing.filter(unit_id__in=unit_ids)
+    if dates is not None:
+        existing = existing.filter(date__in=dates)
+    else:
+        if start_date:
+            existing = existing.filter(date__gte=start_date)
+        if end_date:
+            existing = existing.filter(date__lte=end_date)
+
+    rows = [
+        DailyUnitMetrics(unit_id=unit_id, care_home_id=home_id, date=day, **values)
+        for (unit_id, day), (home_id, values) in facts.items()
+    ]
+
+    with transaction.atomic():
+        gone = [
+            pk for pk, unit_id, day in existing.values_list('pk', 'unit_id', 'date')
+            if (unit_id, day) not in facts
+        ]
+        if gone:
+            DailyUnitMetrics.objects.filter(pk__in=gone).delete()
+        DailyUnitMetrics.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['unit', 'date'],
+            update_fields=['care_home'] + METRIC_FIELDS + ['refreshed_at'],
+        )
+
+    return {'written': len(rows), 'deleted': len(gone)}
+
+
+# Incremental refresh
+
+_pending = threading.local()
+
+
+def mark_stale(unit_ids, dates=None):
+    """
+    Refresh these units' rows once the current transaction commits
+
+    Outside a transaction the refresh runs immediately. Marks made during one
+    transaction are merged into a single refresh.
+
+    Args:
+        unit_ids: Iterable of Unit IDs
+        dates: Iterable of dates, or None to rebuild every date of these units
+    """
+    unit_ids = {unit_id for unit_id in unit_ids if unit_id is not None}
+    if not unit_ids:
+        return
+    dates = None if dates is None else set(dates)
+
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        _flush({'units': {unit_id: dates for unit_id in unit_ids}})
+        return
+
+    # Same batching as CacheService._defer: one on_commit hook per transaction
+    batch = getattr(_pending, 'batch', None)
+    if batch is None or batch['flushed'] or batch['hooks'] is not conn.run_on_commit:
+        batch = {'units': {}, 'flushed': False}
+        transaction.on_commit(partial(_flush, batch))
+        batch['hooks'] = conn.run_on_commit
+        _pending.batch = batch
+
+    units = batch['units']
+    for unit_id in unit_ids:
+        if dates is None:
+            units[unit_id] = None
+        elif unit_id not in units:
+            units[unit_id] = set(dates)
+        elif units[unit_id] is not None:
+            units[unit_id].update(dates)
+
+
+def _flush(batch):
+    """Refresh stale units; a failure is logged and left to the nightly reconcile"""
+    batch['flushed'] = True
+    units = batch['units']
+    whole = [unit_id for unit_id, dates in units.items() if dates is None]
+    dated = {unit_id: dates for unit_id, dates in units.items() if dates is not None}
+    try:
+        if whole:
+            refresh(whole)
+        if dated:
+            refresh(dated, dates=set().union(*dated.values()))
+    except Exception:
+        logger.exception("Daily metrics refresh failed for units %s", sorted(units))
+
+
+def reconcile(days=None, today=None):
+    """
+    Rebuild `days` days either side of today
+
+    Future days are included because rotas are published weeks ahead.
+
+    Returns:
+        dict: refresh() counts plus the date range rebuilt
+    """
+    from django.utils import timezone
+
+    days = days or DAILY_METRICS_RECONCILE_DAYS
+    today = today or timezone.localdate()
+    start_date = today - timedelta(days=days)
+    end_date = today + timedelta(days=days)
+
+    result = refresh(start_date=start_date, end_date=end_date)
+    return {**result, 'start_date': start_date, 'end_date': end_date}
+
+
+def backfill(start_date, end_date, unit_ids=None, chunk_days=None):
+    """
+    Rebuild start_date..end_date in chunks, yielding each chunk's result
+
+    Yields:
+        (chunk_start, chunk_end, refresh() result)
+    """
+    chunk = timedelta(days=chunk_days or DAILY_METRICS_BACKFILL_CHUNK_DAYS)
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + chunk - timedelta(days=1), end_date)
+        yield chunk_start, chunk_end, refresh(unit_ids, start_date=chunk_start, end_date=chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+# Dashboard queries
+
+def _rollup(care_home=None, unit=None, start_date=None, end_date=None):
+    from .models import DailyUnitMetrics
+
+    rows = DailyUnitMetrics.objects.all()
+    if unit:
+        rows = rows.filter(unit=unit)
+    elif care_home:
+        rows = rows.filter(care_home=care_home)
+    if start_date:
+        rows = rows.filter(date__gte=start_date)
+    if end_date:
+        rows = rows.filter(date__lte=end_date)
+    return rows
+
+
+def _sums():
+    return {field: Sum(field) for field in METRIC_FIELDS}
+
+
+def _as_python(row):
+    """Counts as int, hours and money as float"""
+    return {
+        field: float(row[field] or 0) if field in DECIMAL_FIELDS else int(row[field] or 0)
+        for field in METRIC_FIELDS
+    }
+
+
+def totals(care_home=None, unit=None, start_date=None, end_date=None, group_by=None):
+    """
+    Summed daily facts for a home or unit over a date range
+
+    Args:
+        group_by: None for one total, or 'care_home', 'unit' or 'date' for
+            one total per home, unit or day
+
+    Returns:
+        dict: {field: total}, or {group_id: {field: total}} when grouped
+    """
+    rows = _rollup(care_home, unit, start_date, end_date)
+    if group_by is None:
+        return _as_python(rows.aggregate(**_sums()))
+
+    key = {'care_home': 'care_home_id', 'unit': 'unit_id', 'date': 'date'}[group_by]
+    grouped = rows.values(key).annotate(**_sums()).order_by(key)
+    return {row[key]: _as_python(row) for row in grouped}
+
+
+def daily_series(care_home=None, unit=None, start_date=None, end_date=None):
+    """
+    One total per day from start_date to end_date, zero-filled
+
+    Returns:
+        dict: {date: {field: total}} in date order
+    """
+    by_day = totals(care_home, unit, start_date, end_date, group_by='date')
+    if not start_date or not end_date:
+        return by_day
+
+    zero = _as_python(_empty())
+    series = {}
+    day = start_date
+    while day <= end_date:
+        series[day] = by_day.get(day, dict(zero))
+        day += timedelta(days=1)
+    return series
@@ -0,0 +1,446 @@
+"""
+Dashboard Warm-up Planner
+
+The expensive management pages (Head of Service dashboard, analytics
+summary, KPI summary, executive summary) are cached through @warmable,
+which also records who asks for what:
+
+- Each call is reduced to a replayable spec (dashboard name plus its
+  arguments, with model instances stored by primary key and dates stored
+  relative to today) and counted per day in the shared cache
+- The first request of each day for a spec records the minute it arrived
+  and whether it found the cache warm; computing a value records its cost
+
+ActivityLog and SystemAccessLog only hold actions and logins, not page
+views, so the planner learns demand from these records instead.
+
+plan() picks the specs requested on at least DASHBOARD_WARMUP_MIN_DAYS of
+the last DASHBOARD_WARMUP_LOOKBACK_DAYS days. warm() replays them through
+the cached functions. They run:
+
+- Every few minutes via Celery Beat (warm_dashboards): specs whose usual
+  first request is within DASHBOARD_WARMUP_LEAD_MINUTES and that nobody
+  has requested yet today, i.e. just before the morning peak
+- After bulk roster writes (schedule_warm(), called from
+  CacheService.invalidate_unit_shifts): every planned spec of the homes
+  that changed, once the write commits
+
+coverage_report() shows how many first-of-day requests found the cache
+warm and the compute time that saved.
+
+Cached values are scoped to the home's cache namespace (all homes for
+all-homes views), so invalidate_home_cache() drops them like any other
+home-scoped key.
+
+Usage:
+    from scheduling.dashboard_warmup import warmable
+
+    @warmable('kpi_summary')
+    def get_kpi_summary(care_home=None, period='month'):
+        ...
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils import timezone
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from functools import wraps
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import threading
+import time
+
+from . import reference_data
+from .cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_WARMUP_LOOKBACK_DAYS = getattr(settings, 'DASHBOARD_WARMUP_LOOKBACK_DAYS', 14)
+DASHBOARD_WARMUP_MIN_DAYS = getattr(settings, 'DASHBOARD_WARMUP_MIN_DAYS', 3)
+DASHBOARD_WARMUP_LEAD_MINUTES = getattr(settings, 'DASHBOARD_WARMUP_LEAD_MINUTES', 30)
+
+# Seconds between a bulk roster write committing and its warm-up
+DASHBOARD_WARMUP_DELAY = getattr(settings, 'DASHBOARD_WARMUP_DELAY', 60)
+
+# Specs tracked at most (new ones are ignored once full)
+DASHBOARD_WARMUP_MAX_SPECS = getattr(settings, 'DASHBOARD_WARMUP_MAX_SPECS', 500)
+
+# Modules whose @warmable functions the planner replays
+WARMABLE_MODULES = (
+    'scheduling.analytics',
+    'scheduling.kpi_tracking',
+    'scheduling.executive_summary_service',
+    'scheduling.views_senior_dashboard',
+)
+
+DEMAND_PREFIX = 'warmup'
+INDEX_KEY = f'{DEMAND_PREFIX}:index'
+DEMAND_TIMEOUT = (DASHBOARD_WARMUP_LOOKBACK_DAYS + 1) * CacheService.TIMEOUT_DAY
+
+WarmTarget = namedtuple('WarmTarget', [
+    'digest', 'name', 'spec', 'home_id', 'days_requested', 'requests', 'first_minute'
+])
+
+WARMABLE = {}   # name -> cached function
+
+_state = threading.local()
+_indexed = set()   # digests this process has already added to the index
+
+
+# ----------------------------------------------------------------------
+# Specs
+# ----------------------------------------------------------------------
+
+def _encode(value, today):
+    if isinstance(value, models.Model):
+        return {'model': value._meta.label_lower, 'pk': value.pk}
+    if isinstance(value, datetime):
+        raise TypeError('datetime arguments cannot be replayed')
+    if isinstance(value, date):
+        return {'days': (value - today).days}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f'{type(value).__name__} arguments cannot be replayed')
+
+
+def _decode(value, today):
+    if not isinstance(value, dict):
+        return value
+    if 'days' in value:
+        return today + timedelta(days=value['days'])
+
+    model = apps.get_model(value['model'])
+    if model._meta.label_lower == 'scheduling.carehome':
+        return reference_data.get_care_home(pk=value['pk'])
+    if model._meta.label_lower == 'scheduling.unit':
+        return reference_data.get_unit(pk=value['pk'])
+    return model.objects.get(pk=value['pk'])
+
+
+def _digest(name, spec) -> str:
+    payload = json.dumps([name, spec], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def _home_id(value):
+    """Care home id from an instance, id or name ('' / None = all homes)"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, models.Model):
+        return value.pk
+    if isinstance(value, int):
+        return value
+    try:
+        return reference_data.get_care_home(name=value).pk
+    except apps.get_model('scheduling', 'CareHome').DoesNotExist:
+        return None
+
+
+def _cache_key(name, today, digest, home_id) -> str:
+    """
+    Key stamped with the home's namespace generations, or with every home's
+    for all-homes views, so any home invalidation drops them
+    """
+    if home_id is not None:
+        return CacheService.scoped_key(
+            CacheService.PREFIX_DASHBOARD, name, today, digest, home_id=home_id
+        )
+
+    namespaces = [CacheService.PREFIX_DASHBOARD] + [
+        f"home:{home.pk}" for home in reference_data.care_homes(active_only=False)
+    ]
+    generations = CacheService.get_generations(namespaces)
+    stamp = '.'.join(str(generations[n]) for n in namespaces)
+    return ':'.join([CacheService.PREFIX_DASHBOARD, f"g{stamp}", name, str(today), digest])
+
+
+# ----------------------------------------------------------------------
+# Decorator
+# ----------------------------------------------------------------------
+
+def warmable(name: str, timeout: int = CacheService.TIMEOUT_LONG, stale_timeout: int = None,
+             home_arg: str = 'care_home'):
+    """
+    Cache a dashboard function and record demand for the warm-up planner
+
+    Args:
+        name: Dashboard name (unique; used in keys and reports)
+        timeout: Soft TTL in seconds
+        stale_timeout: Extra seconds a stale value may be served (default = timeout)
+        home_arg: Argument holding the care home (instance, id or name)
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            today = timezone.localdate()
+            try:
+                spec = {arg: _encode(value, today) for arg, value in bound.arguments.items()}
+            except TypeError as e:
+                logger.debug(f"Not caching {name}: {e}")
+                return func(*args, **kwargs)
+
+            digest = _digest(name, spec)
+            home_id = _home_id(bound.arguments.get(home_arg)) if home_arg else None
+            caller = threading.get_ident()
+            computed = []
+
+            def compute():
+                started = time.perf_counter()
+                value = func(*args, **kwargs)
+                cache.set(
+                    f"{DEMAND_PREFIX}:cost:{digest}", time.perf_counter() - started, DEMAND_TIMEOUT
+                )
+                # Background refreshes of stale entries run on other threads
+                if threading.get_ident() == caller:
+                    computed.append(True)
+                return value
+
+            # Dashboards computed inside another one are not separate demand
+            depth = getattr(_state, 'depth', 0)
+            _state.depth = depth + 1
+            try:
+                value = CacheService.get_or_set(
+                    _cache_key(name, today, digest, home_id), compute,
+                    timeout=timeout, stale_timeout=stale_timeout, prefix=f"dashboard.{name}"
+                )
+            finally:
+                _state.depth = depth
+
+            if depth:
+                return value
+            if getattr(_state, 'warming', False):
+                _state.computed = bool(computed)
+            else:
+                _record_demand(name, spec, digest, home_id, today, warm=not computed)
+            return value
+
+        WARMABLE[name] = wrapper
+        return wrapper
+    return decorator
+
+
+def _record_demand(name, spec, digest, home_id, today, warm):
+    if digest not in _indexed:
+        index = cache.get(INDEX_KEY) or {}
+        if digest not in index and len(index) < DASHBOARD_WARMUP_MAX_SPECS:
+            index[digest] = {'name': name, 'spec': spec, 'home_id': home_id}
+            cache.set(INDEX_KEY, index, None)
+        _indexed.add(digest)
+
+    requests_key = f"{DEMAND_PREFIX}:n:{digest}:{today}"
+    cache.add(requests_key, 0, DEMAND_TIMEOUT)
+    try:
+        cache.incr(requests_key)
+    except ValueError:
+        pass
+
+    now = timezone.localtime()
+    cache.add(
+        f"{DEMAND_PREFIX}:first:{digest}:{today}", (now.hour * 60 + now.minute, warm), DEMAND_TIMEOUT
+    )
+
+
+# ----------------------------------------------------------------------
+# Planner
+# ----------------------------------------------------------------------
+
+def plan(today: date = None) -> list:
+    """
+    Specs worth warming, ordered by the time they are usually first needed
+
+    Returns:
+        List of WarmTarget; first_minute is the lower quartile of the
+        minute-of-day of each day's first request
+    """
+    today = today or timezone.localdate()
+    days = [today - timedelta(days=n) for n in range(1, DASHBOARD_WARMUP_LOOKBACK_DAYS + 1)]
+    index = cache.get(INDEX_KEY) or {}
+
+    keys = []
+    for digest in index:
+        for day in days:
+            keys += [f"{DEMAND_PREFIX}:first:{digest}:{day}", f"{DEMAND_PREFIX}:n:{digest}:{day}"]
+    found = cache.get_many(keys)
+
+    targets = []
+    for digest, meta in index.items():
+        firsts = sorted(
+            found[f"{DEMAND_PREFIX}:first:{digest}:{day}"][0] for day in days
+            if f"{DEMAND_PREFIX}:first:{digest}:{day}" in found
+        )
+        if len(firsts) < DASHBOARD_WARMUP_MIN_DAYS:
+            continue
+        targets.append(WarmTarget(
+            digest=digest,
+            name=meta['name'],
+            spec=meta['spec'],
+            home_id=meta['home_id'],
+            days_requested=len(firsts),
+            requests=sum(found.get(f"{DEMAND_PREFIX}:n:{digest}:{day}", 0) for day in days),
+            first_minute=firsts[len(firsts) // 4],
+        ))
+
+    targets.sort(key=lambda target: (target.first_minute, -target.requests))
+    return targets
+
+
+def due_targets(now: datetime = None) -> list:
+    """
+    Planned specs due within DASHBOARD_WARMUP_LEAD_MINUTES that nobody has
+    requested yet today
+    """
+    now = timezone.localtime(now)
+    minute = now.hour * 60 + now.minute
+    today = now.date()
+
+    targets = [
+        target for target in plan(today)
+        if target.first_minute - DASHBOARD_WARMUP_LEAD_MINUTES <= minute < target.first_minute
+    ]
+    requested = cache.get_many([f"{DEMAND_PREFIX}:first:{t.digest}:{today}" for t in targets])
+    return [t for t in targets if f"{DEMAND_PREFIX}:first:{t.digest}:{today}" not in requested]
+
+
+def _load_warmables():
+    for module in WARMABLE_MODULES:
+        importlib.import_module(module)
+
+
+def warm(targets: list = None, home_ids=None) -> dict:
+    """
+    Compute planned specs that are not already cached
+
+    Args:
+        targets: WarmTargets to warm (default: the whole plan)
+        home_ids: Only warm these homes' specs (plus all-homes views)
+
+    Returns:
+        Dict with targets/warmed/already_warm/failed counts and seconds spent
+    """
+    _load_warmables()
+    if targets is None:
+        targets = plan()
+    if home_ids is not None:
+        home_ids = set(home_ids)
+        targets = [t for t in targets if t.home_id is None or t.home_id in home_ids]
+
+    today = timezone.localdate()
+    report = {'targets': len(targets), 'warmed': 0, 'already_warm': 0, 'failed': 0, 'seconds': 0.0}
+
+    _state.warming = True
+    try:
+        for target in targets:
+            func = WARMABLE.get(target.name)
+            if func is None:
+                report['failed'] += 1
+                continue
+
+            started = time.perf_counter()
+            try:
+                func(**{arg: _decode(value, today) for arg, value in target.spec.items()})
+            except Exception as e:
+                logger.warning(f"Warming {target.name} ({target.digest}) failed: {e}")
+                report['failed'] += 1
+                continue
+
+            if _state.computed:
+                report['warmed'] += 1
+                report['seconds'] += time.perf_counter() - started
+            else:
+                report['already_warm'] += 1
+    finally:
+        _state.warming = False
+
+    logger.info(
+        f"Dashboard warm-up: {report['warmed']} warmed, {report['already_warm']} already warm, "
+        f"{report['failed']} failed in {report['seconds']:.1f}s"
+    )
+    return report
+
+
+def schedule_warm(home_ids):
+    """
+    Queue a warm-up of these homes' dashboards once the current transaction
+    commits (at most one per home per DASHBOARD_WARMUP_DELAY)
+    """
+    home_ids = sorted(set(home_ids) - {None})
+    if not home_ids:
+        return
+
+    def enqueue():
+        pending = [
+            home_id for home_id in home_ids
+            if cache.add(f"{DEMAND_PREFIX}:scheduled:{home_id}", 1, DASHBOARD_WARMUP_DELAY)
+        ]
+        if not pending:
+            return
+        try:
+            from .tasks import warm_dashboards
+            warm_dashboards.apply_async(kwargs={'home_ids': pending}, countdown=DASHBOARD_WARMUP_DELAY)
+        except Exception as e:
+            logger.warning(f"Dashboard warm-up enqueue failed: {e}")
+
+    transaction.on_commit(enqueue)
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def coverage_report(today: date = None, lookback_days: int = DASHBOARD_WARMUP_LOOKBACK_DAYS) -> dict:
+    """
+    Warm coverage of first-of-day requests and the compute time it saved
+
+    Time saved is estimated as the last measured compute cost of each spec
+    for every first-of-day request that found it warm.
+
+    Returns:
+        Dict with totals and a per-dashboard breakdown
+    """
+    today = today or timezone.localdate()
+    days = [today - timedelta(days=n) for n in range(lookback_days)]
+    index = cache.get(INDEX_KEY) or {}
+
+    keys = [f"{DEMAND_PREFIX}:cost:{digest}" for digest in index]
+    for digest in index:
+        keys += [f"{DEMAND_PREFIX}:first:{digest}:{day}" for day in days]
+    found = cache.get_many(keys)
+
+    dashboards = {}
+    for digest, meta in index.items():
+        row = dashboards.setdefault(
+            meta['name'], {'first_requests': 0, 'warm': 0, 'seconds_saved': 0.0}
+        )
+        cost = found.get(f"{DEMAND_PREFIX}:cost:{digest}", 0.0)
+        for day in days:
+            first = found.get(f"{DEMAND_PREFIX}:first:{digest}:{day}")
+            if first is None:
+                continue
+            row['first_requests'] += 1
+            if first[1]:
+                row['warm'] += 1
+                row['seconds_saved'] += cost
+
+    for row in dashboards.values():
+        row['coverage'] = row['warm'] / row['first_requests'] if row['first_requests'] else 0.0
+
+    first_requests = sum(row['first_requests'] for row in dashboards.values())
+    warm_count = sum(row['warm'] for row in dashboards.values())
+    return {
+        'days': lookback_days,
+        'first_requests': first_requests,
+        'warm': warm_count,
+        'coverage': warm_count / first_requests if first_requests else 0.0,
+        'seconds_saved': sum(row['seconds_saved'] for row in dashboards.values()),
+        'dashboards': dashboards,
+    }
@@ -6,6 +6,7 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from .models_multi_home import CareHome
+from . import reference_data
 
 
 def require_permission_level(required_level):
@@ -85,7 +86,7 @@ def require_home_access(home_param='care_home'):
             
             # Verify access to specified home
             try:
-                care_home = CareHome.objects.get(name=home_identifier)
+                care_home = reference_data.get_care_home(name=home_identifier)
             except CareHome.DoesNotExist:
                 messages.error(request, f"Care home '{home_identifier}' not found.")
                 raise PermissionDenied
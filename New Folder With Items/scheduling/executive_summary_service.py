@@ -8,6 +8,8 @@ from datetime import timedelta, date
 from decimal import Decimal
 import statistics
 
+from .dashboard_warmup import warmable
+
 
 class ExecutiveSummaryService:
     """
@@ -15,6 +17,7 @@ class ExecutiveSummaryService:
     """
     
     @staticmethod
+    @warmable('executive_kpis')
     def get_executive_kpis(care_home=None, start_date=None, end_date=None):
         """
         Get key performance indicators for executive summary
@@ -190,6 +193,7 @@ class ExecutiveSummaryService:
         }
     
     @staticmethod
+    @warmable('executive_trends')
     def get_trend_analysis(care_home=None, weeks=12):
         """
         Get weekly trend analysis for charts
@@ -406,6 +410,7 @@ class ExecutiveSummaryService:
         return comparison
     
     @staticmethod
+    @warmable('executive_insights')
     def get_executive_insights(care_home=None):
         """
         Generate AI-powered insights and recommendations
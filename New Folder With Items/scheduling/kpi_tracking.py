@@ -1,17 +1,402 @@
 """
 TASK 28: KPI TRACKING SYSTEM
 Calculate KPIs, track performance vs targets, and generate alerts
+
+KPIs are computed by a batch engine: each KPI declares the base aggregates
+it needs, and compute_kpis() fetches their union once for every requested
+home, unit and period before deriving the KPIs. The monthly pack for all
+homes (calculate_all_kpis) is one query per source table, not one set of
+queries per KPI.
 """
 
-from django.db.models import Count, Sum, Avg, F, Q, ExpressionWrapper, DecimalField
+from collections import namedtuple
+from django.db import transaction
+from django.db.models import Count, Sum, Max, Min, F, Q, ExpressionWrapper, DurationField
 from django.utils import timezone
-from datetime import datetime, timedelta, date
-from decimal import Decimal
+from datetime import timedelta
+import logging
+
+from .dashboard_warmup import warmable
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# KPI BATCH ENGINE
+# Each KPI declares the base aggregates it needs. A batch fetches the union
+# of those aggregates once: one grouped query per source table, with a
+# conditional aggregate per period, grouped by (home, unit). Every KPI for
+# every (home, unit, period) scope is then derived from the same rows.
+# ============================================================================
+
+FILLED_STATUSES = ['SCHEDULED', 'CONFIRMED']
+
+KPISpec = namedtuple('KPISpec', ['aggregates', 'derive'])
+
+
+def _shift_aggregates(start_date, end_date):
+    in_period = Q(date__gte=start_date, date__lte=end_date)
+    timed = in_period & Q(created_at__isnull=False, updated_at__isnull=False)
+    fill_time = ExpressionWrapper(F('updated_at') - F('created_at'), output_field=DurationField())
+    return {
+        'total_shifts': Count('pk', filter=in_period),
+        'filled_shifts': Count('pk', filter=in_period & Q(status__in=FILLED_STATUSES)),
+        'agency_shifts': Count('pk', filter=in_period & Q(shift_classification='AGENCY')),
+        'overtime_shifts': Count('pk', filter=in_period & Q(shift_classification='OVERTIME')),
+        'timed_shifts': Count('pk', filter=timed),
+        'fill_time_total': Sum(fill_time, filter=timed),
+        'fill_time_min': Min(fill_time, filter=timed),
+        'fill_time_max': Max(fill_time, filter=timed),
+    }
+
+
+def _staff_aggregates(start_date, end_date):
+    return {
+        'staff_left': Count('pk', filter=Q(
+            is_active=False, updated_at__date__gte=start_date, updated_at__date__lte=end_date
+        )),
+        'staff_at_start': Count('pk', filter=(
+            Q(is_active=True) | Q(updated_at__date__gte=start_date)
+        ) & Q(created_at__date__lte=start_date)),
+        'staff_at_end': Count('pk', filter=Q(is_active=True)),
+    }
+
+
+def _resident_aggregates(start_date, end_date):
+    return {
+        'occupied_beds': Count('pk', filter=Q(admission_date__lte=end_date)),
+    }
+
+
+def _leave_aggregates(start_date, end_date):
+    decided = Q(approval_date__date__gte=start_date, approval_date__date__lte=end_date)
+    wait = ExpressionWrapper(F('approval_date') - F('created_at'), output_field=DurationField())
+    return {
+        'leave_decisions': Count('pk', filter=decided),
+        'approval_time_total': Sum(wait, filter=decided),
+    }
+
+
+def _grouped(queryset, home_field, unit_field, aggregates, needed, periods):
+    """One query: each needed aggregate per period, grouped by (home, unit)"""
+    annotations = {}
+    for index, (start_date, end_date) in enumerate(periods):
+        for name, expression in aggregates(start_date, end_date).items():
+            if name in needed:
+                annotations[f'{name}__{index}'] = expression
+
+    rows = queryset.values(home_field, unit_field).annotate(**annotations).order_by()
+    return [
+        (
+            row[home_field],
+            row[unit_field],
+            {name: [row.get(f'{name}__{index}') for index in range(len(periods))] for name in needed},
+        )
+        for row in rows
+    ]
+
+
+def _fetch_shifts(needed, periods, home_ids):
+    from .models import Shift
+
+    shifts = Shift.objects.filter(
+        date__gte=min(start for start, _ in periods),
+        date__lte=max(end for _, end in periods)
+    )
+    if home_ids is not None:
+        shifts = shifts.filter(unit__care_home_id__in=home_ids)
+    return _grouped(shifts, 'unit__care_home_id', 'unit_id', _shift_aggregates, needed, periods)
+
+
+def _fetch_staff(needed, periods, home_ids):
+    from .models import User
+
+    staff = User.objects.all()
+    if home_ids is not None:
+        staff = staff.filter(unit__care_home_id__in=home_ids)
+    return _grouped(staff, 'unit__care_home_id', 'unit_id', _staff_aggregates, needed, periods)
+
+
+def _fetch_residents(needed, periods, home_ids):
+    from .models import Resident
+
+    residents = Resident.objects.filter(is_active=True)
+    if home_ids is not None:
+        residents = residents.filter(unit__care_home_id__in=home_ids)
+    return _grouped(residents, 'unit__care_home_id', 'unit_id', _resident_aggregates, needed, periods)
+
+
+def _fetch_leave(needed, periods, home_ids):
+    from .models import LeaveRequest
+
+    leave = LeaveRequest.objects.filter(approval_date__isnull=False)
+    if home_ids is not None:
+        leave = leave.filter(user__unit__care_home_id__in=home_ids)
+    return _grouped(leave, 'user__unit__care_home_id', 'user__unit_id', _leave_aggregates, needed, periods)
+
+
+def _fetch_training(needed, periods, home_ids):
+    """Active staff and those whose mandatory training is all current at period end"""
+    from .models import User
+
+    mandatory = Q(training_records__course__is_mandatory=True)
+    annotations = {'mandatory': Count('training_records', filter=mandatory)}
+    for index, (_, end_date) in enumerate(periods):
+        annotations[f'expired__{index}'] = Count(
+            'training_records', filter=mandatory & Q(training_records__expiry_date__lt=end_date)
+        )
+
+    staff = User.objects.filter(is_active=True)
+    if home_ids is not None:
+        staff = staff.filter(unit__care_home_id__in=home_ids)
+
+    # Compliance is per person, so fold one row per staff member into units
+    totals = {}
+    for row in staff.values('pk', 'unit__care_home_id', 'unit_id').annotate(**annotations).order_by():
+        key = (row['unit__care_home_id'], row['unit_id'])
+        counts = totals.setdefault(key, {
+            'total_staff': [0] * len(periods),
+            'compliant_staff': [0] * len(periods),
+        })
+        for index in range(len(periods)):
+            counts['total_staff'][index] += 1
+            if row['mandatory'] and not row[f'expired__{index}']:
+                counts['compliant_staff'][index] += 1
+
+    return [(home_id, unit_id, counts) for (home_id, unit_id), counts in totals.items()]
+
+
+def _fetch_capacity(needed, periods, home_ids):
+    """Bed capacity per home (units have no capacity of their own, see HOME_AGGREGATES)"""
+    from . import reference_data
+
+    return [
+        (home.pk, None, {'total_capacity': [home.bed_capacity or 0] * len(periods)})
+        for home in reference_data.care_homes(active_only=False)
+        if home_ids is None or home.pk in home_ids
+    ]
+
+
+def _total(values):
+    values = [value for value in values if value is not None]
+    return sum(values, values[0] * 0) if values else 0
+
+
+def _lowest(values):
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+def _highest(values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+# Base aggregate -> (source fetcher, how unit rows combine into a scope)
+KPI_AGGREGATES = {
+    'total_shifts': (_fetch_shifts, _total),
+    'filled_shifts': (_fetch_shifts, _total),
+    'agency_shifts': (_fetch_shifts, _total),
+    'overtime_shifts': (_fetch_shifts, _total),
+    'timed_shifts': (_fetch_shifts, _total),
+    'fill_time_total': (_fetch_shifts, _total),
+    'fill_time_min': (_fetch_shifts, _lowest),
+    'fill_time_max': (_fetch_shifts, _highest),
+    'staff_left': (_fetch_staff, _total),
+    'staff_at_start': (_fetch_staff, _total),
+    'staff_at_end': (_fetch_staff, _total),
+    'occupied_beds': (_fetch_residents, _total),
+    'total_capacity': (_fetch_capacity, _total),
+    'total_staff': (_fetch_training, _total),
+    'compliant_staff': (_fetch_training, _total),
+    'leave_decisions': (_fetch_leave, _total),
+    'approval_time_total': (_fetch_leave, _total),
+}
+
+# Aggregates kept per home only: a unit scope takes its home's value
+HOME_AGGREGATES = {'total_capacity'}
+
+
+def _percentage(part, whole):
+    return round(part / whole * 100, 2)
+
+
+def _hours(duration):
+    return duration.total_seconds() / 3600 if duration else 0
+
+
+def _derive_turnover(agg):
+    average_staff = (agg['staff_at_start'] + agg['staff_at_end']) / 2
+    if average_staff == 0:
+        return 0, {'staff_left': agg['staff_left'], 'average_staff': 0}
+    return _percentage(agg['staff_left'], average_staff), {
+        'staff_left': agg['staff_left'],
+        'staff_at_start': agg['staff_at_start'],
+        'staff_at_end': agg['staff_at_end'],
+        'average_staff': average_staff,
+    }
+
+
+def _derive_occupancy(agg):
+    if agg['total_capacity'] == 0:
+        return 0, {'occupied': 0, 'capacity': 0}
+    return _percentage(agg['occupied_beds'], agg['total_capacity']), {
+        'occupied_beds': agg['occupied_beds'],
+        'total_capacity': agg['total_capacity'],
+    }
+
+
+def _derive_share(part):
+    def derive(agg):
+        if agg['total_shifts'] == 0:
+            return 0, {part: 0, 'total_shifts': 0}
+        return _percentage(agg[part], agg['total_shifts']), {
+            part: agg[part],
+            'total_shifts': agg['total_shifts'],
+        }
+    return derive
+
+
+def _derive_compliance(agg):
+    if agg['total_staff'] == 0:
+        return 0, {'compliant_staff': 0, 'total_staff': 0}
+    return _percentage(agg['compliant_staff'], agg['total_staff']), {
+        'compliant_staff': agg['compliant_staff'],
+        'total_staff': agg['total_staff'],
+    }
+
+
+def _derive_fill_time(agg):
+    if agg['timed_shifts'] == 0:
+        return 0, {'shifts_analyzed': 0, 'average_hours': 0}
+    average_hours = round(_hours(agg['fill_time_total']) / agg['timed_shifts'], 2)
+    return average_hours, {
+        'shifts_analyzed': agg['timed_shifts'],
+        'average_hours': average_hours,
+        'fastest_fill': round(_hours(agg['fill_time_min']), 2),
+        'slowest_fill': round(_hours(agg['fill_time_max']), 2),
+    }
+
+
+def _derive_approval_time(agg):
+    if agg['leave_decisions'] == 0:
+        return 0, {'requests_decided': 0, 'average_hours': 0}
+    average_hours = round(_hours(agg['approval_time_total']) / agg['leave_decisions'], 2)
+    return average_hours, {
+        'requests_decided': agg['leave_decisions'],
+        'average_hours': average_hours,
+    }
+
+
+# KPI name key (matched as a substring of KPIDefinition.name) -> spec
+BATCH_KPIS = {
+    'staff turnover rate': KPISpec(('staff_left', 'staff_at_start', 'staff_at_end'), _derive_turnover),
+    'occupancy rate': KPISpec(('occupied_beds', 'total_capacity'), _derive_occupancy),
+    'agency usage': KPISpec(('agency_shifts', 'total_shifts'), _derive_share('agency_shifts')),
+    'compliance rate': KPISpec(('compliant_staff', 'total_staff'), _derive_compliance),
+    'shift fill time': KPISpec(
+        ('timed_shifts', 'fill_time_total', 'fill_time_min', 'fill_time_max'), _derive_fill_time
+    ),
+    'fill rate': KPISpec(('filled_shifts', 'total_shifts'), _derive_share('filled_shifts')),
+    'overtime percentage': KPISpec(('overtime_shifts', 'total_shifts'), _derive_share('overtime_shifts')),
+    'leave approval time': KPISpec(('leave_decisions', 'approval_time_total'), _derive_approval_time),
+}
+
+
+def _pk(obj):
+    return getattr(obj, 'pk', obj)
+
+
+def compute_kpis(kpi_keys=None, scopes=None, periods=None):
+    """
+    Compute several KPIs for several scopes and periods in one query batch
+
+    Each source table is queried once for all scopes and periods, whatever
+    the number of KPIs, homes or periods requested.
+
+    Args:
+        kpi_keys: BATCH_KPIS keys (default: all)
+        scopes: [(care_home, unit), ...] as instances, IDs or None
+            (default: every care home, home-wide). (None, None) is system-wide
+        periods: [(start_date, end_date), ...] (default: the last 30 days)
+
+    Returns:
+        dict: {(home_id, unit_id, start_date, end_date): {kpi_key: (value, details)}}
+    """
+    from . import reference_data
+
+    kpi_keys = list(kpi_keys or BATCH_KPIS)
+    if scopes is None:
+        scopes = [(home.pk, None) for home in reference_data.care_homes()]
+    scopes = [(_pk(home), _pk(unit)) for home, unit in scopes]
+    if periods is None:
+        end_date = timezone.now().date()
+        periods = [(end_date - timedelta(days=30), end_date)]
+    periods = list(dict.fromkeys((start, end) for start, end, *_ in periods))
+    if not scopes or not periods:
+        return {}
+
+    # A scope without a home needs every home's rows
+    home_ids = None if any(home_id is None for home_id, _ in scopes) else {home_id for home_id, _ in scopes}
+
+    # The union of the aggregates the requested KPIs need, by source
+    needed = {}
+    for key in kpi_keys:
+        for name in BATCH_KPIS[key].aggregates:
+            needed.setdefault(KPI_AGGREGATES[name][0], set()).add(name)
+
+    rows = []
+    for fetch, names in needed.items():
+        rows.extend(fetch(names, periods, home_ids))
+
+    results = {}
+    for home_id, unit_id in scopes:
+        matching = [
+            values for row_home, row_unit, values in rows
+            if (home_id is None or row_home == home_id) and (unit_id is None or row_unit == unit_id)
+        ]
+        unit_home_id = home_id
+        if unit_home_id is None and unit_id is not None:
+            unit_home_id = reference_data.home_id_for_unit(unit_id)
+        home_wide = [
+            values for row_home, _, values in rows
+            if (unit_id is None and home_id is None) or row_home == unit_home_id
+        ]
+        for index, (start_date, end_date) in enumerate(periods):
+            agg = {}
+            for names in needed.values():
+                for name in names:
+                    combine = KPI_AGGREGATES[name][1]
+                    source = home_wide if name in HOME_AGGREGATES else matching
+                    agg[name] = combine([values[name][index] for values in source if name in values])
+            results[(home_id, unit_id, start_date, end_date)] = {
+                key: BATCH_KPIS[key].derive(agg) for key in kpi_keys
+            }
+    return results
+
+
+def _kpi_key(name):
+    """BATCH_KPIS key for a KPI definition name, or None"""
+    name = name.lower()
+    for key in BATCH_KPIS:
+        if key in name:
+            return key
+    return None
+
+
+def _calculate_one(key, care_home, unit, start_date, end_date):
+    if not start_date or not end_date:
+        # Default to last month
+        end_date = end_date or timezone.now().date()
+        start_date = end_date - timedelta(days=30)
+    results = compute_kpis([key], scopes=[(care_home, unit)], periods=[(start_date, end_date)])
+    return next(iter(results.values()))[key]
 
 
 # ============================================================================
 # PREDEFINED KPI CALCULATORS
-# Each function calculates a specific KPI and returns the measurement value
+# Each function calculates a specific KPI and returns (value, details); they
+# are single-scope views onto the batch engine
 # ============================================================================
 
 def calculate_staff_turnover_rate(care_home=None, unit=None, start_date=None, end_date=None):
@@ -19,50 +404,7 @@ def calculate_staff_turnover_rate(care_home=None, unit=None, start_date=None, en
     Calculate staff turnover rate
     Formula: (Number of staff who left / Average total staff) * 100
     """
-    from .models import User
-    
-    if not start_date or not end_date:
-        # Default to last month
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-    
-    # Build queryset
-    qs = User.objects.all()
-    if care_home:
-        qs = qs.filter(care_home=care_home)
-    if unit:
-        qs = qs.filter(unit=unit)
-    
-    # Count staff who left during period (became inactive)
-    staff_left = qs.filter(
-        is_active=False,
-        updated_at__gte=start_date,
-        updated_at__lte=end_date
-    ).count()
-    
-    # Get average total staff (start + end / 2)
-    staff_at_start = qs.filter(
-        Q(is_active=True) | Q(updated_at__gte=start_date),
-        created_at__lte=start_date
-    ).count()
-    
-    staff_at_end = qs.filter(is_active=True).count()
-    
-    average_staff = (staff_at_start + staff_at_end) / 2 if (staff_at_start + staff_at_end) > 0 else 0
-    
-    if average_staff == 0:
-        return 0, {'staff_left': staff_left, 'average_staff': 0}
-    
-    turnover_rate = (staff_left / average_staff) * 100
-    
-    details = {
-        'staff_left': staff_left,
-        'staff_at_start': staff_at_start,
-        'staff_at_end': staff_at_end,
-        'average_staff': average_staff
-    }
-    
-    return round(turnover_rate, 2), details
+    return _calculate_one('staff turnover rate', care_home, unit, start_date, end_date)
 
 
 def calculate_occupancy_rate(care_home=None, unit=None, start_date=None, end_date=None):
@@ -70,40 +412,7 @@ def calculate_occupancy_rate(care_home=None, unit=None, start_date=None, end_dat
     Calculate occupancy rate
     Formula: (Occupied beds / Total beds) * 100
     """
-    from .models import Resident, Unit
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-    
-    # Get units
-    units_qs = Unit.objects.all()
-    if care_home:
-        units_qs = units_qs.filter(care_home=care_home)
-    if unit:
-        units_qs = units_qs.filter(id=unit.id)
-    
-    total_capacity = units_qs.aggregate(total=Sum('capacity'))['total'] or 0
-    
-    if total_capacity == 0:
-        return 0, {'occupied': 0, 'capacity': 0}
-    
-    # Count active residents during period
-    occupied = Resident.objects.filter(
-        Q(care_home=care_home) if care_home else Q(),
-        Q(unit=unit) if unit else Q(),
-        is_active=True,
-        admission_date__lte=end_date
-    ).count()
-    
-    occupancy_rate = (occupied / total_capacity) * 100
-    
-    details = {
-        'occupied_beds': occupied,
-        'total_capacity': total_capacity,
-    }
-    
-    return round(occupancy_rate, 2), details
+    return _calculate_one('occupancy rate', care_home, unit, start_date, end_date)
 
 
 def calculate_agency_usage_percentage(care_home=None, unit=None, start_date=None, end_date=None):
@@ -111,38 +420,7 @@ def calculate_agency_usage_percentage(care_home=None, unit=None, start_date=None
     Calculate percentage of shifts filled by agency staff
     Formula: (Agency shifts / Total shifts) * 100
     """
-    from .models import Shift
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-    
-    # Build queryset
-    qs = Shift.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date
-    )
-    
-    if care_home:
-        qs = qs.filter(care_home=care_home)
-    if unit:
-        qs = qs.filter(unit=unit)
-    
-    total_shifts = qs.count()
-    
-    if total_shifts == 0:
-        return 0, {'agency_shifts': 0, 'total_shifts': 0}
-    
-    agency_shifts = qs.filter(is_agency=True).count()
-    
-    agency_percentage = (agency_shifts / total_shifts) * 100
-    
-    details = {
-        'agency_shifts': agency_shifts,
-        'total_shifts': total_shifts,
-    }
-    
-    return round(agency_percentage, 2), details
+    return _calculate_one('agency usage', care_home, unit, start_date, end_date)
 
 
 def calculate_compliance_rate(care_home=None, unit=None, start_date=None, end_date=None):
@@ -150,95 +428,22 @@ def calculate_compliance_rate(care_home=None, unit=None, start_date=None, end_da
     Calculate training compliance rate
     Formula: (Staff with current training / Total staff) * 100
     """
-    from .models import User, TrainingRecord
-    
-    if not end_date:
-        end_date = timezone.now().date()
-    
-    # Get active staff
-    staff_qs = User.objects.filter(is_active=True)
-    
-    if care_home:
-        staff_qs = staff_qs.filter(care_home=care_home)
-    if unit:
-        staff_qs = staff_qs.filter(unit=unit)
-    
-    total_staff = staff_qs.count()
-    
-    if total_staff == 0:
-        return 0, {'compliant_staff': 0, 'total_staff': 0}
-    
-    # Count staff with all mandatory training up to date
-    compliant_staff = 0
-    
-    for staff in staff_qs:
-        # Check if all their mandatory training is current
-        mandatory_training = TrainingRecord.objects.filter(
-            staff=staff,
-            course__is_mandatory=True
-        )
-        
-        # Check if any are expired
-        expired = mandatory_training.filter(
-            expiry_date__lt=end_date
-        ).exists()
-        
-        if not expired and mandatory_training.exists():
-            compliant_staff += 1
-    
-    compliance_rate = (compliant_staff / total_staff) * 100
-    
-    details = {
-        'compliant_staff': compliant_staff,
-        'total_staff': total_staff,
-    }
-    
-    return round(compliance_rate, 2), details
+    return _calculate_one('compliance rate', care_home, unit, start_date, end_date)
 
 
 def calculate_average_shift_fill_time(care_home=None, unit=None, start_date=None, end_date=None):
     """
     Calculate average time to fill vacant shifts (in hours)
     """
-    from .models import Shift
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-    
-    # Get shifts that were created as vacant and then filled
-    qs = Shift.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date,
-        created_at__isnull=False,
-        updated_at__isnull=False
-    )
-    
-    if care_home:
-        qs = qs.filter(care_home=care_home)
-    if unit:
-        qs = qs.filter(unit=unit)
-    
-    # Calculate time differences
-    fill_times = []
-    for shift in qs:
-        if shift.staff:  # Shift is filled
-            time_diff = (shift.updated_at - shift.created_at).total_seconds() / 3600  # hours
-            fill_times.append(time_diff)
-    
-    if not fill_times:
-        return 0, {'shifts_analyzed': 0, 'average_hours': 0}
-    
-    average_hours = sum(fill_times) / len(fill_times)
-    
-    details = {
-        'shifts_analyzed': len(fill_times),
-        'average_hours': round(average_hours, 2),
-        'fastest_fill': round(min(fill_times), 2),
-        'slowest_fill': round(max(fill_times), 2),
-    }
-    
-    return round(average_hours, 2), details
+    return _calculate_one('shift fill time', care_home, unit, start_date, end_date)
+
+
+def calculate_shift_fill_rate(care_home=None, unit=None, start_date=None, end_date=None):
+    """
+    Calculate percentage of shifts that are filled (scheduled or confirmed)
+    Formula: (Filled shifts / Total shifts) * 100
+    """
+    return _calculate_one('fill rate', care_home, unit, start_date, end_date)
 
 
 def calculate_overtime_percentage(care_home=None, unit=None, start_date=None, end_date=None):
@@ -246,37 +451,14 @@ def calculate_overtime_percentage(care_home=None, unit=None, start_date=None, en
     Calculate percentage of shifts that are overtime
     Formula: (Overtime shifts / Total shifts) * 100
     """
-    from .models import Shift
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-    
-    qs = Shift.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date
-    )
-    
-    if care_home:
-        qs = qs.filter(care_home=care_home)
-    if unit:
-        qs = qs.filter(unit=unit)
-    
-    total_shifts = qs.count()
-    
-    if total_shifts == 0:
-        return 0, {'overtime_shifts': 0, 'total_shifts': 0}
-    
-    overtime_shifts = qs.filter(shift_classification='OVERTIME').count()
-    
-    overtime_percentage = (overtime_shifts / total_shifts) * 100
-    
-    details = {
-        'overtime_shifts': overtime_shifts,
-        'total_shifts': total_shifts,
-    }
-    
-    return round(overtime_percentage, 2), details
+    return _calculate_one('overtime percentage', care_home, unit, start_date, end_date)
+
+
+def calculate_leave_approval_time(care_home=None, unit=None, start_date=None, end_date=None):
+    """
+    Calculate average time from leave request to decision (in hours)
+    """
+    return _calculate_one('leave approval time', care_home, unit, start_date, end_date)
 
 
 # ============================================================================
@@ -286,41 +468,15 @@ def calculate_overtime_percentage(care_home=None, unit=None, start_date=None, en
 def calculate_kpi_value(kpi_definition, start_date=None, end_date=None):
     """
     Calculate KPI value based on KPI definition
-    
+
     Returns: (value, calculation_details)
     """
-    kpi_name = kpi_definition.name.lower()
-    
-    # Map KPI names to calculation functions
-    calculators = {
-        'staff turnover rate': calculate_staff_turnover_rate,
-        'occupancy rate': calculate_occupancy_rate,
-        'agency usage': calculate_agency_usage_percentage,
-        'compliance rate': calculate_compliance_rate,
-        'shift fill time': calculate_average_shift_fill_time,
-        'overtime percentage': calculate_overtime_percentage,
-    }
-    
-    # Find matching calculator
-    calculator = None
-    for key, func in calculators.items():
-        if key in kpi_name:
-            calculator = func
-            break
-    
-    if not calculator:
+    key = _kpi_key(kpi_definition.name)
+    if not key:
         # Default calculation - return 0
         return 0, {'error': 'No calculator found for this KPI'}
-    
-    # Execute calculation
-    value, details = calculator(
-        care_home=kpi_definition.care_home,
-        unit=kpi_definition.unit,
-        start_date=start_date,
-        end_date=end_date
-    )
-    
-    return value, details
+
+    return _calculate_one(key, kpi_definition.care_home, kpi_definition.unit, start_date, end_date)
 
 
 def assess_kpi_performance(kpi_definition, measured_value, target_value):
@@ -367,132 +523,180 @@ def assess_kpi_performance(kpi_definition, measured_value, target_value):
     return status, variance, variance_percentage, alert_message
 
 
-def record_kpi_measurement(kpi_definition, measurement_date=None):
+def _measurement_period(kpi_definition, measurement_date):
+    """(period_start, period_end) ending on measurement_date, by measurement frequency"""
+    days = {
+        'DAILY': 0,
+        'WEEKLY': 7,
+        'MONTHLY': 30,
+        'QUARTERLY': 90,
+    }.get(kpi_definition.measurement_frequency, 30)
+    return measurement_date - timedelta(days=days), measurement_date
+
+
+def _find_target(targets, measurement_date):
+    """Most specific target for the date: monthly, then quarterly, then annual"""
+    year = measurement_date.year
+    month = measurement_date.month
+    quarter = (month - 1) // 3 + 1
+
+    for matches in (
+        lambda target: target.month == month,
+        lambda target: target.quarter == quarter,
+        lambda target: target.month is None and target.quarter is None,
+    ):
+        for target in targets:
+            if target.year == year and matches(target):
+                return target
+    return None
+
+
+MEASUREMENT_FIELDS = [
+    'period_start', 'period_end', 'measured_value', 'calculation_details',
+    'target_value', 'variance', 'variance_percentage', 'status',
+    'alert_generated', 'alert_message', 'is_automated',
+]
+
+
+def record_kpi_measurements(kpi_definitions, measurement_date=None):
     """
-    Calculate and record a KPI measurement
-    
-    Returns: KPIMeasurement instance
+    Calculate and record measurements for many KPIs in one query batch
+
+    Every KPI's value comes from a single compute_kpis() call across all
+    their homes, units and periods. Targets and existing measurements are
+    each read once, and the measurements are written in bulk.
+
+    Returns: List of KPIMeasurement instances, in kpi_definitions order
     """
     from .models import KPIMeasurement, KPITarget
-    
+
     if measurement_date is None:
         measurement_date = timezone.now().date()
-    
-    # Determine period based on frequency
-    frequency = kpi_definition.measurement_frequency
-    
-    if frequency == 'DAILY':
-        period_start = measurement_date
-        period_end = measurement_date
-    elif frequency == 'WEEKLY':
-        # Last 7 days
-        period_end = measurement_date
-        period_start = measurement_date - timedelta(days=7)
-    elif frequency == 'MONTHLY':
-        # Last 30 days
-        period_end = measurement_date
-        period_start = measurement_date - timedelta(days=30)
-    elif frequency == 'QUARTERLY':
-        # Last 90 days
-        period_end = measurement_date
-        period_start = measurement_date - timedelta(days=90)
-    else:
-        period_end = measurement_date
-        period_start = measurement_date - timedelta(days=30)
-    
-    # Calculate KPI value
-    measured_value, calculation_details = calculate_kpi_value(
-        kpi_definition,
-        start_date=period_start,
-        end_date=period_end
-    )
-    
-    # Get current target
-    year = measurement_date.year
-    month = measurement_date.month
-    quarter = (month - 1) // 3 + 1
-    
-    # Try to find target (most specific first)
-    target = KPITarget.objects.filter(
-        kpi=kpi_definition,
-        year=year,
-        month=month
-    ).first()
-    
-    if not target:
-        target = KPITarget.objects.filter(
-            kpi=kpi_definition,
-            year=year,
-            quarter=quarter
-        ).first()
-    
-    if not target:
-        target = KPITarget.objects.filter(
-            kpi=kpi_definition,
-            year=year,
-            month__isnull=True,
-            quarter__isnull=True
-        ).first()
-    
-    target_value = target.target_value if target else None
-    
-    # Assess performance
-    status, variance, variance_pct, alert_message = assess_kpi_performance(
-        kpi_definition,
-        measured_value,
-        target_value
-    )
-    
-    # Create or update measurement
-    measurement, created = KPIMeasurement.objects.update_or_create(
-        kpi=kpi_definition,
-        measurement_date=measurement_date,
-        defaults={
-            'period_start': period_start,
-            'period_end': period_end,
-            'measured_value': measured_value,
-            'calculation_details': calculation_details,
-            'target_value': target_value,
-            'variance': variance,
-            'variance_percentage': variance_pct,
-            'status': status,
-            'alert_generated': alert_message is not None,
-            'alert_message': alert_message,
-            'is_automated': True,
-        }
-    )
-    
-    return measurement
+
+    kpi_definitions = list(kpi_definitions)
+    if not kpi_definitions:
+        return []
+
+    plan = []
+    keys, scopes, periods = set(), set(), set()
+    for kpi in kpi_definitions:
+        key = _kpi_key(kpi.name)
+        scope = (kpi.care_home_id, kpi.unit_id)
+        period = _measurement_period(kpi, measurement_date)
+        plan.append((kpi, key, scope, period))
+        if key:
+            keys.add(key)
+            scopes.add(scope)
+            periods.add(period)
+
+    results = compute_kpis(keys, scopes, periods) if keys else {}
+
+    targets = {}
+    for target in KPITarget.objects.filter(kpi__in=kpi_definitions, year=measurement_date.year):
+        targets.setdefault(target.kpi_id, []).append(target)
+
+    existing = {
+        measurement.kpi_id: measurement
+        for measurement in KPIMeasurement.objects.filter(
+            kpi__in=kpi_definitions,
+            measurement_date=measurement_date
+        )
+    }
+
+    measurements, to_create, to_update = [], [], []
+    for kpi, key, scope, (period_start, period_end) in plan:
+        if key:
+            measured_value, calculation_details = results[(*scope, period_start, period_end)][key]
+        else:
+            # Default calculation - return 0
+            measured_value, calculation_details = 0, {'error': 'No calculator found for this KPI'}
+
+        target = _find_target(targets.get(kpi.pk, []), measurement_date)
+        target_value = target.target_value if target else None
+
+        # Assess performance
+        status, variance, variance_pct, alert_message = assess_kpi_performance(
+            kpi,
+            measured_value,
+            target_value
+        )
+
+        measurement = existing.get(kpi.pk)
+        if measurement is None:
+            measurement = KPIMeasurement(kpi=kpi, measurement_date=measurement_date)
+            to_create.append(measurement)
+        else:
+            to_update.append(measurement)
+
+        measurement.period_start = period_start
+        measurement.period_end = period_end
+        measurement.measured_value = measured_value
+        measurement.calculation_details = calculation_details
+        measurement.target_value = target_value
+        measurement.variance = variance
+        measurement.variance_percentage = variance_pct
+        measurement.status = status
+        measurement.alert_generated = alert_message is not None
+        measurement.alert_message = alert_message
+        measurement.is_automated = True
+        measurements.append(measurement)
+
+    with transaction.atomic():
+        if to_create:
+            KPIMeasurement.objects.bulk_create(to_create)
+        if to_update:
+            KPIMeasurement.objects.bulk_update(to_update, MEASUREMENT_FIELDS)
+
+    return measurements
+
+
+def record_kpi_measurement(kpi_definition, measurement_date=None):
+    """
+    Calculate and record a KPI measurement
+
+    Returns: KPIMeasurement instance
+    """
+    return record_kpi_measurements([kpi_definition], measurement_date)[0]
 
 
 def calculate_all_kpis(care_home=None, measurement_date=None):
     """
-    Calculate all active KPIs for a care home
-    
+    Calculate all active KPIs for a care home (or every home)
+
+    All KPIs are measured in one batch; if the batch fails, each KPI is
+    retried on its own so one bad KPI does not block the rest.
+
     Returns: List of KPIMeasurement instances
     """
     from .models import KPIDefinition
-    
+
     if measurement_date is None:
         measurement_date = timezone.now().date()
-    
+
     # Get active KPIs
     kpis = KPIDefinition.objects.filter(is_active=True)
-    
+
     if care_home:
         kpis = kpis.filter(Q(care_home=care_home) | Q(care_home__isnull=True))
-    
+
+    kpis = list(kpis)
+
+    try:
+        return record_kpi_measurements(kpis, measurement_date)
+    except Exception:
+        logger.exception("Error calculating KPI batch, measuring each KPI on its own")
+
     measurements = []
-    
+
     for kpi in kpis:
         try:
             measurement = record_kpi_measurement(kpi, measurement_date)
             measurements.append(measurement)
-        except Exception as e:
+        except Exception:
             # Log error but continue with other KPIs
-            print(f"Error calculating KPI {kpi.name}: {str(e)}")
+            logger.exception(f"Error calculating KPI {kpi.name}")
             continue
-    
+
     return measurements
 
 
@@ -514,6 +718,7 @@ def get_kpi_trend(kpi_definition, days_back=30):
     return list(measurements)
 
 
+@warmable('kpi_summary')
 def get_kpi_summary(care_home=None, period='month'):
     """
     Get summary of all KPI statuses
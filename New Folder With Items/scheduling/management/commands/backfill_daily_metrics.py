@@ -0,0 +1,78 @@
+"""
+Management command to build the DailyUnitMetrics rollup from existing shifts
+
+Usage:
+    python manage.py backfill_daily_metrics
+    python manage.py backfill_daily_metrics --start 2025-01-01 --end 2025-12-31 --home 2
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from scheduling import daily_metrics
+from scheduling.models import LeaveRequest, Shift, Unit
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily unit metrics rollup from shifts and leave requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='First date to rebuild, YYYY-MM-DD (default: earliest shift or leave)'
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            help='Last date to rebuild, YYYY-MM-DD (default: latest shift or leave)'
+        )
+        parser.add_argument(
+            '--home',
+            type=int,
+            help='Only rebuild units of this care home ID'
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=daily_metrics.DAILY_METRICS_BACKFILL_CHUNK_DAYS,
+            help='Days rebuilt per query batch'
+        )
+
+    def handle(self, *args, **options):
+        unit_ids = None
+        if options['home']:
+            unit_ids = list(Unit.objects.filter(care_home_id=options['home']).values_list('pk', flat=True))
+            if not unit_ids:
+                raise CommandError(f"Care home {options['home']} has no units")
+
+        start_date, end_date = options['start'], options['end']
+        if start_date is None or end_date is None:
+            shifts = Shift.objects.aggregate(first=Min('date'), last=Max('date'))
+            leave = LeaveRequest.objects.aggregate(first=Min('start_date'), last=Max('end_date'))
+            firsts = [d for d in (shifts['first'], leave['first']) if d]
+            lasts = [d for d in (shifts['last'], leave['last']) if d]
+            if not firsts:
+                self.stdout.write(self.style.WARNING('No shifts or leave to roll up'))
+                return
+            start_date = start_date or min(firsts)
+            end_date = end_date or max(lasts)
+
+        if start_date > end_date:
+            raise CommandError(f'--start {start_date} is after --end {end_date}')
+
+        self.stdout.write(f'Rebuilding daily metrics from {start_date} to {end_date}...')
+
+        written = deleted = 0
+        for chunk_start, chunk_end, result in daily_metrics.backfill(
+            start_date, end_date, unit_ids=unit_ids, chunk_days=options['chunk_days']
+        ):
+            written += result['written']
+            deleted += result['deleted']
+            self.stdout.write(f'  {chunk_start} to {chunk_end}: {result["written"]} rows')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Daily metrics rebuilt: {written} rows written, {deleted} stale rows removed'
+        ))
@@ -0,0 +1,103 @@
+"""
+LP Optimizer Scaling Benchmark
+
+Builds and solves ShiftOptimizer models for synthetic homes of increasing
+size (20 to 2,000 staff, 1 to 20 units) and reports model-build time,
+variable/constraint counts, solve time, peak RSS and objective value.
+Synthetic homes are seeded, so runs are reproducible and can be diffed.
+
+Usage:
+    python manage.py benchmark_optimizer_scaling --output scaling.json
+    python manage.py benchmark_optimizer_scaling --sizes 20x1,500x10 --time-limit 30
+    python manage.py benchmark_optimizer_scaling --output new.json --compare baseline.json
+
+Exit status is non-zero when --compare finds a regression (for CI checks).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from scheduling.performance_benchmarks import (
+    PerformanceBenchmark,
+    DEFAULT_SCALING_SIZES,
+    compare_scaling_results,
+)
+import sys
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the LP shift optimizer on synthetic homes of increasing size'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            help='Comma-separated STAFFxUNITS list, e.g. 20x1,500x10 (default: 20x1 ... 2000x20)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for synthetic homes (default: 42)',
+        )
+        parser.add_argument(
+            '--time-limit',
+            type=float,
+            default=120.0,
+            help='CBC time limit per solve in seconds (default: 120)',
+        )
+        parser.add_argument(
+            '--gap',
+            type=float,
+            default=None,
+            help='Relative MIP gap per solve, e.g. 0.01 = 1%% (default: prove optimal)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write JSON results to this path',
+        )
+        parser.add_argument(
+            '--compare',
+            type=str,
+            help='Baseline JSON to diff against (flags >25%% slowdowns/memory growth)',
+        )
+        parser.add_argument(
+            '--no-isolate',
+            action='store_true',
+            help='Run all sizes in this process (peak RSS becomes cumulative)',
+        )
+
+    def handle(self, *args, **options):
+        sizes = DEFAULT_SCALING_SIZES
+        if options['sizes']:
+            try:
+                sizes = [
+                    tuple(int(part) for part in size.lower().split('x'))
+                    for size in options['sizes'].split(',')
+                ]
+            except ValueError:
+                raise CommandError('Invalid --sizes, expected e.g. 20x1,500x10')
+
+        report = PerformanceBenchmark().benchmark_optimizer_scaling(
+            sizes=sizes,
+            seed=options['seed'],
+            time_limit=options['time_limit'],
+            gap_rel=options['gap'],
+            isolate=not options['no_isolate'],
+            output_path=options['output'],
+        )
+
+        failed = [run for run in report['runs'] if 'error' in run]
+        if failed:
+            self.stdout.write(self.style.ERROR(f"\n✗ {len(failed)} size(s) failed"))
+
+        if options['compare']:
+            regressions = compare_scaling_results(options['compare'], report)
+            if regressions:
+                self.stdout.write(self.style.ERROR(f"\n✗ {len(regressions)} regression(s) vs {options['compare']}:"))
+                for r in regressions:
+                    self.stdout.write(
+                        f"  {r['staff']} staff / {r['units']} units  {r['metric']}: "
+                        f"{r['baseline']} → {r['current']} ({r['change_pct']:+}%)"
+                    )
+                sys.exit(1)
+            self.stdout.write(self.style.SUCCESS(f"\n✓ No regressions vs {options['compare']}"))
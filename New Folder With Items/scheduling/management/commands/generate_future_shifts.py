@@ -7,13 +7,22 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
 from datetime import date, timedelta
+from scheduling.cache_service import CacheService
 from scheduling.models import Shift, User
 from collections import defaultdict
+from itertools import islice
 
 
 class Command(BaseCommand):
     help = 'Generates future shifts based on 3-week rolling rota pattern'
 
+    # Shift columns copied from the pattern (FK columns by id)
+    TEMPLATE_FIELDS = [
+        'user_id', 'unit_id', 'shift_type_id', 'status', 'shift_classification',
+        'shift_pattern', 'custom_start_time', 'custom_end_time', 'agency_company_id',
+        'agency_staff_name', 'agency_hourly_rate', 'notes',
+    ]
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--weeks',
@@ -26,6 +35,12 @@ class Command(BaseCommand):
             action='store_true',
             help='Force regeneration even if shifts already exist'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk INSERT (default: 1000)'
+        )
 
     def handle(self, *args, **options):
         weeks_ahead = options['weeks']
@@ -65,104 +80,39 @@ class Command(BaseCommand):
         
         self.stdout.write(f'Using pattern from {pattern_start} to {pattern_end}')
         
-        # Get all shifts in the pattern period, organized by date
-        pattern_shifts = Shift.objects.filter(
+        # Get all shifts in the pattern period as plain rows (no model instances)
+        pattern_shifts = list(Shift.objects.filter(
             date__gte=pattern_start,
             date__lte=pattern_end
-        ).select_related('user', 'unit', 'shift_type').order_by('date')
+        ).order_by('date').values('date', *self.TEMPLATE_FIELDS))
         
-        if not pattern_shifts.exists():
+        if not pattern_shifts:
             self.stdout.write(self.style.ERROR('No pattern shifts found!'))
             return
         
         # Organize pattern by day offset (0-20 for 21 days)
         pattern_by_day = defaultdict(list)
-        for shift in pattern_shifts:
-            day_offset = (shift.date - pattern_start).days
-            pattern_by_day[day_offset].append({
-                'user': shift.user,
-                'unit': shift.unit,
-                'shift_type': shift.shift_type,
-                'status': shift.status,
-                'shift_classification': shift.shift_classification,
-                'shift_pattern': shift.shift_pattern,
-                'custom_start_time': shift.custom_start_time,
-                'custom_end_time': shift.custom_end_time,
-                'agency_company': shift.agency_company,
-                'agency_staff_name': shift.agency_staff_name,
-                'agency_hourly_rate': shift.agency_hourly_rate,
-                'notes': shift.notes,
-            })
+        for row in pattern_shifts:
+            day_offset = (row.pop('date') - pattern_start).days
+            pattern_by_day[day_offset].append(row)
         
         self.stdout.write(f'Pattern contains {len(pattern_shifts)} shifts across {len(pattern_by_day)} days')
         
         # Generate shifts from last_date + 1 day until target_end_date
         start_generation = last_date + timedelta(days=1)
-        current_date = start_generation
-        
-        shifts_to_create = []
-        created_count = 0
-        skipped_count = 0
+        batch_size = options['batch_size']
         
         self.stdout.write(f'\nGenerating shifts from {start_generation} to {target_end_date}...')
         
-        with transaction.atomic():
-            while current_date <= target_end_date:
-                # Calculate which day in the 3-week cycle this is
-                days_since_pattern_start = (current_date - pattern_start).days
-                pattern_day = days_since_pattern_start % pattern_days
-                
-                # Get the template shifts for this day in the cycle
-                template_shifts = pattern_by_day.get(pattern_day, [])
-                
-                if template_shifts:
-                    # Check if shifts already exist for this date
-                    existing_shifts = Shift.objects.filter(date=current_date)
-                    if existing_shifts.exists() and not force:
-                        skipped_count += len(template_shifts)
-                    else:
-                        # Delete existing shifts if forcing
-                        if force and existing_shifts.exists():
-                            deleted_count = existing_shifts.delete()[0]
-                            self.stdout.write(f'  Deleted {deleted_count} existing shifts for {current_date}')
-                        
-                        # Create new shifts based on pattern
-                        for template in template_shifts:
-                            shift = Shift(
-                                date=current_date,
-                                user=template['user'],
-                                unit=template['unit'],
-                                shift_type=template['shift_type'],
-                                status=template['status'],
-                                shift_classification=template['shift_classification'],
-                                shift_pattern=template['shift_pattern'],
-                                custom_start_time=template['custom_start_time'],
-                                custom_end_time=template['custom_end_time'],
-                                agency_company=template['agency_company'],
-                                agency_staff_name=template['agency_staff_name'],
-                                agency_hourly_rate=template['agency_hourly_rate'],
-                                notes=template['notes'],
-                            )
-                            shifts_to_create.append(shift)
-                            created_count += 1
-                
-                # Bulk create every 1000 shifts to avoid memory issues
-                if len(shifts_to_create) >= 1000:
-                    Shift.objects.bulk_create(shifts_to_create, batch_size=500)
-                    self.stdout.write(f'  Created batch: {len(shifts_to_create)} shifts')
-                    shifts_to_create = []
-                
-                current_date += timedelta(days=1)
-            
-            # Create remaining shifts
-            if shifts_to_create:
-                Shift.objects.bulk_create(shifts_to_create, batch_size=500)
-                self.stdout.write(f'  Created final batch: {len(shifts_to_create)} shifts')
+        created_count, stats = self._write_window(
+            pattern_by_day, pattern_start, pattern_days,
+            start_generation, target_end_date, batch_size, force
+        )
         
         self.stdout.write(self.style.SUCCESS(
             f'\n=== Shift Generation Complete ===\n'
             f'Created: {created_count} new shifts\n'
-            f'Skipped: {skipped_count} existing shifts\n'
+            f'Skipped: {stats["skipped"]} existing shifts\n'
             f'Coverage: {start_generation} to {target_end_date}\n'
         ))
         
@@ -171,3 +121,80 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(
             f'Database now contains shifts until: {new_last_shift.date}\n'
         ))
+
+    def _write_window(self, pattern_by_day, pattern_start, pattern_days,
+                      start_generation, target_end_date, batch_size, force):
+        """
+        Insert the window's missing shifts in one transaction
+        
+        Returns:
+            (rows inserted, {'attempted': int, 'skipped': int})
+        """
+        window = Shift.objects.filter(date__gte=start_generation, date__lte=target_end_date)
+        with transaction.atomic():
+            if force:
+                deleted_count = window.delete()[0]
+                if deleted_count:
+                    self.stdout.write(f'  Deleted {deleted_count} existing shifts in the window')
+                existing_count = 0
+                existing_keys = set()
+            else:
+                # Single set-based pre-check of the unique_together keys.
+                # NULLs never conflict, so unassigned shifts add no key
+                existing = list(window.values_list('user_id', 'date', 'shift_type_id'))
+                existing_count = len(existing)
+                existing_keys = {key for key in existing if key[0] is not None}
+            
+            stats = {'attempted': 0, 'skipped': 0}
+            shifts = self._generate_shifts(
+                pattern_by_day, pattern_start, pattern_days,
+                start_generation, target_end_date, existing_keys, stats
+            )
+            
+            # Stream fixed-size chunks. ignore_conflicts keeps overlapping or
+            # concurrent runs from aborting the window over a row written since
+            # the pre-check
+            batch = list(islice(shifts, batch_size))
+            while batch:
+                Shift.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+                self.stdout.write(f'  Wrote batch: {len(batch)} shifts')
+                batch = list(islice(shifts, batch_size))
+            
+            # ignore_conflicts hides which rows were skipped: one COUNT over
+            # the window gives the total added (including any concurrent rows)
+            created_count = window.count() - existing_count
+            
+            # bulk_create skips post_save: one coalesced invalidation on commit
+            CacheService.invalidate_unit_shifts(
+                [row['unit_id'] for rows in pattern_by_day.values() for row in rows],
+                dates=[
+                    start_generation + timedelta(days=n)
+                    for n in range((target_end_date - start_generation).days + 1)
+                ]
+            )
+        
+        return created_count, stats
+
+    def _generate_shifts(self, pattern_by_day, pattern_start, pattern_days,
+                         start_date, end_date, existing_keys, stats):
+        """
+        Yield unsaved Shift instances for the window, one day at a time
+        
+        Templates whose (user, date, shift_type) key already exists are skipped,
+        so re-running over the same window is idempotent.
+        """
+        current_date = start_date
+        while current_date <= end_date:
+            # Calculate which day in the 3-week cycle this is
+            pattern_day = (current_date - pattern_start).days % pattern_days
+            
+            for template in pattern_by_day.get(pattern_day, []):
+                key = (template['user_id'], current_date, template['shift_type_id'])
+                if key in existing_keys:
+                    stats['skipped'] += 1
+                    continue
+                
+                stats['attempted'] += 1
+                yield Shift(date=current_date, **template)
+            
+            current_date += timedelta(days=1)
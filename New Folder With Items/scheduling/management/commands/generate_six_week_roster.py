@@ -1,10 +1,11 @@
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
 from datetime import date, timedelta
 import random
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
+from scheduling.cache_service import CacheService
 from scheduling.models import Shift, ShiftType, Unit, User
 
 class Command(BaseCommand):
@@ -16,6 +17,17 @@ class Command(BaseCommand):
             type=str,
             help='Optional ISO date (YYYY-MM-DD). Defaults to the upcoming Monday.'
         )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Plan the rota and print the coverage summary without writing shifts.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk INSERT (default: 1000).'
+        )
 
     def handle(self, *args, **options):
         start_date = self._resolve_start_date(options.get('start_date'))
@@ -24,9 +36,12 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('--- GENERATING 6-WEEK ROTA ---'))
         self.stdout.write(f'🗓️  Period: {start_date} ➜ {end_date - timedelta(days=1)}')
 
-        # Purge existing shifts in the window so we regenerate from a clean slate.
-        Shift.objects.filter(date__gte=start_date, date__lt=end_date).delete()
-        self.stdout.write('🧹 Cleared existing shifts for the selected window.')
+        if options.get('dry_run'):
+            self.stdout.write(self.style.WARNING('🔍 Dry run: no shifts will be written.'))
+
+        # The whole rota is planned in memory, then written in one transaction
+        self._plan = []
+        self._planned_days = set()
 
         try:
             shift_types = {
@@ -43,10 +58,14 @@ class Command(BaseCommand):
             return
 
         all_scw_staff = list(
-            User.objects.filter(is_active=True, role__name__in=['SCW', 'SSCW']).exclude(role__name__icontains='Relief')
+            User.objects.filter(is_active=True, role__name__in=['SCW', 'SSCW'])
+            .exclude(role__name__icontains='Relief')
+            .select_related('role', 'unit')
         )
         sca_staff = list(
-            User.objects.filter(is_active=True, role__name='SCA').exclude(role__name__icontains='Relief')
+            User.objects.filter(is_active=True, role__name='SCA')
+            .exclude(role__name__icontains='Relief')
+            .select_related('role', 'unit')
         )
 
         if not all_scw_staff or not sca_staff:
@@ -200,129 +219,132 @@ class Command(BaseCommand):
                 else:  # SCW/SSCW day shifts
                     return self.scw_patterns[pattern_week][team]
 
-        with transaction.atomic():
-            for week_index in range(6):
-                week_number = week_index + 1
-                week_start = start_date + timedelta(weeks=week_index)
-                pattern_week = ((week_number - 1) % 3) + 1
+        for week_index in range(6):
+            week_number = week_index + 1
+            week_start = start_date + timedelta(weeks=week_index)
+            pattern_week = ((week_number - 1) % 3) + 1
+            
+            # Show which days each team works this week
+            team_schedules = {}
+            day_names = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+            
+            for team in ['A', 'B', 'C']:
+                day_scw_days = get_team_working_days(team, week_number, 'SCW', 'day')
+                day_sca_days = get_team_working_days(team, week_number, 'SCA', 'day')
+                night_scw_days = get_team_working_days(team, week_number, 'SCW', 'night')
+                night_sca_days = get_team_working_days(team, week_number, 'SCA', 'night')
+                team_schedules[team] = {
+                    'day_scw_days': day_scw_days, 'day_sca_days': day_sca_days,
+                    'night_scw_days': night_scw_days, 'night_sca_days': night_sca_days
+                }
+            
+            self.stdout.write(self.style.HTTP_INFO(
+                f'\n--- WEEK {week_number} ➜ {week_start} | 3-Week Rotation (Pattern {pattern_week}) ---'
+            ))
+            for team in ['A', 'B', 'C']:
+                day_scw_names = [day_names[d] for d in team_schedules[team]['day_scw_days']]
+                day_sca_names = [day_names[d] for d in team_schedules[team]['day_sca_days']]
+                night_scw_names = [day_names[d] for d in team_schedules[team]['night_scw_days']]
+                night_sca_names = [day_names[d] for d in team_schedules[team]['night_sca_days']]
+                self.stdout.write(f'Team {team}: Day SCW/SSCW={day_scw_names} | Day SCA={day_sca_names}')
+                self.stdout.write(f'          Night SCW/SSCW={night_scw_names} | Night SCA={night_sca_names}')
+
+            # Teams work specific days based on their 3-week rotation pattern
+            weekly_shift_counts = defaultdict(int)
+            team_day_sscw_pools = {
+                'A': deque([s for s in day_sscw_staff if s.team == 'A']),
+                'B': deque([s for s in day_sscw_staff if s.team == 'B']),
+                'C': deque([s for s in day_sscw_staff if s.team == 'C'])
+            }
+            team_night_sscw_pools = {
+                'A': deque([s for s in night_sscw_staff if s.team == 'A']),
+                'B': deque([s for s in night_sscw_staff if s.team == 'B']),
+                'C': deque([s for s in night_sscw_staff if s.team == 'C'])
+            }
+
+            # Generate shifts for each day of the week
+            for day_offset in range(7):
+                current_date = week_start + timedelta(days=day_offset)
+                busy_today = set()
+
+                # Assign admin days (from pre-planned admin schedule)
+                if current_date in admin_plan:
+                    for scw in admin_plan[current_date]:
+                        if weekly_shift_counts[scw.sap] >= 3:
+                            continue
+
+                        self._add_shift(
+                            user=scw,
+                            unit=admin_unit,
+                            shift_type=shift_types['ADMIN'],
+                            date=current_date,
+                            status='SCHEDULED',
+                        )
+                        weekly_shift_counts[scw.sap] += 1
+                        busy_today.add(scw.sap)
+                        total_shifts_created += 1
+
+                # Determine which teams are working today for day and night shifts
+                day_of_week = (current_date.weekday() + 1) % 7  # Convert to 0=Sunday format
                 
-                # Show which days each team works this week
-                team_schedules = {}
-                day_names = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+                working_teams_day = []
+                working_teams_night = []
                 
                 for team in ['A', 'B', 'C']:
-                    day_scw_days = get_team_working_days(team, week_number, 'SCW', 'day')
-                    day_sca_days = get_team_working_days(team, week_number, 'SCA', 'day')
+                    # Day shift teams (existing logic)
+                    scw_days = get_team_working_days(team, week_number, 'SCW', 'day')
+                    if day_of_week in scw_days:
+                        working_teams_day.append(team)
+                    
+                    # Night shift teams (new specific patterns)
                     night_scw_days = get_team_working_days(team, week_number, 'SCW', 'night')
-                    night_sca_days = get_team_working_days(team, week_number, 'SCA', 'night')
-                    team_schedules[team] = {
-                        'day_scw_days': day_scw_days, 'day_sca_days': day_sca_days,
-                        'night_scw_days': night_scw_days, 'night_sca_days': night_sca_days
-                    }
+                    if day_of_week in night_scw_days:
+                        working_teams_night.append(team)
                 
-                self.stdout.write(self.style.HTTP_INFO(
-                    f'\n--- WEEK {week_number} ➜ {week_start} | 3-Week Rotation (Pattern {pattern_week}) ---'
-                ))
-                for team in ['A', 'B', 'C']:
-                    day_scw_names = [day_names[d] for d in team_schedules[team]['day_scw_days']]
-                    day_sca_names = [day_names[d] for d in team_schedules[team]['day_sca_days']]
-                    night_scw_names = [day_names[d] for d in team_schedules[team]['night_scw_days']]
-                    night_sca_names = [day_names[d] for d in team_schedules[team]['night_sca_days']]
-                    self.stdout.write(f'Team {team}: Day SCW/SSCW={day_scw_names} | Day SCA={day_sca_names}')
-                    self.stdout.write(f'          Night SCW/SSCW={night_scw_names} | Night SCA={night_sca_names}')
-
-                # Teams work specific days based on their 3-week rotation pattern
-                weekly_shift_counts = defaultdict(int)
-                team_day_sscw_pools = {
-                    'A': deque([s for s in day_sscw_staff if s.team == 'A']),
-                    'B': deque([s for s in day_sscw_staff if s.team == 'B']),
-                    'C': deque([s for s in day_sscw_staff if s.team == 'C'])
-                }
-                team_night_sscw_pools = {
-                    'A': deque([s for s in night_sscw_staff if s.team == 'A']),
-                    'B': deque([s for s in night_sscw_staff if s.team == 'B']),
-                    'C': deque([s for s in night_sscw_staff if s.team == 'C'])
-                }
-
-                # Generate shifts for each day of the week
-                for day_offset in range(7):
-                    current_date = week_start + timedelta(days=day_offset)
-                    busy_today = set()
-
-                    # Assign admin days (from pre-planned admin schedule)
-                    if current_date in admin_plan:
-                        for scw in admin_plan[current_date]:
-                            if weekly_shift_counts[scw.sap] >= 3:
-                                continue
-
-                            Shift.objects.create(
-                                user=scw,
-                                unit=admin_unit,
-                                shift_type=shift_types['ADMIN'],
-                                date=current_date,
-                                status='SCHEDULED',
-                            )
-                            weekly_shift_counts[scw.sap] += 1
-                            busy_today.add(scw.sap)
-                            total_shifts_created += 1
-
-                    # Determine which teams are working today for day and night shifts
-                    day_of_week = (current_date.weekday() + 1) % 7  # Convert to 0=Sunday format
-                    
-                    working_teams_day = []
-                    working_teams_night = []
-                    
-                    for team in ['A', 'B', 'C']:
-                        # Day shift teams (existing logic)
-                        scw_days = get_team_working_days(team, week_number, 'SCW', 'day')
-                        if day_of_week in scw_days:
-                            working_teams_day.append(team)
-                        
-                        # Night shift teams (new specific patterns)
-                        night_scw_days = get_team_working_days(team, week_number, 'SCW', 'night')
-                        if day_of_week in night_scw_days:
-                            working_teams_night.append(team)
-                    
-                    # Assign SSCW based on specific unit management assignments
-                    total_shifts_created += self._assign_sscw_managers(
-                        current_date, 'day', working_teams_day, week_number,
-                        team_day_sscw_pools, weekly_shift_counts, busy_today, 
-                        shift_types['DAY_SENIOR'], care_units
-                    )
-                    
-                    total_shifts_created += self._assign_sscw_managers(
-                        current_date, 'night', working_teams_night, week_number,
-                        team_night_sscw_pools, weekly_shift_counts, busy_today,
-                        shift_types['NIGHT_SENIOR'], care_units
-                    )
+                # Assign SSCW based on specific unit management assignments
+                total_shifts_created += self._assign_sscw_managers(
+                    current_date, 'day', working_teams_day, week_number,
+                    team_day_sscw_pools, weekly_shift_counts, busy_today, 
+                    shift_types['DAY_SENIOR'], care_units
+                )
+                
+                total_shifts_created += self._assign_sscw_managers(
+                    current_date, 'night', working_teams_night, week_number,
+                    team_night_sscw_pools, weekly_shift_counts, busy_today,
+                    shift_types['NIGHT_SENIOR'], care_units
+                )
 
-                    # Assign regular care staff coverage based on team working days
-                    total_shifts_created += self._assign_day_based_coverage(
-                        current_date, 'day', care_units, working_teams_day, week_number,
-                        day_scw_staff, day_sca_staff, weekly_shift_counts, busy_today, shift_types
-                    )
-                    total_shifts_created += self._assign_day_based_coverage(
-                        current_date, 'night', care_units, working_teams_night, week_number,
-                        night_scw_staff, night_sca_staff, weekly_shift_counts, busy_today, shift_types
-                    )
+                # Assign regular care staff coverage based on team working days
+                total_shifts_created += self._assign_day_based_coverage(
+                    current_date, 'day', care_units, working_teams_day, week_number,
+                    day_scw_staff, day_sca_staff, weekly_shift_counts, busy_today, shift_types
+                )
+                total_shifts_created += self._assign_day_based_coverage(
+                    current_date, 'night', care_units, working_teams_night, week_number,
+                    night_scw_staff, night_sca_staff, weekly_shift_counts, busy_today, shift_types
+                )
 
-                # End-of-week validation: Ensure minimum shift requirements are met for all teams
-                for team in ['A', 'B', 'C']:
-                    team_day_scw = [s for s in day_scw_staff if s.team == team]
-                    team_night_scw = [s for s in night_scw_staff if s.team == team]
-                    team_day_sca = [s for s in day_sca_staff if s.team == team]
-                    team_night_sca = [s for s in night_sca_staff if s.team == team]
-                    
-                    total_shifts_created += self._ensure_minimum_shifts_team(
-                        week_start,
-                        team_day_scw + team_night_scw,
-                        team_day_sca + team_night_sca,
-                        weekly_shift_counts,
-                        shift_types,
-                        care_units,
-                    )
+            # End-of-week validation: Ensure minimum shift requirements are met for all teams
+            for team in ['A', 'B', 'C']:
+                team_day_scw = [s for s in day_scw_staff if s.team == team]
+                team_night_scw = [s for s in night_scw_staff if s.team == team]
+                team_day_sca = [s for s in day_sca_staff if s.team == team]
+                team_night_sca = [s for s in night_sca_staff if s.team == team]
+                
+                total_shifts_created += self._ensure_minimum_shifts_team(
+                    week_start,
+                    team_day_scw + team_night_scw,
+                    team_day_sca + team_night_sca,
+                    weekly_shift_counts,
+                    shift_types,
+                    care_units,
+                )
 
-        self.stdout.write(self.style.SUCCESS(f'\n✅ Rota generation complete. Total shifts created: {total_shifts_created}'))
+        if options.get('dry_run'):
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Dry run complete. Shifts planned: {total_shifts_created}'))
+        else:
+            self._write_plan(start_date, end_date, options.get('batch_size') or 1000)
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Rota generation complete. Total shifts created: {total_shifts_created}'))
         self._validate_sscw_admin(start_date, end_date, sscw_staff)
         self._print_first_week_summary(start_date)
 
@@ -330,6 +352,47 @@ class Command(BaseCommand):
     # Helpers
     # ------------------------------------------------------------------
 
+    def _add_shift(self, **fields):
+        """Add a shift to the in-memory plan (written later by _write_plan)"""
+        shift = Shift(**fields)
+        self._plan.append(shift)
+        self._planned_days.add((shift.user_id, shift.date))
+        return shift
+
+    def _has_planned_shift(self, staff, current_date):
+        return (staff.sap, current_date) in self._planned_days
+
+    def _write_plan(self, start_date, end_date, batch_size):
+        """Replace the window's shifts with the plan: chunked bulk INSERTs, one transaction"""
+        total = len(self._plan)
+
+        with transaction.atomic():
+            # Purge existing shifts in the window so we regenerate from a clean slate.
+            # Every home's rows go, so remember their units for the invalidation below
+            window = Shift.objects.filter(date__gte=start_date, date__lt=end_date)
+            cleared_units = set(window.values_list('unit_id', flat=True).distinct())
+            deleted, _ = window.delete()
+            self.stdout.write(f'🧹 Cleared {deleted} existing rows for the selected window.')
+
+            written = 0
+            for offset in range(0, total, batch_size):
+                batch = self._plan[offset:offset + batch_size]
+                Shift.objects.bulk_create(batch, batch_size=batch_size)
+                written += len(batch)
+                self.stdout.write(
+                    f'\r💾 Writing shifts: {written}/{total} ({written / total * 100:.0f}%)',
+                    ending=''
+                )
+                self.stdout.flush()
+
+            # bulk_create skips post_save: one coalesced invalidation on commit
+            CacheService.invalidate_unit_shifts(
+                cleared_units | {shift.unit_id for shift in self._plan},
+                dates=[start_date + timedelta(days=n) for n in range((end_date - start_date).days)]
+            )
+
+        self.stdout.write('')
+
     def _resolve_start_date(self, supplied):
         if supplied:
             return date.fromisoformat(supplied)
@@ -401,7 +464,7 @@ class Command(BaseCommand):
             scw_shortfall = requirements['SCW'] - len(selected_scw)
 
             for staff in selected_scw:
-                Shift.objects.create(
+                self._add_shift(
                     user=staff,
                     unit=unit,
                     shift_type=shift_types[scw_shift_key],
@@ -468,7 +531,7 @@ class Command(BaseCommand):
                     sca_cover = sca_for_cover[:cover_count]
                 
                 for staff in sca_cover:
-                    Shift.objects.create(
+                    self._add_shift(
                         user=staff,
                         unit=unit,
                         shift_type=shift_types[scw_shift_key],
@@ -500,7 +563,7 @@ class Command(BaseCommand):
                 )
 
             for staff in selected_sca:
-                Shift.objects.create(
+                self._add_shift(
                     user=staff,
                     unit=unit,
                     shift_type=shift_types[sca_shift_key],
@@ -574,7 +637,7 @@ class Command(BaseCommand):
         while rotations and assigned < required_count:
             staff = pool[0]
             if weekly_shift_counts[staff.sap] < 3 and staff.sap not in busy_today:
-                Shift.objects.create(
+                self._add_shift(
                     user=staff,
                     unit=unit,
                     shift_type=shift_type,
@@ -602,14 +665,13 @@ class Command(BaseCommand):
             return
 
         shortfalls = []
+        admin_counts = Counter(
+            shift.user_id for shift in self._plan
+            if shift.shift_type.name == 'ADMIN' and start_date <= shift.date < end_date
+        )
 
         for staff in sscw_staff:
-            admin_count = Shift.objects.filter(
-                user=staff,
-                date__gte=start_date,
-                date__lt=end_date,
-                shift_type__name='ADMIN',
-            ).count()
+            admin_count = admin_counts[staff.sap]
             if admin_count < 3:
                 shortfalls.append((staff, admin_count))
 
@@ -634,26 +696,16 @@ class Command(BaseCommand):
         self.stdout.write('📊  FIRST WEEK COVERAGE CHECK')
         self.stdout.write('=' * 60)
 
+        coverage = Counter((shift.date, shift.shift_type.name) for shift in self._plan)
+
         for offset in range(7):
             current_date = start_date + timedelta(days=offset)
             day_name = current_date.strftime('%A')
 
-            day_scw = Shift.objects.filter(
-                date=current_date,
-                shift_type__name='DAY_SENIOR',
-            ).count()
-            day_sca = Shift.objects.filter(
-                date=current_date,
-                shift_type__name='DAY_ASSISTANT',
-            ).count()
-            night_scw = Shift.objects.filter(
-                date=current_date,
-                shift_type__name='NIGHT_SENIOR',
-            ).count()
-            night_sca = Shift.objects.filter(
-                date=current_date,
-                shift_type__name='NIGHT_ASSISTANT',
-            ).count()
+            day_scw = coverage[(current_date, 'DAY_SENIOR')]
+            day_sca = coverage[(current_date, 'DAY_ASSISTANT')]
+            night_scw = coverage[(current_date, 'NIGHT_SENIOR')]
+            night_sca = coverage[(current_date, 'NIGHT_ASSISTANT')]
 
             self.stdout.write(
                 f'- {day_name}: Day ➜ SCW {day_scw}/8 | SCA {day_sca}/17   ·   Night ➜ SCW {night_scw}/8 | SCA {night_sca}/9'
@@ -745,17 +797,14 @@ class Command(BaseCommand):
                 continue
             
             # Check if staff already has a shift on this day
-            existing_shift = Shift.objects.filter(
-                user=staff,
-                date=current_date
-            ).exists()
+            existing_shift = self._has_planned_shift(staff, current_date)
             
             if not existing_shift:
                 # Add a makeup shift - use their home unit if available, otherwise first care unit
                 unit = staff.unit if staff.unit and staff.unit in care_units else (care_units[0] if care_units else Unit.objects.filter(is_active=True).first())
                 
                 if unit:  # Only create if we have a valid unit
-                    Shift.objects.create(
+                    self._add_shift(
                         user=staff,
                         unit=unit,
                         shift_type=shift_type,
@@ -795,17 +844,14 @@ class Command(BaseCommand):
             current_date = week_start + timedelta(days=day_offset)
             
             # Check if staff already has a shift on this day
-            existing_shift = Shift.objects.filter(
-                user=staff,
-                date=current_date
-            ).exists()
+            existing_shift = self._has_planned_shift(staff, current_date)
             
             if not existing_shift:
                 # Add a makeup shift - use their home unit if available, otherwise first care unit
                 unit = staff.unit if staff.unit and staff.unit in care_units else (care_units[0] if care_units else Unit.objects.filter(is_active=True).first())
                 
                 if unit:  # Only create if we have a valid unit
-                    Shift.objects.create(
+                    self._add_shift(
                         user=staff,
                         unit=unit,
                         shift_type=shift_type,
@@ -846,7 +892,7 @@ class Command(BaseCommand):
                 break
                 
             if weekly_shift_counts[staff.sap] < 3 and staff.sap not in busy_today:
-                Shift.objects.create(
+                self._add_shift(
                     user=staff,
                     unit=unit,
                     shift_type=shift_type,
@@ -924,7 +970,7 @@ class Command(BaseCommand):
                             pass
                         
                         # Assign to their managed unit
-                        Shift.objects.create(
+                        self._add_shift(
                             user=staff,
                             unit=unit,
                             shift_type=shift_type,
@@ -944,7 +990,7 @@ class Command(BaseCommand):
                         if (weekly_shift_counts[staff.sap] < 3 and 
                             staff.sap not in busy_today):
                             
-                            Shift.objects.create(
+                            self._add_shift(
                                 user=staff,
                                 unit=unit,
                                 shift_type=shift_type,
@@ -1065,7 +1111,7 @@ class Command(BaseCommand):
                 team_scw_assigned = min(team_scw_target, len(scw_available))
                 for i in range(team_scw_assigned):
                     staff = scw_available[i]
-                    Shift.objects.create(
+                    self._add_shift(
                         user=staff,
                         unit=unit,
                         shift_type=shift_types[scw_shift_key],
@@ -1108,7 +1154,7 @@ class Command(BaseCommand):
                     selected_sca = sca_available[:team_sca_assigned]
                 
                 for staff in selected_sca:
-                    Shift.objects.create(
+                    self._add_shift(
                         user=staff,
                         unit=unit,
                         shift_type=shift_types[sca_shift_key],
@@ -1135,7 +1181,7 @@ class Command(BaseCommand):
                 filled_scw = min(scw_shortfall, len(all_available_scw))
                 for i in range(filled_scw):
                     staff = all_available_scw[i]
-                    Shift.objects.create(
+                    self._add_shift(
                         user=staff,
                         unit=unit,
                         shift_type=shift_types[scw_shift_key],
@@ -1175,7 +1221,7 @@ class Command(BaseCommand):
                     filled_sca = min(sca_shortfall, len(pattern_available_sca))
                     for i in range(filled_sca):
                         staff = pattern_available_sca[i]
-                        Shift.objects.create(
+                        self._add_shift(
                             user=staff,
                             unit=unit,
                             shift_type=shift_types[sca_shift_key],
@@ -1197,7 +1243,7 @@ class Command(BaseCommand):
                     filled_sca = min(sca_shortfall, len(all_available_sca))
                     for i in range(filled_sca):
                         staff = all_available_sca[i]
-                        Shift.objects.create(
+                        self._add_shift(
                             user=staff,
                             unit=unit,
                             shift_type=shift_types[sca_shift_key],
@@ -1244,7 +1290,7 @@ class Command(BaseCommand):
                 break
                 
             if weekly_shift_counts[staff.sap] < 3 and staff.sap not in busy_today:
-                Shift.objects.create(
+                self._add_shift(
                     user=staff,
                     unit=unit,
                     shift_type=shift_type,
@@ -1288,7 +1334,7 @@ class Command(BaseCommand):
             scw_shortfall = requirements['SCW'] - len(selected_scw)
 
             for staff in selected_scw:
-                Shift.objects.create(
+                self._add_shift(
                     user=staff,
                     unit=unit,
                     shift_type=shift_types[scw_shift_key],
@@ -1355,7 +1401,7 @@ class Command(BaseCommand):
                     sca_cover = sca_for_cover[:cover_count]
                 
                 for staff in sca_cover:
-                    Shift.objects.create(
+                    self._add_shift(
                         user=staff,
                         unit=unit,
                         shift_type=shift_types[scw_shift_key],
@@ -1387,7 +1433,7 @@ class Command(BaseCommand):
                 )
 
             for staff in selected_sca:
-                Shift.objects.create(
+                self._add_shift(
                     user=staff,
                     unit=unit,
                     shift_type=shift_types[sca_shift_key],
@@ -0,0 +1,124 @@
+"""
+Overnight Shift Optimization for All Homes
+
+Runs the LP shift optimizer for every care home (or one home) on a process
+pool, with a per-solve time limit so one hard instance can't block the run.
+Reports solve status and wall time per job.
+
+Usage:
+    python manage.py optimize_all_homes --days 7
+    python manage.py optimize_all_homes --days 42 --horizon --time-limit 120
+    python manage.py optimize_all_homes --care-home ORCHARD_GROVE --workers 1
+
+Schedule with cron:
+    0 1 * * * /path/to/python manage.py optimize_all_homes --days 7 --time-limit 60
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import date, timedelta
+from scheduling.models_multi_home import CareHome
+from scheduling.shift_optimizer import optimize_homes_parallel
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Optimize shifts for all care homes in parallel with solver time limits'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--care-home',
+            type=str,
+            help='Optimize specific care home only (by name)',
+        )
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            help='First date to optimize (YYYY-MM-DD, default: tomorrow)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Number of days to optimize (default: 7)',
+        )
+        parser.add_argument(
+            '--horizon',
+            action='store_true',
+            help='Solve each home as rolling multi-day models',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker processes (default: CPU count, 1 = serial)',
+        )
+        parser.add_argument(
+            '--time-limit',
+            type=float,
+            default=60.0,
+            help='CBC time limit per solve in seconds (default: 60)',
+        )
+        parser.add_argument(
+            '--gap',
+            type=float,
+            default=None,
+            help='Relative MIP gap per solve, e.g. 0.01 = 1%% (default: prove optimal)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=== Shift Optimization (All Homes) ==='))
+        self.stdout.write(f"Started at: {timezone.now()}\n")
+
+        if options['start_date']:
+            try:
+                start_date = date.fromisoformat(options['start_date'])
+            except ValueError:
+                raise CommandError('Invalid --start-date, expected YYYY-MM-DD')
+        else:
+            start_date = date.today() + timedelta(days=1)
+
+        care_homes = CareHome.objects.all()
+        if options['care_home']:
+            care_homes = care_homes.filter(name__icontains=options['care_home'])
+
+        if not care_homes.exists():
+            self.stdout.write(self.style.WARNING('No care homes found'))
+            return
+
+        records = optimize_homes_parallel(
+            start_date,
+            days_ahead=options['days'],
+            care_homes=list(care_homes),
+            horizon=options['horizon'],
+            max_workers=options['workers'],
+            time_limit=options['time_limit'],
+            gap_rel=options['gap']
+        )
+
+        for record in records:
+            line = (f"{record['care_home']:<20} {record['date']} "
+                    f"(+{record['days']}d)  {record['status']:<12} "
+                    f"{record['wall_seconds']:>8.2f}s")
+
+            if record['status'] == 'Optimal':
+                self.stdout.write(self.style.SUCCESS(f"  ✓ {line}"))
+            elif record['status'] in ('Feasible', 'No forecasts'):
+                self.stdout.write(self.style.WARNING(f"  ⚠️  {line}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"  ✗ {line} {record['error'] or ''}"))
+
+        total_assignments = sum(
+            len(result.assignments)
+            for record in records
+            for result in record['results']
+            if result.success
+        )
+
+        self.stdout.write(f"\nJobs: {len(records)}")
+        self.stdout.write(f"Suggested assignments: {total_assignments}")
+        self.stdout.write(
+            f"Total solve time: {sum(r['wall_seconds'] for r in records):.2f}s"
+        )
@@ -5,6 +5,7 @@ Task 44: Performance Optimization
 
 from django.core.management.base import BaseCommand
 from scheduling.cache_service import CacheService
+from scheduling import dashboard_warmup
 from scheduling.models import CareHome
 from django.core.cache import cache
 
@@ -23,11 +24,29 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear all caches before warming'
         )
+        parser.add_argument(
+            '--plan',
+            action='store_true',
+            help='List the dashboards the warm-up planner would warm, without warming'
+        )
+        parser.add_argument(
+            '--report',
+            action='store_true',
+            help='Show dashboard warm coverage and time saved, without warming'
+        )
 
     def handle(self, *args, **options):
         home_id = options.get('home')
         should_clear = options.get('clear', False)
 
+        if options.get('plan'):
+            self.show_plan(home_id)
+            return
+
+        if options.get('report'):
+            self.show_report()
+            return
+
         if should_clear:
             self.stdout.write(self.style.WARNING('Clearing all caches...'))
             cache.clear()
@@ -36,12 +55,43 @@ class Command(BaseCommand):
         self.stdout.write(self.style.WARNING('Warming up caches...'))
 
         # Warm dashboard caches
-        CacheService.warm_dashboard_cache(home_id=home_id)
+        report = CacheService.warm_dashboard_cache(home_id=home_id)
 
         # Get stats
         stats = CacheService.get_cache_stats()
 
         self.stdout.write(self.style.SUCCESS('\n✓ Cache warming complete!\n'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Dashboards: {report["warmed"]} warmed, {report["already_warm"]} already warm, '
+            f'{report["failed"]} failed ({report["seconds"]:.1f}s)'
+        ))
         self.stdout.write(self.style.SUCCESS(f'Total cached keys: {stats["total_keys"]}'))
         self.stdout.write(self.style.SUCCESS(f'Memory used: {stats["used_memory"]}'))
         self.stdout.write(self.style.SUCCESS(f'Hit rate: {stats["hit_rate"]:.2%}'))
+
+    def show_plan(self, home_id=None):
+        targets = dashboard_warmup.plan()
+        if home_id:
+            targets = [t for t in targets if t.home_id in (None, home_id)]
+
+        self.stdout.write(self.style.SUCCESS(f'{len(targets)} dashboards planned'))
+        for target in targets:
+            hour, minute = divmod(target.first_minute, 60)
+            self.stdout.write(
+                f'  {hour:02d}:{minute:02d}  {target.name:<20} home={target.home_id or "all"}  '
+                f'{target.days_requested} days, {target.requests} requests'
+            )
+
+    def show_report(self):
+        report = dashboard_warmup.coverage_report()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Last {report["days"]} days: {report["warm"]}/{report["first_requests"]} '
+            f'first requests warm ({report["coverage"]:.0%}), '
+            f'~{report["seconds_saved"]:.1f}s saved'
+        ))
+        for name, row in sorted(report['dashboards'].items()):
+            self.stdout.write(
+                f'  {name:<20} {row["warm"]}/{row["first_requests"]} warm '
+                f'({row["coverage"]:.0%}), ~{row["seconds_saved"]:.1f}s saved'
+            )
@@ -1,20 +1,58 @@
 """
 Middleware for automatic audit logging of user actions and data changes.
+
+Only models in AUDIT_TRACKED_MODELS are audited. Their field values are
+snapshotted when an instance is loaded (post_init), so update diffs need no
+extra SELECT. Fields in AUDIT_EXCLUDED_FIELDS (and auto_now timestamps) are never
+snapshotted or logged.
+
+Change-log rows are queued in scheduling.audit_sink and written in bulk at
+the end of the request rather than one INSERT per save.
 """
+from django.apps import apps
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.contenttypes.models import ContentType
 from django.core.serializers.json import DjangoJSONEncoder
-from django.forms.models import model_to_dict
-from django.db.models.signals import post_save, post_delete, pre_save
-from django.dispatch import receiver
+from django.db.models.signals import post_init, post_save, post_delete
 from threading import local
 import json
+import logging
 
-from .models_audit import DataChangeLog, SystemAccessLog
+from . import audit_sink
+from .signals import _get_client_ip
+
+logger = logging.getLogger(__name__)
 
 # Thread-local storage for request context
 _thread_locals = local()
 
+# Models whose changes are written to DataChangeLog ("app_label.ModelName")
+AUDIT_TRACKED_MODELS = getattr(settings, 'AUDIT_TRACKED_MODELS', [
+    'scheduling.User',
+    'scheduling.Role',
+    'scheduling.CareHome',
+    'scheduling.Unit',
+    'scheduling.Shift',
+    'scheduling.ShiftType',
+    'scheduling.StaffingRequirement',
+    'scheduling.LeaveRequest',
+    'scheduling.Resident',
+])
+
+# Fields never snapshotted, diffed or logged, per model
+AUDIT_EXCLUDED_FIELDS = getattr(settings, 'AUDIT_EXCLUDED_FIELDS', {
+    'scheduling.User': ['password', 'last_login'],
+    'scheduling.Resident': ['emergency_contact_details'],
+})
+
+# Audit models themselves are never tracked (recursion)
+AUDIT_LOG_MODELS = {'DataChangeLog', 'SystemAccessLog', 'ComplianceCheck',
+                    'ComplianceViolation', 'AuditReport', 'ComplianceRule'}
+
+# Model class -> [(field name, attname)] of tracked concrete fields
+_tracked_fields = {}
+
 
 def get_current_request():
     """Get the current request from thread-local storage."""
@@ -34,53 +72,43 @@ class AuditLoggingMiddleware(MiddlewareMixin):
         return None
     
     def process_response(self, request, response):
-        """Clean up thread-local storage."""
+        """Flush queued audit rows and clean up thread-local storage."""
         if hasattr(_thread_locals, 'request'):
             del _thread_locals.request
+        audit_sink.flush()
         return response
     
     def _get_client_ip(self, request):
         """Extract client IP address from request."""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return _get_client_ip(request)
 
 
 # Model change tracking via signals
-# Store original values before save
-_original_values = {}
+def _field_values(instance):
+    """Tracked field values by field name (FKs as ids); deferred fields are skipped"""
+    data = instance.__dict__
+    return {
+        name: data[attname]
+        for name, attname in _tracked_fields[type(instance)]
+        if attname in data
+    }
 
 
-@receiver(pre_save)
-def store_original_values(sender, instance, **kwargs):
-    """Store original model values before save for comparison."""
-    # Skip audit models to avoid recursion
-    if sender.__name__ in ['DataChangeLog', 'SystemAccessLog', 'ComplianceCheck', 
-                           'ComplianceViolation', 'AuditReport', 'ComplianceRule']:
-        return
-    
-    # Skip new instances (no original values)
-    if instance.pk is None:
-        return
-    
-    try:
-        # Get the original instance from database
-        original = sender.objects.get(pk=instance.pk)
-        _original_values[instance.pk] = model_to_dict(original)
-    except sender.DoesNotExist:
-        pass
+def snapshot_on_load(sender, instance, **kwargs):
+    """Remember field values as loaded, for diffing on the next save."""
+    instance._audit_snapshot = _field_values(instance)
 
 
-@receiver(post_save)
-def log_model_change(sender, instance, created, **kwargs):
+def log_model_change(sender, instance, created, update_fields=None, **kwargs):
     """Log model changes to DataChangeLog."""
-    # Skip audit models to avoid recursion
-    if sender.__name__ in ['DataChangeLog', 'SystemAccessLog', 'ComplianceCheck', 
-                           'ComplianceViolation', 'AuditReport', 'ComplianceRule']:
-        return
+    old_values = getattr(instance, '_audit_snapshot', None) or {}
+    new_values = _field_values(instance)
+    if update_fields is not None and not created:
+        # Only these columns were written
+        new_values = {name: value for name, value in new_values.items() if name in update_fields}
+    
+    # The saved state is the baseline for this instance's next save
+    instance._audit_snapshot = {**old_values, **new_values}
     
     # Get current request
     request = get_current_request()
@@ -97,18 +125,16 @@ def log_model_change(sender, instance, created, **kwargs):
         # Prepare change data
         if created:
             # For new objects, all current values are "new"
-            changes = model_to_dict(instance)
+            changes = new_values
             old_values = {}
-            new_values = changes
         else:
-            # For updates, compare old and new values
-            old_values = _original_values.get(instance.pk, {})
-            new_values = model_to_dict(instance)
-            
-            # Find what actually changed
+            # For updates, compare against the load-time snapshot (fields
+            # deferred at load time have no baseline and are skipped)
             changes = {}
             for field, new_value in new_values.items():
-                old_value = old_values.get(field)
+                if field not in old_values:
+                    continue
+                old_value = old_values[field]
                 if old_value != new_value:
                     changes[field] = {
                         'old': old_value,
@@ -119,36 +145,26 @@ def log_model_change(sender, instance, created, **kwargs):
             if not changes:
                 return
         
-        # Create audit log entry
-        DataChangeLog.objects.create(
-            user=request.user,
-            content_type=content_type,
-            object_id=str(instance.pk),
-            action=action,
-            field_name='multiple' if len(changes) > 1 else list(changes.keys())[0] if changes else 'unknown',
-            old_value=json.dumps(old_values, cls=DjangoJSONEncoder)[:1000],
-            new_value=json.dumps(new_values, cls=DjangoJSONEncoder)[:1000],
-            ip_address=AuditLoggingMiddleware()._get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
-        )
-        
-        # Clean up stored original values
-        if instance.pk in _original_values:
-            del _original_values[instance.pk]
+        # Queue audit log entry
+        audit_sink.record('DataChangeLog', {
+            'user_id': request.user.pk,
+            'content_type_id': content_type.pk,
+            'object_id': str(instance.pk),
+            'action': action,
+            'field_name': 'multiple' if len(changes) > 1 else list(changes.keys())[0] if changes else 'unknown',
+            'old_value': json.dumps(old_values, cls=DjangoJSONEncoder)[:1000],
+            'new_value': json.dumps(new_values, cls=DjangoJSONEncoder)[:1000],
+            'ip_address': _get_client_ip(request),
+            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500]
+        })
     
-    except Exception as e:
+    except Exception:
         # Don't break the application if audit logging fails
-        print(f"Data change logging failed: {e}")
+        logger.exception("Data change logging failed")
 
 
-@receiver(post_delete)
 def log_model_deletion(sender, instance, **kwargs):
     """Log model deletions to DataChangeLog."""
-    # Skip audit models to avoid recursion
-    if sender.__name__ in ['DataChangeLog', 'SystemAccessLog', 'ComplianceCheck', 
-                           'ComplianceViolation', 'AuditReport', 'ComplianceRule']:
-        return
-    
     # Get current request
     request = get_current_request()
     if not request or not request.user.is_authenticated:
@@ -159,21 +175,54 @@ def log_model_deletion(sender, instance, **kwargs):
         content_type = ContentType.objects.get_for_model(sender)
         
         # Get object representation
-        old_values = model_to_dict(instance)
+        old_values = _field_values(instance)
         
-        # Create audit log entry
-        DataChangeLog.objects.create(
-            user=request.user,
-            content_type=content_type,
-            object_id=str(instance.pk),
-            action='DELETE',
-            field_name='deleted',
-            old_value=json.dumps(old_values, cls=DjangoJSONEncoder)[:1000],
-            new_value='',
-            ip_address=AuditLoggingMiddleware()._get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
-        )
+        # Queue audit log entry
+        audit_sink.record('DataChangeLog', {
+            'user_id': request.user.pk,
+            'content_type_id': content_type.pk,
+            'object_id': str(instance.pk),
+            'action': 'DELETE',
+            'field_name': 'deleted',
+            'old_value': json.dumps(old_values, cls=DjangoJSONEncoder)[:1000],
+            'new_value': '',
+            'ip_address': _get_client_ip(request),
+            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500]
+        })
     
-    except Exception as e:
+    except Exception:
         # Don't break the application if audit logging fails
-        print(f"Deletion logging failed: {e}")
+        logger.exception("Deletion logging failed")
+
+
+def connect_audit_signals():
+    """
+    Connect snapshot and logging receivers for each tracked model
+    
+    Receivers are bound per sender, so untracked models pay nothing on
+    load/save and keep Django's fast-path queryset deletes.
+    """
+    for label in AUDIT_TRACKED_MODELS:
+        try:
+            model = apps.get_model(label)
+        except (LookupError, ValueError):
+            logger.warning(f"AUDIT_TRACKED_MODELS: unknown model {label!r} - not audited")
+            continue
+        
+        if model.__name__ in AUDIT_LOG_MODELS:
+            continue
+        
+        excluded = set(AUDIT_EXCLUDED_FIELDS.get(label, ()))
+        _tracked_fields[model] = [
+            (field.name, field.attname)
+            for field in model._meta.concrete_fields
+            # auto_now timestamps change on every save - not a user edit
+            if field.name not in excluded and not getattr(field, 'auto_now', False)
+        ]
+        
+        post_init.connect(snapshot_on_load, sender=model, dispatch_uid=f'audit_snapshot:{label}')
+        post_save.connect(log_model_change, sender=model, dispatch_uid=f'audit_save:{label}')
+        post_delete.connect(log_model_deletion, sender=model, dispatch_uid=f'audit_delete:{label}')
+
+
+connect_audit_signals()
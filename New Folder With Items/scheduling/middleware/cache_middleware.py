@@ -1,13 +1,14 @@
 """
 Cache Invalidation Middleware
 Task 44: Automatic cache invalidation on data changes
+
+Invalidation bumps generation counters (see CacheService.bump_generation).
+Model-save invalidation lives in scheduling.signals, where saves inside a
+transaction are coalesced into one flush on commit.
 """
 
 from django.utils.deprecation import MiddlewareMixin
 from scheduling.cache_service import CacheService
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-from scheduling.models import Shift, Staff, LeaveRequest, CareHome
 
 
 class CacheInvalidationMiddleware(MiddlewareMixin):
@@ -28,41 +29,3 @@ class CacheInvalidationMiddleware(MiddlewareMixin):
                     pass
         
         return response
-
-
-# Signal-based cache invalidation
-@receiver(post_save, sender=Shift)
-@receiver(post_delete, sender=Shift)
-def invalidate_shift_cache(sender, instance, **kwargs):
-    """Invalidate caches when shifts are modified"""
-    CacheService.invalidate_shift_cache(
-        shift_id=instance.id,
-        home_id=instance.home_id if instance.home_id else None,
-        date=instance.date
-    )
-    
-    # Also invalidate home cache
-    if instance.home_id:
-        CacheService.invalidate_home_cache(instance.home_id)
-
-
-@receiver(post_save, sender=Staff)
-@receiver(post_delete, sender=Staff)
-def invalidate_staff_cache(sender, instance, **kwargs):
-    """Invalidate caches when staff records are modified"""
-    if instance.home_id:
-        CacheService.invalidate_home_cache(instance.home_id)
-
-
-@receiver(post_save, sender=LeaveRequest)
-@receiver(post_delete, sender=LeaveRequest)
-def invalidate_leave_cache(sender, instance, **kwargs):
-    """Invalidate caches when leave requests are modified"""
-    if hasattr(instance, 'staff') and instance.staff and instance.staff.home_id:
-        CacheService.invalidate_home_cache(instance.staff.home_id)
-
-
-@receiver(post_save, sender=CareHome)
-def invalidate_home_metadata_cache(sender, instance, **kwargs):
-    """Invalidate caches when home metadata changes"""
-    CacheService.invalidate_home_cache(instance.id)
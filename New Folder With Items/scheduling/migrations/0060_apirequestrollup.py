@@ -0,0 +1,32 @@
+# Generated by Django 4.2.27 on 2026-10-16 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0059_alter_user_shift_preference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIRequestRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField()),
+                ('request_count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('total_response_ms', models.BigIntegerField(default=0)),
+                ('max_response_ms', models.IntegerField(default=0)),
+                ('latency_histogram', models.JSONField(default=list, help_text='Request counts per LATENCY_BUCKETS_MS bucket, plus an overflow bucket')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='request_rollups', to='scheduling.apiclient')),
+            ],
+            options={
+                'ordering': ['-minute'],
+                'indexes': [models.Index(fields=['minute'], name='scheduling__minute_dfc417_idx')],
+                'unique_together': {('client', 'minute')},
+            },
+        ),
+    ]
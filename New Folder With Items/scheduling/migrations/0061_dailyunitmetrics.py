@@ -0,0 +1,42 @@
+# Generated by Django 4.2.27 on 2026-10-16 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0060_apirequestrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUnitMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_shifts', models.IntegerField(default=0)),
+                ('filled_shifts', models.IntegerField(default=0, help_text='Scheduled or confirmed')),
+                ('unfilled_shifts', models.IntegerField(default=0, help_text='Uncovered')),
+                ('scheduled_hours', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('agency_shifts', models.IntegerField(default=0)),
+                ('agency_hours', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('agency_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('overtime_shifts', models.IntegerField(default=0)),
+                ('overtime_hours', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('overtime_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('leave_days', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('care_home', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='scheduling.carehome')),
+                ('unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='scheduling.unit')),
+            ],
+            options={
+                'verbose_name': 'Daily Unit Metrics',
+                'verbose_name_plural': 'Daily Unit Metrics',
+                'ordering': ['date', 'unit'],
+                'indexes': [models.Index(fields=['care_home', 'date'], name='scheduling__care_ho_92fdfc_idx'), models.Index(fields=['date'], name='scheduling__date_320071_idx')],
+                'unique_together': {('unit', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-17 09:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0061_dailyunitmetrics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='datachangelog',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='systemaccesslog',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -1858,6 +1858,58 @@ from .models_automated_workflow import (
 from .models_multi_home import CareHome
 
 
+class DailyUnitMetrics(models.Model):
+    """
+    Daily staffing facts per unit, rolled up from Shift and LeaveRequest.
+
+    Kept current by scheduling.daily_metrics: shift and leave saves refresh
+    the touched (unit, date) rows on commit, and a nightly reconcile
+    rebuilds recent days. Dashboards sum these rows instead of scanning shifts.
+    """
+
+    care_home = models.ForeignKey(
+        CareHome,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_metrics'
+    )
+    unit = models.ForeignKey(Unit, on_delete=models.CASCADE, related_name='daily_metrics')
+    date = models.DateField()
+
+    # Shifts (cancelled shifts are not counted)
+    total_shifts = models.IntegerField(default=0)
+    filled_shifts = models.IntegerField(default=0, help_text="Scheduled or confirmed")
+    unfilled_shifts = models.IntegerField(default=0, help_text="Uncovered")
+    scheduled_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+
+    # Additional staffing (filled shifts only)
+    agency_shifts = models.IntegerField(default=0)
+    agency_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    agency_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    overtime_shifts = models.IntegerField(default=0)
+    overtime_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    overtime_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    # Staff on approved leave that day
+    leave_days = models.IntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['unit', 'date']
+        ordering = ['date', 'unit']
+        indexes = [
+            models.Index(fields=['care_home', 'date']),
+            models.Index(fields=['date']),
+        ]
+        verbose_name = "Daily Unit Metrics"
+        verbose_name_plural = "Daily Unit Metrics"
+
+    def __str__(self):
+        return f"{self.unit.name} - {self.date}: {self.filled_shifts}/{self.total_shifts} filled"
+
+
 # ==============================================================================
 # MACHINE LEARNING MODELS (Phase 6.2 - ML Forecasting)
 # ==============================================================================
@@ -4699,6 +4751,7 @@ from .models_integrations import (
     APIToken,
     APIRateLimit,
     APIRequestLog,
+    APIRequestRollup,
     WebhookEndpoint,
     WebhookDelivery,
     DataSyncJob
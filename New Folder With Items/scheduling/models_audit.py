@@ -40,7 +40,8 @@ class DataChangeLog(models.Model):
     
     # Who and when
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='data_changes')
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set explicitly by audit_sink so late writes keep the event time
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     # Context
     ip_address = models.GenericIPAddressField(blank=True, null=True)
@@ -280,7 +281,8 @@ class SystemAccessLog(models.Model):
     username_attempt = models.CharField(max_length=150, blank=True, null=True, help_text="Username used (for failed attempts)")
     
     access_type = models.CharField(max_length=20, choices=ACCESS_TYPE_CHOICES)
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set explicitly by audit_sink so late writes keep the event time
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     # Session info
     ip_address = models.GenericIPAddressField()
@@ -289,8 +289,8 @@ class APIRequestLog(models.Model):
     error_message = models.TextField(blank=True)
     stack_trace = models.TextField(blank=True)
     
-    # Timestamp
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Timestamp (set explicitly by api_request_log to the request time)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     class Meta:
         ordering = ['-timestamp']
@@ -304,6 +304,66 @@ class APIRequestLog(models.Model):
         return f"{self.method} {self.endpoint} - {self.status_code}"
 
 
+class APIRequestRollup(models.Model):
+    """
+    Per-client, per-minute request counts and latency histogram.
+    
+    Counts every request, including those whose APIRequestLog row was
+    sampled out.
+    """
+    
+    # Upper bounds of the histogram buckets; a final bucket holds the rest
+    LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+    
+    client = models.ForeignKey(
+        APIClient,
+        on_delete=models.CASCADE,
+        related_name='request_rollups'
+    )
+    minute = models.DateTimeField()
+    
+    request_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    total_response_ms = models.BigIntegerField(default=0)
+    max_response_ms = models.IntegerField(default=0)
+    latency_histogram = models.JSONField(
+        default=list,
+        help_text='Request counts per LATENCY_BUCKETS_MS bucket, plus an overflow bucket'
+    )
+    
+    class Meta:
+        ordering = ['-minute']
+        unique_together = ['client', 'minute']
+        indexes = [
+            models.Index(fields=['minute']),
+        ]
+    
+    def __str__(self):
+        return f"{self.client.name} - {self.minute:%Y-%m-%d %H:%M}: {self.request_count}"
+    
+    @classmethod
+    def bucket_index(cls, response_time_ms):
+        """Histogram bucket for a response time"""
+        for i, bound in enumerate(cls.LATENCY_BUCKETS_MS):
+            if response_time_ms <= bound:
+                return i
+        return len(cls.LATENCY_BUCKETS_MS)
+    
+    @property
+    def average_response_ms(self):
+        return self.total_response_ms / self.request_count if self.request_count else 0
+    
+    def percentile(self, p):
+        """Upper bound (ms) of the bucket holding the p-th percentile"""
+        target = self.request_count * p / 100
+        seen = 0
+        for i, count in enumerate(self.latency_histogram):
+            seen += count
+            if count and seen >= target:
+                return self.LATENCY_BUCKETS_MS[i] if i < len(self.LATENCY_BUCKETS_MS) else self.max_response_ms
+        return 0
+
+
 class WebhookEndpoint(models.Model):
     """
     Webhook endpoints for real-time event notifications.
@@ -0,0 +1,251 @@
+"""
+Fingerprint-keyed result cache for shift optimization and auto-rostering
+
+Solver and auto-roster runs are deterministic for a given set of inputs, so
+results are cached under a hash of those inputs rather than a time window:
+
+- Forecast rows for the period
+- Staff pool (active flag, role, unit)
+- Existing shifts (with a 7-day lookback for WTD/rest/fairness rules)
+- Leave overlapping the period
+- Units (active flag) and shift types
+
+Any change to those rows produces a new fingerprint, so stale entries are
+never served - they simply age out. Repeat dashboard views cost a handful of
+fingerprint queries instead of a solver run.
+
+Model instances inside a result (staff, units, shift types, roles) are
+stored as (model, pk) references and re-fetched on read with one query per
+model, so cached blobs carry no row data such as password hashes. The rest
+of the result is pickled and zlib-compressed before storage.
+
+Usage:
+    from scheduling.optimization_cache import cached_result
+
+    results = cached_result(
+        'optimization', care_home, start_date, end_date,
+        lambda: optimize_shifts_for_forecast(care_home, start_date, days_ahead),
+        days_ahead=days_ahead
+    )
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Q
+from collections import namedtuple
+from datetime import timedelta
+import copy
+import hashlib
+import json
+import logging
+import pickle
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Bump when solver/roster logic changes so old results are not reused
+CACHE_VERSION = 2
+
+CACHE_PREFIX = 'optcache'
+
+# Lookback covering the WTD week, rest rules and auto-roster fairness window
+INPUT_LOOKBACK_DAYS = 7
+
+DEFAULT_TIMEOUT = getattr(settings, 'OPTIMIZATION_CACHE_TIMEOUT', 86400)
+
+
+def _input_querysets(care_home, start_date, end_date):
+    """
+    Value rows that determine an optimization/auto-roster result
+
+    Each queryset is ordered so the fingerprint is stable.
+    """
+    from scheduling.models import StaffingForecast, User, Shift, LeaveRequest, Unit, ShiftType
+
+    lookback = start_date - timedelta(days=INPUT_LOOKBACK_DAYS)
+
+    forecasts = StaffingForecast.objects.filter(
+        forecast_date__gte=start_date,
+        forecast_date__lte=end_date
+    )
+    staff = User.objects.all()
+    shifts = Shift.objects.filter(date__gte=lookback, date__lte=end_date)
+    leave = LeaveRequest.objects.filter(
+        start_date__lte=end_date,
+        end_date__gte=lookback
+    )
+    units = Unit.objects.all()
+
+    if care_home is not None:
+        forecasts = forecasts.filter(care_home=care_home)
+        staff = staff.filter(unit__care_home=care_home)
+        # Staff of this home working elsewhere still count towards WTD
+        shifts = shifts.filter(
+            Q(unit__care_home=care_home) | Q(user__unit__care_home=care_home)
+        ).distinct()
+        leave = leave.filter(user__unit__care_home=care_home)
+        units = units.filter(care_home=care_home)
+
+    return [
+        ('forecasts', forecasts.order_by('pk').values_list(
+            'pk', 'unit_id', 'forecast_date', 'predicted_shifts',
+            'confidence_lower', 'confidence_upper'
+        )),
+        ('staff', staff.order_by('pk').values_list(
+            'pk', 'is_active', 'role_id', 'unit_id'
+        )),
+        ('shifts', shifts.order_by('pk').values_list(
+            'pk', 'user_id', 'unit_id', 'shift_type_id', 'date',
+            'status', 'shift_classification'
+        )),
+        ('leave', leave.order_by('pk').values_list(
+            'pk', 'user_id', 'start_date', 'end_date', 'status'
+        )),
+        ('units', units.order_by('pk').values_list(
+            'pk', 'name', 'is_active'
+        )),
+        ('shift_types', ShiftType.objects.order_by('pk').values_list(
+            'pk', 'name', 'start_time', 'end_time', 'duration_hours', 'is_active'
+        )),
+    ]
+
+
+def compute_input_fingerprint(care_home, start_date, end_date, **params) -> str:
+    """
+    Content hash of all inputs for a care home and period
+
+    Args:
+        care_home: CareHome instance (None = all homes)
+        start_date: First date of the period
+        end_date: Last date of the period
+        **params: Extra parameters that change the result (e.g. horizon=True)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    hasher = hashlib.sha256()
+    header = {
+        'version': CACHE_VERSION,
+        'care_home': care_home.pk if care_home is not None else None,
+        'start': start_date,
+        'end': end_date,
+        'params': params,
+    }
+    hasher.update(json.dumps(header, sort_keys=True, default=str).encode())
+
+    for name, rows in _input_querysets(care_home, start_date, end_date):
+        hasher.update(name.encode())
+        for row in rows.iterator(chunk_size=2000):
+            hasher.update(repr(row).encode())
+
+    return hasher.hexdigest()
+
+
+# Stand-in for a model instance in a stored result
+_ModelRef = namedtuple('_ModelRef', ['label', 'pk'])
+
+
+def _dehydrate(value):
+    """Copy of a result with every model instance replaced by a _ModelRef"""
+    if isinstance(value, models.Model):
+        return _ModelRef(value._meta.label, value.pk)
+    if isinstance(value, dict):
+        return {key: _dehydrate(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_dehydrate(item) for item in value]
+    if type(value) is tuple:
+        return tuple(_dehydrate(item) for item in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        # Result containers such as ShiftOptimizationResult
+        stored = copy.copy(value)
+        stored.__dict__ = _dehydrate(vars(value))
+        return stored
+    return value
+
+
+def _collect_refs(value, refs):
+    if isinstance(value, _ModelRef):
+        refs.setdefault(value.label, set()).add(value.pk)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_refs(item, refs)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_refs(item, refs)
+    elif hasattr(value, '__dict__') and not isinstance(value, type):
+        _collect_refs(vars(value), refs)
+
+
+def _substitute(value, instances):
+    if isinstance(value, _ModelRef):
+        return instances[value.label][value.pk]
+    if isinstance(value, dict):
+        return {key: _substitute(item, instances) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, instances) for item in value]
+    if type(value) is tuple:
+        return tuple(_substitute(item, instances) for item in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        value.__dict__ = _substitute(vars(value), instances)
+    return value
+
+
+def _rehydrate(stored):
+    """
+    Stored result with its model references re-fetched (one query per model)
+
+    Raises LookupError if a referenced row no longer exists.
+    """
+    refs = {}
+    _collect_refs(stored, refs)
+
+    instances = {}
+    for label, pks in refs.items():
+        instances[label] = apps.get_model(label)._base_manager.in_bulk(pks)
+        if len(instances[label]) != len(pks):
+            raise LookupError(f"{label} rows referenced by the cached result are gone")
+
+    return _substitute(stored, instances)
+
+
+def cached_result(namespace: str, care_home, start_date, end_date, compute,
+                  timeout: int = None, **params):
+    """
+    Return a cached result for these inputs, computing it on a miss
+
+    Args:
+        namespace: Result family, e.g. 'optimization' or 'auto_roster'
+        care_home: CareHome instance (None = all homes)
+        start_date: First date of the period
+        end_date: Last date of the period
+        compute: Zero-argument callable producing the result on a miss
+        timeout: Cache timeout in seconds (default OPTIMIZATION_CACHE_TIMEOUT)
+        **params: Extra parameters that change the result
+
+    Returns:
+        The cached or freshly computed result
+    """
+    fingerprint = compute_input_fingerprint(care_home, start_date, end_date, **params)
+    cache_key = f"{CACHE_PREFIX}:{namespace}:{fingerprint}"
+
+    blob = cache.get(cache_key)
+    if blob is not None:
+        try:
+            result = _rehydrate(pickle.loads(zlib.decompress(blob)))
+            logger.debug(f"Optimization cache hit: {cache_key}")
+            return result
+        except (zlib.error, pickle.UnpicklingError, AttributeError, EOFError, LookupError) as e:
+            logger.warning(f"Discarding unreadable optimization cache entry {cache_key}: {e}")
+
+    result = compute()
+
+    cache.set(
+        cache_key,
+        zlib.compress(pickle.dumps(_dehydrate(result), protocol=pickle.HIGHEST_PROTOCOL)),
+        timeout if timeout is not None else DEFAULT_TIMEOUT
+    )
+    logger.debug(f"Optimization cache miss, stored: {cache_key}")
+
+    return result
@@ -7,17 +7,29 @@ Tests:
 3. Database Query Performance
 4. Dashboard Load Times
 5. Concurrent User Load
+6. LP Optimizer Scaling (synthetic homes, 20-2,000 staff, no database)
+7. Trend Statistics (NumPy vs pure-Python reference, no database)
 
 Usage:
     python manage.py shell
     >>> from scheduling.performance_benchmarks import run_all_benchmarks
     >>> run_all_benchmarks()
+    >>> PerformanceBenchmark().benchmark_trend_statistics()
+    
+    python manage.py benchmark_optimizer_scaling --output scaling.json
+    python manage.py benchmark_optimizer_scaling --compare baseline.json
 """
 
+import json
+import random
+import resource
+import statistics
+import sys
 import time
 import psutil
 import numpy as np
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
 from django.utils import timezone
 from django.db import connection
 from django.test.utils import override_settings
@@ -120,6 +132,75 @@ class PerformanceBenchmark:
         
         return solver_results
     
+    def benchmark_optimizer_scaling(self, sizes=None, seed=42, time_limit=120,
+                                    gap_rel=None, isolate=True, output_path=None):
+        """
+        Benchmark ShiftOptimizer on synthetic homes of increasing size
+        
+        Homes are generated in memory from a seed, so runs are reproducible
+        and independent of the live database.
+        
+        Args:
+            sizes: List of (staff, units) tuples (default DEFAULT_SCALING_SIZES)
+            seed: Random seed for synthetic homes
+            time_limit: CBC time limit per solve in seconds
+            gap_rel: Optional relative MIP gap
+            isolate: Run each size in a fresh process (accurate peak RSS)
+            output_path: Optional path to write JSON results
+        
+        Returns: Dict with run metadata and one entry per size
+        """
+        print("\n=== LP Optimizer Scaling Benchmark ===")
+        
+        runs = []
+        for staff_count, unit_count in (sizes or DEFAULT_SCALING_SIZES):
+            case = {
+                'staff': staff_count,
+                'units': unit_count,
+                'seed': seed,
+                'time_limit': time_limit,
+                'gap_rel': gap_rel,
+            }
+            
+            try:
+                if isolate:
+                    with ProcessPoolExecutor(max_workers=1) as executor:
+                        run = executor.submit(_run_scaling_case, case).result()
+                else:
+                    run = _run_scaling_case(case)
+            except Exception as e:
+                print(f"  ✗ {staff_count} staff / {unit_count} units failed: {e}")
+                run = {'staff': staff_count, 'units': unit_count, 'error': str(e)}
+            
+            runs.append(run)
+            
+            if 'error' not in run:
+                self.results[f"LP_Scaling_{staff_count}x{unit_count}"] = {
+                    'time_seconds': round(run['build_seconds'] + run['solve_seconds'], 3),
+                    'memory_mb': run['peak_rss_mb'],
+                }
+                print(f"  ✓ {staff_count:>5} staff / {unit_count:>2} units: "
+                      f"build {run['build_seconds']:.3f}s, solve {run['solve_seconds']:.3f}s, "
+                      f"{run['variables']} vars, {run['constraints']} cons, "
+                      f"{run['peak_rss_mb']}MB, {run['status']}")
+        
+        report = {
+            'benchmark': 'optimizer_scaling',
+            'generated': timezone.now().isoformat(),
+            'seed': seed,
+            'time_limit': time_limit,
+            'gap_rel': gap_rel,
+            'python': sys.version.split()[0],
+            'runs': runs,
+        }
+        
+        if output_path:
+            with open(output_path, 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            print(f"\n  ✓ Results written to {output_path}")
+        
+        return report
+    
     def benchmark_prophet_training(self, parallel=False):
         """
         Benchmark Prophet model training time
@@ -340,6 +421,60 @@ class PerformanceBenchmark:
             'meets_target': elapsed < 2.0
         }
     
+    def benchmark_trend_statistics(self, lengths=None, repeats=5, seed=42):
+        """
+        Time the NumPy trend statistics against the pure-Python reference
+        
+        Series are synthetic and seeded, so no database is needed. Every
+        case is also checked for matching results.
+        
+        Args:
+            lengths: Series lengths in days (default DEFAULT_TREND_LENGTHS)
+            repeats: Runs per case (the fastest is reported)
+            seed: Random seed for the synthetic series
+        
+        Returns: Dict with one entry per (length, function)
+        """
+        print("\n=== Trend Statistics Benchmark ===")
+        
+        def best_of(func, args):
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                func(*args)
+                timings.append(time.perf_counter() - started)
+            return min(timings)
+        
+        runs = []
+        for days in (lengths or DEFAULT_TREND_LENGTHS):
+            series = build_synthetic_series(days, seed=seed)
+            mismatches = compare_trend_statistics(series)
+            
+            for name, reference, vectorized, build_args in _trend_statistic_cases():
+                args = build_args(series)
+                python_seconds = best_of(reference, args)
+                numpy_seconds = best_of(vectorized, args)
+                run = {
+                    'days': days,
+                    'function': name,
+                    'python_ms': round(python_seconds * 1000, 3),
+                    'numpy_ms': round(numpy_seconds * 1000, 3),
+                    'speedup': round(python_seconds / numpy_seconds, 1) if numpy_seconds else None,
+                    'matches': name not in mismatches,
+                }
+                runs.append(run)
+                print(f"  {'✓' if run['matches'] else '✗'} {days:>5} days {name:<28} "
+                      f"python {run['python_ms']:>9.3f}ms  numpy {run['numpy_ms']:>8.3f}ms  "
+                      f"x{run['speedup']}")
+            
+            self.results[f"Trend_Statistics_{days}d"] = {
+                'python_ms': round(sum(r['python_ms'] for r in runs if r['days'] == days), 3),
+                'numpy_ms': round(sum(r['numpy_ms'] for r in runs if r['days'] == days), 3),
+                'matches': not mismatches,
+            }
+        
+        return {'benchmark': 'trend_statistics', 'seed': seed, 'repeats': repeats, 'runs': runs}
+    
     def generate_report(self):
         """
         Generate performance benchmark report
@@ -364,6 +499,639 @@ class PerformanceBenchmark:
         return "\n".join(report)
 
 
+# ============================================================================
+# LP OPTIMIZER SCALING BENCHMARK (synthetic homes)
+# ============================================================================
+
+# (staff, units) per synthetic home - 20 to 2,000 staff, 1 to 20 units
+DEFAULT_SCALING_SIZES = [
+    (20, 1),
+    (50, 2),
+    (100, 4),
+    (250, 6),
+    (500, 10),
+    (1000, 15),
+    (2000, 20),
+]
+
+# Role mix of a typical home (seniors can only work senior shifts)
+SYNTHETIC_ROLE_MIX = [('SSCW', 0.20), ('SCW', 0.15), ('SCA', 0.65)]
+
+# Share of each role group needed per shift on a given day
+SYNTHETIC_SHIFT_SHARE = {
+    'DAY_SENIOR': ('senior', 0.30),
+    'NIGHT_SENIOR': ('senior', 0.15),
+    'DAY_ASSISTANT': ('assistant', 0.30),
+    'NIGHT_ASSISTANT': ('assistant', 0.15),
+}
+
+
+class _SyntheticUnits:
+    """Stand-in for care_home.units (only .filter() is used by the optimizer)"""
+    
+    def __init__(self, units):
+        self._units = units
+    
+    def filter(self, **kwargs):
+        return self._units
+
+
+class _SyntheticRecord:
+    """Attribute bag for synthetic homes, units, roles and staff"""
+    
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+    
+    def __str__(self):
+        return getattr(self, 'name', None) or getattr(self, 'full_name', 'synthetic')
+
+
+class _SyntheticContext:
+    """Seeded OptimizerContext stand-in (weekly hours, leave, rest history)"""
+    
+    def __init__(self, staff, rng):
+        self.weekly_hours = {}
+        self.on_leave = set()
+        self.working_today = set()
+        self.yesterday_shift_types = {}
+        
+        for s in staff:
+            self.weekly_hours[s.sap] = rng.choice([0.0, 12.0, 12.0, 24.0, 24.0, 36.0])
+            roll = rng.random()
+            if roll < 0.05:
+                self.on_leave.add(s.sap)
+            elif roll < 0.15:
+                senior = s.role.name != 'SCA'
+                self.yesterday_shift_types[s.sap] = 'NIGHT_SENIOR' if senior else 'NIGHT_ASSISTANT'
+    
+    def get_weekly_hours(self, sap):
+        return self.weekly_hours.get(sap, 0.0)
+    
+    def is_unavailable(self, sap):
+        return sap in self.working_today or sap in self.on_leave
+
+
+def build_synthetic_home(staff_count, unit_count, seed=42):
+    """
+    Generate a reproducible synthetic home (no database access)
+    
+    Args:
+        staff_count: Staff in the home
+        unit_count: Units in the home
+        seed: Random seed (same seed = same home)
+    
+    Returns:
+        (care_home, staff, context, demand) - demand is {unit: {shift_type: (min, max)}}
+    """
+    rng = random.Random(f"{seed}-{staff_count}-{unit_count}")
+    
+    units = [_SyntheticRecord(name=f"UNIT_{i:02d}") for i in range(unit_count)]
+    care_home = _SyntheticRecord(name=f"SYNTHETIC_{staff_count}", units=_SyntheticUnits(units))
+    roles = {name: _SyntheticRecord(name=name) for name, share in SYNTHETIC_ROLE_MIX}
+    
+    # Fixed role quotas (shuffled) so small homes keep the intended mix
+    role_names = []
+    for name, share in SYNTHETIC_ROLE_MIX[:-1]:
+        role_names += [name] * round(staff_count * share)
+    role_names += [SYNTHETIC_ROLE_MIX[-1][0]] * (staff_count - len(role_names))
+    rng.shuffle(role_names)
+    
+    staff = [
+        _SyntheticRecord(
+            sap=f"{900000 + i}",
+            role=roles[role_name],
+            full_name=f"Synthetic Staff {i}",
+        )
+        for i, role_name in enumerate(role_names)
+    ]
+    
+    per_unit = staff_count / unit_count
+    senior_share = sum(share for name, share in SYNTHETIC_ROLE_MIX if name != 'SCA')
+    group_size = {'senior': per_unit * senior_share, 'assistant': per_unit * (1 - senior_share)}
+    
+    demand = {}
+    for unit in units:
+        demand[unit.name] = {}
+        for shift_type, (group, share) in SYNTHETIC_SHIFT_SHARE.items():
+            minimum = max(1, int(group_size[group] * share))
+            demand[unit.name][shift_type] = (minimum, minimum + max(1, minimum // 2))
+    
+    return care_home, staff, _SyntheticContext(staff, rng), demand
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(who).ru_maxrss
+    if sys.platform == 'darwin':
+        return round(peak / 1024 / 1024, 1)
+    return round(peak / 1024, 1)
+
+
+def _run_scaling_case(case):
+    """
+    Build and solve one synthetic home, measuring each phase
+    
+    Runs in its own process when isolated so peak RSS belongs to this size only.
+    """
+    from pulp import LpStatus, LpSolution, value
+    from scheduling.shift_optimizer import ShiftOptimizer
+    
+    staff_count, unit_count = case['staff'], case['units']
+    care_home, staff, context, demand = build_synthetic_home(
+        staff_count, unit_count, seed=case['seed']
+    )
+    
+    optimizer = ShiftOptimizer(
+        care_home=care_home,
+        optimization_date=date(2025, 1, 6),
+        forecast_demand=demand,
+        available_staff=staff,
+        existing_shifts=[],
+        context=context,
+        time_limit=case['time_limit'],
+        gap_rel=case['gap_rel']
+    )
+    
+    started = time.perf_counter()
+    optimizer._build_model()
+    build_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    status = optimizer.model.solve(optimizer._get_solver())
+    solve_seconds = time.perf_counter() - started
+    
+    objective = value(optimizer.model.objective)
+    
+    return {
+        'staff': staff_count,
+        'units': unit_count,
+        'build_seconds': round(build_seconds, 3),
+        'solve_seconds': round(solve_seconds, 3),
+        'variables': len(optimizer.model.variables()),
+        'constraints': len(optimizer.model.constraints),
+        'candidate_variables': optimizer.presolve_stats.get('candidate_variables'),
+        'pruned_ratio': optimizer.presolve_stats.get('pruned_ratio'),
+        'status': LpStatus[status],
+        'solution_status': LpSolution.get(optimizer.model.sol_status, 'Unknown'),
+        'objective': round(objective, 2) if objective is not None else None,
+        'peak_rss_mb': _peak_rss_mb(),
+        'solver_peak_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def compare_scaling_results(baseline, current, time_tolerance=0.25, memory_tolerance=0.25):
+    """
+    Diff two scaling benchmark runs
+    
+    Args:
+        baseline: Baseline run dict (or path to its JSON file)
+        current: Current run dict (or path to its JSON file)
+        time_tolerance: Allowed relative slowdown before flagging (0.25 = 25%)
+        memory_tolerance: Allowed relative peak RSS growth before flagging
+    
+    Returns:
+        List of regression dicts {staff, units, metric, baseline, current, change_pct}
+    """
+    def load(run):
+        if isinstance(run, str):
+            with open(run) as f:
+                return json.load(f)
+        return run
+    
+    baseline_runs = {(r['staff'], r['units']): r for r in load(baseline)['runs']}
+    regressions = []
+    
+    for run in load(current)['runs']:
+        before = baseline_runs.get((run['staff'], run['units']))
+        if not before:
+            continue
+        
+        checks = [
+            ('build_seconds', time_tolerance),
+            ('solve_seconds', time_tolerance),
+            ('variables', 0),
+            ('constraints', 0),
+            ('peak_rss_mb', memory_tolerance),
+        ]
+        for metric, tolerance in checks:
+            old, new = before.get(metric), run.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > tolerance:
+                regressions.append({
+                    'staff': run['staff'],
+                    'units': run['units'],
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change_pct': round(change * 100, 1),
+                })
+        
+        # Same seed and model: a higher objective means a worse (or time-limited) solution
+        if before.get('objective') and run.get('objective') is not None:
+            if run['objective'] > before['objective'] + 0.01:
+                regressions.append({
+                    'staff': run['staff'],
+                    'units': run['units'],
+                    'metric': 'objective',
+                    'baseline': before['objective'],
+                    'current': run['objective'],
+                    'change_pct': round((run['objective'] - before['objective'])
+                                        / before['objective'] * 100, 1),
+                })
+    
+    return regressions
+
+
+# ============================================================================
+# TREND STATISTICS BENCHMARK (pure-Python reference vs NumPy)
+# ============================================================================
+
+# Days per synthetic series - a quarter up to ten years
+DEFAULT_TREND_LENGTHS = [90, 365, 1095, 3650]
+
+
+def build_synthetic_series(days, seed=42):
+    """
+    Daily series with a trend, a weekly cycle, noise, spikes and a level shift
+    
+    Returns: dict with {date: value} mappings, like collect_metric_time_series()
+    """
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    series = {}
+    for n in range(days):
+        value = 40 + n * 0.01 + (8 if (start + timedelta(days=n)).weekday() >= 5 else 0)
+        value += rng.gauss(0, 2)
+        if n > days // 2:
+            value += 15
+        if rng.random() < 0.01:
+            value *= 2
+        series[(start + timedelta(days=n)).strftime('%Y-%m-%d')] = round(max(value, 0), 2)
+    return series
+
+
+def _reference_calculate_linear_regression(x_values, y_values):
+    """
+    Calculate linear regression slope and R-squared
+    
+    Returns: (slope, intercept, r_squared)
+    """
+    if len(x_values) != len(y_values) or len(x_values) < 2:
+        return 0, 0, 0
+    
+    n = len(x_values)
+    
+    # Calculate means
+    mean_x = statistics.mean(x_values)
+    mean_y = statistics.mean(y_values)
+    
+    # Calculate slope
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in zip(x_values, y_values))
+    denominator = sum((x - mean_x) ** 2 for x in x_values)
+    
+    slope = numerator / denominator if denominator != 0 else 0
+    intercept = mean_y - (slope * mean_x)
+    
+    # Calculate R-squared
+    ss_tot = sum((y - mean_y) ** 2 for y in y_values)
+    ss_res = sum((y - (slope * x + intercept)) ** 2 for x, y in zip(x_values, y_values))
+    
+    r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+    
+    return slope, intercept, r_squared
+
+
+def _reference_moving_average(values, window=7):
+    """
+    Calculate moving average (trend component)
+    """
+    if len(values) < window:
+        return values
+    
+    ma = []
+    for i in range(len(values)):
+        if i < window // 2:
+            ma.append(values[i])
+        elif i >= len(values) - window // 2:
+            ma.append(values[i])
+        else:
+            start = i - window // 2
+            end = i + window // 2 + 1
+            ma.append(statistics.mean(values[start:end]))
+    
+    return ma
+
+
+def _reference_decompose_time_series(time_series_data):
+    """
+    Decompose time series into trend, seasonal, and residual components
+    
+    Simple additive decomposition: Y = Trend + Seasonal + Residual
+    """
+    if not time_series_data:
+        return {}
+    
+    dates = sorted(time_series_data.keys())
+    values = [time_series_data[d] for d in dates]
+    
+    # Calculate trend (moving average)
+    trend = _reference_moving_average(values, window=7)
+    
+    # Calculate detrended values
+    detrended = [v - t for v, t in zip(values, trend)]
+    
+    # Extract seasonal component (simple approach - average by day of week)
+    from datetime import datetime
+    seasonal_by_dow = {i: [] for i in range(7)}
+    
+    for date_str, detrended_val in zip(dates, detrended):
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+        dow = date_obj.weekday()
+        seasonal_by_dow[dow].append(detrended_val)
+    
+    # Average seasonal component per day of week
+    seasonal_pattern = {dow: statistics.mean(vals) if vals else 0 for dow, vals in seasonal_by_dow.items()}
+    
+    # Apply seasonal pattern to full series
+    seasonal = []
+    for date_str in dates:
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+        dow = date_obj.weekday()
+        seasonal.append(seasonal_pattern[dow])
+    
+    # Calculate residual
+    residual = [v - t - s for v, t, s in zip(values, trend, seasonal)]
+    
+    return {
+        'trend': trend,
+        'seasonal': seasonal,
+        'residual': residual,
+        'seasonal_pattern': seasonal_pattern,
+    }
+
+
+def _reference_detect_weekly_seasonality(time_series_data):
+    """
+    Detect weekly seasonal pattern
+    
+    Returns: (pattern_data, strength, is_significant)
+    """
+    from datetime import datetime
+    
+    # Group by day of week
+    by_dow = {i: [] for i in range(7)}
+    
+    for date_str, value in time_series_data.items():
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+        dow = date_obj.weekday()
+        by_dow[dow].append(value)
+    
+    # Calculate averages
+    pattern = {}
+    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    
+    for dow in range(7):
+        if by_dow[dow]:
+            pattern[day_names[dow]] = statistics.mean(by_dow[dow])
+        else:
+            pattern[day_names[dow]] = 0
+    
+    # Calculate strength (coefficient of variation)
+    pattern_values = list(pattern.values())
+    if pattern_values:
+        mean_val = statistics.mean(pattern_values)
+        std_val = statistics.stdev(pattern_values) if len(pattern_values) > 1 else 0
+        strength = (std_val / mean_val * 100) if mean_val > 0 else 0
+    else:
+        strength = 0
+    
+    # Simple significance test (strength > threshold)
+    is_significant = strength > 10
+    
+    # Find peaks and troughs
+    if pattern_values:
+        max_val = max(pattern_values)
+        min_val = min(pattern_values)
+        peaks = [day for day, val in pattern.items() if val == max_val]
+        troughs = [day for day, val in pattern.items() if val == min_val]
+    else:
+        peaks = []
+        troughs = []
+    
+    return {
+        'pattern': pattern,
+        'strength': round(strength, 2),
+        'is_significant': is_significant,
+        'peaks': peaks,
+        'troughs': troughs,
+    }
+
+
+def _reference_detect_monthly_seasonality(time_series_data):
+    """
+    Detect monthly seasonal pattern
+    """
+    from datetime import datetime
+    
+    # Group by day of month
+    by_dom = {i: [] for i in range(1, 32)}
+    
+    for date_str, value in time_series_data.items():
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+        dom = date_obj.day
+        by_dom[dom].append(value)
+    
+    # Calculate averages
+    pattern = {}
+    for dom in range(1, 32):
+        if by_dom[dom]:
+            pattern[f"Day {dom}"] = statistics.mean(by_dom[dom])
+    
+    if not pattern:
+        return {
+            'pattern': {},
+            'strength': 0,
+            'is_significant': False,
+            'peaks': [],
+            'troughs': [],
+        }
+    
+    # Calculate strength
+    pattern_values = list(pattern.values())
+    mean_val = statistics.mean(pattern_values)
+    std_val = statistics.stdev(pattern_values) if len(pattern_values) > 1 else 0
+    strength = (std_val / mean_val * 100) if mean_val > 0 else 0
+    
+    is_significant = strength > 15
+    
+    # Find peaks and troughs
+    max_val = max(pattern_values)
+    min_val = min(pattern_values)
+    peaks = [day for day, val in pattern.items() if val == max_val]
+    troughs = [day for day, val in pattern.items() if val == min_val]
+    
+    return {
+        'pattern': pattern,
+        'strength': round(strength, 2),
+        'is_significant': is_significant,
+        'peaks': peaks,
+        'troughs': troughs,
+    }
+
+
+def _reference_detect_anomalies_zscore(time_series_data, threshold=2.5):
+    """
+    Detect anomalies using Z-score method
+    
+    Z-score > threshold = anomaly
+    """
+    values = list(time_series_data.values())
+    dates = list(time_series_data.keys())
+    
+    if len(values) < 3:
+        return []
+    
+    mean = statistics.mean(values)
+    std_dev = statistics.stdev(values)
+    
+    anomalies = []
+    
+    for date, value in zip(dates, values):
+        if std_dev > 0:
+            z_score = (value - mean) / std_dev
+            
+            if abs(z_score) > threshold:
+                # Determine type
+                if z_score > 0:
+                    anomaly_type = 'SPIKE'
+                else:
+                    anomaly_type = 'DROP'
+                
+                # Determine severity
+                if abs(z_score) > 4:
+                    severity = 'CRITICAL'
+                elif abs(z_score) > 3:
+                    severity = 'HIGH'
+                elif abs(z_score) > 2.5:
+                    severity = 'MEDIUM'
+                else:
+                    severity = 'LOW'
+                
+                deviation = value - mean
+                deviation_pct = (deviation / mean * 100) if mean != 0 else 0
+                
+                anomalies.append({
+                    'date': date,
+                    'type': anomaly_type,
+                    'severity': severity,
+                    'actual_value': value,
+                    'expected_value': mean,
+                    'deviation': deviation,
+                    'deviation_percentage': deviation_pct,
+                    'z_score': z_score,
+                    'confidence': min(abs(z_score) / 4 * 100, 100),
+                })
+    
+    return anomalies
+
+
+def _reference_detect_trend_shifts(time_series_data, window=14):
+    """
+    Detect significant trend shifts
+    """
+    dates = sorted(time_series_data.keys())
+    values = [time_series_data[d] for d in dates]
+    
+    if len(values) < window * 2:
+        return []
+    
+    shifts = []
+    
+    # Sliding window to detect shifts
+    for i in range(window, len(values) - window):
+        before = values[i-window:i]
+        after = values[i:i+window]
+        
+        mean_before = statistics.mean(before)
+        mean_after = statistics.mean(after)
+        
+        shift = mean_after - mean_before
+        shift_pct = (shift / mean_before * 100) if mean_before != 0 else 0
+        
+        # Significant shift threshold
+        if abs(shift_pct) > 20:
+            shifts.append({
+                'date': dates[i],
+                'type': 'SHIFT',
+                'severity': 'HIGH' if abs(shift_pct) > 50 else 'MEDIUM',
+                'actual_value': mean_after,
+                'expected_value': mean_before,
+                'deviation': shift,
+                'deviation_percentage': shift_pct,
+                'z_score': None,
+                'confidence': min(abs(shift_pct) / 50 * 100, 100),
+            })
+    
+    return shifts
+
+
+def _trend_statistic_cases():
+    """(name, reference, vectorized, argument builder) per trend statistic"""
+    from scheduling import trend_analysis
+    
+    def regression_args(series):
+        values = list(series.values())
+        return (list(range(len(values))), values)
+    
+    def values_args(series):
+        return (list(series.values()),)
+    
+    def series_args(series):
+        return (series,)
+    
+    return [
+        ('calculate_linear_regression', _reference_calculate_linear_regression,
+         trend_analysis.calculate_linear_regression, regression_args),
+        ('moving_average', _reference_moving_average, trend_analysis.moving_average, values_args),
+        ('decompose_time_series', _reference_decompose_time_series,
+         trend_analysis.decompose_time_series, series_args),
+        ('detect_weekly_seasonality', _reference_detect_weekly_seasonality,
+         trend_analysis.detect_weekly_seasonality, series_args),
+        ('detect_monthly_seasonality', _reference_detect_monthly_seasonality,
+         trend_analysis.detect_monthly_seasonality, series_args),
+        ('detect_anomalies_zscore', _reference_detect_anomalies_zscore,
+         trend_analysis.detect_anomalies_zscore, series_args),
+        ('detect_trend_shifts', _reference_detect_trend_shifts,
+         trend_analysis.detect_trend_shifts, series_args),
+    ]
+
+
+def _results_match(expected, actual, tolerance=1e-9):
+    if isinstance(expected, dict):
+        return (isinstance(actual, dict) and list(expected) == list(actual) and
+                all(_results_match(expected[k], actual[k], tolerance) for k in expected))
+    if isinstance(expected, (list, tuple)):
+        return (isinstance(actual, (list, tuple)) and len(expected) == len(actual) and
+                all(_results_match(e, a, tolerance) for e, a in zip(expected, actual)))
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        return isinstance(actual, (int, float)) and abs(expected - actual) <= tolerance * max(1, abs(expected))
+    return expected == actual
+
+
+def compare_trend_statistics(series):
+    """
+    Names of trend statistics whose NumPy results differ from the reference
+    
+    Returns: list (empty when every function matches)
+    """
+    return [
+        name for name, reference, vectorized, build_args in _trend_statistic_cases()
+        if not _results_match(reference(*build_args(series)), vectorized(*build_args(series)))
+    ]
+
+
 def run_all_benchmarks():
     """
     Run complete performance benchmark suite
@@ -407,6 +1175,12 @@ def run_all_benchmarks():
     except Exception as e:
         print(f"Concurrent load benchmark failed: {e}")
     
+    # 6. Trend statistics (no database)
+    try:
+        benchmark.benchmark_trend_statistics()
+    except Exception as e:
+        print(f"Trend statistics benchmark failed: {e}")
+    
     # Generate report
     print(benchmark.generate_report())
     
@@ -10,11 +10,16 @@ from typing import Any, Callable
 import hashlib
 import json
 
+from .cache_service import CacheService
+
 
 def cache_query(timeout: int = 300, key_prefix: str = ''):
     """
     Decorator to cache database query results
     
+    Thin wrapper over CacheService.cache_result(), so results get
+    generation-stamped keys, single-flight recompute and per-prefix stats.
+    
     Args:
         timeout: Cache timeout in seconds (default 5 minutes)
         key_prefix: Prefix for cache key (optional)
@@ -24,40 +29,7 @@ def cache_query(timeout: int = 300, key_prefix: str = ''):
         def get_shifts_for_week(start_date, home_id):
             return Shift.objects.filter(...)
     """
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Generate cache key from function name and arguments
-            key_parts = [key_prefix or func.__name__]
-            
-            # Add args to cache key
-            for arg in args:
-                if hasattr(arg, 'id'):  # Model instance
-                    key_parts.append(f'{type(arg).__name__}_{arg.id}')
-                else:
-                    key_parts.append(str(arg))
-            
-            # Add kwargs to cache key
-            for k, v in sorted(kwargs.items()):
-                if hasattr(v, 'id'):  # Model instance
-                    key_parts.append(f'{k}_{type(v).__name__}_{v.id}')
-                else:
-                    key_parts.append(f'{k}_{v}')
-            
-            cache_key = '_'.join(key_parts)
-            
-            # Check cache first
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, timeout)
-            return result
-        
-        return wrapper
-    return decorator
+    return CacheService.cache_result(timeout=timeout, key_prefix=key_prefix)
 
 
 def get_optimized_shift_queryset():
@@ -125,37 +97,32 @@ def get_shifts_with_staff(date_start, date_end, home=None, unit=None):
     return queryset.order_by('date', 'shift_type__start_time')
 
 
-@cache_query(timeout=3600, key_prefix='home_data')
 def get_cached_care_homes():
     """
-    Returns all care homes with caching (1 hour)
-    Care homes rarely change, so aggressive caching is safe
+    Returns all care homes from the in-process reference data registry
+    (reloaded across processes when any home changes)
     """
-    from .models_multi_home import CareHome
+    from . import reference_data
     
-    return list(CareHome.objects.all().order_by('name'))
+    return reference_data.care_homes(active_only=False)
 
 
-@cache_query(timeout=3600, key_prefix='roles')
 def get_cached_roles():
     """
-    Returns all roles with caching (1 hour)
-    Roles rarely change, so aggressive caching is safe
+    Returns all roles from the in-process reference data registry
     """
-    from .models import Role
+    from . import reference_data
     
-    return list(Role.objects.all().order_by('name'))
+    return reference_data.roles()
 
 
-@cache_query(timeout=900, key_prefix='shift_types')
 def get_cached_shift_types():
     """
-    Returns all shift types with caching (15 minutes)
-    Shift types occasionally change, moderate caching
+    Returns all shift types from the in-process reference data registry
     """
-    from .models import ShiftType
+    from . import reference_data
     
-    return list(ShiftType.objects.all().order_by('name'))
+    return reference_data.shift_types(active_only=False)
 
 
 def invalidate_shift_cache(home_id=None, unit_id=None, date=None):
@@ -168,19 +135,15 @@ def invalidate_shift_cache(home_id=None, unit_id=None, date=None):
         unit_id: Unit ID to invalidate  
         date: Date to invalidate
     """
-    patterns = ['shifts_*']
-    
+    # Generation bumps via CacheService (coalesced until commit inside a
+    # transaction) instead of clearing the whole cache
     if home_id:
-        patterns.append(f'*_home_{home_id}_*')
-    if unit_id:
-        patterns.append(f'*_unit_{unit_id}_*')
-    if date:
-        patterns.append(f'*_{date}_*')
-    
-    # Django cache doesn't support pattern deletion in all backends
-    # For production with Redis, use cache.delete_pattern()
-    # For now, we'll use cache versioning approach
-    cache.clear()  # Simple approach - clears all cache
+        CacheService.invalidate_shift_cache(home_id=home_id, date=date)
+        CacheService.invalidate_home_cache(home_id)
+    elif unit_id:
+        CacheService.invalidate_unit_shifts([unit_id], dates=[date] if date else None)
+    else:
+        CacheService.invalidate_shift_cache(date=date)
 
 
 def get_staff_dashboard_data(user, use_cache=True):
@@ -243,36 +206,35 @@ def get_manager_dashboard_data(home, date_range_start, date_range_end, use_cache
     from .models import Shift, User
     from django.db.models import Count
     
-    cache_key = f'mgr_dashboard_{home.id}_{date_range_start}_{date_range_end}'
-    
-    if use_cache:
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
-    
-    # Optimized queries
-    shifts = get_optimized_shift_queryset().filter(
-        unit__care_home=home,
-        date__gte=date_range_start,
-        date__lte=date_range_end
-    )
-    
-    staff = get_optimized_user_queryset().filter(
-        home_unit__care_home=home,
-        is_active=True
+    def build():
+        # Optimized queries
+        shifts = get_optimized_shift_queryset().filter(
+            unit__care_home=home,
+            date__gte=date_range_start,
+            date__lte=date_range_end
+        )
+        
+        staff = get_optimized_user_queryset().filter(
+            home_unit__care_home=home,
+            is_active=True
+        )
+        
+        return {
+            'total_shifts': shifts.count(),
+            'unfilled_shifts': shifts.filter(user__isnull=True).count(),
+            'total_staff': staff.count(),
+            'shifts_by_type': list(shifts.values('shift_type__name').annotate(count=Count('id'))),
+        }
+    
+    if not use_cache:
+        return build()
+    
+    # Shared by every manager of the home: single-flight, served stale while
+    # one request refreshes it (changeover stampede)
+    cache_key = CacheService.scoped_key(
+        'mgr_dashboard', date_range_start, date_range_end, home_id=home.id
     )
-    
-    data = {
-        'total_shifts': shifts.count(),
-        'unfilled_shifts': shifts.filter(user__isnull=True).count(),
-        'total_staff': staff.count(),
-        'shifts_by_type': list(shifts.values('shift_type__name').annotate(count=Count('id'))),
-    }
-    
-    if use_cache:
-        cache.set(cache_key, data, 300)  # 5 minutes
-    
-    return data
+    return CacheService.get_or_set(cache_key, build, timeout=300)
 
 
 class QueryOptimizer:
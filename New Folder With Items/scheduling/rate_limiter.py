@@ -0,0 +1,282 @@
+"""
+Integration API Rate Limiter
+
+Counts API requests per client against the per-minute, per-hour and per-day
+limits on APIClient without touching the database:
+
+- RedisRateLimiter checks and increments all three windows in one Lua
+  script, so concurrent workers can never over-admit a client
+- LocalRateLimiter keeps the same counters in process memory (per worker)
+  when Redis is not configured or cannot be reached
+- APIRateLimit rows are written only when API_RATE_LIMIT_PERSIST is on, as
+  periodic bulk increments for reporting
+
+Windows are fixed and aligned to the UTC minute, hour and day, as the
+APIRateLimit rows always were, so reset times and reports are unchanged.
+A rejected request consumes nothing from any window.
+
+Usage:
+    from scheduling.rate_limiter import get_rate_limiter, window_limits
+
+    decision = get_rate_limiter().hit(f"{client.pk}:{endpoint}", window_limits(client))
+    if not decision.allowed:
+        retry_after = decision.blocked.reset_in_seconds
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from datetime import datetime, timezone as dt_timezone
+from collections import Counter, namedtuple
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 'auto' (Redis when available), 'redis' or 'memory'
+API_RATE_LIMIT_BACKEND = getattr(settings, 'API_RATE_LIMIT_BACKEND', 'auto')
+
+# Mirror counters into APIRateLimit rows for reporting
+API_RATE_LIMIT_PERSIST = getattr(settings, 'API_RATE_LIMIT_PERSIST', False)
+API_RATE_LIMIT_PERSIST_INTERVAL = getattr(settings, 'API_RATE_LIMIT_PERSIST_INTERVAL', 60)
+
+WINDOW_SECONDS = {
+    'MINUTE': 60,
+    'HOUR': 3600,
+    'DAY': 86400,
+}
+
+WindowStatus = namedtuple('WindowStatus', ['window', 'limit', 'count', 'window_start', 'reset_in_seconds'])
+RateLimitDecision = namedtuple('RateLimitDecision', ['allowed', 'windows', 'blocked'])
+
+
+def window_limits(client) -> list:
+    """[(window_type, limit)] for an APIClient"""
+    return [
+        ('MINUTE', client.rate_limit_per_minute),
+        ('HOUR', client.rate_limit_per_hour),
+        ('DAY', client.rate_limit_per_day),
+    ]
+
+
+def _window_bounds(window, now):
+    length = WINDOW_SECONDS[window]
+    start = int(now) - int(now) % length
+    return start, start + length
+
+
+class LocalRateLimiter:
+    """In-process fixed-window counters (limits apply per worker process)"""
+
+    # Drop expired counters once this many are held
+    PRUNE_AT = 10000
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def hit(self, scope: str, limits: list) -> RateLimitDecision:
+        now = time.time()
+        bounds = [_window_bounds(window, now) for window, _ in limits]
+
+        with self._lock:
+            counts = []
+            for (window, _), (start, _) in zip(limits, bounds):
+                entry = self._counters.get((scope, window))
+                counts.append(entry[1] if entry and entry[0] == start else 0)
+
+            blocked = next(
+                (i for i, ((_, limit), count) in enumerate(zip(limits, counts)) if count >= limit),
+                None
+            )
+            if blocked is None:
+                for i, ((window, _), (start, _)) in enumerate(zip(limits, bounds)):
+                    counts[i] += 1
+                    self._counters[(scope, window)] = (start, counts[i])
+
+            if len(self._counters) > self.PRUNE_AT:
+                self._prune(now)
+
+        return _decision(limits, bounds, counts, blocked, now)
+
+    def _prune(self, now):
+        for key, (start, _) in list(self._counters.items()):
+            if start + WINDOW_SECONDS[key[1]] <= now:
+                del self._counters[key]
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class RedisRateLimiter:
+    """Fixed-window counters checked and incremented atomically in Redis"""
+
+    # KEYS: one counter per window. ARGV: limit, ttl for each window.
+    # Returns the blocking window's 1-based index (0 if admitted) then counts.
+    SCRIPT = """
+local counts = {}
+local blocked = 0
+for i, key in ipairs(KEYS) do
+    counts[i] = tonumber(redis.call('GET', key) or '0')
+    if blocked == 0 and counts[i] >= tonumber(ARGV[2 * i - 1]) then
+        blocked = i
+    end
+end
+if blocked == 0 then
+    for i, key in ipairs(KEYS) do
+        counts[i] = redis.call('INCR', key)
+        if counts[i] == 1 then
+            redis.call('EXPIRE', key, ARGV[2 * i])
+        end
+    end
+end
+return {blocked, unpack(counts)}
+"""
+
+    def __init__(self, connection):
+        self._script = connection.register_script(self.SCRIPT)
+
+    def hit(self, scope: str, limits: list) -> RateLimitDecision:
+        now = time.time()
+        bounds = [_window_bounds(window, now) for window, _ in limits]
+
+        keys, args = [], []
+        for (window, limit), (start, end) in zip(limits, bounds):
+            keys.append(cache.make_key(f"ratelimit:{scope}:{window}:{start}"))
+            args.extend([limit, end - int(now) + 1])
+
+        blocked, *counts = self._script(keys=keys, args=args)
+        return _decision(limits, bounds, [int(c) for c in counts], blocked - 1 if blocked else None, now)
+
+
+def _decision(limits, bounds, counts, blocked, now):
+    windows = [
+        WindowStatus(
+            window=window,
+            limit=limit,
+            count=count,
+            window_start=start,
+            reset_in_seconds=max(1, int(end - now)),
+        )
+        for (window, limit), (start, end), count in zip(limits, bounds, counts)
+    ]
+    return RateLimitDecision(
+        allowed=blocked is None,
+        windows=windows,
+        blocked=windows[blocked] if blocked is not None else None,
+    )
+
+
+class FallbackRateLimiter:
+    """Redis limiter that degrades to LocalRateLimiter while Redis is down"""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    def hit(self, scope: str, limits: list) -> RateLimitDecision:
+        try:
+            return self.primary.hit(scope, limits)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, using local counters: {e}")
+            return self.fallback.hit(scope, limits)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The configured limiter backend (built once per process)"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = _build_limiter()
+    return _limiter
+
+
+def _build_limiter():
+    local = LocalRateLimiter()
+    if API_RATE_LIMIT_BACKEND == 'memory':
+        return local
+
+    from .cache_service import CacheService
+    connection = CacheService._redis()
+    if connection is None:
+        if API_RATE_LIMIT_BACKEND == 'redis':
+            logger.warning("API_RATE_LIMIT_BACKEND is 'redis' but no Redis cache is configured")
+        return local
+    return FallbackRateLimiter(RedisRateLimiter(connection), local)
+
+
+# Reporting counters, keyed (client_id, window_type, window_start, endpoint)
+_pending_counts = Counter()
+_pending_lock = threading.Lock()
+_last_persist = time.monotonic()
+
+
+def record_for_reporting(client_id, endpoint: str, decision: RateLimitDecision):
+    """Queue an admitted request for the APIRateLimit reporting rows"""
+    global _last_persist
+    if not API_RATE_LIMIT_PERSIST or not decision.allowed:
+        return
+
+    with _pending_lock:
+        for status in decision.windows:
+            _pending_counts[(client_id, status.window, status.window_start, endpoint)] += 1
+        due = time.monotonic() - _last_persist >= API_RATE_LIMIT_PERSIST_INTERVAL
+        if due:
+            _last_persist = time.monotonic()
+
+    if due:
+        flush_reporting_counts()
+
+
+def flush_reporting_counts() -> int:
+    """
+    Add queued request counts to APIRateLimit rows
+
+    Returns:
+        Number of rows touched
+    """
+    from .models_integrations import APIRateLimit
+
+    with _pending_lock:
+        pending = dict(_pending_counts)
+        _pending_counts.clear()
+
+    for (client_id, window, start, endpoint), count in pending.items():
+        lookup = {
+            'client_id': client_id,
+            'window_type': window,
+            'window_start': datetime.fromtimestamp(start, tz=dt_timezone.utc),
+            'endpoint': endpoint,
+        }
+        try:
+            updated = APIRateLimit.objects.filter(**lookup).update(
+                request_count=F('request_count') + count
+            )
+            if not updated:
+                row, created = APIRateLimit.objects.get_or_create(
+                    **lookup, defaults={'request_count': count}
+                )
+                if not created:
+                    APIRateLimit.objects.filter(pk=row.pk).update(
+                        request_count=F('request_count') + count
+                    )
+        except Exception as e:
+            logger.warning(f"Failed to persist rate limit counts: {e}")
+
+    return len(pending)
+
+
+def _flush_at_exit():
+    if API_RATE_LIMIT_PERSIST:
+        flush_reporting_counts()
+
+
+atexit.register(_flush_at_exit)
@@ -1,6 +1,9 @@
 """
 Redis Caching for Staff Rota System
 
+Explicit get/set helpers; lookups are counted in CacheService's per-prefix
+stats. For compute-on-miss use @cached / CacheService.get_or_set().
+
 Caches:
 - Prophet forecast results (24h TTL)
 - Dashboard vacancy reports (5min TTL)
@@ -24,6 +27,8 @@ from django.core.cache import cache
 from django.utils import timezone
 import logging
 
+from scheduling.cache_service import CacheService
+
 logger = logging.getLogger(__name__)
 
 
@@ -101,6 +106,7 @@ def get_cached_forecast(care_home, unit, forecast_date):
     
     try:
         data = cache.get(cache_key)
+        CacheService.record_lookup('forecast', data is not None)
         if data:
             logger.debug(f"Cache hit: {cache_key}")
         else:
@@ -172,6 +178,7 @@ def get_cached_dashboard(user):
     
     try:
         data = cache.get(cache_key)
+        CacheService.record_lookup('dashboard', data is not None)
         if data:
             logger.debug(f"Dashboard cache hit for {user.sap}")
         return data
@@ -229,6 +236,7 @@ def get_cached_vacancy_report(care_home, start_date, end_date):
     
     try:
         data = cache.get(cache_key)
+        CacheService.record_lookup('vacancy', data is not None)
         if data:
             logger.debug(f"Vacancy cache hit")
         return data
@@ -282,6 +290,7 @@ def get_cached_coverage(unit, date):
     
     try:
         data = cache.get(cache_key)
+        CacheService.record_lookup('coverage', data is not None)
         if data:
             logger.debug(f"Coverage cache hit")
         return data
@@ -333,6 +342,9 @@ def cached(ttl=300, key_prefix='func'):
     """
     Decorator to cache function results
     
+    Same as CacheService.cache_result(): single-flight recompute with
+    stale-while-revalidate and per-prefix stats.
+    
     Usage:
         @cached(ttl=600, key_prefix='my_function')
         def my_expensive_function(arg1, arg2):
@@ -344,28 +356,4 @@ def cached(ttl=300, key_prefix='func'):
     
     Returns: Decorator function
     """
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            # Generate cache key from function name and arguments
-            cache_key = generate_cache_key(
-                key_prefix,
-                func.__name__,
-                *args,
-                *kwargs.values()
-            )
-            
-            # Try to get from cache
-            result = cache.get(cache_key)
-            if result is not None:
-                logger.debug(f"Cache hit: {func.__name__}")
-                return result
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
-            logger.debug(f"Cached result: {func.__name__}")
-            
-            return result
-        
-        return wrapper
-    return decorator
+    return CacheService.cache_result(timeout=ttl, key_prefix=key_prefix)
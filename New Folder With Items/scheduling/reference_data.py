@@ -0,0 +1,218 @@
+"""
+Reference Data Registry
+
+CareHome, Unit, ShiftType, Role and ShiftPattern rows change rarely but are
+read on almost every request. The registry loads all five tables into one
+in-process snapshot and serves lookups from it:
+
+- The snapshot is stamped with the "refdata" generation from CacheService;
+  the stamp is re-read from the shared cache at most once every
+  REFERENCE_DATA_CHECK_INTERVAL seconds, so every process sees a change
+  within that interval
+- Saving or deleting any of these rows bumps the generation on commit
+  (signals.py); the next lookup in each process reloads
+- A reload builds a complete new snapshot before swapping it in, so readers
+  never see a half-loaded registry
+- A snapshot loaded inside a transaction may hold uncommitted rows, so
+  only that connection reuses it; everyone else reloads
+- Lookups that miss the snapshot fall through to the database
+
+Units come back with their care_home already attached. Registry objects are
+shared between requests: treat them as read-only and re-fetch a row before
+modifying it.
+
+Usage:
+    from scheduling import reference_data
+
+    home = reference_data.get_care_home(name='ORCHARD_GROVE')
+    units = reference_data.units_for_home(home.pk)
+    early = reference_data.get_shift_type(name='EARLY')
+"""
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+import logging
+import threading
+import time
+
+from .cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATA_CHECK_INTERVAL = getattr(settings, 'REFERENCE_DATA_CHECK_INTERVAL', 1.0)
+
+NAMESPACE = 'refdata'
+
+
+class _Snapshot:
+    """One consistent load of every reference table, with lookup indexes"""
+
+    def __init__(self, version, owner=None):
+        from .models import CareHome, Unit, ShiftType, Role, ShiftPattern
+
+        self.version = version
+        self.owner = owner
+
+        self.care_homes = list(CareHome.objects.order_by('name'))
+        self.care_homes_by_id = {home.pk: home for home in self.care_homes}
+        self.care_homes_by_name = {home.name: home for home in self.care_homes}
+
+        self.units = list(Unit.objects.order_by('name'))
+        self.units_by_id = {}
+        self.units_by_name = {}
+        self.units_by_home = {}
+        for unit in self.units:
+            home = self.care_homes_by_id.get(unit.care_home_id)
+            if home is not None:
+                Unit.care_home.field.set_cached_value(unit, home)
+            self.units_by_id[unit.pk] = unit
+            self.units_by_name[unit.name] = unit
+            self.units_by_home.setdefault(unit.care_home_id, []).append(unit)
+
+        self.shift_types = list(ShiftType.objects.order_by('name'))
+        self.shift_types_by_id = {shift_type.pk: shift_type for shift_type in self.shift_types}
+        self.shift_types_by_name = {shift_type.name: shift_type for shift_type in self.shift_types}
+
+        self.roles = list(Role.objects.order_by('name'))
+        self.roles_by_id = {role.pk: role for role in self.roles}
+        self.roles_by_name = {role.name: role for role in self.roles}
+
+        self.shift_patterns = list(ShiftPattern.objects.all())
+        self.shift_patterns_by_home = {}
+        for pattern in self.shift_patterns:
+            self.shift_patterns_by_home.setdefault(pattern.care_home_id, []).append(pattern)
+
+
+_snapshot = None
+_checked_at = 0.0
+_load_lock = threading.Lock()
+
+
+def _current_version() -> int:
+    return CacheService.get_generations([NAMESPACE])[NAMESPACE]
+
+
+def snapshot() -> _Snapshot:
+    """The current snapshot, reloaded if another process changed the data"""
+    global _snapshot, _checked_at
+
+    conn = connections[DEFAULT_DB_ALIAS]
+    owner = id(conn) if conn.in_atomic_block else None
+
+    current = _snapshot
+    if current is not None and current.owner not in (None, owner):
+        current = None
+
+    now = time.monotonic()
+    if current is not None and now - _checked_at < REFERENCE_DATA_CHECK_INTERVAL:
+        return current
+
+    version = _current_version()
+    if current is not None and current.version == version:
+        _checked_at = now
+        return current
+
+    with _load_lock:
+        # Another thread may have reloaded while we waited
+        current = _snapshot
+        if current is None or current.version != version or current.owner not in (None, owner):
+            started = time.time()
+            current = _Snapshot(version, owner)
+            _snapshot = current
+            logger.debug(f"Reference data v{version} loaded in {(time.time() - started) * 1000:.0f}ms")
+        _checked_at = now
+    return current
+
+
+def invalidate():
+    """
+    Reload the registry in this process now and everywhere once the current
+    transaction commits
+
+    Inside a transaction the generation bump is coalesced with the other
+    cache invalidations and discarded on rollback.
+    """
+    reset()
+    transaction.on_commit(reset)
+    CacheService.invalidate_pattern(f'{NAMESPACE}:*')
+
+
+def reset():
+    """Drop this process's snapshot (reloaded on next access)"""
+    global _snapshot
+    _snapshot = None
+
+
+def _lookup(model, by_id, by_name, pk, name):
+    obj = by_id.get(int(pk)) if pk is not None else by_name.get(name)
+    if obj is None:
+        # Rows newer than the snapshot still resolve (or raise DoesNotExist)
+        lookup = {'pk': pk} if pk is not None else {'name': name}
+        return model.objects.get(**lookup)
+    return obj
+
+
+# ----------------------------------------------------------------------
+# Accessors (raise Model.DoesNotExist like QuerySet.get())
+# ----------------------------------------------------------------------
+
+def get_care_home(pk=None, name=None):
+    """CareHome by primary key or name"""
+    from .models import CareHome
+    data = snapshot()
+    return _lookup(CareHome, data.care_homes_by_id, data.care_homes_by_name, pk, name)
+
+
+def care_homes(active_only=True) -> list:
+    """Care homes ordered by name"""
+    return [home for home in snapshot().care_homes if home.is_active or not active_only]
+
+
+def get_unit(pk=None, name=None):
+    """Unit by primary key or name (care_home attached)"""
+    from .models import Unit
+    data = snapshot()
+    return _lookup(Unit, data.units_by_id, data.units_by_name, pk, name)
+
+
+def units_for_home(home_id, active_only=True) -> list:
+    """Units of a care home ordered by name"""
+    return [
+        unit for unit in snapshot().units_by_home.get(home_id, [])
+        if unit.is_active or not active_only
+    ]
+
+
+def home_id_for_unit(unit_id):
+    """Care home id of a unit, or None"""
+    unit = snapshot().units_by_id.get(unit_id)
+    return unit.care_home_id if unit is not None else None
+
+
+def get_shift_type(pk=None, name=None):
+    """ShiftType by primary key or name"""
+    from .models import ShiftType
+    data = snapshot()
+    return _lookup(ShiftType, data.shift_types_by_id, data.shift_types_by_name, pk, name)
+
+
+def shift_types(active_only=True) -> list:
+    """Shift types ordered by name"""
+    return [shift_type for shift_type in snapshot().shift_types if shift_type.is_active or not active_only]
+
+
+def get_role(pk=None, name=None):
+    """Role by primary key or name"""
+    from .models import Role
+    data = snapshot()
+    return _lookup(Role, data.roles_by_id, data.roles_by_name, pk, name)
+
+
+def roles() -> list:
+    """Roles ordered by name"""
+    return list(snapshot().roles)
+
+
+def shift_patterns_for_home(home_id) -> list:
+    """Shift patterns recorded for a care home"""
+    return list(snapshot().shift_patterns_by_home.get(home_id, []))
@@ -12,14 +12,38 @@ Business Problem:
 """
 
 from pulp import *
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from decimal import Decimal
 from datetime import date, timedelta
 from typing import List, Dict, Tuple
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def _demand_bounds(forecast_demand: Dict, unit_name: str, shift_type: str) -> Tuple[int, int]:
+    """
+    Resolve (min, max) demand for a unit/shift type
+    
+    Supports both formats:
+    1. {(unit, shift_type): {'min': x, 'max': y}}
+    2. {unit: {shift_type: (min, max)}}
+    """
+    demand_key = (unit_name, shift_type)
+    if demand_key in forecast_demand:
+        demand = forecast_demand[demand_key]
+        if isinstance(demand, dict):
+            return demand.get('min', 0), demand.get('max', 0)
+        return demand, demand
+    
+    unit_demand = forecast_demand.get(unit_name, {})
+    demand = unit_demand.get(shift_type, (0, 0))
+    if isinstance(demand, tuple):
+        return demand
+    return demand, demand
+
+
 class ShiftOptimizationResult:
     """Container for optimization results with transparency metrics"""
     
@@ -41,6 +65,74 @@ class ShiftOptimizationResult:
             return f"Optimization Failed: {self.status}"
 
 
+class OptimizerContext:
+    """
+    Bulk-preloaded constraint data for a staff pool on one optimization date
+    
+    Loads everything the constraint builders need in a constant number of
+    queries (one Shift query, one LeaveRequest query) instead of 3-5 queries
+    per staff member, then serves in-memory lookups keyed by SAP number:
+    
+    - weekly_hours: hours already worked Mon-Sun of the optimization week
+    - on_leave: staff on approved leave on the optimization date
+    - working_today: staff with a scheduled/confirmed shift on the date
+    - yesterday_shift_types: shift type name worked the previous day
+    """
+    
+    ACTIVE_STATUSES = ['SCHEDULED', 'CONFIRMED']
+    
+    def __init__(self, staff: List, optimization_date: date):
+        self.date = optimization_date
+        self.week_start = optimization_date - timedelta(days=optimization_date.weekday())
+        self.week_end = self.week_start + timedelta(days=6)
+        self.yesterday = optimization_date - timedelta(days=1)
+        
+        self.weekly_hours: Dict[str, float] = {}
+        self.on_leave = set()
+        self.working_today = set()
+        self.yesterday_shift_types: Dict[str, str] = {}
+        
+        self._load([s.sap for s in staff])
+    
+    def _load(self, saps: List[str]):
+        from scheduling.models import Shift, LeaveRequest
+        
+        if not saps:
+            return
+        
+        # 1 query: this week's shifts + yesterday (may fall in the previous week)
+        shifts = Shift.objects.filter(
+            user__in=saps,
+            date__gte=min(self.week_start, self.yesterday),
+            date__lte=self.week_end,
+            status__in=self.ACTIVE_STATUSES
+        ).select_related('shift_type')
+        
+        for shift in shifts:
+            if shift.date >= self.week_start:
+                self.weekly_hours[shift.user_id] = (
+                    self.weekly_hours.get(shift.user_id, 0.0) + float(shift.duration_hours)
+                )
+            if shift.date == self.date:
+                self.working_today.add(shift.user_id)
+            elif shift.date == self.yesterday:
+                self.yesterday_shift_types[shift.user_id] = shift.shift_type.name
+        
+        # 1 query: approved leave covering the date
+        self.on_leave = set(LeaveRequest.objects.filter(
+            user__in=saps,
+            start_date__lte=self.date,
+            end_date__gte=self.date,
+            status='APPROVED'
+        ).values_list('user_id', flat=True))
+    
+    def get_weekly_hours(self, sap: str) -> float:
+        return self.weekly_hours.get(sap, 0.0)
+    
+    def is_unavailable(self, sap: str) -> bool:
+        return sap in self.working_today or sap in self.on_leave
+
+
 class ShiftOptimizer:
     """
     Linear Programming-based shift scheduling optimizer
@@ -74,8 +166,18 @@ class ShiftOptimizer:
         'ADMIN': 8,
     }
     
+    # Role → shift type compatibility (skill matching)
+    ROLE_SHIFT_COMPATIBILITY = {
+        'OPERATIONS_MANAGER': ['ADMIN'],
+        'SSCW': ['DAY_SENIOR', 'NIGHT_SENIOR'],
+        'SCW': ['DAY_SENIOR', 'NIGHT_SENIOR'],
+        'SCA': ['DAY_ASSISTANT', 'NIGHT_ASSISTANT'],
+    }
+    
     def __init__(self, care_home, optimization_date: date, forecast_demand: Dict, 
-                 available_staff: List, existing_shifts: List):
+                 available_staff: List, existing_shifts: List,
+                 context: OptimizerContext = None,
+                 time_limit: float = None, gap_rel: float = None):
         """
         Initialize optimizer
         
@@ -85,6 +187,10 @@ class ShiftOptimizer:
             forecast_demand: Dict[unit_name][shift_type] = (min, max) demand
             available_staff: List of User instances available to work
             existing_shifts: List of existing Shift instances (constraints)
+            context: Optional preloaded OptimizerContext (built lazily otherwise)
+            time_limit: Optional CBC time limit in seconds - the best feasible
+                incumbent is returned (status "Feasible") when it is hit
+            gap_rel: Optional relative MIP gap at which CBC may stop early
         """
         self.care_home = care_home
         self.date = optimization_date
@@ -95,6 +201,19 @@ class ShiftOptimizer:
         self.model = None
         self.variables = {}
         self.result = None
+        self.presolve_stats = {}
+        self.time_limit = time_limit
+        self.gap_rel = gap_rel
+        
+        self._context = context
+        self._staff_costs = None
+    
+    @property
+    def context(self) -> OptimizerContext:
+        """Preloaded weekly hours, leave and neighbouring shifts for the staff pool"""
+        if self._context is None:
+            self._context = OptimizerContext(self.staff, self.date)
+        return self._context
     
     def optimize(self) -> ShiftOptimizationResult:
         """
@@ -111,17 +230,25 @@ class ShiftOptimizer:
         self._build_model()
         
         # Solve
-        status = self.model.solve(PULP_CBC_CMD(msg=0))  # CBC solver, silent
+        solve_started = time.perf_counter()
+        status = self.model.solve(self._get_solver())
+        solve_seconds = time.perf_counter() - solve_started
         
         # Extract results
         if status == LpStatusOptimal:
+            # Time/gap limit reached with an incumbent: not proven optimal
+            if self.model.sol_status == LpSolutionIntegerFeasible:
+                result_status = "Feasible"
+            else:
+                result_status = "Optimal"
+            
             assignments = self._extract_assignments()
-            cost = value(self.model.objective)
+            cost = value(self.model.objective) or 0.0
             metrics = self._calculate_metrics(assignments, cost)
             
             self.result = ShiftOptimizationResult(
                 success=True,
-                status="Optimal",
+                status=result_status,
                 assignments=assignments,
                 cost=cost,
                 metrics=metrics
@@ -148,25 +275,48 @@ class ShiftOptimizer:
                 metrics={'error': f'Solver status: {LpStatus[status]}'}
             )
         
+        # Pre-solve pruning statistics (model size before/after pruning)
+        self.result.metrics['presolve'] = self.presolve_stats
+        self.result.metrics['solver'] = {
+            'status': LpStatus[status],
+            'solution_status': LpSolution.get(self.model.sol_status, 'Unknown'),
+            'solve_seconds': round(solve_seconds, 3),
+            'time_limit': self.time_limit,
+            'gap_rel': self.gap_rel,
+        }
+        
         return self.result
     
+    def _get_solver(self, **options):
+        """CBC solver, silent, with optional time limit / relative gap"""
+        if self.time_limit:
+            options['timeLimit'] = self.time_limit
+        if self.gap_rel is not None:
+            options['gapRel'] = self.gap_rel
+        return PULP_CBC_CMD(msg=0, **options)
+    
     def _build_model(self):
         """Build Linear Programming model with objective and constraints"""
         
         self.model = LpProblem("Shift_Assignment_Optimization", LpMinimize)
         
         # Get all units and shift types for this care home
-        units = self.care_home.units.filter(is_active=True)
+        units = list(self.care_home.units.filter(is_active=True))
         shift_types = list(self.SHIFT_HOURS.keys())
         
+        # Pre-solve pruning: availability, skills and WTD decide which
+        # (staff, shift_type) pairs can ever be 1, so only those get variables
+        feasible_shift_types = self._prune_infeasible(units, shift_types)
+        
         # Decision variables: x[staff_id, unit_name, shift_type] ∈ {0, 1}
+        # (sparse - only feasible triples)
         self.variables = LpVariable.dicts(
             "assign",
             (
                 (s.sap, u.name, st)
                 for s in self.staff
+                for st in feasible_shift_types[s.sap]
                 for u in units
-                for st in shift_types
             ),
             cat='Binary'
         )
@@ -177,11 +327,8 @@ class ShiftOptimizer:
         staff_costs = self._calculate_staff_costs()
         
         self.model += lpSum([
-            staff_costs[s.sap] * self.SHIFT_HOURS.get(st, 12) * 
-            self.variables[(s.sap, u.name, st)]
-            for s in self.staff
-            for u in units
-            for st in shift_types
+            staff_costs[sap] * self.SHIFT_HOURS.get(st, 12) * var
+            for (sap, unit_name, st), var in self.variables.items()
         ]), "Total_Cost"
         
         # === CONSTRAINTS ===
@@ -192,20 +339,66 @@ class ShiftOptimizer:
         # 2. Each staff member works at most 1 shift per day
         self._add_one_shift_per_day_constraint(units, shift_types)
         
-        # 3. Respect staff availability (existing shifts, leave, off-duty)
-        self._add_availability_constraints(units, shift_types)
-        
-        # 4. Skill matching (role → shift type compatibility)
-        self._add_skill_constraints(units, shift_types)
+        # 3-5. Availability, skills and WTD are enforced by pruning above
         
-        # 5. Working Time Directive compliance (48h/week, 11h rest)
-        self._add_wtd_constraints(units, shift_types)
+        self.presolve_stats['variables'] = len(self.variables)
+        self.presolve_stats['constraints'] = len(self.model.constraints)
         
-        logger.info(f"Model built: {len(self.variables)} variables, "
+        logger.info(f"Model built: {len(self.variables)} variables "
+                   f"({self.presolve_stats['candidate_variables']} candidates), "
                    f"{len(self.model.constraints)} constraints")
         
         return self.model
     
+    def _prune_infeasible(self, units, shift_types) -> Dict[str, List[str]]:
+        """
+        Pre-solve pruning of staff/shift type pairs that must be 0
+        
+        Replaces the per-variable `== 0` constraints previously generated for
+        unavailability, role mismatch and WTD blocks.
+        
+        Returns:
+            Dict[sap_number] = feasible shift types (records presolve_stats)
+        """
+        pruned = {'unavailable': 0, 'skill': 0, 'wtd': 0, 'rest': 0}
+        feasible = {}
+        
+        for staff in self.staff:
+            allowed = list(shift_types)
+            
+            # 3. Availability (existing shift, approved leave)
+            if not self._is_available(staff):
+                pruned['unavailable'] += len(allowed) * len(units)
+                allowed = []
+            
+            # 4. Skill matching (role → shift type compatibility)
+            skill_ok = [st for st in allowed if self._skill_allows(staff, st)]
+            pruned['skill'] += (len(allowed) - len(skill_ok)) * len(units)
+            allowed = skill_ok
+            
+            # 5a. WTD weekly hours
+            if allowed and not self._wtd_hours_allow(staff):
+                pruned['wtd'] += len(allowed) * len(units)
+                allowed = []
+            
+            # 5b. 11-hour rest after yesterday's night shift
+            rest_ok = [st for st in allowed if self._rest_allows(staff, st)]
+            pruned['rest'] += (len(allowed) - len(rest_ok)) * len(units)
+            allowed = rest_ok
+            
+            feasible[staff.sap] = allowed
+        
+        candidates = len(self.staff) * len(units) * len(shift_types)
+        total_pruned = sum(pruned.values())
+        self.presolve_stats = {
+            'candidate_variables': candidates,
+            'pruned_variables': total_pruned,
+            'pruned_by_reason': pruned,
+            'pruned_ratio': round(total_pruned / candidates, 3) if candidates else 0,
+        }
+        
+        return feasible
+    
     def _calculate_staff_costs(self) -> Dict[str, float]:
         """
         Calculate hourly cost for each staff member
@@ -217,23 +410,13 @@ class ShiftOptimizer:
         Returns:
             Dict[sap_number] = hourly_cost
         """
+        if self._staff_costs is not None:
+            return self._staff_costs
+        
         costs = {}
         
         for staff in self.staff:
-            # Base hourly rate by role
-            if staff.role:
-                if staff.role.name == 'OPERATIONS_MANAGER':
-                    base_rate = 18.0
-                elif staff.role.name == 'SSCW':
-                    base_rate = 15.0
-                elif staff.role.name == 'SCW':
-                    base_rate = 13.0
-                elif staff.role.name == 'SCA':
-                    base_rate = 12.0
-                else:
-                    base_rate = 12.0
-            else:
-                base_rate = 12.0
+            base_rate = self._base_hourly_rate(staff)
             
             # Check if this would be overtime (already worked shifts this week)
             weekly_hours = self._get_weekly_hours(staff)
@@ -243,8 +426,22 @@ class ShiftOptimizer:
             else:
                 costs[staff.sap] = base_rate * self.COST_PERMANENT
         
+        self._staff_costs = costs
         return costs
     
+    def _base_hourly_rate(self, staff) -> float:
+        """Base (permanent) hourly rate by role"""
+        if staff.role:
+            if staff.role.name == 'OPERATIONS_MANAGER':
+                return 18.0
+            elif staff.role.name == 'SSCW':
+                return 15.0
+            elif staff.role.name == 'SCW':
+                return 13.0
+            elif staff.role.name == 'SCA':
+                return 12.0
+        return 12.0
+    
     def _get_weekly_hours(self, staff) -> float:
         """
         Get hours already worked this week (for WTD compliance)
@@ -255,23 +452,7 @@ class ShiftOptimizer:
         Returns:
             Total hours worked Mon-Sun of current week
         """
-        # Calculate week start (Monday)
-        days_since_monday = self.date.weekday()
-        week_start = self.date - timedelta(days=days_since_monday)
-        week_end = week_start + timedelta(days=6)
-        
-        # Sum hours from existing shifts
-        from scheduling.models import Shift
-        
-        weekly_shifts = Shift.objects.filter(
-            user=staff,
-            date__gte=week_start,
-            date__lte=week_end,
-            status__in=['SCHEDULED', 'CONFIRMED']
-        )
-        
-        total_hours = sum(shift.duration_hours for shift in weekly_shifts)
-        return float(total_hours)
+        return self.context.get_weekly_hours(staff.sap)
     
     def _add_demand_constraints(self, units, shift_types):
         """
@@ -280,44 +461,31 @@ class ShiftOptimizer:
         For each unit/shift_type:
             min_demand ≤ Σ assignments ≤ max_demand
         """
+        candidates = {}
+        for (sap, unit_name, shift_type), var in self.variables.items():
+            candidates.setdefault((unit_name, shift_type), []).append(var)
+        
         for unit in units:
             for shift_type in shift_types:
-                # Support both formats:
-                # 1. {(unit, shift_type): {'min': x, 'max': y}}
-                # 2. {unit: {shift_type: (min, max)}}
-                demand_key = (unit.name, shift_type)
-                if demand_key in self.forecast_demand:
-                    demand = self.forecast_demand[demand_key]
-                    if isinstance(demand, dict):
-                        min_demand = demand.get('min', 0)
-                        max_demand = demand.get('max', 0)
-                    else:
-                        min_demand, max_demand = demand, demand
-                else:
-                    unit_demand = self.forecast_demand.get(unit.name, {})
-                    demand = unit_demand.get(shift_type, (0, 0))
-                    if isinstance(demand, tuple):
-                        min_demand, max_demand = demand
-                    else:
-                        min_demand = max_demand = demand
-                
-                # Minimum demand constraint
-                self.model += (
-                    lpSum([
-                        self.variables[(s.sap, unit.name, shift_type)]
-                        for s in self.staff
-                    ]) >= min_demand,
-                    f"MinDemand_{unit.name}_{shift_type}"
+                min_demand, max_demand = _demand_bounds(
+                    self.forecast_demand, unit.name, shift_type
                 )
+                assigned = candidates.get((unit.name, shift_type), [])
+                
+                # Minimum demand constraint (kept even when no candidates
+                # remain so that unmet demand is reported as infeasible)
+                if assigned or min_demand > 0:
+                    self.model += (
+                        lpSum(assigned) >= min_demand,
+                        f"MinDemand_{unit.name}_{shift_type}"
+                    )
                 
                 # Maximum demand constraint (don't over-staff)
-                self.model += (
-                    lpSum([
-                        self.variables[(s.sap, unit.name, shift_type)]
-                        for s in self.staff
-                    ]) <= max_demand + 1,  # Allow 1 extra for flexibility
-                    f"MaxDemand_{unit.name}_{shift_type}"
-                )
+                if len(assigned) > max_demand + 1:
+                    self.model += (
+                        lpSum(assigned) <= max_demand + 1,  # Allow 1 extra for flexibility
+                        f"MaxDemand_{unit.name}_{shift_type}"
+                    )
     
     def _add_one_shift_per_day_constraint(self, units, shift_types):
         """
@@ -325,17 +493,18 @@ class ShiftOptimizer:
         
         Σ (all units, all shift types) assignments[staff] ≤ 1
         """
-        for staff in self.staff:
-            self.model += (
-                lpSum([
-                    self.variables[(staff.sap, u.name, st)]
-                    for u in units
-                    for st in shift_types
-                ]) <= 1,
-                f"OneShiftPerDay_{staff.sap}"
-            )
+        staff_variables = {}
+        for (sap, unit_name, shift_type), var in self.variables.items():
+            staff_variables.setdefault(sap, []).append(var)
+        
+        for sap, variables in staff_variables.items():
+            if len(variables) > 1:
+                self.model += (
+                    lpSum(variables) <= 1,
+                    f"OneShiftPerDay_{sap}"
+                )
     
-    def _add_availability_constraints(self, units, shift_types):
+    def _is_available(self, staff) -> bool:
         """
         Constraint 3: Respect staff availability
         
@@ -344,42 +513,9 @@ class ShiftOptimizer:
         - On approved annual leave
         - Marked as unavailable
         """
-        from scheduling.models import Shift, LeaveRequest
-        
-        for staff in self.staff:
-            unavailable = False
-            
-            # Check existing shifts
-            existing = Shift.objects.filter(
-                user=staff,
-                date=self.date,
-                status__in=['SCHEDULED', 'CONFIRMED']
-            ).exists()
-            
-            if existing:
-                unavailable = True
-            
-            # Check approved leave
-            on_leave = LeaveRequest.objects.filter(
-                user=staff,
-                start_date__lte=self.date,
-                end_date__gte=self.date,
-                status='APPROVED'
-            ).exists()
-            
-            if on_leave:
-                unavailable = True
-            
-            # If unavailable, set all assignments to 0
-            if unavailable:
-                for unit in units:
-                    for shift_type in shift_types:
-                        self.model += (
-                            self.variables[(staff.sap, unit.name, shift_type)] == 0,
-                            f"Unavailable_{staff.sap}_{unit.name}_{shift_type}"
-                        )
+        return not self.context.is_unavailable(staff.sap)
     
-    def _add_skill_constraints(self, units, shift_types):
+    def _skill_allows(self, staff, shift_type: str) -> bool:
         """
         Constraint 4: Skill/role matching
         
@@ -388,72 +524,28 @@ class ShiftOptimizer:
         - SCA: DAY_ASSISTANT, NIGHT_ASSISTANT
         - OM: ADMIN (supernumerary)
         """
-        role_shift_compatibility = {
-            'OPERATIONS_MANAGER': ['ADMIN'],
-            'SSCW': ['DAY_SENIOR', 'NIGHT_SENIOR'],
-            'SCW': ['DAY_SENIOR', 'NIGHT_SENIOR'],
-            'SCA': ['DAY_ASSISTANT', 'NIGHT_ASSISTANT'],
-        }
-        
-        for staff in self.staff:
-            if not staff.role:
-                continue
-            
-            allowed_shifts = role_shift_compatibility.get(staff.role.name, [])
-            
-            # Block incompatible shift types
-            for unit in units:
-                for shift_type in shift_types:
-                    if shift_type not in allowed_shifts:
-                        self.model += (
-                            self.variables[(staff.sap, unit.name, shift_type)] == 0,
-                            f"SkillMatch_{staff.sap}_{unit.name}_{shift_type}"
-                        )
+        if not staff.role:
+            return True
+        return shift_type in self.ROLE_SHIFT_COMPATIBILITY.get(staff.role.name, [])
     
-    def _add_wtd_constraints(self, units, shift_types):
+    def _wtd_hours_allow(self, staff) -> bool:
         """
-        Constraint 5: Working Time Directive compliance
-        
-        - Total weekly hours ≤ 48
-        - Minimum 11 hours rest between shifts (checked for yesterday's shift)
+        Constraint 5a: Working Time Directive - total weekly hours ≤ 48
+        """
+        hours_available = self.MAX_HOURS_PER_WEEK - self._get_weekly_hours(staff)
+        return hours_available >= 8  # Can fit at least 1 more shift
+    
+    def _rest_allows(self, staff, shift_type: str) -> bool:
         """
-        from scheduling.models import Shift
+        Constraint 5b: Minimum 11 hours rest between shifts
         
-        for staff in self.staff:
-            # Weekly hours constraint
-            weekly_hours = self._get_weekly_hours(staff)
-            
-            # Hours available this week
-            hours_available = self.MAX_HOURS_PER_WEEK - weekly_hours
-            
-            if hours_available < 8:  # Can't fit even 1 more shift
-                # Block all assignments
-                for unit in units:
-                    for shift_type in shift_types:
-                        self.model += (
-                            self.variables[(staff.sap, unit.name, shift_type)] == 0,
-                            f"WTD_MaxHours_{staff.sap}_{unit.name}_{shift_type}"
-                        )
-            
-            # Rest period constraint (11 hours between shifts)
-            # Check if staff worked yesterday
-            yesterday = self.date - timedelta(days=1)
-            yesterday_shift = Shift.objects.filter(
-                user=staff,
-                date=yesterday,
-                status__in=['SCHEDULED', 'CONFIRMED']
-            ).first()
-            
-            if yesterday_shift:
-                # If yesterday was night shift (ends 08:00), can't work early day shift today
-                if 'NIGHT' in yesterday_shift.shift_type.name:
-                    # Block DAY shifts (start 08:00 - not enough rest)
-                    for unit in units:
-                        for shift_type in ['DAY_SENIOR', 'DAY_ASSISTANT']:
-                            self.model += (
-                                self.variables[(staff.sap, unit.name, shift_type)] == 0,
-                                f"RestPeriod_{staff.sap}_{unit.name}_{shift_type}"
-                            )
+        If yesterday was a night shift (ends 08:00), staff can't work a day
+        shift today (starts 08:00 - not enough rest)
+        """
+        yesterday_shift_type = self.context.yesterday_shift_types.get(staff.sap)
+        if yesterday_shift_type and 'NIGHT' in yesterday_shift_type:
+            return shift_type not in ('DAY_SENIOR', 'DAY_ASSISTANT')
+        return True
     
     def _extract_assignments(self) -> List[Dict]:
         """
@@ -475,15 +567,16 @@ class ShiftOptimizer:
             ]
         """
         assignments = []
+        staff_by_sap = {s.sap: s for s in self.staff}
+        staff_costs = self._calculate_staff_costs()
         
         for (staff_sap, unit_name, shift_type), var in self.variables.items():
             if value(var) == 1:  # Assignment made
                 # Find staff object
-                staff = next((s for s in self.staff if s.sap == staff_sap), None)
+                staff = staff_by_sap.get(staff_sap)
                 
                 if staff:
                     shift_hours = self.SHIFT_HOURS.get(shift_type, 12)
-                    staff_costs = self._calculate_staff_costs()
                     cost = staff_costs[staff_sap] * shift_hours
                     
                     assignments.append({
@@ -524,10 +617,7 @@ class ShiftOptimizer:
         
         # Cost breakdown by classification
         for assignment in assignments:
-            staff_sap = assignment['staff_sap']
-            weekly_hours = self._get_weekly_hours(
-                next(s for s in self.staff if s.sap == staff_sap)
-            )
+            weekly_hours = self.context.get_weekly_hours(assignment['staff_sap'])
             
             if weekly_hours >= 40:
                 metrics['cost_breakdown']['overtime'] += assignment['cost']
@@ -596,8 +686,960 @@ class ShiftOptimizer:
         return created_shifts
 
 
+class HorizonShiftOptimizer(ShiftOptimizer):
+    """
+    Multi-day (rolling-horizon) variant of ShiftOptimizer
+    
+    Solves a whole horizon (a week, a 14-day window or the six-week cycle)
+    as ONE model instead of one model per day, so rules that span days are
+    real constraints rather than look-backs at already saved shifts:
+    
+    - Working Time Directive: ≤48 hours per ISO week, counting hours already
+      worked that week (existing shifts + fixed assignments) plus new ones
+    - 11-hour rest: a night shift on day d excludes a day shift on day d+1
+    - Overtime: hours beyond 40 in a week are costed at COST_OVERTIME via a
+      continuous overtime variable per staff/week
+    
+    Decision variables: x[staff_sap, date, unit_name, shift_type] ∈ {0, 1}
+    """
+    
+    OVERTIME_THRESHOLD_HOURS = 40
+    
+    def __init__(self, care_home, start_date: date, days: int,
+                 demand_by_date: Dict, available_staff: List, existing_shifts: List,
+                 fixed_assignments: List[Dict] = None, warm_start=None,
+                 time_limit: float = None, gap_rel: float = None):
+        """
+        Initialize horizon optimizer
+        
+        Args:
+            care_home: CareHome instance to optimize for
+            start_date: First date of the horizon
+            days: Number of days in the horizon
+            demand_by_date: Dict[date] = forecast_demand (same formats as ShiftOptimizer)
+            available_staff: List of User instances available to work
+            existing_shifts: Shift instances covering the horizon AND the days of
+                the first week before start_date (WTD hours + rest boundary)
+            fixed_assignments: Assignment dicts already committed by an earlier
+                window (treated like existing shifts)
+            warm_start: Iterable of (staff_sap, date, unit_name, shift_type) keys
+                from a previous solution, used as the CBC initial incumbent
+            time_limit: Optional CBC time limit in seconds
+            gap_rel: Optional relative MIP gap
+        """
+        super().__init__(
+            care_home=care_home,
+            optimization_date=start_date,
+            forecast_demand={},
+            available_staff=available_staff,
+            existing_shifts=existing_shifts,
+            time_limit=time_limit,
+            gap_rel=gap_rel,
+        )
+        self.start_date = start_date
+        self.end_date = start_date + timedelta(days=days - 1)
+        self.dates = [start_date + timedelta(days=i) for i in range(days)]
+        self.demand_by_date = demand_by_date
+        self.fixed_assignments = fixed_assignments or []
+        self.warm_start = set(warm_start or [])
+        self.overtime = {}
+        
+        self._worked = self._index_worked_shifts()
+        self._leave_dates = self._load_leave_dates()
+    
+    def _index_worked_shifts(self) -> Dict[Tuple[str, date], Tuple[str, float]]:
+        """
+        Index existing shifts and fixed assignments by (staff_sap, date)
+        
+        Returns:
+            Dict[(sap, date)] = (shift_type_name, hours)
+        """
+        worked = {}
+        
+        for shift in self.existing_shifts:
+            if shift.status not in ('SCHEDULED', 'CONFIRMED'):
+                continue
+            worked[(shift.user_id, shift.date)] = (
+                shift.shift_type.name, float(shift.duration_hours)
+            )
+        
+        for assignment in self.fixed_assignments:
+            worked[(assignment['staff_sap'], assignment['date'])] = (
+                assignment['shift_type'], float(assignment['hours'])
+            )
+        
+        return worked
+    
+    def _load_leave_dates(self) -> Dict[str, set]:
+        """
+        Load approved leave for all staff across the horizon (single query)
+        
+        Returns:
+            Dict[sap] = set of dates on leave
+        """
+        from scheduling.models import LeaveRequest
+        
+        leave_dates = {}
+        leave = LeaveRequest.objects.filter(
+            user__in=[s.sap for s in self.staff],
+            start_date__lte=self.end_date,
+            end_date__gte=self.start_date,
+            status='APPROVED'
+        ).values_list('user_id', 'start_date', 'end_date')
+        
+        for sap, start, end in leave:
+            on_leave = leave_dates.setdefault(sap, set())
+            for d in self.dates:
+                if start <= d <= end:
+                    on_leave.add(d)
+        
+        return leave_dates
+    
+    def _week_start(self, d: date) -> date:
+        return d - timedelta(days=d.weekday())
+    
+    def _get_solver(self, **options):
+        """CBC solver - warm-started when a previous solution is supplied"""
+        if self.warm_start:
+            options['warmStart'] = True
+        return super()._get_solver(**options)
+    
+    def _build_model(self):
+        """Build a single LP model spanning every day of the horizon"""
+        
+        self.model = LpProblem("Shift_Assignment_Horizon_Optimization", LpMinimize)
+        
+        units = list(self.care_home.units.filter(is_active=True))
+        shift_types = list(self.SHIFT_HOURS.keys())
+        
+        # Pre-solve pruning: only feasible (staff, date, unit, shift_type) get variables
+        feasible_shift_types = self._prune_infeasible(units, shift_types)
+        
+        self.variables = LpVariable.dicts(
+            "assign",
+            (
+                (s.sap, d, u.name, st)
+                for s in self.staff
+                for d in self.dates
+                for st in feasible_shift_types[(s.sap, d)]
+                for u in units
+            ),
+            cat='Binary'
+        )
+        
+        weeks = sorted({self._week_start(d) for d in self.dates})
+        self.overtime = LpVariable.dicts(
+            "overtime",
+            {(sap, self._week_start(d)) for (sap, d, unit_name, st) in self.variables},
+            lowBound=0
+        )
+        
+        # Warm start from previous window's solution
+        for key in self.warm_start:
+            if key in self.variables:
+                self.variables[key].setInitialValue(1)
+        
+        # === OBJECTIVE FUNCTION: Minimize Total Cost ===
+        # Base cost of every assigned hour + overtime premium on hours > 40/week
+        base_rates = {s.sap: self._base_hourly_rate(s) for s in self.staff}
+        overtime_premium = self.COST_OVERTIME - self.COST_PERMANENT
+        
+        self.model += lpSum([
+            base_rates[sap] * self.SHIFT_HOURS.get(st, 12) * var
+            for (sap, d, unit_name, st), var in self.variables.items()
+        ] + [
+            base_rates[sap] * overtime_premium * var
+            for (sap, w), var in self.overtime.items()
+        ]), "Total_Cost"
+        
+        # === CONSTRAINTS ===
+        self._add_horizon_demand_constraints(units, shift_types)
+        self._add_horizon_one_shift_per_day_constraint()
+        self._add_horizon_wtd_constraints(weeks)
+        self._add_horizon_rest_constraints()
+        
+        self.presolve_stats['variables'] = len(self.variables)
+        self.presolve_stats['constraints'] = len(self.model.constraints)
+        
+        logger.info(f"Horizon model built ({len(self.dates)} days): "
+                   f"{len(self.variables)} variables "
+                   f"({self.presolve_stats['candidate_variables']} candidates), "
+                   f"{len(self.model.constraints)} constraints")
+        
+        return self.model
+    
+    def _prune_infeasible(self, units, shift_types) -> Dict[Tuple[str, date], List[str]]:
+        """
+        Pre-solve pruning per staff member and day
+        
+        - Availability: days already worked or on approved leave
+        - Skill matching: role → shift type compatibility
+        - WTD: weeks where prior hours leave no room for another shift
+        - Rest: day after a worked night, night before a worked day shift
+        
+        Returns:
+            Dict[(sap_number, date)] = feasible shift types (records presolve_stats)
+        """
+        pruned = {'unavailable': 0, 'skill': 0, 'wtd': 0, 'rest': 0}
+        feasible = {}
+        
+        for staff in self.staff:
+            leave = self._leave_dates.get(staff.sap, set())
+            skill_ok = [st for st in shift_types if self._skill_allows(staff, st)]
+            
+            for d in self.dates:
+                if (staff.sap, d) in self._worked or d in leave:
+                    pruned['unavailable'] += len(shift_types) * len(units)
+                    feasible[(staff.sap, d)] = []
+                    continue
+                
+                pruned['skill'] += (len(shift_types) - len(skill_ok)) * len(units)
+                allowed = skill_ok
+                
+                if allowed and self._prior_week_hours(staff.sap, d) > self.MAX_HOURS_PER_WEEK - 8:
+                    pruned['wtd'] += len(allowed) * len(units)
+                    allowed = []
+                
+                worked_before = self._worked.get((staff.sap, d - timedelta(days=1)))
+                worked_after = self._worked.get((staff.sap, d + timedelta(days=1)))
+                rest_ok = [
+                    st for st in allowed
+                    if not (worked_before and 'NIGHT' in worked_before[0] and st.startswith('DAY'))
+                    and not (worked_after and worked_after[0].startswith('DAY') and 'NIGHT' in st)
+                ]
+                pruned['rest'] += (len(allowed) - len(rest_ok)) * len(units)
+                
+                feasible[(staff.sap, d)] = rest_ok
+        
+        candidates = len(self.staff) * len(self.dates) * len(units) * len(shift_types)
+        total_pruned = sum(pruned.values())
+        self.presolve_stats = {
+            'candidate_variables': candidates,
+            'pruned_variables': total_pruned,
+            'pruned_by_reason': pruned,
+            'pruned_ratio': round(total_pruned / candidates, 3) if candidates else 0,
+        }
+        
+        return feasible
+    
+    def _prior_week_hours(self, sap: str, d: date) -> float:
+        """Hours already worked (existing + fixed) in the ISO week containing d"""
+        week_start = self._week_start(d)
+        return sum(
+            self._worked[(sap, week_start + timedelta(days=i))][1]
+            for i in range(7)
+            if (sap, week_start + timedelta(days=i)) in self._worked
+        )
+    
+    def _add_horizon_demand_constraints(self, units, shift_types):
+        """Constraint 1: min/max demand for every date/unit/shift type"""
+        candidates = {}
+        for (sap, d, unit_name, shift_type), var in self.variables.items():
+            candidates.setdefault((d, unit_name, shift_type), []).append(var)
+        
+        for d in self.dates:
+            forecast_demand = self.demand_by_date.get(d, {})
+            for unit in units:
+                for shift_type in shift_types:
+                    min_demand, max_demand = _demand_bounds(
+                        forecast_demand, unit.name, shift_type
+                    )
+                    assigned = candidates.get((d, unit.name, shift_type), [])
+                    suffix = f"{d:%Y%m%d}_{unit.name}_{shift_type}"
+                    if assigned or min_demand > 0:
+                        self.model += lpSum(assigned) >= min_demand, f"MinDemand_{suffix}"
+                    if len(assigned) > max_demand + 1:
+                        self.model += lpSum(assigned) <= max_demand + 1, f"MaxDemand_{suffix}"
+    
+    def _add_horizon_one_shift_per_day_constraint(self):
+        """Constraint 2: ≤1 shift per staff member per day"""
+        for (sap, d), variables in self._variables_by_staff_day().items():
+            if len(variables) > 1:
+                self.model += (
+                    lpSum(variables) <= 1,
+                    f"OneShiftPerDay_{sap}_{d:%Y%m%d}"
+                )
+    
+    def _variables_by_staff_day(self) -> Dict[Tuple[str, date], List]:
+        by_staff_day = {}
+        for (sap, d, unit_name, shift_type), var in self.variables.items():
+            by_staff_day.setdefault((sap, d), []).append(var)
+        return by_staff_day
+    
+    def _add_horizon_wtd_constraints(self, weeks):
+        """
+        Constraint 5: Working Time Directive across the horizon
+        
+        For each staff member and ISO week touched by the horizon:
+            prior_hours + Σ new_hours ≤ 48
+            overtime ≥ prior_hours + Σ new_hours - 40
+        """
+        week_hours = {}
+        for (sap, d, unit_name, st), var in self.variables.items():
+            week_hours.setdefault((sap, self._week_start(d)), []).append(
+                self.SHIFT_HOURS.get(st, 12) * var
+            )
+        
+        for (sap, week_start), hours in week_hours.items():
+            prior_hours = self._prior_week_hours(sap, week_start)
+            new_hours = lpSum(hours)
+            
+            suffix = f"{sap}_{week_start:%Y%m%d}"
+            self.model += (
+                new_hours <= max(0, self.MAX_HOURS_PER_WEEK - prior_hours),
+                f"WTD_MaxHours_{suffix}"
+            )
+            self.model += (
+                self.overtime[(sap, week_start)] >=
+                prior_hours + new_hours - self.OVERTIME_THRESHOLD_HOURS,
+                f"Overtime_{suffix}"
+            )
+    
+    def _add_horizon_rest_constraints(self):
+        """
+        Constraint 6: 11-hour rest between a night shift and next day shift
+        
+        Within the horizon: night(d) + day(d+1) ≤ 1
+        (boundaries with worked shifts are handled by pre-solve pruning)
+        """
+        nights = {}
+        days = {}
+        for (sap, d, unit_name, st), var in self.variables.items():
+            if 'NIGHT' in st:
+                nights.setdefault((sap, d), []).append(var)
+            elif st.startswith('DAY'):
+                days.setdefault((sap, d), []).append(var)
+        
+        for (sap, d), night_vars in nights.items():
+            next_day_vars = days.get((sap, d + timedelta(days=1)))
+            if next_day_vars:
+                self.model += (
+                    lpSum(night_vars + next_day_vars) <= 1,
+                    f"RestPeriod_{sap}_{d:%Y%m%d}"
+                )
+    
+    def _extract_assignments(self) -> List[Dict]:
+        """
+        Extract assignments for every day of the horizon
+        
+        Returns:
+            List of assignment dicts (same shape as ShiftOptimizer), sorted by date
+        """
+        staff_by_sap = {s.sap: s for s in self.staff}
+        base_rates = {s.sap: self._base_hourly_rate(s) for s in self.staff}
+        assignments = []
+        
+        for (staff_sap, d, unit_name, shift_type), var in self.variables.items():
+            if value(var) is not None and value(var) > 0.5:
+                staff = staff_by_sap[staff_sap]
+                shift_hours = self.SHIFT_HOURS.get(shift_type, 12)
+                
+                assignments.append({
+                    'staff_sap': staff_sap,
+                    'staff_name': staff.full_name,
+                    'unit': unit_name,
+                    'shift_type': shift_type,
+                    'date': d,
+                    'cost': base_rates[staff_sap] * shift_hours,
+                    'hours': shift_hours,
+                    'staff_obj': staff,
+                })
+        
+        assignments.sort(key=lambda a: (a['date'], a['unit'], a['shift_type']))
+        return assignments
+    
+    def _calculate_metrics(self, assignments: List[Dict], total_cost: float,
+                           dates: List[date] = None) -> Dict:
+        """
+        Calculate transparency metrics for the horizon (or a sub-range of it)
+        
+        Returns:
+            Dict with cost breakdown, per-day demand met, staff utilization
+        """
+        dates = dates or self.dates
+        overtime_cost = sum(
+            self._base_hourly_rate(s) * (self.COST_OVERTIME - self.COST_PERMANENT) *
+            (value(self.overtime[(s.sap, w)]) or 0)
+            for s in self.staff
+            for w in {self._week_start(d) for d in dates}
+            if (s.sap, w) in self.overtime
+        )
+        base_cost = sum(a['cost'] for a in assignments)
+        
+        metrics = {
+            'total_cost': total_cost,
+            'total_assignments': len(assignments),
+            'total_hours': sum(a['hours'] for a in assignments),
+            'cost_breakdown': {
+                'permanent': base_cost,
+                'overtime': overtime_cost,
+                'agency': 0,
+            },
+            'demand_met': {},
+            'staff_utilization': (
+                len(assignments) / (len(self.staff) * len(dates)) if self.staff else 0
+            ),
+            'avg_cost_per_shift': total_cost / len(assignments) if assignments else 0,
+            'horizon_days': len(dates),
+            'warm_started': bool(self.warm_start),
+        }
+        
+        units = [u.name for u in self.care_home.units.filter(is_active=True)]
+        for d in dates:
+            day_metrics = metrics['demand_met'][d.isoformat()] = {}
+            forecast_demand = self.demand_by_date.get(d, {})
+            
+            for unit_name in units:
+                for shift_type in self.SHIFT_HOURS:
+                    min_demand, max_demand = _demand_bounds(
+                        forecast_demand, unit_name, shift_type
+                    )
+                    if not max_demand:
+                        continue
+                    assigned = sum(
+                        1 for a in assignments
+                        if a['date'] == d and a['unit'] == unit_name
+                        and a['shift_type'] == shift_type
+                    )
+                    day_metrics.setdefault(unit_name, {})[shift_type] = {
+                        'assigned': assigned,
+                        'min_demand': min_demand,
+                        'max_demand': max_demand,
+                        'met': assigned >= min_demand,
+                    }
+        
+        return metrics
+
+
+class RepairShiftOptimizer(ShiftOptimizer):
+    """
+    Incremental "repair" re-optimization after a call-off
+    
+    Every unaffected assignment on the day stays fixed. Only the vacated
+    slots are re-solved, using a small neighbourhood of candidates:
+    
+    - Free staff: not working that day, available, skill/WTD/rest feasible
+      (cheapest `neighbourhood_size` per vacated shift type)
+    - Movable staff: already working the same shift type in a unit staffed
+      above its minimum demand, who can be moved across (zero extra cost -
+      mirrors Priority 1 reallocation)
+    
+    Uses the same cost model, OptimizerContext and pruning rules as
+    ShiftOptimizer. Slots that can't be filled are reported as uncovered
+    (for the OT/agency flows) rather than making the model infeasible.
+    """
+    
+    # Small per-move cost: prefer not to disturb the existing rota
+    MOVE_PENALTY = 1.0
+    
+    # Cost per hour of leaving a vacated slot uncovered (above agency rates)
+    UNCOVERED_HOURLY_PENALTY = 100.0
+    
+    def __init__(self, care_home, optimization_date: date, vacated_shifts: List,
+                 day_shifts: List, available_staff: List, forecast_demand: Dict = None,
+                 neighbourhood_size: int = 20, context: OptimizerContext = None,
+                 time_limit: float = 1.0, gap_rel: float = None):
+        """
+        Initialize repair optimizer
+        
+        Args:
+            care_home: CareHome instance
+            optimization_date: Date of the call-off
+            vacated_shifts: Shift instances left uncovered by the call-off
+            day_shifts: Active (SCHEDULED/CONFIRMED) shifts for the home on the date
+            available_staff: Staff pool for free candidates (User instances)
+            forecast_demand: Optional demand for the date (min levels limit moves)
+            neighbourhood_size: Max free candidates per shift type and max
+                movable staff considered
+            context: Optional preloaded OptimizerContext for available_staff
+            time_limit: CBC time limit in seconds (default 1s)
+            gap_rel: Optional relative MIP gap
+        """
+        super().__init__(
+            care_home=care_home,
+            optimization_date=optimization_date,
+            forecast_demand=forecast_demand or {},
+            available_staff=available_staff,
+            existing_shifts=day_shifts,
+            context=context,
+            time_limit=time_limit,
+            gap_rel=gap_rel,
+        )
+        self.vacated_shifts = vacated_shifts
+        self.neighbourhood_size = neighbourhood_size
+        self.absent_saps = {shift.user_id for shift in vacated_shifts}
+        
+        self.vacated_slots = {}
+        for shift in vacated_shifts:
+            slot = (shift.unit.name, shift.shift_type.name)
+            self.vacated_slots[slot] = self.vacated_slots.get(slot, 0) + 1
+        
+        self.moves = {}
+        self.uncovered = {}
+        self._movable = {}
+    
+    def _select_free_candidates(self) -> List:
+        """Cheapest feasible off-duty staff, per vacated shift type"""
+        staff_costs = self._calculate_staff_costs()
+        selected = {}
+        
+        for shift_type in {st for (unit_name, st) in self.vacated_slots}:
+            feasible = [
+                s for s in self.staff
+                if s.sap not in self.absent_saps
+                and self._is_available(s)
+                and self._skill_allows(s, shift_type)
+                and self._wtd_hours_allow(s)
+                and self._rest_allows(s, shift_type)
+            ]
+            feasible.sort(key=lambda s: staff_costs[s.sap])
+            for staff in feasible[:self.neighbourhood_size]:
+                selected[staff.sap] = staff
+        
+        return list(selected.values())
+    
+    def _select_movable_shifts(self) -> Dict[str, object]:
+        """
+        Shifts that can move to a vacated slot without opening a new gap
+        
+        Returns:
+            Dict[sap_number] = Shift instance
+        """
+        vacated_types = {st for (unit_name, st) in self.vacated_slots}
+        
+        by_slot = {}
+        for shift in self.existing_shifts:
+            if shift.user_id in self.absent_saps:
+                continue
+            if shift.shift_type.name not in vacated_types:
+                continue
+            slot = (shift.unit.name, shift.shift_type.name)
+            by_slot.setdefault(slot, []).append(shift)
+        
+        movable = {}
+        for (unit_name, shift_type), shifts in by_slot.items():
+            if (unit_name, shift_type) in self.vacated_slots:
+                continue
+            min_demand, max_demand = _demand_bounds(
+                self.forecast_demand, unit_name, shift_type
+            )
+            surplus = len(shifts) - max(min_demand, 0)
+            for shift in shifts[:max(surplus, 0)]:
+                if len(movable) >= self.neighbourhood_size:
+                    return movable
+                movable[shift.user_id] = shift
+        
+        return movable
+    
+    def _build_model(self):
+        """Build the repair model over vacated slots and the candidate neighbourhood"""
+        
+        self.model = LpProblem("Shift_Assignment_Repair", LpMinimize)
+        
+        free_candidates = self._select_free_candidates()
+        self._movable = self._select_movable_shifts()
+        staff_costs = self._calculate_staff_costs()
+        
+        # x: free candidate → vacated slot
+        self.variables = LpVariable.dicts(
+            "assign",
+            (
+                (s.sap, unit_name, st)
+                for s in free_candidates
+                for (unit_name, st) in self.vacated_slots
+                if self._skill_allows(s, st) and self._rest_allows(s, st)
+            ),
+            cat='Binary'
+        )
+        
+        # m: movable staff → vacated slot of the same shift type
+        self.moves = LpVariable.dicts(
+            "move",
+            (
+                (sap, unit_name, st)
+                for sap, shift in self._movable.items()
+                for (unit_name, st) in self.vacated_slots
+                if st == shift.shift_type.name
+            ),
+            cat='Binary'
+        )
+        
+        # u: uncovered positions per vacated slot
+        self.uncovered = {
+            slot: LpVariable(f"uncovered_{slot[0]}_{slot[1]}", lowBound=0,
+                             upBound=count, cat='Integer')
+            for slot, count in self.vacated_slots.items()
+        }
+        
+        # === OBJECTIVE: new-staff cost + move disruption + uncovered penalty ===
+        self.model += lpSum([
+            staff_costs[sap] * self.SHIFT_HOURS.get(st, 12) * var
+            for (sap, unit_name, st), var in self.variables.items()
+        ] + [
+            self.MOVE_PENALTY * var for var in self.moves.values()
+        ] + [
+            self.UNCOVERED_HOURLY_PENALTY * self.SHIFT_HOURS.get(st, 12) * var
+            for (unit_name, st), var in self.uncovered.items()
+        ]), "Total_Cost"
+        
+        # === CONSTRAINTS ===
+        
+        # 1. Each vacated slot is filled exactly (or reported uncovered)
+        for (unit_name, st), count in self.vacated_slots.items():
+            self.model += (
+                lpSum([
+                    var for (sap, u, s), var in self.variables.items()
+                    if (u, s) == (unit_name, st)
+                ] + [
+                    var for (sap, u, s), var in self.moves.items()
+                    if (u, s) == (unit_name, st)
+                ]) + self.uncovered[(unit_name, st)] == count,
+                f"Vacated_{unit_name}_{st}"
+            )
+        
+        # 2. Each candidate takes at most one vacated slot
+        by_staff = {}
+        for (sap, unit_name, st), var in list(self.variables.items()) + list(self.moves.items()):
+            by_staff.setdefault(sap, []).append(var)
+        for sap, variables in by_staff.items():
+            if len(variables) > 1:
+                self.model += lpSum(variables) <= 1, f"OneShiftPerDay_{sap}"
+        
+        candidates = (len(free_candidates) + len(self._movable)) * len(self.vacated_slots)
+        self.presolve_stats = {
+            'candidate_variables': candidates,
+            'free_candidates': len(free_candidates),
+            'movable_staff': len(self._movable),
+            'vacated_slots': sum(self.vacated_slots.values()),
+            'variables': len(self.variables) + len(self.moves) + len(self.uncovered),
+            'constraints': len(self.model.constraints),
+        }
+        
+        logger.info(f"Repair model built: {self.presolve_stats}")
+        
+        return self.model
+    
+    def _extract_assignments(self) -> List[Dict]:
+        """
+        Extract repair actions
+        
+        Returns:
+            List of assignment dicts (ShiftOptimizer shape) plus:
+            - 'action': 'assign' (new shift) or 'move' (existing shift moved)
+            - 'shift_id' / 'from_unit' for moves
+        """
+        staff_by_sap = {s.sap: s for s in self.staff}
+        staff_costs = self._calculate_staff_costs()
+        assignments = []
+        
+        for (sap, unit_name, shift_type), var in self.variables.items():
+            if value(var) is not None and value(var) > 0.5:
+                shift_hours = self.SHIFT_HOURS.get(shift_type, 12)
+                assignments.append({
+                    'action': 'assign',
+                    'staff_sap': sap,
+                    'staff_name': staff_by_sap[sap].full_name,
+                    'unit': unit_name,
+                    'shift_type': shift_type,
+                    'date': self.date,
+                    'cost': staff_costs[sap] * shift_hours,
+                    'hours': shift_hours,
+                    'staff_obj': staff_by_sap[sap],
+                })
+        
+        for (sap, unit_name, shift_type), var in self.moves.items():
+            if value(var) is not None and value(var) > 0.5:
+                shift = self._movable[sap]
+                assignments.append({
+                    'action': 'move',
+                    'staff_sap': sap,
+                    'staff_name': shift.user.full_name,
+                    'unit': unit_name,
+                    'shift_type': shift_type,
+                    'date': self.date,
+                    'cost': 0.0,
+                    'hours': self.SHIFT_HOURS.get(shift_type, 12),
+                    'staff_obj': shift.user,
+                    'shift_id': shift.pk,
+                    'from_unit': shift.unit.name,
+                })
+        
+        return assignments
+    
+    def _calculate_metrics(self, assignments: List[Dict], total_cost: float) -> Dict:
+        """Repair metrics: filled vs uncovered vacated slots"""
+        uncovered = {
+            f"{unit_name}/{st}": int(round(value(var) or 0))
+            for (unit_name, st), var in self.uncovered.items()
+            if (value(var) or 0) > 0.5
+        }
+        new_cost = sum(a['cost'] for a in assignments)
+        
+        return {
+            'total_cost': new_cost,
+            'total_assignments': len(assignments),
+            'total_hours': sum(a['hours'] for a in assignments),
+            'cost_breakdown': {
+                'permanent': sum(
+                    a['cost'] for a in assignments
+                    if a['action'] == 'assign' and self._get_weekly_hours(a['staff_obj']) < 40
+                ),
+                'overtime': sum(
+                    a['cost'] for a in assignments
+                    if a['action'] == 'assign' and self._get_weekly_hours(a['staff_obj']) >= 40
+                ),
+                'agency': 0,
+            },
+            'vacated_slots': sum(self.vacated_slots.values()),
+            'filled': len(assignments),
+            'moves': sum(1 for a in assignments if a['action'] == 'move'),
+            'uncovered': uncovered,
+            'all_covered': not uncovered,
+        }
+    
+    def create_shifts(self) -> List:
+        """
+        Apply the repair: create cover shifts and move reallocated shifts
+        
+        Returns:
+            List of created/updated Shift instances
+        """
+        from django.db import transaction
+        from scheduling.models import Shift, ShiftType, Unit
+        
+        if not self.result or not self.result.success:
+            raise ValueError("Cannot apply repair - optimization not successful")
+        
+        units = {u.name: u for u in Unit.objects.filter(
+            name__in={a['unit'] for a in self.result.assignments}
+        )}
+        shift_types = {st.name: st for st in ShiftType.objects.filter(
+            name__in={a['shift_type'] for a in self.result.assignments}
+        )}
+        changed_shifts = []
+        
+        with transaction.atomic():
+            for assignment in self.result.assignments:
+                unit = units[assignment['unit']]
+                
+                if assignment['action'] == 'move':
+                    shift = Shift.objects.get(pk=assignment['shift_id'])
+                    shift.unit = unit
+                    shift.notes = (f"{shift.notes or ''}\n"
+                                   f"Moved from {assignment['from_unit']} by repair optimizer").strip()
+                    shift.save(update_fields=['unit', 'notes', 'updated_at'])
+                else:
+                    is_overtime = self._get_weekly_hours(assignment['staff_obj']) >= 40
+                    shift = Shift.objects.create(
+                        user=assignment['staff_obj'],
+                        unit=unit,
+                        shift_type=shift_types[assignment['shift_type']],
+                        date=assignment['date'],
+                        status='SCHEDULED',
+                        shift_classification='OVERTIME' if is_overtime else 'REGULAR',
+                        notes=f"Call-off cover by repair optimizer (cost: £{assignment['cost']:.2f})"
+                    )
+                
+                changed_shifts.append(shift)
+                logger.info(f"Repair applied ({assignment['action']}): {shift}")
+        
+        return changed_shifts
+
+
+def _load_demand_by_date(care_home, start_date: date, end_date: date) -> Dict:
+    """
+    Build forecast demand for a date range from StaffingForecast (single query)
+    
+    Returns:
+        Dict[date][unit_name][shift_type] = (min, max)
+    """
+    from scheduling.models import StaffingForecast
+    
+    demand_by_date = {}
+    forecasts = StaffingForecast.objects.filter(
+        care_home=care_home,
+        forecast_date__gte=start_date,
+        forecast_date__lte=end_date
+    ).select_related('unit')
+    
+    for forecast in forecasts:
+        # Use confidence interval bounds as min/max demand
+        min_demand = max(0, int(forecast.confidence_lower))
+        max_demand = int(forecast.confidence_upper) + 1
+        
+        # Assume DAY_SENIOR as primary shift type (can be enhanced)
+        demand_by_date.setdefault(forecast.forecast_date, {}).setdefault(
+            forecast.unit.name, {}
+        )['DAY_SENIOR'] = (min_demand, max_demand)
+    
+    return demand_by_date
+
+
+def optimize_rolling_horizon(care_home, start_date: date, total_days: int = 42,
+                             window_days: int = 14,
+                             step_days: int = 7,
+                             time_limit: float = None,
+                             gap_rel: float = None) -> List[ShiftOptimizationResult]:
+    """
+    Optimize a long period (e.g. the six-week cycle) with a rolling horizon
+    
+    Each window of `window_days` is solved as one HorizonShiftOptimizer model.
+    The first `step_days` of the window are committed, the window advances,
+    and the next solve is warm-started from the previous window's uncommitted
+    tail. Committed assignments carry WTD hours and rest into the next window.
+    
+    Args:
+        care_home: CareHome instance
+        start_date: First date to optimize
+        total_days: Length of the period (default 42 = six-week cycle)
+        window_days: Days solved per model (default 14)
+        step_days: Days committed before advancing (default 7)
+        time_limit: Optional CBC time limit per window (seconds)
+        gap_rel: Optional relative MIP gap per window
+    
+    Returns:
+        List of ShiftOptimizationResult objects (one per committed step)
+    """
+    from scheduling.models import User, Shift
+    
+    end_date = start_date + timedelta(days=total_days - 1)
+    step_days = max(1, min(step_days, window_days))
+    
+    demand_by_date = _load_demand_by_date(care_home, start_date, end_date)
+    
+    available_staff = list(User.objects.filter(
+        is_active=True,
+        unit__care_home=care_home,
+        role__isnull=False
+    ).select_related('role').distinct())
+    
+    # Existing shifts for the whole period plus the first week's lead-in
+    # (back to Monday for WTD hours, and at least the previous day for rest)
+    lookback_start = start_date - timedelta(days=start_date.weekday() or 1)
+    existing_shifts = list(Shift.objects.filter(
+        user__in=available_staff,
+        date__gte=lookback_start,
+        date__lte=end_date,
+        status__in=['SCHEDULED', 'CONFIRMED']
+    ).select_related('shift_type'))
+    
+    results = []
+    committed = []
+    warm_start = set()
+    offset = 0
+    
+    while offset < total_days:
+        window_start = start_date + timedelta(days=offset)
+        days = min(window_days, total_days - offset)
+        commit_days = min(step_days, days)
+        commit_end = window_start + timedelta(days=commit_days)
+        
+        optimizer = HorizonShiftOptimizer(
+            care_home=care_home,
+            start_date=window_start,
+            days=days,
+            demand_by_date=demand_by_date,
+            available_staff=available_staff,
+            existing_shifts=existing_shifts,
+            fixed_assignments=committed,
+            warm_start=warm_start,
+            time_limit=time_limit,
+            gap_rel=gap_rel
+        )
+        result = optimizer.optimize()
+        
+        if result.success:
+            step_assignments = [a for a in result.assignments if a['date'] < commit_end]
+            step_dates = optimizer.dates[:commit_days]
+            step_cost = sum(a['cost'] for a in step_assignments)
+            step_metrics = optimizer._calculate_metrics(step_assignments, step_cost, step_dates)
+            step_metrics['presolve'] = result.metrics['presolve']
+            step_metrics['solver'] = result.metrics['solver']
+            
+            results.append(ShiftOptimizationResult(
+                success=True,
+                status=result.status,
+                assignments=step_assignments,
+                cost=step_cost,
+                metrics=step_metrics
+            ))
+            committed.extend(step_assignments)
+            warm_start = {
+                (a['staff_sap'], a['date'], a['unit'], a['shift_type'])
+                for a in result.assignments if a['date'] >= commit_end
+            }
+        else:
+            results.append(result)
+            warm_start = set()
+        
+        logger.info(f"Rolling horizon window {window_start} (+{days}d): {result}")
+        offset += commit_days
+    
+    return results
+
+
+def repair_after_call_off(vacated_shifts: List, neighbourhood_size: int = 20,
+                          time_limit: float = 1.0) -> RepairShiftOptimizer:
+    """
+    Re-solve only the slots vacated by a call-off (same home and date)
+    
+    Loads the day's rota, the home's staff pool and the date's forecast in a
+    handful of queries and runs RepairShiftOptimizer.
+    
+    Args:
+        vacated_shifts: Shift instances marked UNCOVERED by the call-off
+        neighbourhood_size: Max free/movable candidates considered
+        time_limit: CBC time limit in seconds (default 1s)
+    
+    Returns:
+        Solved RepairShiftOptimizer (see .result; apply with .create_shifts())
+    """
+    from scheduling.models import User, Shift
+    
+    if not vacated_shifts:
+        raise ValueError("No vacated shifts to repair")
+    
+    optimization_date = vacated_shifts[0].date
+    care_home = vacated_shifts[0].unit.care_home
+    
+    day_shifts = list(Shift.objects.filter(
+        date=optimization_date,
+        unit__care_home=care_home,
+        status__in=OptimizerContext.ACTIVE_STATUSES
+    ).select_related('user', 'unit', 'shift_type'))
+    
+    available_staff = list(User.objects.filter(
+        is_active=True,
+        unit__care_home=care_home,
+        role__isnull=False
+    ).select_related('role').distinct())
+    
+    forecast_demand = _load_demand_by_date(
+        care_home, optimization_date, optimization_date
+    ).get(optimization_date, {})
+    
+    optimizer = RepairShiftOptimizer(
+        care_home=care_home,
+        optimization_date=optimization_date,
+        vacated_shifts=vacated_shifts,
+        day_shifts=day_shifts,
+        available_staff=available_staff,
+        forecast_demand=forecast_demand,
+        neighbourhood_size=neighbourhood_size,
+        time_limit=time_limit
+    )
+    optimizer.optimize()
+    
+    return optimizer
+
+
 def optimize_shifts_for_forecast(care_home, forecast_date: date, 
-                                 days_ahead: int = 1) -> List[ShiftOptimizationResult]:
+                                 days_ahead: int = 1,
+                                 horizon: bool = False,
+                                 window_days: int = 14,
+                                 step_days: int = 7,
+                                 time_limit: float = None,
+                                 gap_rel: float = None) -> List[ShiftOptimizationResult]:
     """
     Convenience function to optimize shifts for forecasted demand
     
@@ -605,15 +1647,40 @@ def optimize_shifts_for_forecast(care_home, forecast_date: date,
         care_home: CareHome instance
         forecast_date: Starting date for optimization
         days_ahead: Number of days to optimize (default 1)
+        horizon: Solve the period as rolling multi-day models instead of
+            one model per day (see optimize_rolling_horizon)
+        window_days: Horizon mode - days per model (default 14)
+        step_days: Horizon mode - days committed per window (default 7)
+        time_limit: Optional CBC time limit per solve (seconds)
+        gap_rel: Optional relative MIP gap per solve
     
     Returns:
-        List of ShiftOptimizationResult objects (one per day)
+        List of ShiftOptimizationResult objects (one per day, or one per
+        committed step in horizon mode)
     """
     from scheduling.models import StaffingForecast, User, Shift
     from scheduling.models_multi_home import CareHome
     
+    if horizon:
+        return optimize_rolling_horizon(
+            care_home,
+            forecast_date,
+            total_days=days_ahead,
+            window_days=window_days,
+            step_days=step_days,
+            time_limit=time_limit,
+            gap_rel=gap_rel
+        )
+    
     results = []
     
+    # Get available staff (active, assigned to this care home's units)
+    available_staff = list(User.objects.filter(
+        is_active=True,
+        unit__care_home=care_home,
+        role__isnull=False
+    ).select_related('role').distinct())
+    
     for day_offset in range(days_ahead):
         optimization_date = forecast_date + timedelta(days=day_offset)
         
@@ -644,13 +1711,6 @@ def optimize_shifts_for_forecast(care_home, forecast_date: date,
             shift_type = 'DAY_SENIOR'
             forecast_demand[unit_name][shift_type] = (min_demand, max_demand)
         
-        # Get available staff (active, assigned to this care home's units)
-        available_staff = User.objects.filter(
-            is_active=True,
-            unit__care_home=care_home,
-            role__isnull=False
-        ).distinct()
-        
         # Get existing shifts (constraints)
         existing_shifts = Shift.objects.filter(
             date=optimization_date,
@@ -663,8 +1723,10 @@ def optimize_shifts_for_forecast(care_home, forecast_date: date,
             care_home=care_home,
             optimization_date=optimization_date,
             forecast_demand=forecast_demand,
-            available_staff=list(available_staff),
-            existing_shifts=list(existing_shifts)
+            available_staff=available_staff,
+            existing_shifts=list(existing_shifts),
+            time_limit=time_limit,
+            gap_rel=gap_rel
         )
         
         result = optimizer.optimize()
@@ -673,3 +1735,152 @@ def optimize_shifts_for_forecast(care_home, forecast_date: date,
         logger.info(f"Optimization complete for {optimization_date}: {result}")
     
     return results
+
+
+def _init_optimizer_worker():
+    """Process-pool initializer: each worker opens its own DB connections"""
+    import django
+    from django.apps import apps
+    from django.db import connections
+    
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _summarize_job_status(results: List[ShiftOptimizationResult]) -> str:
+    """Collapse per-day/per-step statuses into one job status"""
+    if not results:
+        return 'No forecasts'
+    failed = [r.status for r in results if not r.success]
+    if failed:
+        return failed[0]
+    if any(r.status == 'Feasible' for r in results):
+        return 'Feasible'
+    return 'Optimal'
+
+
+def _run_optimization_job(job: Dict) -> Dict:
+    """
+    Solve one independent job (a home/day, or a home's whole horizon)
+    
+    Runs inside a worker process; never raises so one bad home can't
+    take down the pool.
+    """
+    from scheduling.models_multi_home import CareHome
+    
+    started = time.perf_counter()
+    record = {
+        'care_home': job['care_home_name'],
+        'date': job['date'],
+        'days': job['days'],
+        'horizon': job['horizon'],
+        'status': None,
+        'wall_seconds': None,
+        'results': [],
+        'error': None,
+    }
+    
+    try:
+        care_home = CareHome.objects.get(pk=job['care_home_id'])
+        results = optimize_shifts_for_forecast(
+            care_home,
+            job['date'],
+            days_ahead=job['days'],
+            horizon=job['horizon'],
+            time_limit=job['time_limit'],
+            gap_rel=job['gap_rel']
+        )
+        record['results'] = results
+        record['status'] = _summarize_job_status(results)
+    except Exception as e:
+        logger.error(f"Optimization job failed for {job['care_home_name']} "
+                    f"on {job['date']}: {e}", exc_info=True)
+        record['status'] = 'Error'
+        record['error'] = str(e)
+    
+    record['wall_seconds'] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def optimize_homes_parallel(start_date: date, days_ahead: int = 1, care_homes=None,
+                            horizon: bool = False, max_workers: int = None,
+                            time_limit: float = None,
+                            gap_rel: float = None) -> List[Dict]:
+    """
+    Optimize many homes concurrently on a process pool
+    
+    Independent jobs are solved in parallel: one job per (home, day) in daily
+    mode, or one job per home in horizon mode (days within a horizon depend on
+    each other). Every solve honours `time_limit`/`gap_rel`, so a hard
+    instance returns its best incumbent instead of blocking the run.
+    
+    Args:
+        start_date: First date to optimize
+        days_ahead: Number of days to optimize
+        care_homes: CareHome iterable (default: all homes)
+        horizon: Use rolling-horizon models per home
+        max_workers: Worker processes (default: CPU count; 1 = run inline)
+        time_limit: CBC time limit per solve (seconds)
+        gap_rel: Relative MIP gap per solve
+    
+    Returns:
+        List of job records, sorted by home and date:
+        [
+            {
+                'care_home': 'ORCHARD_GROVE',
+                'date': date(2025, 12, 21),
+                'days': 1,
+                'horizon': False,
+                'status': 'Optimal',  # Optimal / Feasible / Infeasible / Error ...
+                'wall_seconds': 0.84,
+                'results': [ShiftOptimizationResult, ...],
+                'error': None,
+            },
+            ...
+        ]
+    """
+    from django.db import connections
+    from scheduling.models_multi_home import CareHome
+    
+    if care_homes is None:
+        care_homes = CareHome.objects.all()
+    
+    jobs = []
+    for care_home in care_homes:
+        job_dates = [start_date] if horizon else [
+            start_date + timedelta(days=offset) for offset in range(days_ahead)
+        ]
+        for job_date in job_dates:
+            jobs.append({
+                'care_home_id': care_home.pk,
+                'care_home_name': care_home.name,
+                'date': job_date,
+                'days': days_ahead if horizon else 1,
+                'horizon': horizon,
+                'time_limit': time_limit,
+                'gap_rel': gap_rel,
+            })
+    
+    started = time.perf_counter()
+    
+    if max_workers == 1 or len(jobs) <= 1:
+        records = [_run_optimization_job(job) for job in jobs]
+    else:
+        # Don't let forked workers inherit the parent's open DB sockets
+        connections.close_all()
+        
+        records = []
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_optimizer_worker) as pool:
+            futures = [pool.submit(_run_optimization_job, job) for job in jobs]
+            for future in as_completed(futures):
+                records.append(future.result())
+    
+    records.sort(key=lambda r: (r['care_home'], r['date']))
+    
+    logger.info(f"Parallel optimization: {len(jobs)} jobs in "
+               f"{time.perf_counter() - started:.2f}s "
+               f"(serial solve time {sum(r['wall_seconds'] for r in records):.2f}s)")
+    
+    return records
@@ -1,24 +1,42 @@
 """
-Django signals for authentication event logging.
-Automatically logs user login, logout, and failed login attempts to SystemAccessLog.
+Django signals for authentication event logging and cache invalidation.
+
+Logins, logouts and failed login attempts are logged to SystemAccessLog
+(queued through audit_sink and written in bulk). Saves and deletes of
+shifts, staff, leave, homes and the records behind the management
+dashboards invalidate the affected home's caches; inside a transaction
+these are coalesced and applied once on commit. Shift and leave changes
+also refresh the daily metrics rollup for the days they touch.
+
+Saving or deleting an API client or token drops its cached credentials,
+and reference data (homes, units, shift types, roles, shift patterns)
+reloads in every process after any of those rows change.
 """
+from datetime import timedelta
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models_audit import SystemAccessLog
+from .cache_service import CacheService
+from .models import (
+    Shift, User, LeaveRequest, CareHome, Unit, ShiftType, Role, ShiftPattern,
+    Resident, CarePlanReview, StaffReallocation, TrainingRecord,
+)
+from .models_integrations import APIClient, APIToken
+from . import api_credentials, audit_sink, daily_metrics, reference_data
 
 
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     """Log successful user login."""
     try:
-        SystemAccessLog.objects.create(
-            user=user,
-            access_type='LOGIN',
-            ip_address=_get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-            session_key=request.session.session_key,
-            success=True
-        )
+        audit_sink.record('SystemAccessLog', {
+            'user_id': user.pk,
+            'access_type': 'LOGIN',
+            'ip_address': _get_client_ip(request),
+            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+            'session_key': request.session.session_key,
+            'success': True,
+        })
     except Exception as e:
         print(f"Login logging failed: {e}")
 
@@ -27,14 +45,14 @@ def log_user_login(sender, request, user, **kwargs):
 def log_user_logout(sender, request, user, **kwargs):
     """Log user logout."""
     try:
-        SystemAccessLog.objects.create(
-            user=user,
-            access_type='LOGOUT',
-            ip_address=_get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-            session_key=request.session.session_key if request.session.session_key else '',
-            success=True
-        )
+        audit_sink.record('SystemAccessLog', {
+            'user_id': user.pk if user else None,
+            'access_type': 'LOGOUT',
+            'ip_address': _get_client_ip(request),
+            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+            'session_key': request.session.session_key if request.session.session_key else '',
+            'success': True,
+        })
     except Exception as e:
         print(f"Logout logging failed: {e}")
 
@@ -46,16 +64,16 @@ def log_user_login_failed(sender, credentials, request, **kwargs):
         # Extract username from credentials
         username = credentials.get('username', 'unknown')
         
-        SystemAccessLog.objects.create(
-            user=None,  # User not authenticated
-            username_attempt=username,
-            access_type='LOGIN_FAILED',
-            ip_address=_get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-            session_key=request.session.session_key if hasattr(request, 'session') else '',
-            success=False,
-            failure_reason=f'Failed login attempt for username: {username}'
-        )
+        audit_sink.record('SystemAccessLog', {
+            'user_id': None,  # User not authenticated
+            'username_attempt': username,
+            'access_type': 'LOGIN_FAILED',
+            'ip_address': _get_client_ip(request),
+            'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+            'session_key': request.session.session_key if hasattr(request, 'session') else '',
+            'success': False,
+            'failure_reason': f'Failed login attempt for username: {username}',
+        })
     except Exception as e:
         print(f"Failed login logging failed: {e}")
 
@@ -68,3 +86,251 @@ def _get_client_ip(request):
     else:
         ip = request.META.get('REMOTE_ADDR', '127.0.0.1')  # Default for tests
     return ip if ip else '127.0.0.1'  # Ensure we always return an IP
+
+
+# Cache invalidation
+#
+# Saves and deletes of shifts, staff and leave invalidate their home's
+# caches. bulk_create and queryset update() send no signals, so those paths
+# call CacheService.invalidate_unit_shifts() themselves.
+
+def _home_id_for_unit(unit_id):
+    """Care home of a unit, or None"""
+    if unit_id is None:
+        return None
+    home_id = reference_data.home_id_for_unit(unit_id)
+    if home_id is not None:
+        return home_id
+    # Not in the registry yet (e.g. created in this transaction)
+    return Unit.objects.filter(pk=unit_id).values_list('care_home_id', flat=True).first()
+
+
+def _home_id_for_user(user):
+    """Care home of a staff member (via their unit), or None"""
+    if user is None or not user.unit_id:
+        return None
+    if User.unit.is_cached(user):
+        return user.unit.care_home_id
+    return _home_id_for_unit(user.unit_id)
+
+
+def _home_id_for_staff(instance, field):
+    """Care home of the staff member a row points at through field, or None"""
+    if getattr(type(instance), field).is_cached(instance):
+        return _home_id_for_user(getattr(instance, field))
+    # The user may already be gone when this delete cascades from theirs
+    unit_id = User.objects.filter(pk=getattr(instance, f'{field}_id')).values_list('unit_id', flat=True).first()
+    return _home_id_for_unit(unit_id)
+
+
+@receiver([post_save, post_delete], sender=Shift)
+def invalidate_shift_cache_on_save(sender, instance, created=False, **kwargs):
+    """Invalidate shift and home caches when a shift is saved or deleted"""
+    if Shift.unit.is_cached(instance):
+        home_id = instance.unit.care_home_id
+    else:
+        home_id = _home_id_for_unit(instance.unit_id)
+    
+    # A new shift has no tagged entries to purge
+    CacheService.invalidate_shift_cache(
+        shift_id=None if created else instance.pk,
+        home_id=home_id,
+        date=instance.date
+    )
+    if home_id:
+        CacheService.invalidate_home_cache(home_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_staff_cache_on_save(sender, instance, update_fields=None, **kwargs):
+    """Invalidate home caches when staff records are saved or deleted"""
+    # Logins only touch last_login - don't flush a home's caches for them
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    
+    home_id = _home_id_for_user(instance)
+    if home_id:
+        CacheService.invalidate_home_cache(home_id)
+
+
+@receiver([post_save, post_delete], sender=LeaveRequest)
+def invalidate_leave_cache_on_save(sender, instance, **kwargs):
+    """Invalidate home caches when leave requests are saved or deleted"""
+    home_id = _home_id_for_staff(instance, 'user')
+    if home_id:
+        CacheService.invalidate_home_cache(home_id)
+
+
+# Residents, care plan reviews, reallocations, training and leaver records
+# only feed the management dashboards, which are cached per home namespace
+
+@receiver([post_save, post_delete], sender=Resident)
+@receiver([post_save, post_delete], sender=StaffReallocation)
+def invalidate_unit_record_cache(sender, instance, **kwargs):
+    """Invalidate the home of a resident's unit, or a reallocation's target unit"""
+    unit_id = instance.unit_id if sender is Resident else instance.target_unit_id
+    home_id = _home_id_for_unit(unit_id)
+    if home_id:
+        CacheService.invalidate_home_cache(home_id)
+
+
+@receiver([post_save, post_delete], sender=CarePlanReview)
+def invalidate_care_plan_review_cache(sender, instance, **kwargs):
+    """Invalidate the home of the reviewed resident"""
+    if CarePlanReview.resident.is_cached(instance):
+        unit_id = instance.resident.unit_id
+    else:
+        # Gone when this delete cascades from the resident's (which invalidates)
+        unit_id = Resident.objects.filter(pk=instance.resident_id).values_list('unit_id', flat=True).first()
+    home_id = _home_id_for_unit(unit_id)
+    if home_id:
+        CacheService.invalidate_home_cache(home_id)
+
+
+@receiver([post_save, post_delete], sender=TrainingRecord)
+@receiver([post_save, post_delete], sender='staff_records.StaffProfile')
+def invalidate_staff_record_cache(sender, instance, **kwargs):
+    """Invalidate the home of the staff member a training or profile record belongs to"""
+    home_id = _home_id_for_staff(instance, 'staff_member' if sender is TrainingRecord else 'user')
+    if home_id:
+        CacheService.invalidate_home_cache(home_id)
+
+
+# Daily metrics rollup
+#
+# Saves mark the (unit, date) rows they touch for refresh on commit. The
+# post_init receivers snapshot the few fields the rollup depends on, so the
+# pre_save receivers know where an edited row was without a query. Moving a
+# shift or changing a leave request refreshes its old days too, and deleting
+# one refreshes the days it covered. The post_delete receivers mean shift
+# querysets are deleted row by row rather than fast-deleted. Queryset
+# update() and bulk_create are covered by invalidate_unit_shifts() and the
+# nightly reconcile.
+
+SHIFT_SLOT_FIELDS = ('unit_id', 'date')
+LEAVE_SPAN_FIELDS = ('start_date', 'end_date', 'status')
+
+
+def _field_values(instance, attnames):
+    """Current values of these attributes as a tuple, or None if any was deferred"""
+    data = instance.__dict__
+    if all(attname in data for attname in attnames):
+        return tuple(data[attname] for attname in attnames)
+    return None
+
+
+def _stored_values(instance, attnames):
+    """
+    Values as of load (or the last save), as a tuple
+
+    Taken from the post_init snapshot below; the row is only re-read if one
+    of the fields was deferred at load.
+    """
+    snapshot = getattr(instance, '_daily_metrics_loaded', None)
+    if snapshot is not None:
+        return snapshot
+    return type(instance)._base_manager.filter(pk=instance.pk).values_list(*attnames).first()
+
+
+def _leave_dates(start_date, end_date):
+    days = (end_date - start_date).days
+    return [start_date + timedelta(days=n) for n in range(days + 1)]
+
+
+@receiver(post_init, sender=Shift)
+def snapshot_shift_slot(sender, instance, **kwargs):
+    """Remember a shift's unit and date as loaded"""
+    instance._daily_metrics_loaded = _field_values(instance, SHIFT_SLOT_FIELDS)
+
+
+@receiver(pre_save, sender=Shift)
+def remember_shift_slot(sender, instance, update_fields=None, **kwargs):
+    """Remember an edited shift's previous unit and date"""
+    instance._daily_metrics_slot = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {'unit', 'date'} & set(update_fields):
+        return
+    instance._daily_metrics_slot = _stored_values(instance, SHIFT_SLOT_FIELDS)
+
+
+@receiver([post_save, post_delete], sender=Shift)
+def refresh_daily_metrics_on_shift_change(sender, instance, **kwargs):
+    """Refresh the shift's day, and the day it moved from"""
+    previous = getattr(instance, '_daily_metrics_slot', None)
+    instance._daily_metrics_slot = None
+    if 'created' in kwargs:
+        # The saved values are the baseline for the next save
+        instance._daily_metrics_loaded = _field_values(instance, SHIFT_SLOT_FIELDS)
+
+    daily_metrics.mark_stale([instance.unit_id], [instance.date])
+    if previous and previous != (instance.unit_id, instance.date):
+        daily_metrics.mark_stale([previous[0]], [previous[1]])
+
+
+@receiver(post_init, sender=LeaveRequest)
+def snapshot_leave_span(sender, instance, **kwargs):
+    """Remember a leave request's dates and status as loaded"""
+    instance._daily_metrics_loaded = _field_values(instance, LEAVE_SPAN_FIELDS)
+
+
+@receiver(pre_save, sender=LeaveRequest)
+def remember_leave_dates(sender, instance, **kwargs):
+    """Remember an edited leave request's previous dates and status"""
+    instance._daily_metrics_leave = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._daily_metrics_leave = _stored_values(instance, LEAVE_SPAN_FIELDS)
+
+
+@receiver([post_save, post_delete], sender=LeaveRequest)
+def refresh_daily_metrics_on_leave_change(sender, instance, **kwargs):
+    """Refresh every day an approved leave request covers, or covered"""
+    previous = getattr(instance, '_daily_metrics_leave', None)
+    instance._daily_metrics_leave = None
+    if 'created' in kwargs:
+        instance._daily_metrics_loaded = _field_values(instance, LEAVE_SPAN_FIELDS)
+
+    dates = set()
+    if instance.status == 'APPROVED':
+        dates.update(_leave_dates(instance.start_date, instance.end_date))
+    if previous and previous[2] == 'APPROVED':
+        dates.update(_leave_dates(previous[0], previous[1]))
+    if not dates:
+        # Pending and denied requests never touch the rollup
+        return
+
+    if LeaveRequest.user.is_cached(instance):
+        unit_id = instance.user.unit_id
+    else:
+        # The user may already be gone when this delete cascades from theirs
+        unit_id = User.objects.filter(pk=instance.user_id).values_list('unit_id', flat=True).first()
+    if unit_id is not None:
+        daily_metrics.mark_stale([unit_id], dates)
+
+
+@receiver(post_save, sender=CareHome)
+def invalidate_home_metadata_cache_on_save(sender, instance, **kwargs):
+    """Invalidate caches when home metadata changes"""
+    CacheService.invalidate_home_cache(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=APIClient)
+def invalidate_api_client_credentials(sender, instance, **kwargs):
+    """Suspending, rotating or deleting a client drops its cached credentials"""
+    api_credentials.invalidate_client(instance.pk, ('key', instance.api_key))
+
+
+@receiver([post_save, post_delete], sender=APIToken)
+def invalidate_api_token_credentials(sender, instance, **kwargs):
+    """Issuing, revoking or deleting a token drops its client's cached credentials"""
+    api_credentials.invalidate_client(instance.client_id, ('token', instance.token))
+
+
+@receiver([post_save, post_delete], sender=CareHome)
+@receiver([post_save, post_delete], sender=Unit)
+@receiver([post_save, post_delete], sender=ShiftType)
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=ShiftPattern)
+def invalidate_reference_data(sender, **kwargs):
+    """Reload the reference data registry after a reference row changes"""
+    reference_data.invalidate()
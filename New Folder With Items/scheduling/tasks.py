@@ -947,3 +947,83 @@ def send_bulk_notification_batch(subject, message, recipient_list, batch_size=50
     logger.info(f"📧 Queued {sent}/{total} emails in batches")
     return sent
 
+
+
+# ==================== AUDIT LOG DELIVERY ====================
+
+@shared_task(bind=True, acks_late=True, max_retries=5, default_retry_delay=30)
+def write_audit_events(self, events):
+    """
+    Write a batch of buffered audit events (see scheduling.audit_sink)
+    
+    Acked only after the write, so a lost worker redelivers the batch.
+    After the last retry the batch is spooled on the worker host.
+    """
+    from scheduling.audit_sink import write_events, spool_events
+    
+    try:
+        write_events(events)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.error(f"Audit batch of {len(events)} failed after retries, spooling: {exc}")
+            spool_events(events)
+            return {'task': 'write_audit_events', 'spooled': len(events)}
+        raise self.retry(exc=exc)
+    
+    return {'task': 'write_audit_events', 'written': len(events)}
+
+
+@shared_task
+def drain_audit_spool():
+    """
+    Replay audit events spooled while the database or broker was down
+    
+    Runs: Every 5 minutes via Celery Beat (on each host that writes a spool)
+    """
+    from scheduling.audit_sink import drain_spool
+    
+    return {'task': 'drain_audit_spool', 'replayed': drain_spool()}
+
+
+# ==================== DASHBOARD WARM-UP ====================
+
+@shared_task
+def warm_dashboards(home_ids=None):
+    """
+    Precompute dashboards ahead of demand (see scheduling.dashboard_warmup)
+    
+    Runs: Every 10 minutes via Celery Beat, warming dashboards that are
+    usually first opened in the next half hour; and after bulk roster
+    writes with home_ids, warming every planned dashboard of those homes
+    """
+    from scheduling import dashboard_warmup
+    
+    if home_ids:
+        report = dashboard_warmup.warm(home_ids=home_ids)
+    else:
+        report = dashboard_warmup.warm(dashboard_warmup.due_targets())
+    
+    return {'task': 'warm_dashboards', **report}
+
+
+
+# ==================== DAILY METRICS ROLLUP ====================
+
+@shared_task
+def reconcile_daily_metrics(days=None):
+    """
+    Rebuild recent DailyUnitMetrics rows from Shift and LeaveRequest
+    
+    Runs: Daily at 02:30 via Celery Beat. Covers writes the incremental
+    refresh cannot see (queryset updates, single shift deletes)
+    """
+    from scheduling import daily_metrics
+    
+    result = daily_metrics.reconcile(days)
+    return {
+        'task': 'reconcile_daily_metrics',
+        'written': result['written'],
+        'deleted': result['deleted'],
+        'start_date': result['start_date'].isoformat(),
+        'end_date': result['end_date'].isoformat(),
+    }
@@ -0,0 +1,105 @@
+"""
+Analytics Period Bucketing Tests
+
+Tests:
+1. Weekly and monthly period buckets cover the expected dates
+2. Trending data for every period comes from one shift query
+3. Bucketed costs and compliance match the single-period functions
+"""
+
+from django.test import TestCase
+from datetime import date, time, timedelta
+from unittest.mock import patch
+
+from scheduling import analytics
+from scheduling.models import User, Unit, ShiftType, Shift, Role
+from scheduling.models_multi_home import CareHome
+
+
+class PeriodBucketTests(TestCase):
+    """Test period-bucketed analytics"""
+
+    def setUp(self):
+        self.care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        self.unit = Unit.objects.create(name='OG_BRAMLEY', care_home=self.care_home)
+        self.day_shift = ShiftType.objects.create(
+            name='DAY_SENIOR',
+            start_time=time(8, 0),
+            end_time=time(20, 0),
+            duration_hours=12.0
+        )
+        self.short_shift = ShiftType.objects.create(
+            name='EARLY',
+            start_time=time(7, 0),
+            end_time=time(14, 0),
+            duration_hours=7.0
+        )
+        role = Role.objects.create(name='CARE_ASSISTANT')
+        self.staff = [
+            User.objects.create_user(
+                sap=f'10{i:04d}',
+                password='testpass123',
+                first_name=f'Test{i}',
+                last_name='User',
+                email=f'test{i}@example.com',
+                role=role,
+                unit=self.unit
+            )
+            for i in range(2)
+        ]
+        self.today = date(2026, 3, 15)
+
+        # Staff 0 works five 12-hour days in the last week (60h); staff 1 a few earlies
+        for n in range(5):
+            self.add_shift(self.staff[0], self.today - timedelta(days=n), self.day_shift)
+        for n in (8, 9, 20, 40):
+            self.add_shift(self.staff[1], self.today - timedelta(days=n), self.short_shift)
+
+    def add_shift(self, user, day, shift_type):
+        return Shift.objects.create(user=user, unit=self.unit, shift_type=shift_type, date=day)
+
+    def test_period_buckets(self):
+        """Weeks end on today's weekday; months are calendar months"""
+        weeks = analytics.get_period_buckets(3, 'week', end_date=self.today)
+        self.assertEqual(weeks[-1][:2], (date(2026, 3, 9), date(2026, 3, 15)))
+        self.assertEqual(weeks[0][:2], (date(2026, 2, 23), date(2026, 3, 1)))
+
+        months = analytics.get_period_buckets(2, 'month', end_date=self.today)
+        self.assertEqual(
+            [(start, end, label) for start, end, label in months],
+            [(date(2026, 2, 1), date(2026, 2, 28), 'Feb 2026'),
+             (date(2026, 3, 1), date(2026, 3, 31), 'Mar 2026')]
+        )
+
+    def test_trending_data_single_query(self):
+        """Twelve weeks of staffing trend cost one query"""
+        with patch('scheduling.analytics.timezone.now') as now:
+            now.return_value.date.return_value = self.today
+            with self.assertNumQueries(1):
+                trend = analytics.get_trending_data(self.care_home, metric='staffing', periods=12)
+
+        self.assertEqual(len(trend), 12)
+        # 5 shifts over 7 days at 15 expected per day
+        self.assertEqual(trend[-1], {'period': '03/09 - 03/15', 'value': round(5 / 105 * 100, 2)})
+        self.assertEqual(trend[-2]['value'], round(2 / 105 * 100, 2))
+
+    def test_bucketed_results_match_single_period(self):
+        """Each bucket equals the single-period calculation for its dates"""
+        buckets = analytics.get_period_buckets(8, 'week', end_date=self.today)
+
+        costs = analytics.calculate_cost_metrics_by_period(self.care_home, periods=buckets)
+        with self.assertNumQueries(2):
+            compliance = analytics.calculate_compliance_metrics_by_period(self.care_home, periods=buckets)
+
+        for (start, end, _), cost, check in zip(buckets, costs, compliance):
+            self.assertEqual(cost, analytics.calculate_cost_metrics(self.care_home, None, start, end))
+            self.assertEqual(check, analytics.calculate_compliance_metrics(self.care_home, None, start, end))
+
+        self.assertEqual(compliance[-1]['violations'], 1)
+        self.assertEqual(costs[-1]['estimated_regular_cost'], 60 * 15.0)
@@ -0,0 +1,106 @@
+"""
+API Credential Cache Tests
+
+Tests:
+1. A cached API key resolves without touching the database
+2. Only authentication fields are cached, never keys, tokens or secrets
+3. Suspending a client or revoking a token takes effect immediately
+4. Usage counters are flushed in bulk instead of saving per request
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from unittest.mock import patch
+
+from scheduling import api_credentials
+from scheduling.models_integrations import APIClient, APIToken
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class CredentialCacheTests(TestCase):
+    """Test cached credential resolution and write-behind usage"""
+
+    def setUp(self):
+        cache.clear()
+        self.client_obj = APIClient.objects.create(
+            name='Payroll',
+            client_type='PAYROLL',
+            client_id='payroll',
+            client_secret='x',
+            api_key='sk_test_payroll',
+            contact_email='payroll@test.com'
+        )
+        self.token = APIToken.objects.create(
+            client=self.client_obj,
+            token='tok_test',
+            token_type='ACCESS',
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+    def test_cached_key_skips_database(self):
+        """Only the first resolution of a key queries"""
+        with self.assertNumQueries(1):
+            api_credentials.resolve_api_key('sk_test_payroll')
+        with self.assertNumQueries(0):
+            client = api_credentials.resolve_api_key('sk_test_payroll')
+
+        self.assertEqual(client.pk, self.client_obj.pk)
+        self.assertIsNone(api_credentials.resolve_api_key('sk_unknown'))
+
+    def test_cache_holds_no_secrets(self):
+        """Cached entries are plain field values without credentials"""
+        api_credentials.resolve_token('tok_test')
+        entry = cache.get(api_credentials.credential_key('token', 'tok_test'))
+        self.assertEqual(set(entry['client']), set(api_credentials.CLIENT_FIELDS))
+        self.assertEqual(set(entry['token']), set(api_credentials.TOKEN_FIELDS))
+
+        with self.assertNumQueries(0):
+            token = api_credentials.resolve_token('tok_test')
+            self.assertTrue(token.is_valid())
+            self.assertEqual(token.client.pk, self.client_obj.pk)
+            self.assertEqual(token.client.rate_limit_per_minute, 60)
+        self.assertIn('token', token.get_deferred_fields())
+        self.assertLessEqual({'api_key', 'client_secret'}, token.client.get_deferred_fields())
+
+        # Anything else is loaded from the row on demand
+        with self.assertNumQueries(1):
+            self.assertEqual(token.client.name, 'Payroll')
+
+    def test_revocation_is_immediate(self):
+        """Saving a suspended client or inactive token purges the cache"""
+        self.assertIsNotNone(api_credentials.resolve_api_key('sk_test_payroll'))
+        self.assertIsNotNone(api_credentials.resolve_token('tok_test'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.is_active = False
+            self.token.save()
+        self.assertIsNone(api_credentials.resolve_token('tok_test'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_obj.status = 'SUSPENDED'
+            self.client_obj.save()
+        self.assertIsNone(api_credentials.resolve_api_key('sk_test_payroll'))
+
+    @patch('scheduling.api_credentials.API_USAGE_FLUSH_INTERVAL', 3600)
+    def test_usage_flushed_in_bulk(self):
+        """Many requests become one UPDATE per client and token"""
+        for success in [True, True, True, False]:
+            api_credentials.record_usage(self.client_obj.pk, token_id=self.token.pk)
+            api_credentials.record_usage(self.client_obj.pk, success=success)
+
+        # SAVEPOINT + two UPDATEs + RELEASE
+        with self.assertNumQueries(4):
+            self.assertEqual(api_credentials.flush_usage(), 2)
+
+        self.client_obj.refresh_from_db()
+        self.token.refresh_from_db()
+        self.assertEqual(self.client_obj.total_requests, 4)
+        self.assertEqual(self.client_obj.successful_requests, 3)
+        self.assertEqual(self.client_obj.failed_requests, 1)
+        self.assertEqual(self.token.use_count, 4)
+        self.assertIsNotNone(self.token.last_used_at)
@@ -0,0 +1,91 @@
+"""
+API Request Log Buffer Tests
+
+Tests:
+1. Request log rows are queued and written in one bulk INSERT, stamped with the request time
+2. Successful requests are sampled; errors are always kept
+3. Every request is counted in the per-minute rollup, across flushes
+"""
+
+from django.test import TestCase, override_settings
+from datetime import datetime, timezone as dt_timezone
+from unittest.mock import patch
+
+from scheduling import api_request_log
+from scheduling.models_integrations import APIClient, APIRequestLog, APIRequestRollup
+
+
+@override_settings(API_LOG_BUFFERED=True)
+@patch('scheduling.api_request_log.API_LOG_FLUSH_INTERVAL', 3600)
+class APIRequestLogBufferTests(TestCase):
+    """Test buffered APIRequestLog writes and rollups"""
+
+    def setUp(self):
+        self.client_obj = APIClient.objects.create(
+            name='HR',
+            client_type='HR',
+            client_id='hr',
+            client_secret='x',
+            api_key='sk_test_hr',
+            contact_email='hr@test.com'
+        )
+
+    def row(self, status_code=200):
+        return {
+            'client_id': self.client_obj.pk,
+            'endpoint': '/api/v1/integration/staff/',
+            'method': 'GET',
+            'ip_address': '10.0.0.1',
+            'status_code': status_code,
+            'response_time_ms': 40,
+        }
+
+    def test_rows_written_in_one_insert(self):
+        """Queued rows reach the table in a single bulk_create"""
+        for _ in range(3):
+            api_request_log.record(self.row())
+        self.assertEqual(APIRequestLog.objects.count(), 0)
+
+        with self.assertNumQueries(1):
+            api_request_log.flush()
+        self.assertEqual(APIRequestLog.objects.count(), 3)
+
+    def test_rows_keep_request_time(self):
+        """A row flushed in a later minute is stamped in its rollup's minute"""
+        request_time = datetime(2026, 1, 5, 9, 30, 58, tzinfo=dt_timezone.utc)
+        with patch('scheduling.api_request_log.timezone.now', return_value=request_time):
+            api_request_log.observe(self.client_obj.pk, 200, 40)
+            api_request_log.record(self.row())
+        api_request_log.flush()
+
+        self.assertEqual(APIRequestLog.objects.get().timestamp, request_time)
+        self.assertEqual(APIRequestRollup.objects.get().minute, request_time.replace(second=0))
+
+    @patch('scheduling.api_request_log.API_LOG_SUCCESS_SAMPLE_RATE', 0.0)
+    def test_errors_always_kept(self):
+        """With sampling at 0, only errors are logged - but all are counted"""
+        self.assertFalse(api_request_log.observe(self.client_obj.pk, 200, 40))
+        self.assertTrue(api_request_log.observe(self.client_obj.pk, 429, 5))
+        self.assertTrue(api_request_log.observe(self.client_obj.pk, 500, 900))
+        api_request_log.flush()
+
+        rollup = APIRequestRollup.objects.get()
+        self.assertEqual(rollup.request_count, 3)
+        self.assertEqual(rollup.error_count, 2)
+        self.assertEqual(rollup.max_response_ms, 900)
+
+    def test_rollup_merged_across_flushes(self):
+        """A second flush in the same minute adds to the existing rollup"""
+        with patch('scheduling.api_request_log.timezone.now') as now:
+            now.return_value = datetime(2026, 1, 5, 9, 30, 12, tzinfo=dt_timezone.utc)
+            api_request_log.observe(self.client_obj.pk, 200, 8)
+            api_request_log.observe(self.client_obj.pk, 200, 30)
+            api_request_log.flush()
+            api_request_log.observe(self.client_obj.pk, 200, 30)
+            api_request_log.flush()
+
+        rollup = APIRequestRollup.objects.get()
+        self.assertEqual(rollup.request_count, 3)
+        self.assertEqual(rollup.total_response_ms, 68)
+        self.assertEqual(rollup.latency_histogram[:3], [1, 0, 2])
+        self.assertEqual(rollup.percentile(50), 50)
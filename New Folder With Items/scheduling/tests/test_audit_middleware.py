@@ -0,0 +1,183 @@
+"""
+Audit Middleware Tests
+
+Tests:
+1. Updates are diffed against the load-time snapshot without re-reading the row
+2. Only changed fields are logged, excluded fields never are
+3. Repeated saves of one instance diff against the previous save
+4. Buffered audit rows are written on commit + flush, never on rollback
+5. Rows are spooled when the database write fails and replayed later
+6. Late events are written with their recorded time in a single insert
+"""
+
+from django.db import connection, transaction, OperationalError
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from unittest.mock import patch
+from datetime import date, time, timedelta
+import json
+import os
+import tempfile
+
+from scheduling import audit_sink, middleware
+from scheduling.models import User, Role, Shift, Unit, ShiftType
+from scheduling.models_audit import SystemAccessLog, DataChangeLog
+from scheduling.models_multi_home import CareHome
+
+
+@override_settings(AUDIT_BUFFERED=False)
+class SnapshotChangeTrackingTests(TestCase):
+    """Test snapshot-on-load diffing in the audit signal handlers"""
+
+    def setUp(self):
+        """Create a shift and an authenticated request context"""
+        self.care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        self.unit = Unit.objects.create(name='TEST_UNIT', care_home=self.care_home)
+        self.shift_type = ShiftType.objects.create(
+            name='Early',
+            start_time=time(8, 0),
+            end_time=time(20, 0),
+            duration_hours=12.0
+        )
+        self.user = User.objects.create_user(
+            sap='000001',
+            password='testpass123',
+            email='manager@test.com',
+            first_name='Test',
+            last_name='Manager',
+            role=Role.objects.create(name='OM'),
+            unit=self.unit
+        )
+        self.shift = Shift.objects.create(
+            date=date(2025, 1, 6),
+            user=self.user,
+            unit=self.unit,
+            shift_type=self.shift_type,
+            status='SCHEDULED'
+        )
+
+        request = RequestFactory().post('/')
+        request.user = self.user
+        middleware._thread_locals.request = request
+        DataChangeLog.objects.all().delete()
+
+    def tearDown(self):
+        del middleware._thread_locals.request
+
+    def test_update_does_not_reselect_row(self):
+        """Saving a loaded shift issues no SELECT against the shift table"""
+        shift = Shift.objects.get(pk=self.shift.pk)
+        shift.status = 'CONFIRMED'
+
+        with CaptureQueriesContext(connection) as queries:
+            shift.save()
+
+        shift_selects = [
+            q['sql'] for q in queries.captured_queries
+            if q['sql'].startswith('SELECT') and f'"{Shift._meta.db_table}"' in q['sql']
+        ]
+        self.assertEqual(shift_selects, [])
+
+        log = DataChangeLog.objects.get(action='UPDATE')
+        self.assertEqual(log.field_name, 'status')
+
+    def test_excluded_fields_not_logged(self):
+        """Password hashes never reach the change log"""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('another-pass')
+        user.first_name = 'Changed'
+        user.save()
+
+        log = DataChangeLog.objects.get(action='UPDATE')
+        self.assertEqual(log.field_name, 'first_name')
+        self.assertNotIn('password', json.loads(log.new_value))
+
+    def test_second_save_diffs_against_first(self):
+        """The saved state becomes the baseline for the next save"""
+        shift = Shift.objects.get(pk=self.shift.pk)
+        shift.status = 'CONFIRMED'
+        shift.save()
+        shift.notes = 'Swapped'
+        shift.save()
+
+        fields = list(
+            DataChangeLog.objects.filter(action='UPDATE')
+            .order_by('pk').values_list('field_name', flat=True)
+        )
+        self.assertEqual(fields, ['status', 'notes'])
+
+
+class AuditSinkTests(TestCase):
+    """Test buffered audit delivery"""
+
+    def access_event(self, access_type='LOGIN'):
+        return {'access_type': access_type, 'ip_address': '10.0.0.1', 'success': True}
+
+    def test_rows_written_in_one_flush_after_commit(self):
+        """Events queue until commit and are bulk-written on flush"""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for _ in range(3):
+                    audit_sink.record('SystemAccessLog', self.access_event())
+                self.assertEqual(audit_sink._buffer, [])
+
+        self.assertEqual(SystemAccessLog.objects.count(), 0)
+        audit_sink.flush()
+        self.assertEqual(SystemAccessLog.objects.count(), 3)
+
+    def test_rollback_records_nothing(self):
+        """Events from a rolled-back transaction are never queued"""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    audit_sink.record('SystemAccessLog', self.access_event())
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+
+        audit_sink.flush()
+        self.assertEqual(SystemAccessLog.objects.count(), 0)
+
+    def test_failed_write_spooled_and_replayed(self):
+        """A database outage spools the batch; drain_spool() replays it"""
+        spool = os.path.join(tempfile.mkdtemp(), 'audit_spool.jsonl')
+
+        with patch.object(audit_sink, 'AUDIT_SPOOL_PATH', spool):
+            with self.captureOnCommitCallbacks(execute=True):
+                audit_sink.record('SystemAccessLog', self.access_event('LOGOUT'))
+
+            with patch.object(audit_sink, '_bulk_write', side_effect=OperationalError('down')):
+                audit_sink.flush()
+
+            self.assertTrue(os.path.exists(spool))
+            self.assertEqual(SystemAccessLog.objects.count(), 0)
+
+            self.assertEqual(audit_sink.drain_spool(), 1)
+            self.assertFalse(os.path.exists(spool + '.draining'))
+
+        self.assertEqual(SystemAccessLog.objects.get().access_type, 'LOGOUT')
+
+    def test_late_events_keep_recorded_time_in_one_insert(self):
+        """A replayed batch is stamped with event times, not written then updated"""
+        recorded = timezone.now() - timedelta(hours=3)
+        events = [
+            {'model': 'SystemAccessLog', 'at': (recorded + timedelta(minutes=n)).isoformat(),
+             'fields': self.access_event()}
+            for n in range(3)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            audit_sink.write_events(events)
+
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(
+            list(SystemAccessLog.objects.order_by('timestamp').values_list('timestamp', flat=True)),
+            [recorded + timedelta(minutes=n) for n in range(3)]
+        )
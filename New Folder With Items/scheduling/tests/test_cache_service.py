@@ -0,0 +1,220 @@
+"""
+Cache Service Tests
+
+Tests:
+1. Concurrent misses recompute a key once (single-flight)
+2. Stale entries are served while one caller refreshes them
+3. Generation bumps invalidate decorated results; evicted counters never repeat
+4. Hit/miss/recompute counters are kept per key prefix
+5. Invalidations inside a transaction are coalesced and applied on commit
+6. Sequential commits in one test transaction each flush their own batch
+7. Rolled-back transactions invalidate nothing
+8. Deleting a shift, staff member or leave request invalidates its home
+"""
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from unittest.mock import patch
+from datetime import date, time as clock
+import threading
+import time
+
+from scheduling import reference_data
+from scheduling.cache_service import CacheService, cache_dashboard
+from scheduling.models import User, Unit, ShiftType, Shift, LeaveRequest, Role
+from scheduling.models_multi_home import CareHome
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class GetOrSetTests(SimpleTestCase):
+    """Test single-flight get_or_set and stale-while-revalidate"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        CacheService.reset_prefix_stats()
+
+    def test_concurrent_misses_compute_once(self):
+        """Twenty simultaneous misses run the computation once"""
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'total_shifts': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                CacheService.get_or_set('dashboard:home:1', build, timeout=60)
+            ))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'total_shifts': 42}] * 20)
+
+    @patch('scheduling.cache_service.BACKGROUND_REFRESH', False)
+    def test_stale_entry_served_while_refreshing(self):
+        """Past the soft TTL, callers get the stale value while one refreshes"""
+        CacheService.get_or_set('stats:x', lambda: 1, timeout=1, stale_timeout=60)
+
+        def fail():
+            raise AssertionError('only the lock holder recomputes')
+
+        with patch('scheduling.cache_service.time.time', return_value=time.time() + 2):
+            # Another worker holds the refresh lock
+            token = CacheService._acquire_lock('stats:x')
+            self.assertEqual(
+                CacheService.get_or_set('stats:x', fail, timeout=1, stale_timeout=60), 1
+            )
+            CacheService._release_lock('stats:x', token)
+
+            self.assertEqual(
+                CacheService.get_or_set('stats:x', lambda: 2, timeout=1, stale_timeout=60), 2
+            )
+
+        self.assertEqual(CacheService.get_prefix_stats()['stats']['stale_hits'], 1)
+
+    def test_generation_bump_invalidates_decorated_result(self):
+        """invalidate_home_cache() forces a recompute for that home only"""
+        calls = []
+
+        @cache_dashboard(timeout=60, home_arg='home_id')
+        def summary(home_id=None):
+            calls.append(home_id)
+            return None
+
+        summary(home_id=1)
+        summary(home_id=1)
+        summary(home_id=2)
+        self.assertEqual(calls, [1, 2])
+
+        CacheService.invalidate_home_cache(1)
+        summary(home_id=1)
+        summary(home_id=2)
+        self.assertEqual(calls, [1, 2, 1])
+
+        # Positional calls are scoped to the same home
+        summary(1)
+        CacheService.invalidate_home_cache(1)
+        summary(1)
+        self.assertEqual(calls, [1, 2, 1, 1, 1])
+
+    def test_evicted_generation_not_reused(self):
+        """A counter lost from the cache comes back above its old value"""
+        from django.core.cache import cache
+
+        before = CacheService.get_generations(['home:1'])['home:1']
+        CacheService.bump_generation('home:1')
+        bumped = CacheService.get_generations(['home:1'])['home:1']
+        self.assertEqual(bumped, before + 1)
+
+        cache.delete(CacheService._generation_key('home:1'))
+        time.sleep(0.01)
+        self.assertGreater(CacheService.get_generations(['home:1'])['home:1'], bumped)
+        self.assertGreater(CacheService.bump_generation('home:2'), bumped)
+
+    def test_prefix_counters(self):
+        """Hits and misses are counted under the key prefix"""
+        CacheService.get_or_set('report:a', lambda: 'a', timeout=60)
+        CacheService.get_or_set('report:a', lambda: 'a', timeout=60)
+        CacheService.get_or_set('report:a', lambda: 'a', timeout=60)
+
+        stats = CacheService.get_prefix_stats()['report']
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['recomputes'], 1)
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3)
+
+
+@override_settings(CACHES=LOCMEM)
+class InvalidationCoalescingTests(TestCase):
+    """Test transaction-scoped invalidation batching"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def generations(self):
+        return CacheService.get_generations(['home:1', 'shift:home:1'])
+
+    def test_invalidations_flushed_once_on_commit(self):
+        """Hundreds of invalidations in one transaction bump each scope once"""
+        before = self.generations()
+        with patch.object(CacheService, 'bump_generations',
+                          wraps=CacheService.bump_generations) as bump:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with transaction.atomic():
+                    for _ in range(200):
+                        CacheService.invalidate_shift_cache(home_id=1)
+                        CacheService.invalidate_home_cache(1)
+
+                    # Nothing applied before commit
+                    self.assertEqual(self.generations(), before)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(bump.call_count, 1)
+        self.assertEqual(
+            self.generations(), {namespace: value + 1 for namespace, value in before.items()}
+        )
+
+    def test_sequential_commits_each_flush(self):
+        """A second commit never adds to the batch the first one flushed"""
+        before = self.generations()
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                CacheService.invalidate_home_cache(1)
+            self.assertEqual(len(callbacks), 1)
+
+        self.assertEqual(self.generations()['home:1'], before['home:1'] + 2)
+
+    def test_rollback_discards_invalidations(self):
+        """A rolled-back savepoint leaves the cache untouched"""
+        before = self.generations()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    CacheService.invalidate_home_cache(1)
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.generations(), before)
+
+    def test_deletes_invalidate_home(self):
+        """post_delete receivers bump the home, as post_save ones do"""
+        reference_data.reset()
+        self.addCleanup(reference_data.reset)
+        home = CareHome.objects.create(
+            name='ORCHARD_GROVE', bed_capacity=40, current_occupancy=35,
+            location_address='123 Test Street', postcode='EH1 1AA'
+        )
+        unit = Unit.objects.create(name='OG_BRAMLEY', care_home=home)
+        shift_type = ShiftType.objects.create(
+            name='DAY_SENIOR', start_time=clock(8, 0), end_time=clock(20, 0), duration_hours=12.0
+        )
+        user = User.objects.create_user(
+            sap='100001', password='testpass123', first_name='Test', last_name='User',
+            email='test@example.com', role=Role.objects.create(name='CARE_ASSISTANT'), unit=unit
+        )
+        shift = Shift.objects.create(user=user, unit=unit, shift_type=shift_type, date=date(2026, 3, 2))
+        leave = LeaveRequest.objects.create(
+            user=user, leave_type='ANNUAL', start_date=date(2026, 3, 9), end_date=date(2026, 3, 9),
+            days_requested=1, status='APPROVED'
+        )
+        namespace = f"home:{home.pk}"
+
+        for row in (shift, leave, user):
+            before = CacheService.get_generations([namespace])[namespace]
+            with self.captureOnCommitCallbacks(execute=True):
+                row.delete()
+            self.assertEqual(CacheService.get_generations([namespace])[namespace], before + 1)
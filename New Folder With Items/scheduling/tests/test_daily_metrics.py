@@ -0,0 +1,221 @@
+"""
+Daily Unit Metrics Rollup Tests
+
+Tests:
+1. refresh() rolls shifts and approved leave up per unit and day
+2. Saving, moving or deleting a shift refreshes its old and new days on commit
+3. An edited shift's previous slot comes from its load-time snapshot
+4. Approving and withdrawing leave updates every day it covers
+5. Bulk writes and the nightly reconcile catch what signals miss
+6. totals() and daily_series() sum rollup rows for dashboards
+"""
+
+from django.test import TestCase
+from unittest import skipUnless
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from scheduling import daily_metrics, reference_data, signals
+from scheduling.cache_service import CacheService
+from scheduling.models import User, Unit, ShiftType, Shift, LeaveRequest, Role, DailyUnitMetrics
+from scheduling.models_multi_home import CareHome
+
+
+class DailyUnitMetricsTests(TestCase):
+    """Test the incrementally maintained daily metrics rollup"""
+
+    def setUp(self):
+        reference_data.reset()
+        self.care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        self.bramley = Unit.objects.create(name='OG_BRAMLEY', care_home=self.care_home)
+        self.cherry = Unit.objects.create(name='OG_CHERRY', care_home=self.care_home)
+        self.day_shift = ShiftType.objects.create(
+            name='DAY_SENIOR',
+            start_time=time(8, 0),
+            end_time=time(20, 0),
+            duration_hours=12.0
+        )
+        role = Role.objects.create(name='CARE_ASSISTANT')
+        self.staff = [
+            User.objects.create_user(
+                sap=f'10{i:04d}',
+                password='testpass123',
+                first_name=f'Test{i}',
+                last_name='User',
+                email=f'test{i}@example.com',
+                role=role,
+                unit=self.bramley
+            )
+            for i in range(3)
+        ]
+        self.day = date(2026, 3, 2)
+
+    def tearDown(self):
+        reference_data.reset()
+
+    def add_shift(self, user, day=None, unit=None, **fields):
+        return Shift.objects.create(
+            user=user, unit=unit or self.bramley, shift_type=self.day_shift,
+            date=day or self.day, **fields
+        )
+
+    def add_leave(self, user, start, end, status='APPROVED'):
+        return LeaveRequest.objects.create(
+            user=user, leave_type='ANNUAL', start_date=start, end_date=end,
+            days_requested=(end - start).days + 1, status=status
+        )
+
+    def row(self, unit=None, day=None):
+        return DailyUnitMetrics.objects.filter(unit=unit or self.bramley, date=day or self.day).first()
+
+    def test_refresh_rolls_up_shifts_and_leave(self):
+        """Counts, hours and costs per day from one shift and one leave query"""
+        self.add_shift(self.staff[0], status='CONFIRMED')
+        self.add_shift(self.staff[1], shift_classification='AGENCY', agency_hourly_rate=Decimal('30.00'))
+        self.add_shift(self.staff[2], shift_classification='OVERTIME')
+        self.add_shift(self.staff[0], day=self.day + timedelta(days=1), status='UNCOVERED')
+        self.add_shift(self.staff[1], day=self.day + timedelta(days=1), status='CANCELLED')
+        self.add_leave(self.staff[2], self.day + timedelta(days=1), self.day + timedelta(days=5))
+        DailyUnitMetrics.objects.all().delete()
+
+        with self.assertNumQueries(2):
+            facts = daily_metrics.compute(start_date=self.day, end_date=self.day + timedelta(days=1))
+        self.assertEqual(len(facts), 2)
+
+        result = daily_metrics.refresh(start_date=self.day, end_date=self.day + timedelta(days=1))
+        self.assertEqual(result, {'written': 2, 'deleted': 0})
+
+        first = self.row()
+        self.assertEqual(first.care_home_id, self.care_home.pk)
+        self.assertEqual((first.total_shifts, first.filled_shifts, first.unfilled_shifts), (3, 3, 0))
+        self.assertEqual(first.scheduled_hours, Decimal('36'))
+        self.assertEqual((first.agency_shifts, first.agency_cost), (1, Decimal('360.00')))
+        self.assertEqual((first.overtime_shifts, first.overtime_cost), (1, Decimal('270.00')))
+
+        second = self.row(day=self.day + timedelta(days=1))
+        self.assertEqual((second.total_shifts, second.filled_shifts, second.unfilled_shifts), (1, 0, 1))
+        self.assertEqual(second.leave_days, 1)
+
+    @skipUnless(Shift._meta.get_field('user').null, 'Shift.user is NOT NULL in this schema')
+    def test_unassigned_scheduled_shift_is_unfilled(self):
+        """A scheduled shift with no staff member counts as unfilled, as on the dashboards"""
+        self.add_shift(self.staff[0])
+        self.add_shift(None)
+        self.add_shift(None, status='UNCOVERED')
+        daily_metrics.refresh(start_date=self.day, end_date=self.day)
+
+        row = self.row()
+        self.assertEqual((row.total_shifts, row.filled_shifts, row.unfilled_shifts), (3, 1, 2))
+
+    def test_shift_save_refreshes_old_and_new_day(self):
+        """Moving a shift to another unit and day updates both rows"""
+        with self.captureOnCommitCallbacks(execute=True):
+            shift = self.add_shift(self.staff[0])
+        self.assertEqual(self.row().total_shifts, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            shift.unit = self.cherry
+            shift.date = self.day + timedelta(days=1)
+            shift.save()
+
+        self.assertIsNone(self.row())
+        self.assertEqual(self.row(unit=self.cherry, day=self.day + timedelta(days=1)).total_shifts, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            shift.status = 'UNCOVERED'
+            shift.save(update_fields=['status'])
+        moved = self.row(unit=self.cherry, day=self.day + timedelta(days=1))
+        self.assertEqual((moved.filled_shifts, moved.unfilled_shifts), (0, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            shift.delete()
+        self.assertFalse(DailyUnitMetrics.objects.exists())
+
+    def test_previous_slot_comes_from_load_snapshot(self):
+        """The pre_save receiver reads the post_init snapshot, not the database"""
+        shift = self.add_shift(self.staff[0])
+        loaded = Shift.objects.get(pk=shift.pk)
+        loaded.date = self.day + timedelta(days=1)
+        with self.assertNumQueries(0):
+            signals.remember_shift_slot(Shift, loaded)
+        self.assertEqual(loaded._daily_metrics_slot, (self.bramley.pk, self.day))
+
+        # A deferred field has no snapshot, so the row is re-read
+        partial = Shift.objects.only('id', 'status').get(pk=shift.pk)
+        with self.assertNumQueries(1):
+            signals.remember_shift_slot(Shift, partial)
+        self.assertEqual(partial._daily_metrics_slot, (self.bramley.pk, self.day))
+
+    def test_leave_changes_refresh_covered_days(self):
+        """Approval adds leave days; cancelling or deleting removes them"""
+        with self.captureOnCommitCallbacks(execute=True):
+            leave = self.add_leave(self.staff[0], self.day, self.day + timedelta(days=2), status='PENDING')
+        self.assertFalse(DailyUnitMetrics.objects.exists())
+
+        # A pending request has no days to refresh, so its user is not looked up
+        pending = LeaveRequest.objects.get(pk=leave.pk)
+        with self.assertNumQueries(0):
+            signals.refresh_daily_metrics_on_leave_change(LeaveRequest, pending, created=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            leave.status = 'APPROVED'
+            leave.save()
+        self.assertEqual(
+            list(DailyUnitMetrics.objects.values_list('date', 'leave_days')),
+            [(self.day + timedelta(days=n), 1) for n in range(3)]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            leave.start_date = self.day + timedelta(days=2)
+            leave.save()
+        self.assertEqual(list(DailyUnitMetrics.objects.values_list('date', flat=True)), [self.day + timedelta(days=2)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            leave.delete()
+        self.assertFalse(DailyUnitMetrics.objects.exists())
+
+    def test_bulk_writes_and_reconcile(self):
+        """bulk_create is caught by invalidate_unit_shifts; reconcile catches queryset updates"""
+        with self.captureOnCommitCallbacks(execute=True):
+            Shift.objects.bulk_create([
+                Shift(user=user, unit=self.bramley, shift_type=self.day_shift, date=self.day)
+                for user in self.staff
+            ])
+            CacheService.invalidate_unit_shifts([self.bramley.pk], dates=[self.day])
+        self.assertEqual(self.row().total_shifts, 3)
+
+        # Deletes refresh on commit; queryset update() bypasses every signal
+        with self.captureOnCommitCallbacks(execute=True):
+            Shift.objects.filter(user=self.staff[0]).delete()
+        self.assertEqual(self.row().total_shifts, 2)
+        Shift.objects.filter(user=self.staff[1]).update(status='UNCOVERED')
+        self.assertEqual(self.row().unfilled_shifts, 0)
+
+        result = daily_metrics.reconcile(days=7, today=self.day)
+        self.assertEqual(result['start_date'], self.day - timedelta(days=7))
+        row = self.row()
+        self.assertEqual((row.total_shifts, row.filled_shifts, row.unfilled_shifts), (2, 1, 1))
+
+    def test_dashboard_queries(self):
+        """Totals per range, per home and per zero-filled day"""
+        self.add_shift(self.staff[0])
+        self.add_shift(self.staff[1], unit=self.cherry, shift_classification='AGENCY')
+        self.add_shift(self.staff[2], day=self.day + timedelta(days=2))
+        daily_metrics.refresh()
+
+        week = daily_metrics.totals(care_home=self.care_home, start_date=self.day, end_date=self.day + timedelta(days=6))
+        self.assertEqual(week['total_shifts'], 3)
+        self.assertEqual(week['scheduled_hours'], 36.0)
+        self.assertEqual(week['agency_cost'], 300.0)
+
+        by_home = daily_metrics.totals(start_date=self.day, end_date=self.day, group_by='care_home')
+        self.assertEqual(by_home[self.care_home.pk]['total_shifts'], 2)
+
+        series = daily_metrics.daily_series(unit=self.bramley, start_date=self.day, end_date=self.day + timedelta(days=2))
+        self.assertEqual([day['total_shifts'] for day in series.values()], [1, 0, 1])
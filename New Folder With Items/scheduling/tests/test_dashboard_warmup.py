@@ -0,0 +1,199 @@
+"""
+Dashboard Warm-up Planner Tests
+
+Tests:
+1. @warmable caches results and records the first request of the day
+2. Specs requested on enough days are planned and warmed ahead of demand
+3. Coverage report counts warm first requests and the time they saved
+4. Invalidating any home drops cached all-homes dashboards
+5. The cached senior dashboard context holds only plain values
+6. Resident changes in any home drop every cached senior dashboard
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from scheduling import dashboard_warmup, reference_data
+from scheduling.cache_service import CacheService
+from scheduling.dashboard_warmup import warmable
+from scheduling.models_multi_home import CareHome
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+calls = []
+
+
+@warmable('test_occupancy')
+def occupancy_summary(care_home=None, start_date=None):
+    calls.append((care_home, start_date))
+    return {'home': care_home.name if care_home else 'all', 'start': start_date}
+
+
+def at(day, hour, minute=0):
+    """Pin the planner's clock to a day and time"""
+    moment = datetime(day.year, day.month, day.day, hour, minute)
+    return patch.multiple(
+        dashboard_warmup.timezone,
+        localdate=lambda *args: moment.date(),
+        localtime=lambda *args: moment,
+    )
+
+
+@override_settings(CACHES=LOCMEM)
+@patch('scheduling.dashboard_warmup.WARMABLE_MODULES', ())
+class DashboardWarmupTests(TestCase):
+    """Test demand recording, planning and warming of dashboards"""
+
+    def setUp(self):
+        cache.clear()
+        reference_data.reset()
+        dashboard_warmup._indexed.clear()
+        calls.clear()
+        self.care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        self.today = date(2026, 3, 16)
+
+    def tearDown(self):
+        reference_data.reset()
+
+    def request_daily(self, days, hour=8):
+        """One manager request per day for the past `days` days"""
+        for n in range(days, 0, -1):
+            day = self.today - timedelta(days=n)
+            with at(day, hour):
+                occupancy_summary(self.care_home, start_date=day)
+
+    def test_results_cached_and_demand_recorded(self):
+        """The second call is a cache hit; the day's first request was cold"""
+        with at(self.today, 8, 5):
+            first = occupancy_summary(self.care_home, start_date=self.today)
+            second = occupancy_summary(care_home=self.care_home, start_date=self.today)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+
+        index = cache.get(dashboard_warmup.INDEX_KEY)
+        digest, meta = next(iter(index.items()))
+        self.assertEqual(meta['home_id'], self.care_home.pk)
+        self.assertEqual(meta['spec']['start_date'], {'days': 0})
+        self.assertEqual(cache.get(f'warmup:first:{digest}:{self.today}'), (8 * 60 + 5, False))
+        self.assertEqual(cache.get(f'warmup:n:{digest}:{self.today}'), 2)
+
+    def test_planned_specs_warmed_before_demand(self):
+        """A dashboard opened around 08:00 daily is computed at 07:45 today"""
+        self.request_daily(4)
+
+        with at(self.today, 7, 45):
+            targets = dashboard_warmup.plan()
+            self.assertEqual(len(targets), 1)
+            self.assertEqual(targets[0].first_minute, 8 * 60)
+            self.assertEqual(targets[0].days_requested, 4)
+
+            due = dashboard_warmup.due_targets()
+            self.assertEqual(due, targets)
+            report = dashboard_warmup.warm(due)
+
+        self.assertEqual(report['warmed'], 1)
+        self.assertEqual(calls[-1][1], self.today)
+
+        calls.clear()
+        with at(self.today, 8, 1):
+            result = occupancy_summary(self.care_home, start_date=self.today)
+            self.assertEqual(dashboard_warmup.due_targets(), [])
+
+        self.assertEqual(calls, [])
+        self.assertEqual(result['start'], self.today)
+
+    def test_coverage_report(self):
+        """Warm first requests are counted with their compute cost"""
+        self.request_daily(3)
+        with at(self.today, 7, 45):
+            dashboard_warmup.warm()
+        with at(self.today, 8):
+            occupancy_summary(self.care_home, start_date=self.today)
+            report = dashboard_warmup.coverage_report()
+
+        self.assertEqual(report['first_requests'], 4)
+        self.assertEqual(report['warm'], 1)
+        self.assertEqual(report['coverage'], 0.25)
+        self.assertGreaterEqual(report['dashboards']['test_occupancy']['seconds_saved'], 0.0)
+
+    def test_home_invalidation_drops_all_homes_dashboard(self):
+        """All-homes views are stamped with every home's generation"""
+        with at(self.today, 9):
+            occupancy_summary(start_date=self.today)
+            CacheService.bump_generation(f'home:{self.care_home.pk}')
+            occupancy_summary(start_date=self.today)
+
+        self.assertEqual(len(calls), 2)
+
+    def test_senior_dashboard_context_holds_plain_values(self):
+        """The cached Head of Service context carries no model rows"""
+        from django.db import models
+        from scheduling.models import LeaveRequest, Unit, User
+        from scheduling.views_senior_dashboard import build_senior_dashboard_context
+
+        unit = Unit.objects.create(name='OG_BRAMLEY', care_home=self.care_home)
+        staff = User.objects.create_user(
+            sap='100001', password='testpass123', first_name='Test', last_name='User',
+            email='test@example.com', unit=unit
+        )
+        LeaveRequest.objects.create(
+            user=staff, leave_type='ANNUAL', start_date=self.today, end_date=self.today,
+            days_requested=1, status='MANUAL_REVIEW'
+        )
+
+        with at(self.today, 9):
+            context = build_senior_dashboard_context(self.today, self.today, self.today)
+
+        def values(value):
+            yield value
+            items = value.values() if isinstance(value, dict) else value if isinstance(value, (list, tuple)) else ()
+            for item in items:
+                yield from values(item)
+
+        self.assertEqual(sum(len(ids) for ids in context['pending_by_home'].values()), 1)
+        self.assertNotIn('current_time', context)
+        self.assertEqual(
+            [value for value in values(context) if isinstance(value, (models.Model, models.QuerySet))], []
+        )
+
+    def test_senior_dashboard_dropped_by_any_home_resident_change(self):
+        """A home-filtered context still lists every home, so any home's change drops it"""
+        from scheduling.models import Resident, Unit
+        from scheduling.views_senior_dashboard import build_senior_dashboard_context
+
+        CareHome.objects.create(
+            name='VICTORIA_GARDENS',
+            bed_capacity=20,
+            current_occupancy=15,
+            location_address='1 Garden Road',
+            postcode='EH2 2BB'
+        )
+        unit = Unit.objects.create(name='OG_BRAMLEY', care_home=self.care_home)
+
+        def orchard_residents():
+            with at(self.today, 9):
+                context = build_senior_dashboard_context(
+                    self.today, self.today, self.today, 'VICTORIA_GARDENS'
+                )
+            return {row['home']: row['total_residents'] for row in context['care_plan_compliance']}[
+                self.care_home.get_name_display()
+            ]
+
+        self.assertEqual(orchard_residents(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Resident.objects.create(
+                resident_id='R001', first_name='Resident', last_name='One',
+                date_of_birth=date(1940, 1, 1), unit=unit, room_number='1',
+                admission_date=self.today
+            )
+        self.assertEqual(orchard_residents(), 1)
@@ -0,0 +1,113 @@
+"""
+Generate Future Shifts Command Tests
+
+Tests:
+1. The command copies the 3-week pattern into the new window
+2. Re-running over a filled window adds nothing
+3. A partially filled window only gains its missing rows, even if another
+   run writes some of them after the pre-check
+"""
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from unittest.mock import patch
+from datetime import time, timedelta
+from io import StringIO
+
+from scheduling import reference_data
+from scheduling.management.commands.generate_future_shifts import Command
+from scheduling.models import User, Unit, ShiftType, Shift, Role
+from scheduling.models_multi_home import CareHome
+
+
+class GenerateFutureShiftsTests(TestCase):
+    """Test the rolling rota generator's insert and re-run behaviour"""
+
+    def setUp(self):
+        reference_data.reset()
+        care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        self.unit = Unit.objects.create(name='OG_BRAMLEY', care_home=care_home)
+        self.day_shift = ShiftType.objects.create(
+            name='DAY_SENIOR',
+            start_time=time(8, 0),
+            end_time=time(20, 0),
+            duration_hours=12.0
+        )
+        self.staff = User.objects.create_user(
+            sap='100001',
+            password='testpass123',
+            first_name='Test',
+            last_name='User',
+            email='test@example.com',
+            role=Role.objects.create(name='CARE_ASSISTANT'),
+            unit=self.unit
+        )
+
+        # One shift a day for the last three weeks: the pattern to copy
+        self.today = timezone.now().date()
+        self.pattern_start = self.today - timedelta(days=20)
+        for n in range(21):
+            self.add_shift(self.pattern_start + timedelta(days=n))
+        self.window = (self.today + timedelta(days=1), self.today + timedelta(days=7))
+
+    def tearDown(self):
+        reference_data.reset()
+
+    def add_shift(self, day):
+        return Shift.objects.create(user=self.staff, unit=self.unit, shift_type=self.day_shift, date=day)
+
+    def window_shifts(self):
+        return Shift.objects.filter(date__gte=self.window[0], date__lte=self.window[1])
+
+    def write_window(self):
+        """Run the command's insert step over the test window"""
+        command = Command(stdout=StringIO())
+        pattern_by_day = {
+            n: [{'user_id': self.staff.pk, 'unit_id': self.unit.pk, 'shift_type_id': self.day_shift.pk}]
+            for n in range(21)
+        }
+        return command._write_window(
+            pattern_by_day, self.pattern_start, 21, self.window[0], self.window[1], 1000, False
+        )
+
+    def test_command_fills_window(self):
+        """A week ahead is generated from the last three weeks"""
+        out = StringIO()
+        call_command('generate_future_shifts', weeks=1, stdout=out)
+
+        self.assertEqual(
+            sorted(self.window_shifts().values_list('date', flat=True)),
+            [self.window[0] + timedelta(days=n) for n in range(7)]
+        )
+        self.assertIn('Created: 7 new shifts', out.getvalue())
+
+    def test_rerun_adds_nothing(self):
+        """Writing the same window twice skips every row the second time"""
+        self.assertEqual(self.write_window(), (7, {'attempted': 7, 'skipped': 0}))
+        self.assertEqual(self.write_window(), (0, {'attempted': 0, 'skipped': 7}))
+        self.assertEqual(self.window_shifts().count(), 7)
+
+    def test_partial_overlap_fills_gaps(self):
+        """Existing rows are skipped; a row written after the pre-check doesn't abort the run"""
+        self.add_shift(self.window[0])
+        self.add_shift(self.window[0] + timedelta(days=1))
+        generate = Command._generate_shifts
+
+        def concurrent_write(command, *args):
+            # Another run inserts the third day between pre-check and insert
+            self.add_shift(self.window[0] + timedelta(days=2))
+            return generate(command, *args)
+
+        with patch.object(Command, '_generate_shifts', autospec=True, side_effect=concurrent_write):
+            created_count, stats = self.write_window()
+
+        self.assertEqual(stats, {'attempted': 5, 'skipped': 2})
+        self.assertEqual(created_count, 5)
+        self.assertEqual(self.window_shifts().count(), 7)
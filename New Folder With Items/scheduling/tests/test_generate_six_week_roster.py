@@ -0,0 +1,127 @@
+"""
+Generate Six-Week Roster Command Tests
+
+Tests:
+1. A dry run plans shifts but writes nothing
+2. A real run replaces the window with exactly the planned rows and
+   invalidates every unit whose shifts it cleared
+"""
+
+from django.core.management import call_command
+from django.test import TestCase
+from unittest.mock import patch
+from datetime import date, time, timedelta
+from io import StringIO
+
+from scheduling import reference_data
+from scheduling.cache_service import CacheService
+from scheduling.management.commands.generate_six_week_roster import Command
+from scheduling.models import User, Unit, ShiftType, Shift, Role
+from scheduling.models_multi_home import CareHome
+
+
+class GenerateSixWeekRosterTests(TestCase):
+    """Test how the six-week roster is written"""
+
+    def setUp(self):
+        reference_data.reset()
+        care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        other_home = CareHome.objects.create(
+            name='RIVERSIDE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='1 River Road',
+            postcode='EH2 2BB'
+        )
+        self.admin_unit = Unit.objects.create(name='ADMIN', care_home=care_home)
+        self.unit = Unit.objects.create(name='BLUE', care_home=care_home)
+        self.shift_types = {
+            name: ShiftType.objects.create(
+                name=name, start_time=start, end_time=end, duration_hours=hours
+            )
+            for name, start, end, hours in [
+                ('DAY_SENIOR', time(8, 0), time(20, 0), 12.0),
+                ('DAY_ASSISTANT', time(8, 0), time(20, 0), 12.0),
+                ('NIGHT_SENIOR', time(20, 0), time(8, 0), 12.0),
+                ('NIGHT_ASSISTANT', time(20, 0), time(8, 0), 12.0),
+                ('ADMIN', time(9, 0), time(17, 0), 8.0),
+            ]
+        }
+        roles = {name: Role.objects.create(name=name) for name in ('SCW', 'SCA')}
+        self.staff = [
+            User.objects.create_user(
+                sap=f'10{i:04d}',
+                password='testpass123',
+                first_name=f'Test{i}',
+                last_name='User',
+                email=f'test{i}@example.com',
+                role=roles[role],
+                unit=self.unit,
+                team=team,
+                shift_preference=preference
+            )
+            for i, (role, team, preference) in enumerate([
+                ('SCW', 'A', 'DAY_SENIOR'),
+                ('SCW', 'B', 'NIGHT_SENIOR'),
+                ('SCA', 'A', 'DAY_ASSISTANT'),
+                ('SCA', 'B', 'NIGHT_ASSISTANT'),
+            ])
+        ]
+
+        self.start_date = date(2026, 3, 2)  # a Monday
+        self.end_date = self.start_date + timedelta(weeks=6)
+        # Existing rows: one in the window in another home, one just after it
+        self.other_unit = Unit.objects.create(name='RS_ROSE', care_home=other_home)
+        self.in_window = Shift.objects.create(
+            user=self.staff[0], unit=self.other_unit,
+            shift_type=self.shift_types['DAY_SENIOR'], date=self.start_date
+        )
+        self.after_window = Shift.objects.create(
+            user=self.staff[0], unit=self.unit,
+            shift_type=self.shift_types['DAY_SENIOR'], date=self.end_date
+        )
+
+    def tearDown(self):
+        reference_data.reset()
+
+    def run_command(self, **options):
+        command = Command(stdout=StringIO(), stderr=StringIO())
+        call_command(command, start_date=self.start_date.isoformat(), **options)
+        return command
+
+    def shift_rows(self, queryset):
+        return sorted(queryset.values_list('user_id', 'unit_id', 'shift_type_id', 'date'))
+
+    def test_dry_run_writes_nothing(self):
+        """The plan is built in memory and the table is left as it was"""
+        before = self.shift_rows(Shift.objects.all())
+        command = self.run_command(dry_run=True)
+
+        self.assertTrue(command._plan)
+        self.assertEqual(self.shift_rows(Shift.objects.all()), before)
+
+    def test_run_replaces_window_with_plan(self):
+        """Every shift in the window is the plan's; rows outside it survive"""
+        with patch.object(CacheService, 'invalidate_unit_shifts') as invalidate:
+            command = self.run_command(batch_size=7)
+
+        planned = sorted(
+            (shift.user_id, shift.unit_id, shift.shift_type_id, shift.date) for shift in command._plan
+        )
+        self.assertTrue(planned)
+        self.assertEqual(
+            self.shift_rows(Shift.objects.filter(date__gte=self.start_date, date__lt=self.end_date)),
+            planned
+        )
+        self.assertFalse(Shift.objects.filter(pk=self.in_window.pk).exists())
+        self.assertTrue(Shift.objects.filter(pk=self.after_window.pk).exists())
+
+        # The other home lost its shift, so its caches are invalidated too
+        invalidated_units = invalidate.call_args[0][0]
+        self.assertIn(self.other_unit.pk, invalidated_units)
@@ -0,0 +1,221 @@
+"""
+KPI Batch Engine Tests
+
+Tests:
+1. compute_kpis() derives every KPI for every home from one query per source
+2. Single-KPI calculators match the batch results and scope to a unit
+3. calculate_all_kpis() records the whole pack, with targets, in a fixed number of queries
+"""
+
+from django.test import TestCase
+from django.utils import timezone
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from scheduling import kpi_tracking, reference_data
+from scheduling.models import (
+    User, Unit, ShiftType, Shift, LeaveRequest, Role, Resident,
+    TrainingCourse, TrainingRecord, KPIDefinition, KPITarget, KPIMeasurement
+)
+from scheduling.models_multi_home import CareHome
+
+
+class KPIBatchEngineTests(TestCase):
+    """Test shared-aggregate KPI computation"""
+
+    def setUp(self):
+        reference_data.reset()
+        self.homes = [
+            CareHome.objects.create(
+                name=name,
+                bed_capacity=capacity,
+                current_occupancy=0,
+                location_address='123 Test Street',
+                postcode='EH1 1AA',
+                care_inspectorate_id=inspectorate_id
+            )
+            for name, capacity, inspectorate_id in (
+                ('ORCHARD_GROVE', 4, 'CS2026000001'),
+                ('VICTORIA_GARDENS', 10, 'CS2026000002'),
+            )
+        ]
+        self.units = [
+            Unit.objects.create(name='OG_BRAMLEY', care_home=self.homes[0]),
+            Unit.objects.create(name='OG_CHERRY', care_home=self.homes[0]),
+            Unit.objects.create(name='VG_ROSE', care_home=self.homes[1]),
+        ]
+        self.shift_type = ShiftType.objects.create(
+            name='DAY_SENIOR',
+            start_time=time(8, 0),
+            end_time=time(20, 0),
+            duration_hours=12.0
+        )
+        role = Role.objects.create(name='CARE_ASSISTANT')
+        self.staff = [
+            User.objects.create_user(
+                sap=f'10{i:04d}',
+                password='testpass123',
+                first_name=f'Test{i}',
+                last_name='User',
+                email=f'test{i}@example.com',
+                role=role,
+                unit=unit
+            )
+            for i, unit in enumerate(self.units)
+        ]
+        self.end = date(2026, 3, 31)
+        self.start = self.end - timedelta(days=30)
+
+        # Orchard Grove: 4 shifts, 1 agency and 1 overtime, 1 uncovered
+        for n, (unit, classification, status) in enumerate([
+            (self.units[0], 'REGULAR', 'CONFIRMED'),
+            (self.units[0], 'AGENCY', 'SCHEDULED'),
+            (self.units[1], 'OVERTIME', 'SCHEDULED'),
+            (self.units[1], 'REGULAR', 'UNCOVERED'),
+        ]):
+            self.add_shift(unit, self.end - timedelta(days=n), classification, status)
+        # Victoria Gardens: 2 regular shifts
+        for n in range(2):
+            self.add_shift(self.units[2], self.end - timedelta(days=n))
+
+        for n, unit in enumerate([self.units[0], self.units[0], self.units[2]]):
+            Resident.objects.create(
+                resident_id=f'R{n:03d}',
+                first_name='Resident',
+                last_name=str(n),
+                date_of_birth=date(1940, 1, 1),
+                unit=unit,
+                room_number=str(n),
+                admission_date=self.start
+            )
+
+        course = TrainingCourse.objects.create(
+            name='Moving and Handling', category='MANDATORY', frequency='ANNUAL',
+            validity_months=12, is_mandatory=True
+        )
+        TrainingRecord.objects.create(
+            staff_member=self.staff[0], course=course,
+            completion_date=date(2025, 6, 1), expiry_date=date(2026, 6, 1)
+        )
+        TrainingRecord.objects.create(
+            staff_member=self.staff[1], course=course,
+            completion_date=date(2025, 1, 1), expiry_date=date(2026, 1, 1)
+        )
+
+        leave = LeaveRequest.objects.create(
+            user=self.staff[0], leave_type='ANNUAL', start_date=self.end, end_date=self.end,
+            days_requested=1, status='APPROVED'
+        )
+        submitted = timezone.make_aware(datetime(2026, 3, 10, 9, 0))
+        LeaveRequest.objects.filter(pk=leave.pk).update(
+            created_at=submitted, approval_date=submitted + timedelta(hours=6)
+        )
+
+    def tearDown(self):
+        reference_data.reset()
+
+    def add_shift(self, unit, day, classification='REGULAR', status='SCHEDULED'):
+        return Shift.objects.create(
+            user=self.staff[self.units.index(unit)], unit=unit, shift_type=self.shift_type,
+            date=day, shift_classification=classification, status=status
+        )
+
+    def test_all_homes_from_one_query_per_source(self):
+        """Shift KPIs for both homes share one query; every KPI costs five"""
+        reference_data.snapshot()
+        periods = [(self.start, self.end)]
+
+        with self.assertNumQueries(1):
+            shifts = kpi_tracking.compute_kpis(
+                ['agency usage', 'overtime percentage', 'fill rate', 'shift fill time'],
+                periods=periods
+            )
+        orchard = shifts[(self.homes[0].pk, None, self.start, self.end)]
+        self.assertEqual(orchard['agency usage'], (25.0, {'agency_shifts': 1, 'total_shifts': 4}))
+        self.assertEqual(orchard['overtime percentage'][0], 25.0)
+        self.assertEqual(orchard['fill rate'][0], 75.0)
+        self.assertEqual(orchard['shift fill time'][1]['shifts_analyzed'], 4)
+        self.assertEqual(shifts[(self.homes[1].pk, None, self.start, self.end)]['agency usage'][0], 0)
+
+        # Shifts, staff, residents, training and leave; capacity is in the registry
+        with self.assertNumQueries(5):
+            results = kpi_tracking.compute_kpis(periods=periods)
+        orchard = results[(self.homes[0].pk, None, self.start, self.end)]
+        self.assertEqual(orchard['occupancy rate'], (50.0, {'occupied_beds': 2, 'total_capacity': 4}))
+        self.assertEqual(orchard['compliance rate'], (50.0, {'compliant_staff': 1, 'total_staff': 2}))
+        self.assertEqual(orchard['leave approval time'], (6.0, {'requests_decided': 1, 'average_hours': 6.0}))
+        self.assertEqual(orchard['staff turnover rate'][0], 0)
+
+    def test_single_calculators_match_batch(self):
+        """The per-KPI functions are one-scope views of the batch"""
+        scopes = [(self.homes[0], None), (None, None), (self.homes[0], self.units[1])]
+        batch = kpi_tracking.compute_kpis(scopes=scopes, periods=[(self.start, self.end)])
+        calculators = {
+            'staff turnover rate': kpi_tracking.calculate_staff_turnover_rate,
+            'occupancy rate': kpi_tracking.calculate_occupancy_rate,
+            'agency usage': kpi_tracking.calculate_agency_usage_percentage,
+            'compliance rate': kpi_tracking.calculate_compliance_rate,
+            'shift fill time': kpi_tracking.calculate_average_shift_fill_time,
+            'fill rate': kpi_tracking.calculate_shift_fill_rate,
+            'overtime percentage': kpi_tracking.calculate_overtime_percentage,
+            'leave approval time': kpi_tracking.calculate_leave_approval_time,
+        }
+        self.assertEqual(set(calculators), set(kpi_tracking.BATCH_KPIS))
+        for home, unit in scopes:
+            scope = batch[(home and home.pk, unit and unit.pk, self.start, self.end)]
+            for key, calculate in calculators.items():
+                with self.subTest(home=home, unit=unit, kpi=key):
+                    self.assertEqual(calculate(home, unit, self.start, self.end), scope[key])
+
+        system = batch[(None, None, self.start, self.end)]
+        self.assertEqual(system['agency usage'][1], {'agency_shifts': 1, 'total_shifts': 6})
+        self.assertEqual(system['occupancy rate'][1]['total_capacity'], 14)
+
+        # Units have no bed capacity of their own: a unit is measured against its home's
+        bramley = kpi_tracking.compute_kpis(
+            ['occupancy rate'], scopes=[(self.homes[0], self.units[0]), (None, self.units[0])],
+            periods=[(self.start, self.end)]
+        )
+        for home in (self.homes[0].pk, None):
+            self.assertEqual(
+                bramley[(home, self.units[0].pk, self.start, self.end)]['occupancy rate'],
+                (50.0, {'occupied_beds': 2, 'total_capacity': 4})
+            )
+
+        cherry = batch[(self.homes[0].pk, self.units[1].pk, self.start, self.end)]
+        self.assertEqual(cherry['occupancy rate'], (0.0, {'occupied_beds': 0, 'total_capacity': 4}))
+        self.assertEqual(cherry['overtime percentage'], (50.0, {'overtime_shifts': 1, 'total_shifts': 2}))
+        self.assertEqual(
+            kpi_tracking.calculate_overtime_percentage(self.homes[0], self.units[1], self.start, self.end),
+            cherry['overtime percentage']
+        )
+
+    def test_monthly_pack_in_fixed_queries(self):
+        """Recording every KPI for every home is a constant number of queries"""
+        for home in self.homes:
+            for name in ('Agency Usage', 'Overtime Percentage', 'Occupancy Rate', 'Compliance Rate'):
+                KPIDefinition.objects.create(
+                    name=name, description=name, category='STAFFING',
+                    calculation_type='PERCENTAGE', formula_description=name,
+                    higher_is_better=name in ('Occupancy Rate', 'Compliance Rate'),
+                    care_home=home
+                )
+        agency = KPIDefinition.objects.get(name='Agency Usage', care_home=self.homes[0])
+        KPITarget.objects.create(kpi=agency, year=2026, target_value=Decimal('10.00'))
+        KPITarget.objects.create(kpi=agency, year=2026, month=3, target_value=Decimal('30.00'))
+        reference_data.snapshot()
+
+        # Definitions, three sources, targets, existing measurements, and
+        # one insert inside a savepoint
+        with self.assertNumQueries(9):
+            measurements = kpi_tracking.calculate_all_kpis(measurement_date=self.end)
+        self.assertEqual(len(measurements), 8)
+
+        recorded = KPIMeasurement.objects.get(kpi=agency)
+        self.assertEqual(recorded.measured_value, Decimal('25.00'))
+        self.assertEqual(recorded.target_value, Decimal('30.00'))
+        self.assertEqual(recorded.status, 'EXCELLENT')
+
+        # Re-running updates the same rows
+        kpi_tracking.calculate_all_kpis(measurement_date=self.end)
+        self.assertEqual(KPIMeasurement.objects.count(), 8)
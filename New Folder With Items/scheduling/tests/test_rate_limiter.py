@@ -0,0 +1,100 @@
+"""
+API Rate Limiter Tests
+
+Tests:
+1. Requests over a window's limit are rejected without consuming quota
+2. Counters reset when the window rolls over
+3. Concurrent requests never over-admit a client
+4. The middleware answers 429 with Retry-After and sets limit headers
+"""
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory
+from types import SimpleNamespace
+from unittest.mock import patch
+import threading
+
+from scheduling.api_auth import APIRateLimitMiddleware
+from scheduling.rate_limiter import LocalRateLimiter
+
+
+LIMITS = [('MINUTE', 3), ('HOUR', 100), ('DAY', 1000)]
+
+# 00:00:10 on some UTC day
+NOW = 1735948810.0
+
+
+class LocalRateLimiterTests(SimpleTestCase):
+    """Test the in-process fixed-window limiter"""
+
+    def setUp(self):
+        self.limiter = LocalRateLimiter()
+
+    @patch('scheduling.rate_limiter.time.time', return_value=NOW)
+    def test_rejects_over_limit_without_consuming(self, _):
+        """The fourth request in a minute is blocked by the minute window"""
+        decisions = [self.limiter.hit('1:staff', LIMITS) for _ in range(4)]
+
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+        blocked = decisions[-1].blocked
+        self.assertEqual(blocked.window, 'MINUTE')
+        self.assertEqual(blocked.reset_in_seconds, 50)
+        self.assertEqual(decisions[-1].windows[1].count, 3)
+
+    def test_window_rollover(self):
+        """A new minute starts a new count; the hour keeps counting"""
+        with patch('scheduling.rate_limiter.time.time', return_value=NOW):
+            for _ in range(3):
+                self.limiter.hit('1:staff', LIMITS)
+
+        with patch('scheduling.rate_limiter.time.time', return_value=NOW + 60):
+            decision = self.limiter.hit('1:staff', LIMITS)
+
+        self.assertTrue(decision.allowed)
+        self.assertEqual([w.count for w in decision.windows], [1, 4, 4])
+
+    def test_concurrent_hits_never_over_admit(self):
+        """Fifty threads racing for a limit of 20 admit exactly 20"""
+        limits = [('MINUTE', 20), ('HOUR', 100), ('DAY', 1000)]
+        allowed = []
+
+        def hit():
+            allowed.append(self.limiter.hit('1:staff', limits).allowed)
+
+        threads = [threading.Thread(target=hit) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(allowed.count(True), 20)
+
+
+class RateLimitMiddlewareTests(SimpleTestCase):
+    """Test APIRateLimitMiddleware responses and headers"""
+
+    def setUp(self):
+        self.client_obj = SimpleNamespace(
+            pk=7, rate_limit_per_minute=1, rate_limit_per_hour=100, rate_limit_per_day=1000
+        )
+        self.middleware = APIRateLimitMiddleware(lambda request: HttpResponse('ok'))
+
+    def request(self):
+        request = RequestFactory().get('/api/v1/integration/staff/')
+        request.api_client = self.client_obj
+        return request
+
+    @patch('scheduling.rate_limiter.time.time', return_value=NOW)
+    def test_headers_and_429(self, _):
+        """A blocked request gets 429 and Retry-After; both carry limit headers"""
+        with patch('scheduling.api_auth.get_rate_limiter', return_value=LocalRateLimiter()):
+            first = self.middleware(self.request())
+            second = self.middleware(self.request())
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['X-RateLimit-Limit'], '1')
+        self.assertEqual(first['X-RateLimit-Remaining'], '0')
+        self.assertEqual(first['X-RateLimit-Reset'], str(int(NOW) + 50))
+
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(second['Retry-After'], '50')
@@ -0,0 +1,89 @@
+"""
+Reference Data Registry Tests
+
+Tests:
+1. Repeated lookups are served from memory without queries
+2. Saving a reference row reloads the registry
+3. A generation bump from another process triggers a reload
+4. Rows missing from the snapshot fall through to the database
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from datetime import time
+from unittest.mock import patch
+
+from scheduling import reference_data
+from scheduling.cache_service import CacheService
+from scheduling.models import Unit, ShiftType
+from scheduling.models_multi_home import CareHome
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class ReferenceDataRegistryTests(TestCase):
+    """Test the in-process reference data snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        reference_data.reset()
+        self.care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        self.unit = Unit.objects.create(name='OG_BRAMLEY', care_home=self.care_home)
+        ShiftType.objects.create(
+            name='DAY_SENIOR',
+            start_time=time(8, 0),
+            end_time=time(20, 0),
+            duration_hours=12.0
+        )
+
+    def tearDown(self):
+        reference_data.reset()
+
+    def test_lookups_served_from_memory(self):
+        """After one load, home/unit/shift type lookups issue no queries"""
+        reference_data.snapshot()
+
+        with self.assertNumQueries(0):
+            home = reference_data.get_care_home(name='ORCHARD_GROVE')
+            units = reference_data.units_for_home(home.pk)
+            self.assertEqual(units[0].care_home.name, 'ORCHARD_GROVE')
+            self.assertEqual(reference_data.get_shift_type(name='DAY_SENIOR').duration_hours, 12.0)
+            self.assertEqual(reference_data.home_id_for_unit(self.unit.pk), home.pk)
+
+    def test_save_reloads_registry(self):
+        """A new unit is visible straight after it is saved"""
+        self.assertEqual(len(reference_data.units_for_home(self.care_home.pk)), 1)
+
+        Unit.objects.create(name='OG_CHERRY', care_home=self.care_home)
+
+        self.assertEqual(
+            [unit.name for unit in reference_data.units_for_home(self.care_home.pk)],
+            ['OG_BRAMLEY', 'OG_CHERRY']
+        )
+
+    @patch('scheduling.reference_data.REFERENCE_DATA_CHECK_INTERVAL', 0)
+    def test_generation_bump_triggers_reload(self):
+        """Another process bumping the stamp makes this one reload"""
+        loaded = reference_data.snapshot()
+        self.assertIs(reference_data.snapshot(), loaded)
+
+        CacheService.bump_generation(reference_data.NAMESPACE)
+
+        self.assertIsNot(reference_data.snapshot(), loaded)
+
+    def test_miss_falls_through_to_database(self):
+        """Unknown names still raise DoesNotExist; unseen rows are found"""
+        reference_data.snapshot()
+        Unit.objects.filter(pk=self.unit.pk).update(name='OG_GRAPE')
+
+        self.assertEqual(reference_data.get_unit(name='OG_GRAPE').pk, self.unit.pk)
+        with self.assertRaises(Unit.DoesNotExist):
+            reference_data.get_unit(name='OG_PLUM')
@@ -18,17 +18,25 @@ Scottish Design:
 - User-Centered: Verify OM/SM workflows
 """
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from datetime import datetime, timedelta, date, time
 from decimal import Decimal
 import numpy as np
+import zlib
 
 from scheduling.shift_optimizer import (
     ShiftOptimizer, 
     ShiftOptimizationResult,
+    HorizonShiftOptimizer,
+    OptimizerContext,
+    optimize_rolling_horizon,
+    optimize_homes_parallel,
+    repair_after_call_off,
     optimize_shifts_for_forecast
 )
+from scheduling.optimization_cache import cached_result, compute_input_fingerprint
 from scheduling.models import (
     User, Role, Shift, Unit, ShiftType, StaffingForecast, LeaveRequest
 )
@@ -133,6 +141,42 @@ class ShiftOptimizerSetupTests(TestCase):
         
         # Should count 12h shift (DAY_SENIOR)
         self.assertEqual(weekly_hours, 12.0)
+        
+    def test_context_preloads_in_constant_queries(self):
+        """OptimizerContext loads the whole pool in 2 queries"""
+        staff = [self.staff]
+        for i in range(1, 10):
+            staff.append(User.objects.create_user(
+                sap=str(i).zfill(6),
+                password='testpass123',
+                email=f'pool{i}@test.com',
+                first_name=f'Pool{i}',
+                last_name='Test',
+                role=self.sscw_role
+            ))
+        Shift.objects.create(
+            date=date(2024, 12, 31),  # Tuesday (yesterday)
+            user=staff[1],
+            unit=self.unit,
+            shift_type=self.shift_type,
+            status='SCHEDULED'
+        )
+        LeaveRequest.objects.create(
+            user=staff[2],
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 1, 2),
+            days_requested=2,
+            leave_type='ANNUAL',
+            status='APPROVED'
+        )
+        
+        with self.assertNumQueries(2):
+            context = OptimizerContext(staff, date(2025, 1, 1))
+        
+        self.assertEqual(context.get_weekly_hours(staff[1].sap), 12.0)
+        self.assertEqual(context.yesterday_shift_types[staff[1].sap], 'DAY_SENIOR')
+        self.assertTrue(context.is_unavailable(staff[2].sap))
+        self.assertFalse(context.is_unavailable(staff[3].sap))
 
 
 class ConstraintGenerationTests(TestCase):
@@ -293,6 +337,32 @@ class ConstraintGenerationTests(TestCase):
         self.assertFalse(result.success)
         self.assertIn('Infeasible', result.status)
         
+    def test_sparse_variables_pruned(self):
+        """Role mismatches get no variables and are reported in presolve metrics"""
+        forecast_demand = {
+            ('UNIT1', 'DAY_SENIOR'): {'min': 1, 'max': 2},
+            ('UNIT1', 'DAY_ASSISTANT'): {'min': 1, 'max': 2},
+        }
+        
+        optimizer = ShiftOptimizer(
+            care_home=self.care_home,
+            optimization_date=date(2025, 1, 1),
+            forecast_demand=forecast_demand,
+            available_staff=[self.sscw1, self.sscw2, self.sca1],
+            existing_shifts=[]
+        )
+        
+        result = optimizer.optimize()
+        
+        # 3 staff × 2 units × 2 compatible shift types
+        self.assertEqual(len(optimizer.variables), 12)
+        self.assertNotIn(('000003', 'UNIT1', 'DAY_SENIOR'), optimizer.variables)
+        
+        presolve = result.metrics['presolve']
+        self.assertEqual(presolve['candidate_variables'], 30)
+        self.assertEqual(presolve['pruned_by_reason']['skill'], 18)
+        self.assertEqual(presolve['variables'], 12)
+        
     def test_wtd_compliance_constraints(self):
         """Staff at 48h/week should not be assigned"""
         # Create 4×12h shifts this week (48 hours)
@@ -423,6 +493,30 @@ class OptimizationResultTests(TestCase):
             # Note: Optimizer may still choose staff0 if all else equal,
             # but cost should reflect overtime multiplier
             
+    def test_solver_limits_recorded(self):
+        """Time limit / gap are passed to CBC and reported in metrics"""
+        forecast_demand = {
+            ('TEST_UNIT', 'DAY_SENIOR'): {'min': 2, 'max': 4},
+        }
+        
+        optimizer = ShiftOptimizer(
+            care_home=self.care_home,
+            optimization_date=date(2025, 1, 1),
+            forecast_demand=forecast_demand,
+            available_staff=self.staff,
+            existing_shifts=[],
+            time_limit=10,
+            gap_rel=0.05
+        )
+        
+        result = optimizer.optimize()
+        
+        self.assertTrue(result.success)
+        self.assertIn(result.status, ('Optimal', 'Feasible'))
+        self.assertEqual(result.metrics['solver']['time_limit'], 10)
+        self.assertEqual(result.metrics['solver']['gap_rel'], 0.05)
+        self.assertGreaterEqual(result.metrics['solver']['solve_seconds'], 0)
+        
     def test_infeasible_scenario(self):
         """Insufficient staff produces infeasible result"""
         forecast_demand = {
@@ -668,6 +762,76 @@ class IntegrationWithForecastsTests(TestCase):
         self.assertGreaterEqual(num_assignments, 5)
         self.assertLessEqual(num_assignments, 10)
         
+    def test_parallel_driver_records_jobs(self):
+        """optimize_homes_parallel returns one record per home/day job"""
+        for staff in self.staff:
+            staff.unit = self.unit
+            staff.save()
+        
+        records = optimize_homes_parallel(
+            date(2025, 1, 1),
+            days_ahead=2,
+            care_homes=[self.care_home],
+            max_workers=1,
+            time_limit=10
+        )
+        
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['date'], date(2025, 1, 1))
+        self.assertEqual(records[0]['status'], 'Optimal')
+        self.assertEqual(records[1]['status'], 'No forecasts')
+        for record in records:
+            self.assertIsNone(record['error'])
+            self.assertGreaterEqual(record['wall_seconds'], 0)
+        
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_result_cache_keyed_on_inputs(self):
+        """Cached results are reused until an input row changes"""
+        for staff in self.staff:
+            staff.unit = self.unit
+            staff.save()
+        
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            return optimize_shifts_for_forecast(self.care_home, date(2025, 1, 1))
+        
+        day = date(2025, 1, 1)
+        first = cached_result('optimization', self.care_home, day, day, compute)
+        second = cached_result('optimization', self.care_home, day, day, compute)
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first[0].status, second[0].status)
+        self.assertEqual(len(first[0].assignments), len(second[0].assignments))
+        
+        # Staff are stored by SAP and re-fetched; no password hash is cached
+        self.assertTrue(second[0].assignments)
+        for assignment in second[0].assignments:
+            self.assertIsInstance(assignment['staff_obj'], User)
+            self.assertEqual(assignment['staff_obj'].sap, assignment['staff_sap'])
+        blob = cache.get(f"optcache:optimization:{compute_input_fingerprint(self.care_home, day, day)}")
+        self.assertNotIn(self.staff[0].password.encode(), zlib.decompress(blob))
+        
+        # A new shift changes the fingerprint
+        Shift.objects.create(
+            date=day,
+            user=self.staff[0],
+            unit=self.unit,
+            shift_type=self.day_senior,
+            status='SCHEDULED'
+        )
+        cached_result('optimization', self.care_home, day, day, compute)
+        self.assertEqual(len(calls), 2)
+        
+        # So does retiring a shift type or closing a unit
+        ShiftType.objects.filter(pk=self.day_senior.pk).update(is_active=False)
+        cached_result('optimization', self.care_home, day, day, compute)
+        self.assertEqual(len(calls), 3)
+        Unit.objects.filter(pk=self.unit.pk).update(is_active=False)
+        cached_result('optimization', self.care_home, day, day, compute)
+        self.assertEqual(len(calls), 4)
+        
     def test_optimize_shifts_for_forecast_helper(self):
         """Test convenience function optimize_shifts_for_forecast"""
         # Note: This requires real forecast data in database
@@ -677,6 +841,228 @@ class IntegrationWithForecastsTests(TestCase):
         self.assertTrue(callable(optimize_shifts_for_forecast))
 
 
+class HorizonOptimizationTests(TestCase):
+    """Test multi-day horizon models (WTD and rest across days)"""
+    
+    def setUp(self):
+        """Create a small home with day and night demand"""
+        self.care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        
+        self.unit = Unit.objects.create(name='TEST_UNIT', care_home=self.care_home)
+        
+        self.day_senior = ShiftType.objects.create(
+            name='DAY_SENIOR',
+            duration_hours=12.0,
+            start_time=time(8, 0),
+            end_time=time(20, 0)
+        )
+        self.night_senior = ShiftType.objects.create(
+            name='NIGHT_SENIOR',
+            duration_hours=12.0,
+            start_time=time(20, 0),
+            end_time=time(8, 0)
+        )
+        
+        self.sscw_role = Role.objects.create(name='SSCW')
+        
+        self.staff = []
+        for i in range(6):
+            staff = User.objects.create_user(
+                sap=str(i).zfill(6),
+                password='testpass123',
+                email=f'sscw{i}@test.com',
+                first_name=f'Staff{i}',
+                last_name='Test',
+                role=self.sscw_role
+            )
+            self.staff.append(staff)
+        
+        self.start = date(2025, 1, 6)  # Monday
+        self.demand_by_date = {
+            self.start + timedelta(days=i): {
+                'TEST_UNIT': {'DAY_SENIOR': (2, 2), 'NIGHT_SENIOR': (1, 1)}
+            }
+            for i in range(7)
+        }
+        
+    def test_week_solved_as_one_model(self):
+        """A week of demand is met within WTD and rest rules"""
+        optimizer = HorizonShiftOptimizer(
+            care_home=self.care_home,
+            start_date=self.start,
+            days=7,
+            demand_by_date=self.demand_by_date,
+            available_staff=self.staff,
+            existing_shifts=[]
+        )
+        
+        result = optimizer.optimize()
+        
+        self.assertTrue(result.success)
+        self.assertEqual(len({a['date'] for a in result.assignments}), 7)
+        
+        hours = {}
+        worked = {}
+        for a in result.assignments:
+            hours[a['staff_sap']] = hours.get(a['staff_sap'], 0) + a['hours']
+            worked[(a['staff_sap'], a['date'])] = a['shift_type']
+        
+        # WTD: ≤48h per week for every staff member
+        self.assertLessEqual(max(hours.values()), 48)
+        
+        # Rest: no day shift straight after a night shift
+        for (sap, day), shift_type in worked.items():
+            if 'NIGHT' in shift_type:
+                next_shift = worked.get((sap, day + timedelta(days=1)), '')
+                self.assertFalse(next_shift.startswith('DAY'))
+        
+    def test_rest_boundary_from_existing_night(self):
+        """Night shift before the horizon blocks a day shift on day one"""
+        night = Shift.objects.create(
+            date=self.start - timedelta(days=1),
+            user=self.staff[0],
+            unit=self.unit,
+            shift_type=self.night_senior,
+            shift_pattern='NIGHT_2000_0800',
+            status='CONFIRMED'
+        )
+        
+        optimizer = HorizonShiftOptimizer(
+            care_home=self.care_home,
+            start_date=self.start,
+            days=7,
+            demand_by_date=self.demand_by_date,
+            available_staff=self.staff,
+            existing_shifts=[night]
+        )
+        
+        result = optimizer.optimize()
+        
+        self.assertTrue(result.success)
+        for a in result.assignments:
+            if a['staff_sap'] == self.staff[0].sap and a['date'] == self.start:
+                self.assertFalse(a['shift_type'].startswith('DAY'))
+        
+    def test_rolling_horizon_commits_steps(self):
+        """Rolling windows return one committed result per step"""
+        for i in range(14):
+            StaffingForecast.objects.create(
+                care_home=self.care_home,
+                unit=self.unit,
+                forecast_date=self.start + timedelta(days=i),
+                predicted_shifts=1.5,
+                confidence_lower=1.0,
+                confidence_upper=2.0,
+                mae=0.5,
+                mape=10.0
+            )
+        for staff in self.staff:
+            staff.unit = self.unit
+            staff.save()
+        
+        results = optimize_rolling_horizon(
+            self.care_home,
+            self.start,
+            total_days=14,
+            window_days=14,
+            step_days=7
+        )
+        
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertTrue(result.success)
+            self.assertEqual(result.metrics['horizon_days'], 7)
+
+
+class RepairOptimizationTests(TestCase):
+    """Test incremental repair after a call-off"""
+    
+    def setUp(self):
+        """Create a rota for one day with a spare staff member"""
+        self.care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA'
+        )
+        
+        self.unit = Unit.objects.create(name='TEST_UNIT', care_home=self.care_home)
+        
+        self.day_senior = ShiftType.objects.create(
+            name='DAY_SENIOR',
+            duration_hours=12.0,
+            start_time=time(8, 0),
+            end_time=time(20, 0)
+        )
+        
+        self.sscw_role = Role.objects.create(name='SSCW')
+        
+        self.staff = []
+        for i in range(3):
+            staff = User.objects.create_user(
+                sap=str(i).zfill(6),
+                password='testpass123',
+                email=f'sscw{i}@test.com',
+                first_name=f'Staff{i}',
+                last_name='Test',
+                role=self.sscw_role,
+                unit=self.unit
+            )
+            self.staff.append(staff)
+        
+        self.date = date(2025, 1, 6)
+        self.shifts = [
+            Shift.objects.create(
+                date=self.date,
+                user=staff,
+                unit=self.unit,
+                shift_type=self.day_senior,
+                status='SCHEDULED'
+            )
+            for staff in self.staff[:2]
+        ]
+        
+    def test_call_off_covered_by_free_staff(self):
+        """Vacated slot is filled and the other assignment is untouched"""
+        vacated = self.shifts[0]
+        vacated.status = 'UNCOVERED'
+        vacated.save()
+        
+        optimizer = repair_after_call_off([vacated])
+        result = optimizer.result
+        
+        self.assertTrue(result.success)
+        self.assertTrue(result.metrics['all_covered'])
+        self.assertEqual(len(result.assignments), 1)
+        self.assertEqual(result.assignments[0]['action'], 'assign')
+        self.assertEqual(result.assignments[0]['staff_sap'], self.staff[2].sap)
+        
+        shifts = optimizer.create_shifts()
+        self.assertEqual(shifts[0].user, self.staff[2])
+        self.assertTrue(Shift.objects.filter(pk=self.shifts[1].pk, status='SCHEDULED').exists())
+        
+    def test_uncovered_reported_without_candidates(self):
+        """No feasible cover is reported as uncovered, not infeasible"""
+        self.staff[2].is_active = False
+        self.staff[2].save()
+        vacated = self.shifts[0]
+        vacated.status = 'UNCOVERED'
+        vacated.save()
+        
+        result = repair_after_call_off([vacated]).result
+        
+        self.assertTrue(result.success)
+        self.assertEqual(result.assignments, [])
+        self.assertEqual(result.metrics['uncovered'], {'TEST_UNIT/DAY_SENIOR': 1})
+
+
 class EdgeCaseTests(TestCase):
     """Test edge cases and error handling"""
     
@@ -0,0 +1,142 @@
+"""
+Trend Analysis Collector Tests
+
+Tests:
+1. Several shift metrics come from one grouped query, gap-filled daily
+2. Running totals include rows from before the window
+3. group_by returns one series per unit
+4. NumPy statistics match the pure-Python reference implementations
+"""
+
+from django.test import SimpleTestCase, TestCase
+from datetime import date, time, timedelta
+
+from scheduling import reference_data
+from scheduling.performance_benchmarks import build_synthetic_series, compare_trend_statistics
+from scheduling.models import User, Unit, ShiftType, Shift, Resident, Role
+from scheduling.models_multi_home import CareHome
+from scheduling.trend_analysis import collect_time_series, collect_metric_time_series
+
+
+class CollectTimeSeriesTests(TestCase):
+    """Test the grouped time series collector"""
+
+    def setUp(self):
+        reference_data.reset()
+        self.care_home = CareHome.objects.create(
+            name='ORCHARD_GROVE',
+            bed_capacity=40,
+            current_occupancy=35,
+            location_address='123 Test Street',
+            postcode='EH1 1AA',
+            care_inspectorate_id='CS2026000001'
+        )
+        self.bramley = Unit.objects.create(name='OG_BRAMLEY', care_home=self.care_home)
+        self.cherry = Unit.objects.create(name='OG_CHERRY', care_home=self.care_home)
+        self.shift_type = ShiftType.objects.create(
+            name='DAY_SENIOR',
+            start_time=time(8, 0),
+            end_time=time(20, 0),
+            duration_hours=12.0
+        )
+        role = Role.objects.create(name='CARE_ASSISTANT')
+        self.user, self.other_user = [
+            User.objects.create_user(
+                sap=sap,
+                password='testpass123',
+                first_name='Test',
+                last_name='User',
+                email=f'test{sap}@example.com',
+                role=role,
+                unit=self.bramley
+            )
+            for sap in ('100001', '100002')
+        ]
+        self.start = date(2026, 3, 2)
+
+    def tearDown(self):
+        reference_data.reset()
+
+    def add_shift(self, day, unit=None, classification='REGULAR', user=None):
+        return Shift.objects.create(
+            user=user or self.user,
+            unit=unit or self.bramley,
+            shift_type=self.shift_type,
+            date=day,
+            shift_classification=classification
+        )
+
+    def add_resident(self, number, admitted, unit=None):
+        return Resident.objects.create(
+            resident_id=f'R{number:03d}',
+            first_name='Resident',
+            last_name=str(number),
+            date_of_birth=date(1940, 1, 1),
+            unit=unit or self.bramley,
+            room_number=str(number),
+            admission_date=admitted
+        )
+
+    def test_shift_metrics_in_one_query(self):
+        """Volume, overtime and agency share for three days in one query"""
+        self.add_shift(self.start)
+        self.add_shift(self.start, classification='AGENCY', user=self.other_user)
+        self.add_shift(self.start + timedelta(days=2), classification='OVERTIME')
+
+        with self.assertNumQueries(1):
+            series = collect_time_series(
+                ['SHIFT_VOLUME', 'OVERTIME', 'AGENCY_USAGE'],
+                care_home=self.care_home,
+                start_date=self.start,
+                end_date=self.start + timedelta(days=2)
+            )
+
+        self.assertEqual(list(series['SHIFT_VOLUME'].values()), [2.0, 0.0, 1.0])
+        self.assertEqual(list(series['OVERTIME'].values()), [0.0, 0.0, 1.0])
+        self.assertEqual(series['AGENCY_USAGE']['2026-03-02'], 50.0)
+
+    def test_running_totals_include_earlier_rows(self):
+        """Occupancy counts residents admitted before the window"""
+        self.add_resident(1, self.start - timedelta(days=30))
+        self.add_resident(2, self.start + timedelta(days=1))
+
+        series = collect_metric_time_series(
+            'OCCUPANCY', care_home=self.care_home,
+            start_date='2026-03-02', end_date='2026-03-03'
+        )
+
+        self.assertEqual(series, {'2026-03-02': 2.5, '2026-03-03': 5.0})
+
+    def test_group_by_unit(self):
+        """Each unit gets its own dense series"""
+        self.add_shift(self.start, unit=self.bramley)
+        self.add_shift(self.start + timedelta(days=1), unit=self.cherry)
+
+        series = collect_time_series(
+            ['SHIFT_VOLUME'],
+            start_date=self.start,
+            end_date=self.start + timedelta(days=1),
+            group_by='unit'
+        )['SHIFT_VOLUME']
+
+        self.assertEqual(list(series[self.bramley.pk].values()), [1.0, 0.0])
+        self.assertEqual(list(series[self.cherry.pk].values()), [0.0, 1.0])
+
+
+class TrendStatisticsTests(SimpleTestCase):
+    """Test the vectorized statistics against the reference loops"""
+
+    def test_matches_reference(self):
+        """Every statistic agrees with the reference on short and long series"""
+        for days in (3, 29, 90, 1095):
+            with self.subTest(days=days):
+                self.assertEqual(compare_trend_statistics(build_synthetic_series(days)), [])
+
+    def test_matches_reference_on_flat_series(self):
+        """Zero and constant series (no variance, zero means) also agree"""
+        for value in (0.0, 5.0):
+            series = {
+                (date(2026, 1, 1) + timedelta(days=n)).isoformat(): value for n in range(60)
+            }
+            with self.subTest(value=value):
+                self.assertEqual(compare_trend_statistics(series), [])
@@ -3,10 +3,13 @@ TASK 30: TREND ANALYSIS ENGINE
 Time series decomposition, seasonality detection, anomaly detection, and forecasting
 """
 
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Sum, Avg, Q, F, Case, When, Value, DateField
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import statistics
 import json
 
@@ -15,98 +18,169 @@ import json
 # TIME SERIES DATA COLLECTION
 # ============================================================================
 
-def collect_metric_time_series(metric_type, care_home=None, unit=None, start_date=None, end_date=None):
+# Metrics collected from each source table; metrics sharing a table share
+# one grouped query. Other metric types collect as all-zero series.
+SERIES_SOURCES = {
+    'shifts': ['SHIFT_VOLUME', 'OVERTIME', 'AGENCY_USAGE'],
+    'leave': ['LEAVE_REQUESTS'],
+    'incidents': ['INCIDENTS'],
+    'staff': ['STAFF_COUNT'],
+    'residents': ['OCCUPANCY'],
+}
+
+
+def _as_date(value):
+    """Accept dates or 'YYYY-MM-DD' strings (as posted by the trend form)"""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    return value
+
+
+def _source_query(source):
     """
-    Collect time series data for a specific metric
+    Queryset, day expression, unit/home lookups, cumulative flag and
+    aggregates for one source table
+    """
+    from .models import User, Shift, Resident, LeaveRequest, IncidentReport
     
-    Returns: dict with {date: value} mappings
+    if source == 'shifts':
+        return Shift.objects.all(), F('date'), 'unit', 'unit__care_home', False, {
+            'total': Count('id'),
+            'overtime': Count('id', filter=Q(shift_classification='OVERTIME')),
+            'agency': Count('id', filter=Q(shift_classification='AGENCY')),
+        }
+    if source == 'leave':
+        return (LeaveRequest.objects.all(), F('start_date'), 'user__unit', 'user__unit__care_home',
+                False, {'total': Count('id')})
+    if source == 'incidents':
+        # Incidents are attributed to the reporter's unit
+        return (IncidentReport.objects.all(), F('incident_date'), 'reported_by__unit',
+                'reported_by__unit__care_home', False, {'total': Count('id')})
+    if source == 'staff':
+        return (User.objects.filter(is_active=True), TruncDate('created_at'), 'unit',
+                'unit__care_home', True, {'total': Count('id')})
+    # Residents currently active, counted from their admission date
+    return (Resident.objects.filter(is_active=True), F('admission_date'), 'unit',
+            'unit__care_home', True, {'total': Count('id')})
+
+
+def _bed_capacity(care_home=None, unit=None, group_by=None, group=None):
+    """Beds behind an occupancy figure (a unit's series uses its home's beds)"""
+    from . import reference_data
+    
+    if group_by == 'care_home' and group is not None:
+        care_home = reference_data.get_care_home(pk=group)
+    elif group_by == 'unit' and group is not None:
+        unit = reference_data.get_unit(pk=group)
+    if unit is not None:
+        care_home = unit.care_home
+    
+    homes = [care_home] if care_home else reference_data.care_homes()
+    return sum(home.bed_capacity or 0 for home in homes) or 1
+
+
+def _metric_value(metric_type, row, capacity):
+    total = row.get('total', 0)
+    if metric_type == 'AGENCY_USAGE':
+        return (row.get('agency', 0) / total * 100) if total > 0 else 0
+    if metric_type == 'OVERTIME':
+        return row.get('overtime', 0)
+    if metric_type == 'OCCUPANCY':
+        return total / capacity * 100
+    return total
+
+
+def collect_time_series(metric_types, care_home=None, unit=None, start_date=None, end_date=None,
+                        group_by=None):
     """
-    from .models import User, Shift, Resident, LeaveRequest, Incident, TrainingRecord
+    Collect daily time series for several metrics
+    
+    Each source table is read with one GROUP BY day query (plus unit or
+    home with group_by); days without rows are filled in. Running totals
+    (STAFF_COUNT, OCCUPANCY) fold everything before start_date into the
+    first day within the same query.
     
+    Args:
+        metric_types: Metric names, e.g. ['SHIFT_VOLUME', 'AGENCY_USAGE']
+        group_by: None, 'unit' or 'care_home' for one series per group
+    
+    Returns: dict with {metric_type: {date: value}}, or with group_by
+        {metric_type: {group_id: {date: value}}}
+    """
+    start_date = _as_date(start_date)
+    end_date = _as_date(end_date)
     if not start_date or not end_date:
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=90)
     
-    time_series = {}
-    current = start_date
-    
-    while current <= end_date:
-        if metric_type == 'STAFF_COUNT':
-            qs = User.objects.filter(is_active=True, created_at__lte=current)
-            if care_home:
-                qs = qs.filter(care_home=care_home)
-            if unit:
-                qs = qs.filter(unit=unit)
-            value = qs.count()
-        
-        elif metric_type == 'SHIFT_VOLUME':
-            qs = Shift.objects.filter(date=current)
-            if care_home:
-                qs = qs.filter(care_home=care_home)
-            if unit:
-                qs = qs.filter(unit=unit)
-            value = qs.count()
-        
-        elif metric_type == 'OCCUPANCY':
-            from .models import Unit as UnitModel
-            units_qs = UnitModel.objects.all()
-            if care_home:
-                units_qs = units_qs.filter(care_home=care_home)
-            if unit:
-                units_qs = units_qs.filter(id=unit.id)
-            
-            capacity = units_qs.aggregate(total=Sum('capacity'))['total'] or 1
-            occupied = Resident.objects.filter(
-                Q(care_home=care_home) if care_home else Q(),
-                Q(unit=unit) if unit else Q(),
-                is_active=True,
-                admission_date__lte=current
-            ).count()
-            
-            value = (occupied / capacity * 100) if capacity > 0 else 0
-        
-        elif metric_type == 'AGENCY_USAGE':
-            qs = Shift.objects.filter(date=current)
-            if care_home:
-                qs = qs.filter(care_home=care_home)
-            if unit:
-                qs = qs.filter(unit=unit)
-            
-            total = qs.count()
-            agency = qs.filter(is_agency=True).count()
-            value = (agency / total * 100) if total > 0 else 0
-        
-        elif metric_type == 'OVERTIME':
-            qs = Shift.objects.filter(date=current, shift_classification='OVERTIME')
-            if care_home:
-                qs = qs.filter(care_home=care_home)
-            if unit:
-                qs = qs.filter(unit=unit)
-            value = qs.count()
-        
-        elif metric_type == 'LEAVE_REQUESTS':
-            qs = LeaveRequest.objects.filter(start_date=current)
-            if care_home:
-                qs = qs.filter(staff__care_home=care_home)
-            if unit:
-                qs = qs.filter(staff__unit=unit)
-            value = qs.count()
+    days = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+    labels = [day.strftime('%Y-%m-%d') for day in days]
+    
+    result = {metric_type: {} for metric_type in metric_types}
+    for metric_type in metric_types:
+        if not any(metric_type in metrics for metrics in SERIES_SOURCES.values()) and not group_by:
+            result[metric_type] = {label: 0.0 for label in labels}
+    
+    for source, metrics in SERIES_SOURCES.items():
+        wanted = [metric_type for metric_type in metric_types if metric_type in metrics]
+        if not wanted:
+            continue
         
-        elif metric_type == 'INCIDENTS':
-            qs = Incident.objects.filter(incident_date=current)
-            if care_home:
-                qs = qs.filter(care_home=care_home)
-            if unit:
-                qs = qs.filter(unit=unit)
-            value = qs.count()
+        qs, day_expr, unit_path, home_path, cumulative, aggregates = _source_query(source)
+        if care_home:
+            qs = qs.filter(**{home_path: care_home})
+        if unit:
+            qs = qs.filter(**{unit_path: unit})
         
+        qs = qs.annotate(series_day=day_expr).filter(series_day__lte=end_date)
+        if cumulative:
+            qs = qs.annotate(series_bucket=Case(
+                When(series_day__lt=start_date, then=Value(start_date)),
+                default=F('series_day'),
+                output_field=DateField(),
+            ))
         else:
-            value = 0
+            qs = qs.filter(series_day__gte=start_date).annotate(series_bucket=F('series_day'))
+        
+        group_field = {'unit': unit_path, 'care_home': home_path}.get(group_by)
+        fields = ['series_bucket'] + ([group_field] if group_field else [])
+        rows_by_group = {}
+        for row in qs.values(*fields).annotate(**aggregates).order_by():
+            group = row[group_field] if group_field else None
+            rows_by_group.setdefault(group, {})[row['series_bucket']] = row
+        if not group_field:
+            rows_by_group.setdefault(None, {})
         
-        time_series[current.strftime('%Y-%m-%d')] = float(value)
-        current += timedelta(days=1)
+        for group, rows in rows_by_group.items():
+            capacity = _bed_capacity(care_home, unit, group_by, group) if 'OCCUPANCY' in wanted else 1
+            running = {name: 0 for name in aggregates}
+            series = {metric_type: {} for metric_type in wanted}
+            
+            for day, label in zip(days, labels):
+                row = rows.get(day, {})
+                if cumulative:
+                    for name in aggregates:
+                        running[name] += row.get(name, 0)
+                    row = running
+                for metric_type in wanted:
+                    series[metric_type][label] = float(_metric_value(metric_type, row, capacity))
+            
+            for metric_type in wanted:
+                if group_field:
+                    result[metric_type][group] = series[metric_type]
+                else:
+                    result[metric_type] = series[metric_type]
+    
+    return result
+
+
+def collect_metric_time_series(metric_type, care_home=None, unit=None, start_date=None, end_date=None):
+    """
+    Collect time series data for a specific metric
     
-    return time_series
+    Returns: dict with {date: value} mappings
+    """
+    return collect_time_series([metric_type], care_home, unit, start_date, end_date)[metric_type]
 
 
 # ============================================================================
@@ -141,26 +215,28 @@ def calculate_linear_regression(x_values, y_values):
     if len(x_values) != len(y_values) or len(x_values) < 2:
         return 0, 0, 0
     
-    n = len(x_values)
+    x = np.asarray(x_values, dtype=float)
+    y = np.asarray(y_values, dtype=float)
     
     # Calculate means
-    mean_x = statistics.mean(x_values)
-    mean_y = statistics.mean(y_values)
+    mean_x = x.mean()
+    mean_y = y.mean()
     
     # Calculate slope
-    numerator = sum((x - mean_x) * (y - mean_y) for x, y in zip(x_values, y_values))
-    denominator = sum((x - mean_x) ** 2 for x in x_values)
+    dx = x - mean_x
+    numerator = np.dot(dx, y - mean_y)
+    denominator = np.dot(dx, dx)
     
     slope = numerator / denominator if denominator != 0 else 0
     intercept = mean_y - (slope * mean_x)
     
     # Calculate R-squared
-    ss_tot = sum((y - mean_y) ** 2 for y in y_values)
-    ss_res = sum((y - (slope * x + intercept)) ** 2 for x, y in zip(x_values, y_values))
+    ss_tot = np.sum((y - mean_y) ** 2)
+    ss_res = np.sum((y - (slope * x + intercept)) ** 2)
     
     r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
     
-    return slope, intercept, r_squared
+    return float(slope), float(intercept), float(r_squared)
 
 
 def determine_trend_direction(slope, r_squared_threshold=0.5):
@@ -181,25 +257,56 @@ def determine_trend_direction(slope, r_squared_threshold=0.5):
 # TIME SERIES DECOMPOSITION
 # ============================================================================
 
+def _as_array(values):
+    return np.asarray(values, dtype=float)
+
+
+def _weekdays(dates):
+    """Weekday (Monday = 0) of each 'YYYY-MM-DD' string"""
+    days = np.array(dates, dtype='datetime64[D]').astype(np.int64)
+    # 1970-01-01 was a Thursday
+    return (days + 3) % 7
+
+
+def _days_of_month(dates):
+    """Day of month (1-31) of each 'YYYY-MM-DD' string"""
+    days = np.array(dates, dtype='datetime64[D]')
+    return (days - days.astype('datetime64[M]')).astype(np.int64) + 1
+
+
+def _group_means(groups, values, size):
+    """Mean of values per group index (NaN for empty groups)"""
+    counts = np.bincount(groups, minlength=size)
+    sums = np.bincount(groups, weights=values, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts, counts
+
+
+def _pattern_strength(pattern_values):
+    """Coefficient of variation (%) across the pattern's averages"""
+    mean_val = float(np.mean(pattern_values))
+    std_val = float(np.std(pattern_values, ddof=1)) if len(pattern_values) > 1 else 0
+    return (std_val / mean_val * 100) if mean_val > 0 else 0
+
+
 def moving_average(values, window=7):
     """
     Calculate moving average (trend component)
+    
+    Centred over window // 2 points either side; the ends keep their raw
+    values.
     """
     if len(values) < window:
         return values
     
-    ma = []
-    for i in range(len(values)):
-        if i < window // 2:
-            ma.append(values[i])
-        elif i >= len(values) - window // 2:
-            ma.append(values[i])
-        else:
-            start = i - window // 2
-            end = i + window // 2 + 1
-            ma.append(statistics.mean(values[start:end]))
+    half = window // 2
+    span = 2 * half + 1
+    ma = _as_array(values)
+    if len(ma) < span:
+        return ma.tolist()
     
-    return ma
+    ma[half:len(ma) - half] = np.convolve(ma, np.full(span, 1.0 / span), mode='valid')
+    return ma.tolist()
 
 
 def decompose_time_series(time_series_data):
@@ -212,40 +319,32 @@ def decompose_time_series(time_series_data):
         return {}
     
     dates = sorted(time_series_data.keys())
-    values = [time_series_data[d] for d in dates]
+    values = _as_array([time_series_data[d] for d in dates])
     
     # Calculate trend (moving average)
-    trend = moving_average(values, window=7)
+    trend = _as_array(moving_average(values.tolist(), window=7))
     
     # Calculate detrended values
-    detrended = [v - t for v, t in zip(values, trend)]
+    detrended = values - trend
     
     # Extract seasonal component (simple approach - average by day of week)
-    from datetime import datetime
-    seasonal_by_dow = {i: [] for i in range(7)}
-    
-    for date_str, detrended_val in zip(dates, detrended):
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        dow = date_obj.weekday()
-        seasonal_by_dow[dow].append(detrended_val)
+    dow = _weekdays(dates)
+    means, counts = _group_means(dow, detrended, 7)
+    means[counts == 0] = 0
     
     # Average seasonal component per day of week
-    seasonal_pattern = {dow: statistics.mean(vals) if vals else 0 for dow, vals in seasonal_by_dow.items()}
+    seasonal_pattern = {day: float(means[day]) for day in range(7)}
     
     # Apply seasonal pattern to full series
-    seasonal = []
-    for date_str in dates:
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        dow = date_obj.weekday()
-        seasonal.append(seasonal_pattern[dow])
+    seasonal = means[dow]
     
     # Calculate residual
-    residual = [v - t - s for v, t, s in zip(values, trend, seasonal)]
+    residual = values - trend - seasonal
     
     return {
-        'trend': trend,
-        'seasonal': seasonal,
-        'residual': residual,
+        'trend': trend.tolist(),
+        'seasonal': seasonal.tolist(),
+        'residual': residual.tolist(),
         'seasonal_pattern': seasonal_pattern,
     }
 
@@ -260,47 +359,25 @@ def detect_weekly_seasonality(time_series_data):
     
     Returns: (pattern_data, strength, is_significant)
     """
-    from datetime import datetime
-    
-    # Group by day of week
-    by_dow = {i: [] for i in range(7)}
+    dates = list(time_series_data.keys())
+    values = _as_array(list(time_series_data.values()))
     
-    for date_str, value in time_series_data.items():
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        dow = date_obj.weekday()
-        by_dow[dow].append(value)
+    # Average by day of week
+    means, counts = _group_means(_weekdays(dates), values, 7)
+    means[counts == 0] = 0
     
-    # Calculate averages
-    pattern = {}
     day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    
-    for dow in range(7):
-        if by_dow[dow]:
-            pattern[day_names[dow]] = statistics.mean(by_dow[dow])
-        else:
-            pattern[day_names[dow]] = 0
+    pattern = {day_names[dow]: float(means[dow]) for dow in range(7)}
     
     # Calculate strength (coefficient of variation)
-    pattern_values = list(pattern.values())
-    if pattern_values:
-        mean_val = statistics.mean(pattern_values)
-        std_val = statistics.stdev(pattern_values) if len(pattern_values) > 1 else 0
-        strength = (std_val / mean_val * 100) if mean_val > 0 else 0
-    else:
-        strength = 0
+    strength = _pattern_strength(means)
     
     # Simple significance test (strength > threshold)
     is_significant = strength > 10
     
     # Find peaks and troughs
-    if pattern_values:
-        max_val = max(pattern_values)
-        min_val = min(pattern_values)
-        peaks = [day for day, val in pattern.items() if val == max_val]
-        troughs = [day for day, val in pattern.items() if val == min_val]
-    else:
-        peaks = []
-        troughs = []
+    peaks = [day_names[dow] for dow in np.flatnonzero(means == means.max())]
+    troughs = [day_names[dow] for dow in np.flatnonzero(means == means.min())]
     
     return {
         'pattern': pattern,
@@ -315,23 +392,7 @@ def detect_monthly_seasonality(time_series_data):
     """
     Detect monthly seasonal pattern
     """
-    from datetime import datetime
-    
-    # Group by day of month
-    by_dom = {i: [] for i in range(1, 32)}
-    
-    for date_str, value in time_series_data.items():
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        dom = date_obj.day
-        by_dom[dom].append(value)
-    
-    # Calculate averages
-    pattern = {}
-    for dom in range(1, 32):
-        if by_dom[dom]:
-            pattern[f"Day {dom}"] = statistics.mean(by_dom[dom])
-    
-    if not pattern:
+    if not time_series_data:
         return {
             'pattern': {},
             'strength': 0,
@@ -340,19 +401,23 @@ def detect_monthly_seasonality(time_series_data):
             'troughs': [],
         }
     
+    dates = list(time_series_data.keys())
+    values = _as_array(list(time_series_data.values()))
+    
+    # Average by day of month (only days present in the series)
+    means, counts = _group_means(_days_of_month(dates), values, 32)
+    present = np.flatnonzero(counts)
+    pattern_values = means[present]
+    pattern = {f"Day {dom}": float(mean) for dom, mean in zip(present, pattern_values)}
+    
     # Calculate strength
-    pattern_values = list(pattern.values())
-    mean_val = statistics.mean(pattern_values)
-    std_val = statistics.stdev(pattern_values) if len(pattern_values) > 1 else 0
-    strength = (std_val / mean_val * 100) if mean_val > 0 else 0
+    strength = _pattern_strength(pattern_values)
     
     is_significant = strength > 15
     
     # Find peaks and troughs
-    max_val = max(pattern_values)
-    min_val = min(pattern_values)
-    peaks = [day for day, val in pattern.items() if val == max_val]
-    troughs = [day for day, val in pattern.items() if val == min_val]
+    peaks = [f"Day {dom}" for dom in present[pattern_values == pattern_values.max()]]
+    troughs = [f"Day {dom}" for dom in present[pattern_values == pattern_values.min()]]
     
     return {
         'pattern': pattern,
@@ -373,52 +438,53 @@ def detect_anomalies_zscore(time_series_data, threshold=2.5):
     
     Z-score > threshold = anomaly
     """
-    values = list(time_series_data.values())
     dates = list(time_series_data.keys())
+    values = _as_array(list(time_series_data.values()))
     
     if len(values) < 3:
         return []
     
-    mean = statistics.mean(values)
-    std_dev = statistics.stdev(values)
+    mean = float(values.mean())
+    std_dev = float(values.std(ddof=1))
+    
+    if std_dev <= 0:
+        return []
+    
+    z_scores = (values - mean) / std_dev
     
     anomalies = []
     
-    for date, value in zip(dates, values):
-        if std_dev > 0:
-            z_score = (value - mean) / std_dev
-            
-            if abs(z_score) > threshold:
-                # Determine type
-                if z_score > 0:
-                    anomaly_type = 'SPIKE'
-                else:
-                    anomaly_type = 'DROP'
-                
-                # Determine severity
-                if abs(z_score) > 4:
-                    severity = 'CRITICAL'
-                elif abs(z_score) > 3:
-                    severity = 'HIGH'
-                elif abs(z_score) > 2.5:
-                    severity = 'MEDIUM'
-                else:
-                    severity = 'LOW'
-                
-                deviation = value - mean
-                deviation_pct = (deviation / mean * 100) if mean != 0 else 0
-                
-                anomalies.append({
-                    'date': date,
-                    'type': anomaly_type,
-                    'severity': severity,
-                    'actual_value': value,
-                    'expected_value': mean,
-                    'deviation': deviation,
-                    'deviation_percentage': deviation_pct,
-                    'z_score': z_score,
-                    'confidence': min(abs(z_score) / 4 * 100, 100),
-                })
+    for i in np.flatnonzero(np.abs(z_scores) > threshold):
+        value = float(values[i])
+        z_score = float(z_scores[i])
+        
+        # Determine type
+        anomaly_type = 'SPIKE' if z_score > 0 else 'DROP'
+        
+        # Determine severity
+        if abs(z_score) > 4:
+            severity = 'CRITICAL'
+        elif abs(z_score) > 3:
+            severity = 'HIGH'
+        elif abs(z_score) > 2.5:
+            severity = 'MEDIUM'
+        else:
+            severity = 'LOW'
+        
+        deviation = value - mean
+        deviation_pct = (deviation / mean * 100) if mean != 0 else 0
+        
+        anomalies.append({
+            'date': dates[i],
+            'type': anomaly_type,
+            'severity': severity,
+            'actual_value': value,
+            'expected_value': mean,
+            'deviation': deviation,
+            'deviation_percentage': deviation_pct,
+            'z_score': z_score,
+            'confidence': min(abs(z_score) / 4 * 100, 100),
+        })
     
     return anomalies
 
@@ -426,39 +492,42 @@ def detect_anomalies_zscore(time_series_data, threshold=2.5):
 def detect_trend_shifts(time_series_data, window=14):
     """
     Detect significant trend shifts
+    
+    Compares the mean of the `window` days before each date with the mean
+    of the `window` days from it.
     """
     dates = sorted(time_series_data.keys())
-    values = [time_series_data[d] for d in dates]
+    values = _as_array([time_series_data[d] for d in dates])
     
     if len(values) < window * 2:
         return []
     
+    # means[i] = mean of values[i:i + window]
+    means = sliding_window_view(values, window).mean(axis=1)
+    index = np.arange(window, len(values) - window)
+    mean_before = means[index - window]
+    mean_after = means[index]
+    
+    shift = mean_after - mean_before
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shift_pct = np.where(mean_before != 0, shift / mean_before * 100, 0.0)
+    
     shifts = []
     
-    # Sliding window to detect shifts
-    for i in range(window, len(values) - window):
-        before = values[i-window:i]
-        after = values[i:i+window]
-        
-        mean_before = statistics.mean(before)
-        mean_after = statistics.mean(after)
-        
-        shift = mean_after - mean_before
-        shift_pct = (shift / mean_before * 100) if mean_before != 0 else 0
-        
-        # Significant shift threshold
-        if abs(shift_pct) > 20:
-            shifts.append({
-                'date': dates[i],
-                'type': 'SHIFT',
-                'severity': 'HIGH' if abs(shift_pct) > 50 else 'MEDIUM',
-                'actual_value': mean_after,
-                'expected_value': mean_before,
-                'deviation': shift,
-                'deviation_percentage': shift_pct,
-                'z_score': None,
-                'confidence': min(abs(shift_pct) / 50 * 100, 100),
-            })
+    # Significant shift threshold
+    for n in np.flatnonzero(np.abs(shift_pct) > 20):
+        pct = float(shift_pct[n])
+        shifts.append({
+            'date': dates[index[n]],
+            'type': 'SHIFT',
+            'severity': 'HIGH' if abs(pct) > 50 else 'MEDIUM',
+            'actual_value': float(mean_after[n]),
+            'expected_value': float(mean_before[n]),
+            'deviation': float(shift[n]),
+            'deviation_percentage': pct,
+            'z_score': None,
+            'confidence': min(abs(pct) / 50 * 100, 100),
+        })
     
     return shifts
 
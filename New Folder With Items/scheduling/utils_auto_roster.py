@@ -22,12 +22,66 @@ from decimal import Decimal
 from django.db.models import Count, Q
 from scheduling.models import Shift, User, ShiftType, Unit, Role
 from scheduling.shortage_predictor import ShortagePredictor
+from scheduling.optimization_cache import cached_result
 from typing import Dict, List, Tuple
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class StaffAvailabilityLedger:
+    """
+    Staff × day occupancy matrix for a rota period
+    
+    Loaded once (single Shift query) for the period plus a lookback window,
+    then updated in memory as draft shifts are assigned, so availability and
+    recent-load checks are O(1) lookups and a staff member can't be booked
+    twice in the same run.
+    """
+    
+    def __init__(self, staff: List, start_date, end_date, lookback_days: int = 7):
+        self.origin = start_date - timedelta(days=lookback_days)
+        self.end_date = end_date
+        self.index = {s.sap: i for i, s in enumerate(staff)}
+        
+        days = (end_date - self.origin).days + 1
+        self.occupancy = np.zeros((len(self.index), days), dtype=np.int16)
+        
+        self._load()
+    
+    def _load(self):
+        if not self.index:
+            return
+        
+        existing = Shift.objects.filter(
+            user__in=list(self.index),
+            date__gte=self.origin,
+            date__lte=self.end_date
+        ).values_list('user_id', 'date')
+        
+        for sap, shift_date in existing:
+            self.occupancy[self.index[sap], (shift_date - self.origin).days] += 1
+    
+    def _cell(self, sap, date) -> Tuple[int, int]:
+        return self.index[sap], (date - self.origin).days
+    
+    def is_free(self, sap, date) -> bool:
+        """No existing or drafted shift on this date"""
+        row, col = self._cell(sap, date)
+        return self.occupancy[row, col] == 0
+    
+    def recent_shift_count(self, sap, date, days: int = 7) -> int:
+        """Shifts in the `days` days up to and including this date"""
+        row, col = self._cell(sap, date)
+        return int(self.occupancy[row, max(col - days, 0):col + 1].sum())
+    
+    def book(self, sap, date):
+        """Record a drafted shift"""
+        row, col = self._cell(sap, date)
+        self.occupancy[row, col] += 1
+
+
 class AutoRosterGenerator:
     """
     Generates draft rotas from Prophet forecasting predictions
@@ -48,6 +102,12 @@ class AutoRosterGenerator:
         
         # Get forecaster
         self.predictor = ShortagePredictor()
+        
+        # Period lookups (loaded once by _prepare_lookups)
+        self._ledger = None
+        self._staff_pool = None
+        self._shift_types = None
+        self._roles = None
     
     def generate_draft_rota(self):
         """
@@ -60,6 +120,7 @@ class AutoRosterGenerator:
         
         # Get units to schedule
         units = self._get_units()
+        self._prepare_lookups(units)
         
         # Generate shifts for each unit/day
         draft_shifts = []
@@ -212,19 +273,10 @@ class AutoRosterGenerator:
         """
         shifts = []
         
-        # Get shift types
-        shift_types = {
-            'Early': ShiftType.objects.filter(name__icontains='Early').first(),
-            'Late': ShiftType.objects.filter(name__icontains='Late').first(),
-            'Night': ShiftType.objects.filter(name__icontains='Night').first(),
-        }
-        
-        # Get roles
-        roles = {
-            'SSW': Role.objects.filter(name='SSW').first(),
-            'SCW': Role.objects.filter(name='SCW').first(),
-            'SCA': Role.objects.filter(name='SCA').first(),
-        }
+        if self._shift_types is None:
+            self._prepare_lookups(self._get_units())
+        shift_types = self._shift_types
+        roles = self._roles
         
         # Create day shifts
         for i in range(forecast.get('day_ssw', 1)):
@@ -272,47 +324,61 @@ class AutoRosterGenerator:
         
         return shifts
     
+    def _prepare_lookups(self, units):
+        """
+        Load everything staff matching needs for the whole period
+        
+        Shift types, roles, the qualified staff pool and the availability
+        ledger are loaded once per run instead of per slot.
+        """
+        self._shift_types = {
+            'Early': ShiftType.objects.filter(name__icontains='Early').first(),
+            'Late': ShiftType.objects.filter(name__icontains='Late').first(),
+            'Night': ShiftType.objects.filter(name__icontains='Night').first(),
+        }
+        
+        roles = {role.name: role for role in Role.objects.filter(name__in=['SSW', 'SCW', 'SCA'])}
+        self._roles = {name: roles.get(name) for name in ['SSW', 'SCW', 'SCA']}
+        
+        staff = list(User.objects.filter(is_active=True, unit__in=units))
+        
+        self._staff_pool = {}
+        for member in staff:
+            self._staff_pool.setdefault((member.unit_id, member.role_id), []).append(member)
+        
+        self._ledger = StaffAvailabilityLedger(staff, self.start_date, self.end_date)
+    
     def _find_available_staff(self, unit, date, shift_type, role):
         """
         Find available staff member for this shift
         Uses intelligent matching based on:
         - Role qualification
-        - Availability (no conflicting shifts)
+        - Availability (no conflicting shifts, including earlier draft assignments)
         - WTD compliance
         - Recent shift distribution (fairness)
         
         Returns:
-            User instance or None
+            User instance or None (the chosen staff member is booked in the ledger)
         """
-        # Get staff with this role
-        qualified_staff = User.objects.filter(
-            role=role,
-            is_active=True,
-            unit=unit
-        )
+        if self._ledger is None:
+            self._prepare_lookups(self._get_units())
+        
+        # Staff with this role in this unit
+        qualified_staff = self._staff_pool.get((unit.pk, role.pk if role else None), [])
         
         # Filter for availability
         for staff in qualified_staff:
-            # Check if already scheduled this day
-            existing_shift = Shift.objects.filter(
-                date=date,
-                user=staff
-            ).first()
-            
-            if existing_shift:
-                continue  # Already scheduled
+            # Check if already scheduled (or drafted) this day
+            if not self._ledger.is_free(staff.sap, date):
+                continue
             
             # Check WTD compliance (simplified)
             # In production: Use full WTD validator
-            recent_shifts = Shift.objects.filter(
-                user=staff,
-                date__gte=date - timedelta(days=7)
-            ).count()
-            
-            if recent_shifts >= 5:
+            if self._ledger.recent_shift_count(staff.sap, date) >= 5:
                 continue  # Too many recent shifts
             
             # Found available staff!
+            self._ledger.book(staff.sap, date)
             return staff
         
         # No available staff found
@@ -818,7 +884,7 @@ def generate_auto_rota(start_date, end_date, care_home=None, save_to_db=False, r
     if save_to_db:
         return generator.save_draft_to_database(review_mode)
     else:
-        return generator.generate_draft_rota()
+        return cached_result('auto_roster', care_home, start_date, end_date, generator.generate_draft_rota)
 
 
 # ============================================================================
@@ -828,7 +894,7 @@ def generate_auto_rota(start_date, end_date, care_home=None, save_to_db=False, r
 def get_auto_roster_executive_dashboard(start_date, end_date, care_home=None):
     """Executive auto-roster dashboard with quality (0-100) and fairness (0-100) scoring - Returns quality_score, fairness_score, status_light, constraint_violations, staff_distribution"""
     generator = AutoRosterGenerator(start_date, end_date, care_home)
-    draft = generator.generate_draft_rota()
+    draft = cached_result('auto_roster', care_home, start_date, end_date, generator.generate_draft_rota)
     quality_score = 94.0  # Simplified - in production: validate all constraints
     fairness_score = 91.0  # Simplified - in production: calculate distribution std deviation
     overall_score = (quality_score * 0.6) + (fairness_score * 0.4)
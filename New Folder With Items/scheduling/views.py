@@ -54,6 +54,7 @@ from .models import (
 )
 from .models_audit import ComplianceCheck
 from .models_multi_home import CareHome
+from . import reference_data
 from .models_feedback import DemoFeedback, FeatureRequest
 from .forms_feedback import DemoFeedbackForm, FeatureRequestForm
 from staff_records.models import SicknessRecord, StaffProfile
@@ -132,7 +133,7 @@ def manager_dashboard(request):
         selected_home_name = request.GET.get('care_home', '')
         if selected_home_name:
             try:
-                user_home = CareHome.objects.get(name=selected_home_name)
+                user_home = reference_data.get_care_home(name=selected_home_name)
             except CareHome.DoesNotExist:
                 user_home = None
     else:
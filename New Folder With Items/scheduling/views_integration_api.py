@@ -598,7 +598,8 @@ def api_get_info(request):
     GET /api/v1/integration/info
     """
     try:
-        client = request.api_client
+        # request.api_client only carries the authentication fields
+        client = APIClient.objects.get(pk=request.api_client.pk)
         
         return JsonResponse({
             'api_version': 'v1',
@@ -16,6 +16,7 @@ import logging
 from .models import StaffingForecast, Shift, User, Unit
 from .models_multi_home import CareHome
 from .shift_optimizer import ShiftOptimizer, optimize_shifts_for_forecast
+from .optimization_cache import cached_result
 
 logger = logging.getLogger(__name__)
 
@@ -157,6 +158,7 @@ def run_optimization(request):
     - care_home: Care home name
     - start_date: ISO date string
     - days_ahead: Number of days to optimize
+    - horizon: Optional - solve as rolling multi-day models (WTD/rest across days)
     
     Returns:
         JSON with optimization results, cost savings, suggested assignments
@@ -169,6 +171,7 @@ def run_optimization(request):
         care_home_name = data.get('care_home')
         start_date_str = data.get('start_date')
         days_ahead = int(data.get('days_ahead', 1))
+        horizon = bool(data.get('horizon', False))
         
         # Validate inputs
         if not care_home_name or not start_date_str:
@@ -185,13 +188,20 @@ def run_optimization(request):
             if not request.user.can_access_home(care_home):
                 return JsonResponse({'error': 'Unauthorized for this care home'}, status=403)
         
-        # Run optimization
+        # Run optimization (reused while forecasts/staff/shifts/leave are unchanged)
         logger.info(f"Running optimization for {care_home} from {start_date} ({days_ahead} days)")
         
-        results = optimize_shifts_for_forecast(
-            care_home=care_home,
-            forecast_date=start_date,
-            days_ahead=days_ahead
+        end_date = start_date + timedelta(days=days_ahead - 1)
+        results = cached_result(
+            'optimization', care_home, start_date, end_date,
+            lambda: optimize_shifts_for_forecast(
+                care_home=care_home,
+                forecast_date=start_date,
+                days_ahead=days_ahead,
+                horizon=horizon
+            ),
+            days_ahead=days_ahead,
+            horizon=horizon
         )
         
         # Calculate total cost and assignments
@@ -199,7 +209,6 @@ def run_optimization(request):
         total_assignments = sum(len(r.assignments) for r in results if r.success)
         
         # Get current cost for comparison
-        end_date = start_date + timedelta(days=days_ahead - 1)
         existing_shifts = Shift.objects.filter(
             unit__care_home=care_home,
             date__gte=start_date,
@@ -26,6 +26,7 @@ import json
 from .models import Shift, Unit, User, LeaveRequest, StaffReallocation, Resident, CarePlanReview
 from .models_multi_home import CareHome
 from .decorators_api import api_login_required
+from .dashboard_warmup import warmable
 # Automated workflow models - to be integrated in Phase 2
 # from .models_automated_workflow import (
 #     StaffingCoverRequest, ReallocationRequest, AgencyRequest
@@ -87,6 +88,29 @@ def senior_management_dashboard(request):
     if export_format == 'csv':
         return senior_dashboard_export(request)
     
+    context = build_senior_dashboard_context(today, start_date, end_date, selected_home)
+    now = timezone.now()
+    context['current_time'] = now
+    # Alert ages are relative to now, so they are not part of the cached context
+    context['critical_alerts'] = [
+        {**alert, 'age_hours': (now - alert['created']).total_seconds() / 3600}
+        for alert in context['critical_alerts']
+    ]
+    
+    return render(request, 'scheduling/senior_management_dashboard.html', context)
+
+
+@warmable('senior_dashboard', home_arg=None)
+def build_senior_dashboard_context(today, start_date, end_date, selected_home=''):
+    """
+    Template context for the Head of Service dashboard
+    
+    Cached per date range and home filter (see dashboard_warmup), so it
+    holds only plain values - no model rows. The caller sets current_time
+    and each alert's age_hours after retrieval. Every variant includes
+    all-homes sections, so it is keyed on every home's namespace (home_arg=None)
+    and any home's invalidation drops it.
+    """
     days_in_range = (end_date - start_date).days + 1
     
     current_month_start = today.replace(day=1)
@@ -124,7 +148,6 @@ def senior_management_dashboard(request):
         occupancy_rate = (home.current_occupancy / home.bed_capacity * 100) if home.bed_capacity > 0 else 0
         
         home_overview.append({
-            'home': home,
             'display_name': home.get_name_display(),
             'occupancy': home.current_occupancy,
             'capacity': home.bed_capacity,
@@ -297,12 +320,11 @@ def senior_management_dashboard(request):
                 'date': shift.date,
                 'unit': shift.unit.name,
                 'severity': 'HIGH' if shift.date <= today + timedelta(days=2) else 'MEDIUM',
-                'created': shift.created_at if hasattr(shift, 'created_at') else today,
-                'age_hours': ((timezone.now() - shift.created_at).total_seconds() / 3600) if hasattr(shift, 'created_at') else 0,
+                'created': shift.created_at,
             })
     
     # Sort by age (oldest first)
-    critical_alerts = sorted(critical_alerts, key=lambda x: x['age_hours'], reverse=True)[:20]
+    critical_alerts = sorted(critical_alerts, key=lambda x: x['created'])[:20]
     
     # =================================================================
     # SECTION 5: PENDING ACTIONS - Require Management Attention
@@ -320,7 +342,8 @@ def senior_management_dashboard(request):
             home_name = home.get_name_display() if home else 'Unknown'
             if home_name not in pending_by_home:
                 pending_by_home[home_name] = []
-            pending_by_home[home_name].append(leave_request)
+            # The template only counts them
+            pending_by_home[home_name].append(leave_request.pk)
     
     # Pending reallocations
     pending_reallocations = StaffReallocation.objects.filter(
@@ -417,7 +440,6 @@ def senior_management_dashboard(request):
         # Always add home to the list for governance visibility
         care_plan_compliance.append({
             'home': home.get_name_display(),
-            'home_obj': home,
             'total_residents': total_residents,
             'total_reviews': len(reviews),
             'completed': completed,
@@ -470,7 +492,6 @@ def senior_management_dashboard(request):
         
         vacancies.append({
             'home': profile.user.unit.care_home.get_name_display(),
-            'home_obj': profile.user.unit.care_home,
             'role': profile.user.role.get_name_display() if profile.user.role else 'Unknown',
             'role_code': profile.user.role.name if profile.user.role else 'UNKNOWN',
             'staff_name': profile.user.full_name,
@@ -537,7 +558,6 @@ def senior_management_dashboard(request):
         # Day shift summary for this home
         day_data = {
             'home': home.get_name_display(),
-            'home_obj': home,
             'sscw_min': requirements['day_sscw_min'],
             'sscw_ideal': requirements['day_sscw_ideal'],
             'min_required': requirements['day_min'],
@@ -548,7 +568,6 @@ def senior_management_dashboard(request):
         # Night shift summary for this home
         night_data = {
             'home': home.get_name_display(),
-            'home_obj': home,
             'sscwn_min': requirements['night_sscwn_min'],
             'sscwn_ideal': requirements['night_sscwn_ideal'],
             'min_required': requirements['night_min'],
@@ -678,7 +697,6 @@ def senior_management_dashboard(request):
         
         home_snapshot = {
             'home': home.get_name_display(),
-            'home_obj': home,
             'day_ideal': requirements['day_ideal'],
             'night_ideal': requirements['night_ideal'],
             'days': []
@@ -757,7 +775,7 @@ def senior_management_dashboard(request):
                 compliance_percentage = (total_compliant / total_required * 100) if total_required > 0 else 0
                 
                 training_compliance_by_home.append({
-                    'home': home,
+                    'home_name': home.name,
                     'total_staff': total_staff,
                     'total_required': total_required,
                     'compliant': total_compliant,
@@ -769,7 +787,6 @@ def senior_management_dashboard(request):
     # =================================================================
     context = {
         'today': today,
-        'current_time': timezone.now(),
         'current_month': current_month_start.strftime('%B %Y'),
         
         # Date range parameters
@@ -778,7 +795,10 @@ def senior_management_dashboard(request):
         'days_in_range': days_in_range,
         
         # Filtering
-        'all_care_homes': CareHome.objects.all().order_by('name'),
+        'all_care_homes': [
+            {'name': home.name, 'display_name': home.get_name_display()}
+            for home in CareHome.objects.all().order_by('name')
+        ],
         'selected_home': selected_home,
         
         # Overview
@@ -831,7 +851,7 @@ def senior_management_dashboard(request):
         'training_compliance_by_home': training_compliance_by_home,
     }
     
-    return render(request, 'scheduling/senior_management_dashboard.html', context)
+    return context
 
 
 @login_required